@@ -7,22 +7,26 @@
 # This flow file is for the SRAMminionRTL, which is the val/rdy wrapper
 # for the SRAM blocks.
 #
+# Keyword arguments of construct() override the parameters below, which
+# is how the design-space sweep (sim/tut8_sram/SramSweep.py) generates
+# one graph per sweep point. mflowgen calls construct() without
+# arguments, so running this flow directly is unchanged. The parameters
+# are built by mk_parameters() and mflowgen is only imported in
+# construct(), so the sweep can read the parameters of a point (e.g., to
+# key its step cache) without mflowgen.
+#
 
 import os
 import json
 
-from mflowgen.components import Graph, Step
-
-def construct():
+#-------------------------------------------------------------------------
+# Parameters
+#-------------------------------------------------------------------------
 
-  g = Graph()
+def mk_parameters( **kwargs ):
 
   this_dir = os.path.dirname( os.path.abspath( __file__ ) )
 
-  #-----------------------------------------------------------------------
-  # Parameters
-  #-----------------------------------------------------------------------
-
   adk_name = 'freepdk-45nm'
   adk_view = 'stdview'
 
@@ -69,21 +73,35 @@ def construct():
     'saif_instance'      : 'SramMinionRTL_tb/DUT',
   }
 
-  #-----------------------------------------------------------------------
+  parameters.update( kwargs )
+
   # Truncate design name at first instance of '__' to run the right tests
-  #-----------------------------------------------------------------------
 
   trunc_design_name = parameters['design_name']
   trunc_design_name = trunc_design_name.split("__", 1)[0]
   parameters['trunc_design_name'] = trunc_design_name
 
+  return parameters
+
+#-------------------------------------------------------------------------
+# construct
+#-------------------------------------------------------------------------
+
+def construct( **kwargs ):
+
+  from mflowgen.components import Graph, Step
+
+  g = Graph()
+
+  parameters = mk_parameters( **kwargs )
+
   #-----------------------------------------------------------------------
   # Create nodes
   #-----------------------------------------------------------------------
 
   # ADK step
 
-  g.set_adk( adk_name )
+  g.set_adk( parameters['adk'] )
   adk = g.get_adk_step()
 
   # Custom steps
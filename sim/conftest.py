@@ -17,6 +17,15 @@ def pytest_addoption(parser):
   parser.addoption( "--vrtl", action="store_true",
                     help="use VRTL implementations" )
 
+  parser.addoption( "--sram-ntrans", type=int, default=2000,
+                    help="number of random transactions of the bulk SRAM tests" )
+
+  parser.addoption( "--vl-cache", default=None,
+                    help="directory of the cache of verilated models" )
+
+  parser.addoption( "--vl-cache-size", type=int, default=2048,
+                    help="maximum size of the cache of verilated models in MB" )
+
 #-------------------------------------------------------------------------
 # Handle other command line options
 #-------------------------------------------------------------------------
@@ -29,9 +38,15 @@ def pytest_configure(config):
     sys._pymtl_rtl_override = 'pymtl'
   elif config.option.vrtl:
     sys._pymtl_rtl_override = 'verilog'
+  if config.option.vl_cache:
+    from sram.SramVerilatorCache import install_verilator_cache
+    install_verilator_cache( config.option.vl_cache, config.option.vl_cache_size * 2**20 )
 
 def pytest_unconfigure(config):
   import sys
+  if config.option.vl_cache:
+    from sram.SramVerilatorCache import uninstall_verilator_cache
+    uninstall_verilator_cache()
   del sys._called_from_test
   del sys._pymtl_rtl_override
 
@@ -55,3 +70,12 @@ def fix_randseed():
   """Set the random seed prior to each test case."""
   random.seed(0xdeadbeef)
 
+
+#-------------------------------------------------------------------------
+# sram_ntrans
+#-------------------------------------------------------------------------
+# number of random transactions for deep random SRAM regressions
+
+@pytest.fixture
+def sram_ntrans( request ):
+  return request.config.getoption("sram_ntrans")
@@ -0,0 +1,71 @@
+#=========================================================================
+# 1r1w SRAM model
+#=========================================================================
+# Port 0 is the write port and port 1 is the read port, matching the
+# port numbering of the OpenRAM memory compiler.
+
+from pymtl3                         import *
+from pymtl3.passes.backends.verilog import *
+from .SramGeneric1r1wPRTL           import SramGeneric1r1wPRTL
+
+class BaseSRAM1r1w( Component ):
+
+  # Make sure widths match the .v
+
+  def construct( s, data_nbits, num_entries, storage='wire', activity=False,
+                 semantics='read-first', check=False ):
+
+    # clock (in PyMTL simulation it uses implict .clk port when
+    # translated to Verilog, actual clock ports should be CE1
+
+    s.clk0  = InPort () # clk
+    s.csb0  = InPort () # bar( write port en )
+    s.addr0 = InPort ( clog2(num_entries) ) # write address
+    s.din0  = InPort ( data_nbits ) # write data
+
+    s.clk1  = InPort () # clk
+    s.csb1  = InPort () # bar( read port en )
+    s.addr1 = InPort ( clog2(num_entries) ) # read address
+    s.dout1 = OutPort( data_nbits ) # read data
+
+    # This is a blackbox that shouldn't be translated
+
+    s.set_metadata( VerilogTranslationPass.no_synthesis, True )
+    s.set_metadata( VerilogTranslationPass.no_synthesis_no_clk, True )
+    s.set_metadata( VerilogTranslationPass.no_synthesis_no_reset, True )
+    s.set_metadata( VerilogTranslationPass.explicit_module_name, f'SRAM_{data_nbits}x{num_entries}_1r1w' )
+
+    # instantiate a generic sram inside, storage selects the simulation
+    # storage engine of the generic sram, activity enables its access
+    # counters, and semantics and check select and check its
+    # read-during-write semantics (see SramGenericPRTL)
+
+    s.sram_generic = m = SramGeneric1r1wPRTL( data_nbits, num_entries, storage=storage,
+                                              activity=activity, semantics=semantics,
+                                              check=check )
+    m.clk0  //= s.clk0
+    m.csb0  //= s.csb0
+    m.addr0 //= s.addr0
+    m.din0  //= s.din0
+    m.clk1  //= s.clk1
+    m.csb1  //= s.csb1
+    m.addr1 //= s.addr1
+    m.dout1 //= s.dout1
+
+    if check:
+      s.dout1_x = OutPort()
+      m.dout1_x //= s.dout1_x
+
+  def line_trace( s ):
+    return f"(addr0={s.addr0} din0={s.din0} addr1={s.addr1} dout1={s.dout1})"
+
+  def num_resident_pages( s ):
+    return s.sram_generic.num_resident_pages()
+
+  # Backdoor access to the memory array (see SramGenericPRTL)
+
+  def load( s, data, base_idx=0 ):
+    s.sram_generic.load( data, base_idx )
+
+  def dump( s, lo=0, hi=None ):
+    return s.sram_generic.dump( lo, hi )
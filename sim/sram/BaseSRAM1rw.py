@@ -10,7 +10,8 @@ class BaseSRAM1rw( Component ):
 
   # Make sure widths match the .v
 
-  def construct( s, data_nbits, num_entries ):
+  def construct( s, data_nbits, num_entries, storage='wire', activity=False,
+                 semantics='x-on-write', check=False ):
 
     # clock (in PyMTL simulation it uses implict .clk port when
     # translated to Verilog, actual clock ports should be CE1
@@ -29,9 +30,14 @@ class BaseSRAM1rw( Component ):
     s.set_metadata( VerilogTranslationPass.no_synthesis_no_reset, True )
     s.set_metadata( VerilogTranslationPass.explicit_module_name, f'SRAM_{data_nbits}x{num_entries}_1rw' )
 
-    # instantiate a generic sram inside
+    # instantiate a generic sram inside, storage selects the simulation
+    # storage engine of the generic sram, activity enables its access
+    # counters, and semantics and check select and check its
+    # read-during-write semantics (see SramGenericPRTL)
 
-    s.sram_generic = m = SramGenericPRTL( data_nbits, num_entries )
+    s.sram_generic = m = SramGenericPRTL( data_nbits, num_entries, storage=storage,
+                                          activity=activity, semantics=semantics,
+                                          check=check )
     m.clk0  //= s.clk0
     m.web0  //= s.web0
     m.csb0  //= s.csb0
@@ -39,5 +45,20 @@ class BaseSRAM1rw( Component ):
     m.din0  //= s.din0
     m.dout0 //= s.dout0
 
+    if check:
+      s.dout0_x = OutPort()
+      m.dout0_x //= s.dout0_x
+
   def line_trace( s ):
     return s.sram_generic.line_trace()
+
+  def num_resident_pages( s ):
+    return s.sram_generic.num_resident_pages()
+
+  # Backdoor access to the memory array (see SramGenericPRTL)
+
+  def load( s, data, base_idx=0 ):
+    s.sram_generic.load( data, base_idx )
+
+  def dump( s, lo=0, hi=None ):
+    return s.sram_generic.dump( lo, hi )
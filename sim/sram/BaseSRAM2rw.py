@@ -0,0 +1,80 @@
+#=========================================================================
+# Dual-ported (2rw) SRAM model
+#=========================================================================
+
+from pymtl3                         import *
+from pymtl3.passes.backends.verilog import *
+from .SramGeneric2rwPRTL            import SramGeneric2rwPRTL
+
+class BaseSRAM2rw( Component ):
+
+  # Make sure widths match the .v
+
+  def construct( s, data_nbits, num_entries, storage='wire', activity=False,
+                 semantics='read-first', check=False ):
+
+    # clock (in PyMTL simulation it uses implict .clk port when
+    # translated to Verilog, actual clock ports should be CE1
+
+    s.clk0  = InPort () # clk
+    s.web0  = InPort () # bar( write en )
+    s.csb0  = InPort () # bar( port 0 en )
+    s.addr0 = InPort ( clog2(num_entries) ) # address
+    s.din0  = InPort ( data_nbits ) # write data
+    s.dout0 = OutPort( data_nbits ) # read data
+
+    s.clk1  = InPort () # clk
+    s.web1  = InPort () # bar( write en )
+    s.csb1  = InPort () # bar( port 1 en )
+    s.addr1 = InPort ( clog2(num_entries) ) # address
+    s.din1  = InPort ( data_nbits ) # write data
+    s.dout1 = OutPort( data_nbits ) # read data
+
+    # This is a blackbox that shouldn't be translated
+
+    s.set_metadata( VerilogTranslationPass.no_synthesis, True )
+    s.set_metadata( VerilogTranslationPass.no_synthesis_no_clk, True )
+    s.set_metadata( VerilogTranslationPass.no_synthesis_no_reset, True )
+    s.set_metadata( VerilogTranslationPass.explicit_module_name, f'SRAM_{data_nbits}x{num_entries}_2rw' )
+
+    # instantiate a generic sram inside, storage selects the simulation
+    # storage engine of the generic sram, activity enables its access
+    # counters, and semantics and check select and check its
+    # read-during-write semantics (see SramGenericPRTL)
+
+    s.sram_generic = m = SramGeneric2rwPRTL( data_nbits, num_entries, storage=storage,
+                                             activity=activity, semantics=semantics,
+                                             check=check )
+    m.clk0  //= s.clk0
+    m.web0  //= s.web0
+    m.csb0  //= s.csb0
+    m.addr0 //= s.addr0
+    m.din0  //= s.din0
+    m.dout0 //= s.dout0
+    m.clk1  //= s.clk1
+    m.web1  //= s.web1
+    m.csb1  //= s.csb1
+    m.addr1 //= s.addr1
+    m.din1  //= s.din1
+    m.dout1 //= s.dout1
+
+    if check:
+      s.dout0_x = OutPort()
+      s.dout1_x = OutPort()
+      m.dout0_x //= s.dout0_x
+      m.dout1_x //= s.dout1_x
+
+  def line_trace( s ):
+    return f"(addr0={s.addr0} din0={s.din0} dout0={s.dout0})" \
+           f"(addr1={s.addr1} din1={s.din1} dout1={s.dout1})"
+
+  def num_resident_pages( s ):
+    return s.sram_generic.num_resident_pages()
+
+  # Backdoor access to the memory array (see SramGenericPRTL)
+
+  def load( s, data, base_idx=0 ):
+    s.sram_generic.load( data, base_idx )
+
+  def dump( s, lo=0, hi=None ):
+    return s.sram_generic.dump( lo, hi )
@@ -0,0 +1,50 @@
+//========================================================================
+// 32 bits x 256 words 1r1w SRAM
+//========================================================================
+
+`ifndef SRAM_32x256_1r1w
+`define SRAM_32x256_1r1w
+
+`include "sram/SramGeneric1r1wVRTL.v"
+
+`ifndef SYNTHESIS
+
+module SRAM_32x256_1r1w
+#(
+  // Simulation only, the read-during-write semantics (see SramSemantics.py)
+  parameter p_semantics = 0
+)(
+  input  logic        clk0,
+  input  logic        csb0,
+  input  logic [7:0]  addr0,
+  input  logic [31:0] din0,
+
+  input  logic        clk1,
+  input  logic        csb1,
+  input  logic [7:0]  addr1,
+  output logic [31:0] dout1
+);
+
+  sram_SramGeneric1r1wVRTL
+  #(
+    .p_data_nbits  (32),
+    .p_num_entries (256),
+    .p_semantics   (p_semantics)
+  )
+  sram_generic
+  (
+    .clk0  (clk0),
+    .addr0 (addr0),
+    .csb0  (csb0),
+    .din0  (din0),
+    .clk1  (clk1),
+    .addr1 (addr1),
+    .csb1  (csb1),
+    .dout1 (dout1)
+  );
+
+endmodule
+
+`endif /* SYNTHESIS */
+
+`endif /* SRAM_32x256_1r1w */
@@ -10,7 +10,10 @@
 `ifndef SYNTHESIS
 
 module SRAM_32x256_1rw
-(
+#(
+  // Simulation only, the read-during-write semantics (see SramSemantics.py)
+  parameter p_semantics = 2
+)(
   input  logic        clk0,
   input  logic        web0,
   input  logic        csb0,
@@ -22,7 +25,8 @@ module SRAM_32x256_1rw
   sram_SramGenericVRTL
   #(
     .p_data_nbits  (32),
-    .p_num_entries (256)
+    .p_num_entries (256),
+    .p_semantics   (p_semantics)
   )
   sram_generic
   (
@@ -31,6 +35,7 @@ module SRAM_32x256_1rw
     .web0  (web0),
     .csb0  (csb0),
     .din0  (din0),
+    .wmask0 (1'b1),
     .dout0 (dout0)
   );
 
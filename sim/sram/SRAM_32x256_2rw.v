@@ -0,0 +1,58 @@
+//========================================================================
+// 32 bits x 256 words dual-ported (2rw) SRAM
+//========================================================================
+
+`ifndef SRAM_32x256_2rw
+`define SRAM_32x256_2rw
+
+`include "sram/SramGeneric2rwVRTL.v"
+
+`ifndef SYNTHESIS
+
+module SRAM_32x256_2rw
+#(
+  // Simulation only, the read-during-write semantics (see SramSemantics.py)
+  parameter p_semantics = 0
+)(
+  input  logic        clk0,
+  input  logic        web0,
+  input  logic        csb0,
+  input  logic [7:0]  addr0,
+  input  logic [31:0] din0,
+  output logic [31:0] dout0,
+
+  input  logic        clk1,
+  input  logic        web1,
+  input  logic        csb1,
+  input  logic [7:0]  addr1,
+  input  logic [31:0] din1,
+  output logic [31:0] dout1
+);
+
+  sram_SramGeneric2rwVRTL
+  #(
+    .p_data_nbits  (32),
+    .p_num_entries (256),
+    .p_semantics   (p_semantics)
+  )
+  sram_generic
+  (
+    .clk0  (clk0),
+    .addr0 (addr0),
+    .web0  (web0),
+    .csb0  (csb0),
+    .din0  (din0),
+    .dout0 (dout0),
+    .clk1  (clk1),
+    .addr1 (addr1),
+    .web1  (web1),
+    .csb1  (csb1),
+    .din1  (din1),
+    .dout1 (dout1)
+  );
+
+endmodule
+
+`endif /* SYNTHESIS */
+
+`endif /* SRAM_32x256_2rw */
@@ -0,0 +1,83 @@
+//========================================================================
+// 1r1w SRAM RTL with custom low-level interface
+//========================================================================
+// This is the version of sram_SramVRTL with one write port (port0_) and
+// one read port (port1_), which can both be used every cycle. By default
+// a read returns the old data if the same entry is written in the same
+// cycle.
+// It contains an instance of either a 1r1w SRAM generated by the OpenRAM
+// memory compiler or the generic 1r1w SRAM RTL model
+// (SramGeneric1r1wVRTL).
+//
+// p_semantics selects the read-during-write semantics of the SRAM in
+// simulation (see SramSemantics.py), the default is read-first.
+//
+//  Port Name     Direction  Description
+//  ----------------------------------------------------------------------
+//  port0_val     I          write enable (1 = enabled)
+//  port0_idx     I          write index
+//  port0_wdata   I          write data
+//  port1_val     I          read enable (1 = enabled)
+//  port1_idx     I          read index
+//  port1_rdata   O          read data output
+//
+
+`ifndef SRAM_SRAM_1R1W_VRTL
+`define SRAM_SRAM_1R1W_VRTL
+
+`include "sram/SramGeneric1r1wVRTL.v"
+`include "sram/SRAM_32x256_1r1w.v"
+`include "sram/SramMacroSemantics.v"
+
+module sram_Sram1r1wVRTL
+#(
+  parameter p_data_nbits  = 32,
+  parameter p_num_entries = 256,
+  parameter p_semantics   = 0,
+
+  // Local constants not meant to be set from outside the module
+  parameter c_addr_nbits  = $clog2(p_num_entries)
+)(
+  input  logic                      clk,
+  input  logic                      reset,
+
+  input  logic                      port0_val,
+  input  logic [c_addr_nbits-1:0]   port0_idx,
+  input  logic [p_data_nbits-1:0]   port0_wdata,
+
+  input  logic                      port1_val,
+  input  logic [c_addr_nbits-1:0]   port1_idx,
+  output logic [p_data_nbits-1:0]   port1_rdata
+);
+
+  logic                     clk0;
+  logic                     csb0;
+  logic [c_addr_nbits-1:0]  addr0;
+  logic [p_data_nbits-1:0]  din0;
+
+  logic                     clk1;
+  logic                     csb1;
+  logic [c_addr_nbits-1:0]  addr1;
+  logic [p_data_nbits-1:0]  dout1;
+
+  assign clk0  = clk;
+  assign csb0  = ~port0_val;
+  assign addr0 = port0_idx;
+  assign din0  = port0_wdata;
+
+  assign clk1  = clk;
+  assign csb1  = ~port1_val;
+  assign addr1 = port1_idx;
+
+  assign port1_rdata = dout1;
+
+  generate
+    if ( p_data_nbits == 32 && p_num_entries == 256 ) SRAM_32x256_1r1w `SRAM_MACRO_SEMANTICS sram (.*);
+    else
+      sram_SramGeneric1r1wVRTL#(p_data_nbits,p_num_entries,p_semantics) sram (.*);
+  endgenerate
+
+endmodule
+
+`endif /* SRAM_SRAM_1R1W_VRTL */
+
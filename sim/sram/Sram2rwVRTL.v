@@ -0,0 +1,84 @@
+//========================================================================
+// Dual-ported (2rw) SRAM RTL with custom low-level interface
+//========================================================================
+// This is the dual-ported version of sram_SramVRTL. Both ports can read
+// or write every cycle, and the interface of each port is the same as
+// the only port of sram_SramVRTL with the port0_ or port1_ prefix (write
+// masks are not supported). It contains an instance of either a 2rw SRAM
+// generated by the OpenRAM memory compiler or the generic 2rw SRAM RTL
+// model (SramGeneric2rwVRTL).
+//
+// p_semantics selects the read-during-write semantics of the SRAM in
+// simulation (see SramSemantics.py), the default is read-first.
+
+`ifndef SRAM_SRAM_2RW_VRTL
+`define SRAM_SRAM_2RW_VRTL
+
+`include "sram/SramGeneric2rwVRTL.v"
+`include "sram/SRAM_32x256_2rw.v"
+`include "sram/SramMacroSemantics.v"
+
+module sram_Sram2rwVRTL
+#(
+  parameter p_data_nbits  = 32,
+  parameter p_num_entries = 256,
+  parameter p_semantics   = 0,
+
+  // Local constants not meant to be set from outside the module
+  parameter c_addr_nbits  = $clog2(p_num_entries)
+)(
+  input  logic                      clk,
+  input  logic                      reset,
+
+  input  logic                      port0_val,
+  input  logic                      port0_type,
+  input  logic [c_addr_nbits-1:0]   port0_idx,
+  input  logic [p_data_nbits-1:0]   port0_wdata,
+  output logic [p_data_nbits-1:0]   port0_rdata,
+
+  input  logic                      port1_val,
+  input  logic                      port1_type,
+  input  logic [c_addr_nbits-1:0]   port1_idx,
+  input  logic [p_data_nbits-1:0]   port1_wdata,
+  output logic [p_data_nbits-1:0]   port1_rdata
+);
+
+  logic                     clk0;
+  logic                     web0;
+  logic                     csb0;
+  logic [c_addr_nbits-1:0]  addr0;
+  logic [p_data_nbits-1:0]  din0;
+  logic [p_data_nbits-1:0]  dout0;
+
+  logic                     clk1;
+  logic                     web1;
+  logic                     csb1;
+  logic [c_addr_nbits-1:0]  addr1;
+  logic [p_data_nbits-1:0]  din1;
+  logic [p_data_nbits-1:0]  dout1;
+
+  assign clk0  = clk;
+  assign web0  = ~port0_type;
+  assign csb0  = ~port0_val;
+  assign addr0 = port0_idx;
+  assign din0  = port0_wdata;
+
+  assign clk1  = clk;
+  assign web1  = ~port1_type;
+  assign csb1  = ~port1_val;
+  assign addr1 = port1_idx;
+  assign din1  = port1_wdata;
+
+  assign port0_rdata = dout0;
+  assign port1_rdata = dout1;
+
+  generate
+    if ( p_data_nbits == 32 && p_num_entries == 256 ) SRAM_32x256_2rw `SRAM_MACRO_SEMANTICS sram (.*);
+    else
+      sram_SramGeneric2rwVRTL#(p_data_nbits,p_num_entries,p_semantics) sram (.*);
+  endgenerate
+
+endmodule
+
+`endif /* SRAM_SRAM_2RW_VRTL */
+
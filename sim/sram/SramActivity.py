@@ -0,0 +1,32 @@
+#=========================================================================
+# SramActivity
+#=========================================================================
+# Simulation-only access counters of one SRAM instance. The generic SRAM
+# models create a SramActivity if they are constructed with
+# activity=True and update it at every clock edge after reset with the
+# number of reads and writes in that cycle (a port is enabled if its csb
+# is low). SramEnergy.py turns the counters into an energy estimate.
+
+class SramActivity:
+
+  def __init__( s, data_nbits, num_entries ):
+    s.data_nbits  = data_nbits
+    s.num_entries = num_entries
+    s.reset()
+
+  def reset( s ):
+    s.ncycles = 0
+    s.nreads  = 0
+    s.nwrites = 0
+
+  def tick( s, nreads=0, nwrites=0 ):
+    s.ncycles += 1
+    s.nreads  += nreads
+    s.nwrites += nwrites
+
+  def as_dict( s ):
+    return {
+      'ncycles' : s.ncycles,
+      'nreads'  : s.nreads,
+      'nwrites' : s.nwrites,
+    }
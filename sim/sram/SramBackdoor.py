@@ -0,0 +1,237 @@
+#=========================================================================
+# Verilator SRAM backdoor
+#=========================================================================
+# Zero-cycle backdoor into the memory arrays of the Verilog SRAM models
+# (SramVRTL, Sram1r1wVRTL, and Sram2rwVRTL, i.e., SramRTL with
+# rtl_language = 'verilog') once they are imported with Verilator. The
+# generic Verilog SRAMs export DPI functions which read and write their
+# memory array in 32-bit chunks (see the end of SramGenericVRTL.v), and
+# SramBackdoor calls them through cffi in the shared library of the
+# imported model, so preloading or dumping a whole memory costs a few
+# function calls per word instead of a simulated cycle per word. Every
+# kind of generic SRAM exports its own functions, so ports selects the
+# ones of the SRAM within the model.
+#
+# SramBackdoor provides the same load, dump, and load_image methods as
+# the PyMTL model (see SramPRTL.py and SramStorage.py):
+#
+#   model = SramRTL( 32, 256 )
+#   model = config_model_with_cmdline_opts( model, cmdline_opts, [] )
+#   model.apply( DefaultPassGroup() )
+#   model.sim_reset()
+#
+#   mem = SramBackdoor( model, 32, 256 )
+#   mem.load( words )
+#   assert mem.dump() == words
+#
+# sram_backdoor( model, ... ) returns the model itself if it already has
+# a backdoor (i.e., it is a PyMTL model), so tests can use the same code
+# for both languages.
+#
+# The shared library is found next to the Python wrapper which the
+# import pass generated for the model (i.e., lib<top>_v.so in the
+# directory the model was imported in), not in the current directory.
+#
+# Every DPI call runs in the scope of one generic SRAM instance, which we
+# look up by its hierarchical name: the imported model wraps the Verilog
+# model in an instance named v, so the SRAM is TOP.<top>.v.genblk1.sram
+# (or TOP.<top>.v.genblk1.sram.sram_generic if it is an SRAM macro, and
+# TOP.<top>.v.lanes.lane[i].sram.sram_generic for the lanes of a masked
+# SRAM). path selects the instance of the SRAM within the model, e.g.,
+# v.sram for the SRAM of SramMinionVRTL. Verilator registers the scope
+# names globally, so only one imported model of the same top module may
+# be alive at a time (see the trace function in the Verilator wrapper of
+# PyMTL for the same limitation). The backdoor is not available for PyMTL
+# models translated to Verilog, which do not have the DPI functions.
+
+import os
+import sys
+
+from cffi import FFI
+
+from .SramStorage import sram_words
+from .SramImage   import load_sram_image
+
+sram_backdoor_ffi = FFI()
+sram_backdoor_ffi.cdef("""
+  typedef void * svScope;
+  svScope svGetScopeFromName( const char * );
+  svScope svSetScope( const svScope );
+  int  sram_generic_backdoor_nbits( void );
+  int  sram_generic_backdoor_nentries( void );
+  int  sram_generic_backdoor_read( int, int );
+  void sram_generic_backdoor_write( int, int, int );
+  int  sram_generic_1r1w_backdoor_nbits( void );
+  int  sram_generic_1r1w_backdoor_nentries( void );
+  int  sram_generic_1r1w_backdoor_read( int, int );
+  void sram_generic_1r1w_backdoor_write( int, int, int );
+  int  sram_generic_2rw_backdoor_nbits( void );
+  int  sram_generic_2rw_backdoor_nentries( void );
+  int  sram_generic_2rw_backdoor_read( int, int );
+  void sram_generic_2rw_backdoor_write( int, int, int );
+""")
+
+# Prefix of the DPI functions of the generic SRAM for every kind of ports
+
+sram_backdoor_prefixes = {
+  '1rw'  : 'sram_generic',
+  '1r1w' : 'sram_generic_1r1w',
+  '2rw'  : 'sram_generic_2rw',
+}
+
+# The shared library is already loaded by the imported model, so this
+# returns the same instance of the library
+
+def sram_backdoor_lib( lib_file ):
+  return sram_backdoor_ffi.dlopen( lib_file )
+
+# The import pass generates the Python wrapper <top>_v.py of the model
+# and the shared library lib<top>_v.so in the same directory, and the
+# class of the imported model is defined in the wrapper
+
+def sram_backdoor_lib_file( model ):
+  top    = type( model ).__name__
+  module = sys.modules.get( type( model ).__module__ )
+  assert module is not None and getattr( module, '__file__', None ), \
+    f"Cannot find the Python wrapper of {top} (is it imported with Verilator?)"
+
+  lib_file = os.path.join( os.path.dirname( os.path.abspath( module.__file__ ) ),
+                           f"lib{top}_v.so" )
+  assert os.path.exists( lib_file ), \
+    f"Cannot find the shared library {lib_file} of {top} (is it imported " \
+    f"with Verilator?)"
+  return lib_file
+
+# Instances of the generic SRAM within the Verilog SRAM models, a whole
+# word is stored in one instance or every lane in its own instance
+
+sram_backdoor_word_paths = [
+  'genblk1.sram.sram_generic', 'genblk1.sram', 'sram.sram_generic', 'sram',
+]
+
+sram_backdoor_lane_path = 'lanes.lane[{}].sram.sram_generic'
+
+#-------------------------------------------------------------------------
+# SramBackdoor
+#-------------------------------------------------------------------------
+
+class SramBackdoor:
+
+  def __init__( s, model, data_nbits, num_entries, mask_size=0, path='v',
+                ports='1rw', lib=None ):
+
+    if ports not in sram_backdoor_prefixes:
+      raise ValueError( f"Unknown SRAM ports {ports}, expected one of "
+                        f"{', '.join( sram_backdoor_prefixes )}!" )
+
+    top = type( model ).__name__
+
+    s.data_nbits  = data_nbits
+    s.num_entries = num_entries
+    s.nbytes      = int( data_nbits + 7 ) // 8
+
+    s.lib = lib or sram_backdoor_lib( sram_backdoor_lib_file( model ) )
+
+    # DPI functions of the generic SRAM with these ports
+
+    prefix     = sram_backdoor_prefixes[ ports ]
+    s.nbits    = getattr( s.lib, f"{prefix}_backdoor_nbits"    )
+    s.nentries = getattr( s.lib, f"{prefix}_backdoor_nentries" )
+    s.read     = getattr( s.lib, f"{prefix}_backdoor_read"     )
+    s.write    = getattr( s.lib, f"{prefix}_backdoor_write"    )
+
+    # regions of the word as ( scope, lsb, nbits )
+
+    s.regions = []
+
+    for name in sram_backdoor_word_paths:
+      scope = s.find_scope( f"TOP.{top}.{path}.{name}", data_nbits )
+      if scope is not None:
+        s.regions = [ ( scope, 0, data_nbits ) ]
+        break
+
+    if not s.regions and mask_size > 0:
+      lane_nbits = data_nbits // mask_size
+      for i in range( mask_size ):
+        scope = s.find_scope( f"TOP.{top}.{path}.{sram_backdoor_lane_path.format(i)}",
+                              lane_nbits )
+        if scope is None:
+          break
+        s.regions.append( ( scope, i*lane_nbits, lane_nbits ) )
+
+      if len( s.regions ) != mask_size:
+        s.regions = []
+
+    assert s.regions, \
+      f"Cannot find the memory array of {top} at {path} (is it a Verilog SRAM " \
+      f"imported with Verilator?)"
+
+  # Returns the scope of the generic SRAM with the given name if it has
+  # the right size, otherwise None
+
+  def find_scope( s, name, nbits ):
+    scope = s.lib.svGetScopeFromName( name.encode() )
+    if not scope:
+      return None
+    s.lib.svSetScope( scope )
+    if ( s.nbits(), s.nentries() ) != \
+       ( nbits, s.num_entries ):
+      return None
+    return scope
+
+  #-----------------------------------------------------------------------
+  # Backdoor access
+  #-----------------------------------------------------------------------
+  # The DPI functions take and return signed 32-bit chunks
+
+  def load( s, data, base_idx=0 ):
+
+    words = sram_words( data, s.nbytes )
+    assert 0 <= base_idx and base_idx + len(words) <= s.num_entries, \
+      f"Cannot load words [{base_idx},{base_idx+len(words)}) into an SRAM " \
+      f"with {s.num_entries} entries!"
+
+    write = s.write
+    for scope, lsb, nbits in s.regions:
+      s.lib.svSetScope( scope )
+      nchunks = -( -nbits // 32 )
+      for i, word in enumerate( words ):
+        value = ( word >> lsb ) & ( ( 1 << nbits ) - 1 )
+        for chunk in range( nchunks ):
+          x = ( value >> ( 32*chunk ) ) & 0xffffffff
+          write( base_idx + i, chunk, x - ( x >> 31 << 32 ) )
+
+  def dump( s, lo=0, hi=None ):
+
+    if hi is None:
+      hi = s.num_entries
+    assert 0 <= lo <= hi <= s.num_entries, \
+      f"Cannot dump words [{lo},{hi}) from an SRAM with {s.num_entries} entries!"
+
+    words = [ 0 ] * ( hi - lo )
+    read  = s.read
+    for scope, lsb, nbits in s.regions:
+      s.lib.svSetScope( scope )
+      nchunks = -( -nbits // 32 )
+      for i in range( hi - lo ):
+        value = 0
+        for chunk in range( nchunks ):
+          value |= ( read( lo + i, chunk ) & 0xffffffff ) << ( 32*chunk )
+        words[i] |= ( value & ( ( 1 << nbits ) - 1 ) ) << lsb
+
+    return words
+
+  def load_image( s, path, fmt=None, base_idx=0 ):
+    return load_sram_image( s, path, fmt, base_idx )
+
+#-------------------------------------------------------------------------
+# sram_backdoor
+#-------------------------------------------------------------------------
+# Returns an object with the load, dump, and load_image methods for an
+# SramRTL (or any model containing one at path) in either language.
+
+def sram_backdoor( model, data_nbits, num_entries, mask_size=0, path='v',
+                   ports='1rw' ):
+  if hasattr( model, 'load' ) and hasattr( model, 'dump' ):
+    return model
+  return SramBackdoor( model, data_nbits, num_entries, mask_size, path, ports )
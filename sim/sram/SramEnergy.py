@@ -0,0 +1,116 @@
+#=========================================================================
+# SramEnergy
+#=========================================================================
+# Estimate the energy of all SRAMs in a simulated design from the access
+# counters of each SRAM instance (see SramActivity.py), without running
+# power analysis on the gate-level netlist. The SRAMs have to be
+# constructed with activity=True (e.g., SramPRTL( ..., activity=True ) or
+# SramMinionPRTL( stats=True )).
+#
+# Every SRAM macro uses the characterization data of the macro registry
+# in SramTiler.py, i.e., the read and write energy and the leakage power
+# from the OpenRAM .lib of the macro if one can be found, and estimates
+# otherwise. Generic SRAMs which are not inside a macro always use the
+# analytical estimates of estimate_sram_char. For each instance we
+# report (energies in pJ):
+#
+#  - read_energy    : nreads  x energy per read
+#  - write_energy   : nwrites x energy per write
+#  - leakage_energy : leakage power x ncycles x clock period
+#
+# The default clock period of 1.2 ns is the clock period of the ASIC flow
+# in asic/tut8-sram/flow.py. The leakage power is in mW and the clock
+# period is in ns, so their product is in pJ.
+
+from .SramActivity import SramActivity
+from .SramTiler    import sram_macros, estimate_sram_char
+
+#-------------------------------------------------------------------------
+# estimate_sram_energy
+#-------------------------------------------------------------------------
+# Returns a dictionary with the energy of every SRAM instance inside the
+# given component (which can be any component of the simulated design)
+# and the total energy of all instances.
+
+def sram_components( m ):
+  yield m
+  for child in m.get_child_components():
+    yield from sram_components( child )
+
+def estimate_sram_energy( top, clock_period=1.2 ):
+
+  macros_by_cls = { macro.cls : macro for macro in sram_macros.values() }
+
+  instances = []
+
+  for m in sram_components( top ):
+
+    activity = getattr( m, 'activity', None )
+    if not isinstance( activity, SramActivity ):
+      continue
+
+    # generic SRAMs inside a macro are reported as the macro
+
+    parent = m.get_parent_object()
+    macro  = macros_by_cls.get( type( parent ) ) if parent is not None else None
+
+    if macro is not None:
+      name  = repr( parent )
+      read_energy, write_energy, leakage = \
+        macro.read_energy, macro.write_energy, macro.leakage
+    else:
+      name  = repr( m )
+      char  = estimate_sram_char( activity.data_nbits, activity.num_entries )
+      read_energy, write_energy, leakage = \
+        char['read'], char['write'], char['leakage']
+
+    instance = {
+      'name'           : name,
+      'macro'          : macro.name if macro is not None else None,
+      'data_nbits'     : activity.data_nbits,
+      'num_entries'    : activity.num_entries,
+      'ncycles'        : activity.ncycles,
+      'nreads'         : activity.nreads,
+      'nwrites'        : activity.nwrites,
+      'read_energy'    : activity.nreads  * read_energy,
+      'write_energy'   : activity.nwrites * write_energy,
+      'leakage_energy' : activity.ncycles * leakage * clock_period,
+    }
+
+    instance['total_energy'] = instance['read_energy'] \
+                             + instance['write_energy'] \
+                             + instance['leakage_energy']
+
+    instances.append( instance )
+
+  dynamic_energy = sum([ x['read_energy'] + x['write_energy'] for x in instances ])
+  leakage_energy = sum([ x['leakage_energy'] for x in instances ])
+
+  return {
+    'clock_period'   : clock_period,
+    'instances'      : instances,
+    'dynamic_energy' : dynamic_energy,
+    'leakage_energy' : leakage_energy,
+    'total_energy'   : dynamic_energy + leakage_energy,
+  }
+
+#-------------------------------------------------------------------------
+# fmt_sram_energy
+#-------------------------------------------------------------------------
+
+def fmt_sram_energy( report ):
+
+  lines = []
+
+  for x in report['instances']:
+    lines.append( f" {x['name']:24} {x['macro'] or 'generic':18} "
+                  f"{x['nreads']:8} rd {x['nwrites']:8} wr {x['ncycles']:8} cycles "
+                  f"{x['total_energy']:12.2f} pJ" )
+
+  lines += [
+    f" dynamic energy = {report['dynamic_energy']:.2f} pJ",
+    f" leakage energy = {report['leakage_energy']:.2f} pJ",
+    f" total energy   = {report['total_energy']:.2f} pJ",
+  ]
+
+  return "\n".join( lines )
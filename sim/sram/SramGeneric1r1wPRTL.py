@@ -0,0 +1,165 @@
+#=========================================================================
+# Generic model of a 1r1w SRAM
+#=========================================================================
+# This is meant to be instantiated within a carefully named outer module
+# so the outer module corresponds to an SRAM with one write port and one
+# read port generated with the OpenRAM memory compiler (num_w_ports = 1,
+# num_r_ports = 1). OpenRAM numbers the write ports before the read
+# ports, so port 0 is the write port and port 1 is the read port.
+#
+# The semantics parameter selects what a read returns if the write port
+# writes the same entry in the same cycle (see SramSemantics.py). By
+# default it returns the data stored before the clock edge
+# ('read-first'), with 'write-first' the data written in this cycle, and
+# with 'x-on-write' the read data is undefined. With check=True the
+# dout1_x output is one whenever the read data is undefined (simulation
+# only).
+#
+# The storage parameter selects the storage engine used during simulation
+# and the load and dump methods provide a zero-cycle backdoor into the
+# memory array, exactly like in SramGenericPRTL.
+#
+# If activity is True the model counts the cycles, reads, and writes
+# after reset in s.activity (simulation only, see SramActivity.py).
+
+from pymtl3 import *
+
+from .SramStorage   import mk_sram_storage, sram_words
+from .SramActivity  import SramActivity
+from .SramSemantics import check_sram_semantics
+
+class SramGeneric1r1wPRTL( Component ):
+
+  def construct( s, data_nbits=32, num_entries=256, storage='wire', activity=False,
+                 semantics='read-first', check=False ):
+
+    check_sram_semantics( semantics )
+
+    addr_width = clog2( num_entries )      # address width
+    nbytes     = int( data_nbits + 7 ) // 8 # $ceil(data_nbits/8)
+
+    # port names set to match the OpenRAM memory compiler
+
+    s.clk0  = InPort ()                      # clk
+    s.csb0  = InPort ()                      # bar( write port en )
+    s.addr0 = InPort ( addr_width )          # write address
+    s.din0  = InPort ( data_nbits )          # write data
+
+    s.clk1  = InPort ()                      # clk
+    s.csb1  = InPort ()                      # bar( read port en )
+    s.addr1 = InPort ( addr_width )          # read address
+    s.dout1 = OutPort( data_nbits )          # read data
+
+    # memory array
+
+    s.nbytes  = nbytes
+    s.storage = storage
+
+    if storage == 'wire':
+
+      s.ram = [ Wire( data_nbits ) for _ in range( num_entries ) ]
+
+      # read path
+
+      if semantics == 'write-first':
+
+        @update_ff
+        def read_logic_wf():
+          if ~s.csb1 & ~s.csb0 & ( s.addr0 == s.addr1 ):
+            s.dout1 <<= s.din0
+          elif ~s.csb1:
+            s.dout1 <<= s.ram[ s.addr1 ]
+          else:
+            s.dout1 <<= 0
+
+      else:
+
+        @update_ff
+        def read_logic():
+          if ~s.csb1:
+            s.dout1 <<= s.ram[ s.addr1 ]
+          else:
+            s.dout1 <<= 0
+
+      # write path
+
+      @update_ff
+      def write_logic():
+        if ~s.csb0:
+          s.ram[s.addr0] <<= s.din0
+
+    else:
+
+      s.mem = mk_sram_storage( storage, data_nbits, num_entries )
+
+      # read-first reads happen before the write, write-first reads
+      # after the write
+
+      write_first = b1( semantics == 'write-first' )
+
+      @update_ff
+      def read_write_logic_mem():
+
+        if ~s.csb1 & ~write_first:
+          s.dout1 <<= s.mem.read( int(s.addr1) )
+
+        if ~s.csb0:
+          s.mem.write( int(s.addr0), int(s.din0) )
+
+        if ~s.csb1 & write_first:
+          s.dout1 <<= s.mem.read( int(s.addr1) )
+        elif s.csb1:
+          s.dout1 <<= 0
+
+    # the read data is undefined after cycles without a read and, in
+    # x-on-write mode, after reads of the entry the write port writes
+
+    if check:
+
+      s.dout1_x = OutPort()
+
+      x_on_write = b1( semantics == 'x-on-write' )
+
+      @update_ff
+      def up_check():
+        s.dout1_x <<= s.csb1 | ( x_on_write & ~s.csb0 & ( s.addr0 == s.addr1 ) )
+
+    # access counters
+
+    if activity:
+
+      s.activity = SramActivity( data_nbits, num_entries )
+
+      @update_ff
+      def up_activity():
+        if s.reset:
+          s.activity.reset()
+        else:
+          s.activity.tick( int(~s.csb1), int(~s.csb0) )
+
+  def num_resident_pages( s ):
+    return s.mem.num_resident_pages
+
+  # Backdoor access to the memory array
+
+  def load( s, data, base_idx=0 ):
+    if s.storage != 'wire':
+      s.mem.load( data, base_idx )
+      return
+
+    words = sram_words( data, s.nbytes )
+    assert 0 <= base_idx and base_idx + len(words) <= len(s.ram), \
+      f"Cannot load words [{base_idx},{base_idx+len(words)}) into an SRAM " \
+      f"with {len(s.ram)} entries!"
+
+    for i, word in enumerate( words ):
+      s.ram[ base_idx + i ] @= word
+      s.ram[ base_idx + i ] <<= word
+
+  def dump( s, lo=0, hi=None ):
+    if s.storage != 'wire':
+      return s.mem.dump( lo, hi )
+
+    if hi is None:
+      hi = len(s.ram)
+    return [ int( s.ram[idx] ) for idx in range( lo, hi ) ]
@@ -0,0 +1,118 @@
+//========================================================================
+// Generic Parameterized 1r1w SRAM
+//========================================================================
+// This is meant to be instantiated within a carefully named outer module
+// so the outer module corresponds to an SRAM with one write port and one
+// read port generated with the OpenRAM memory compiler. OpenRAM numbers
+// the write ports before the read ports, so port 0 is the write port and
+// port 1 is the read port.
+//
+// What a read returns if the write port writes the same entry in the
+// same cycle is selected by p_semantics (see SramSemantics.py): 0 = the
+// data stored before the clock edge (read-first, default), 1 = the data
+// written in this cycle (write-first), 2 = X (x-on-write).
+
+`ifndef SRAM_SRAM_GENERIC_1R1W_V
+`define SRAM_SRAM_GENERIC_1R1W_V
+
+module sram_SramGeneric1r1wVRTL
+#(
+  parameter p_data_nbits  = 1,
+  parameter p_num_entries = 2,
+  parameter p_semantics   = 0,
+
+  // Local constants not meant to be set from outside the module
+  parameter c_addr_nbits  = $clog2(p_num_entries)
+)(
+  input  logic                      clk0,  // clk
+  input  logic                      csb0,  // bar( write port en )
+  input  logic [c_addr_nbits-1:0]   addr0, // write address
+  input  logic [p_data_nbits-1:0]   din0,  // write data
+
+  input  logic                      clk1,  // clk
+  input  logic                      csb1,  // bar( read port en )
+  input  logic [c_addr_nbits-1:0]   addr1, // read address
+  output logic [p_data_nbits-1:0]   dout1  // read data
+);
+
+  logic [p_data_nbits-1:0] mem[p_num_entries-1:0];
+
+  logic [p_data_nbits-1:0] data_out1;
+
+  always @( posedge clk0 ) begin
+
+    // Read path
+
+    if ( ~csb1 && p_semantics == 1 && ~csb0 && addr0 == addr1 )
+      data_out1 <= din0;
+    else if ( ~csb1 && p_semantics == 2 && ~csb0 && addr0 == addr1 )
+      data_out1 <= {p_data_nbits{1'bx}};
+    else if ( ~csb1 )
+      data_out1 <= mem[addr1];
+    else
+      data_out1 <= {p_data_nbits{1'bx}};
+
+    // Write path
+
+    if ( ~csb0 )
+      mem[addr0] <= din0;
+
+  end
+
+  assign dout1 = data_out1;
+
+  //----------------------------------------------------------------------
+  // Backdoor access
+  //----------------------------------------------------------------------
+  // Only for Verilator: zero-cycle access to the memory array from Python
+  // through DPI (see SramBackdoor.py). Words are accessed in 32-bit
+  // chunks, so the exported functions have the same prototype for every
+  // parameterization. Every kind of generic SRAM exports its own names
+  // (sram_generic_1r1w_backdoor_*), so one design may contain several kinds.
+
+`ifdef VERILATOR
+
+  localparam c_backdoor_nbits = ( ( p_data_nbits + 31 ) / 32 ) * 32;
+
+  export "DPI-C" function sram_generic_1r1w_backdoor_nbits;
+  export "DPI-C" function sram_generic_1r1w_backdoor_nentries;
+  export "DPI-C" function sram_generic_1r1w_backdoor_read;
+  export "DPI-C" function sram_generic_1r1w_backdoor_write;
+
+  function int sram_generic_1r1w_backdoor_nbits();
+    return p_data_nbits;
+  endfunction
+
+  function int sram_generic_1r1w_backdoor_nentries();
+    return p_num_entries;
+  endfunction
+
+  function int sram_generic_1r1w_backdoor_read( input int idx, input int chunk );
+    logic [c_backdoor_nbits-1:0] word;
+    word = '0;
+    word[p_data_nbits-1:0] = mem[idx];
+    return word[ chunk*32 +: 32 ];
+  endfunction
+
+  // The write port writes mem with nonblocking assignments and this
+  // function with a blocking one, which Verilator reports as BLKANDNBLK.
+  // The backdoor is only called from outside the model between two
+  // evaluations, never from a process while the clock edge is evaluated,
+  // so the two writes cannot race.
+
+  /* verilator lint_off BLKANDNBLK */
+  function void sram_generic_1r1w_backdoor_write( input int idx, input int chunk, input int value );
+    logic [c_backdoor_nbits-1:0] word;
+    word = '0;
+    word[p_data_nbits-1:0] = mem[idx];
+    word[ chunk*32 +: 32 ] = value;
+    mem[idx] = word[p_data_nbits-1:0];
+  endfunction
+  /* verilator lint_on BLKANDNBLK */
+
+`endif /* VERILATOR */
+
+endmodule
+
+`endif /* SRAM_SRAM_GENERIC_1R1W_V */
+
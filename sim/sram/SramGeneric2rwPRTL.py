@@ -0,0 +1,236 @@
+#=========================================================================
+# Generic model of a dual-ported (2rw) SRAM
+#=========================================================================
+# This is meant to be instantiated within a carefully named outer module
+# so the outer module corresponds to a dual-ported SRAM generated with
+# the OpenRAM memory compiler (num_rw_ports = 2). Both ports can read or
+# write every cycle.
+#
+# The semantics parameter selects what a read returns if the other port
+# writes the same entry in the same cycle, and what the read data of a
+# write is (see SramSemantics.py). By default both return the data stored
+# before the clock edge ('read-first'), with 'write-first' they return
+# the data written in this cycle, and with 'x-on-write' they are
+# undefined. If both ports write the same entry in the same cycle port 1
+# wins (the entry is undefined in x-on-write mode). With check=True the
+# dout0_x and dout1_x outputs are one whenever the read data is undefined
+# and two ports writing the same entry in x-on-write mode raise an
+# AssertionError (simulation only).
+#
+# The storage parameter selects the storage engine used during simulation
+# and the load and dump methods provide a zero-cycle backdoor into the
+# memory array, exactly like in SramGenericPRTL.
+#
+# If activity is True the model counts the cycles, reads, and writes
+# after reset in s.activity (simulation only, see SramActivity.py).
+
+from pymtl3 import *
+
+from .SramStorage   import mk_sram_storage, sram_words
+from .SramActivity  import SramActivity
+from .SramSemantics import check_sram_semantics
+
+class SramGeneric2rwPRTL( Component ):
+
+  def construct( s, data_nbits=32, num_entries=256, storage='wire', activity=False,
+                 semantics='read-first', check=False ):
+
+    check_sram_semantics( semantics )
+
+    addr_width = clog2( num_entries )      # address width
+    nbytes     = int( data_nbits + 7 ) // 8 # $ceil(data_nbits/8)
+
+    # port names set to match the OpenRAM memory compiler
+
+    s.clk0  = InPort ()                      # clk
+    s.web0  = InPort ()                      # bar( write en )
+    s.csb0  = InPort ()                      # bar( port 0 en )
+    s.addr0 = InPort ( addr_width )          # address
+    s.din0  = InPort ( data_nbits )          # write data
+    s.dout0 = OutPort( data_nbits )          # read data
+
+    s.clk1  = InPort ()                      # clk
+    s.web1  = InPort ()                      # bar( write en )
+    s.csb1  = InPort ()                      # bar( port 1 en )
+    s.addr1 = InPort ( addr_width )          # address
+    s.din1  = InPort ( data_nbits )          # write data
+    s.dout1 = OutPort( data_nbits )          # read data
+
+    # memory array
+
+    s.nbytes  = nbytes
+    s.storage = storage
+
+    if storage == 'wire':
+
+      s.ram = [ Wire( data_nbits ) for _ in range( num_entries ) ]
+
+      # read path
+
+      if semantics == 'write-first':
+
+        # writes of the other port to the same entry are forwarded, port 1
+        # first since it wins if both ports write the entry
+
+        @update_ff
+        def read_logic_wf():
+
+          if ~s.csb0 & ~s.csb1 & ~s.web1 & ( s.addr0 == s.addr1 ):
+            s.dout0 <<= s.din1
+          elif ~s.csb0 & ~s.web0:
+            s.dout0 <<= s.din0
+          elif ~s.csb0:
+            s.dout0 <<= s.ram[ s.addr0 ]
+          else:
+            s.dout0 <<= 0
+
+          if ~s.csb1 & ~s.web1:
+            s.dout1 <<= s.din1
+          elif ~s.csb1 & ~s.csb0 & ~s.web0 & ( s.addr0 == s.addr1 ):
+            s.dout1 <<= s.din0
+          elif ~s.csb1:
+            s.dout1 <<= s.ram[ s.addr1 ]
+          else:
+            s.dout1 <<= 0
+
+      elif semantics == 'read-first':
+
+        @update_ff
+        def read_logic_rf():
+
+          if ~s.csb0:
+            s.dout0 <<= s.ram[ s.addr0 ]
+          else:
+            s.dout0 <<= 0
+
+          if ~s.csb1:
+            s.dout1 <<= s.ram[ s.addr1 ]
+          else:
+            s.dout1 <<= 0
+
+      else:
+
+        @update_ff
+        def read_logic():
+
+          if ~s.csb0 & s.web0:
+            s.dout0 <<= s.ram[ s.addr0 ]
+          else:
+            s.dout0 <<= 0
+
+          if ~s.csb1 & s.web1:
+            s.dout1 <<= s.ram[ s.addr1 ]
+          else:
+            s.dout1 <<= 0
+
+      # write path (both ports write the array in the same block)
+
+      @update_ff
+      def write_logic():
+
+        if ~s.csb0 & ~s.web0:
+          s.ram[s.addr0] <<= s.din0
+
+        if ~s.csb1 & ~s.web1:
+          s.ram[s.addr1] <<= s.din1
+
+    else:
+
+      s.mem = mk_sram_storage( storage, data_nbits, num_entries )
+
+      # read-first reads happen before the writes, write-first reads
+      # after the writes
+
+      read_first  = b1( semantics == 'read-first'  )
+      write_first = b1( semantics == 'write-first' )
+
+      @update_ff
+      def read_write_logic_mem():
+
+        dout0 = 0
+        dout1 = 0
+
+        if ~s.csb0 & ( s.web0 | read_first ):
+          dout0 = s.mem.read( int(s.addr0) )
+
+        if ~s.csb1 & ( s.web1 | read_first ):
+          dout1 = s.mem.read( int(s.addr1) )
+
+        if ~s.csb0 & ~s.web0:
+          s.mem.write( int(s.addr0), int(s.din0) )
+
+        if ~s.csb1 & ~s.web1:
+          s.mem.write( int(s.addr1), int(s.din1) )
+
+        if write_first:
+          if ~s.csb0:
+            dout0 = s.mem.read( int(s.addr0) )
+          if ~s.csb1:
+            dout1 = s.mem.read( int(s.addr1) )
+
+        s.dout0 <<= dout0
+        s.dout1 <<= dout1
+
+    # the read data is undefined after cycles without a read and, in
+    # x-on-write mode, after writes and reads of an entry the other port
+    # writes
+
+    if check:
+
+      s.dout0_x = OutPort()
+      s.dout1_x = OutPort()
+
+      x_on_write = b1( semantics == 'x-on-write' )
+
+      @update_ff
+      def up_check():
+
+        conflict = ~s.csb0 & ~s.csb1 & ( s.addr0 == s.addr1 )
+
+        s.dout0_x <<= s.csb0 | ( x_on_write & ( ~s.web0 | ( conflict & ~s.web1 ) ) )
+        s.dout1_x <<= s.csb1 | ( x_on_write & ( ~s.web1 | ( conflict & ~s.web0 ) ) )
+
+        if x_on_write & conflict & ~s.web0 & ~s.web1 & ~s.reset:
+          raise AssertionError( f"Both ports of a 2rw SRAM write entry {s.addr0} "
+                                f"in the same cycle!" )
+
+    # access counters
+
+    if activity:
+
+      s.activity = SramActivity( data_nbits, num_entries )
+
+      @update_ff
+      def up_activity():
+        if s.reset:
+          s.activity.reset()
+        else:
+          s.activity.tick( int(~s.csb0 & s.web0)  + int(~s.csb1 & s.web1),
+                           int(~s.csb0 & ~s.web0) + int(~s.csb1 & ~s.web1) )
+
+  def num_resident_pages( s ):
+    return s.mem.num_resident_pages
+
+  # Backdoor access to the memory array
+
+  def load( s, data, base_idx=0 ):
+    if s.storage != 'wire':
+      s.mem.load( data, base_idx )
+      return
+
+    words = sram_words( data, s.nbytes )
+    assert 0 <= base_idx and base_idx + len(words) <= len(s.ram), \
+      f"Cannot load words [{base_idx},{base_idx+len(words)}) into an SRAM " \
+      f"with {len(s.ram)} entries!"
+
+    for i, word in enumerate( words ):
+      s.ram[ base_idx + i ] @= word
+      s.ram[ base_idx + i ] <<= word
+
+  def dump( s, lo=0, hi=None ):
+    if s.storage != 'wire':
+      return s.mem.dump( lo, hi )
+
+    if hi is None:
+      hi = len(s.ram)
+    return [ int( s.ram[idx] ) for idx in range( lo, hi ) ]
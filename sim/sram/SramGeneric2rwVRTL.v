@@ -0,0 +1,142 @@
+//========================================================================
+// Generic Parameterized Dual-Ported (2rw) SRAM
+//========================================================================
+// This is meant to be instantiated within a carefully named outer module
+// so the outer module corresponds to a dual-ported SRAM generated with
+// the OpenRAM memory compiler. Both ports can read or write every cycle.
+//
+// What a read returns if the other port writes the same entry in the same
+// cycle, and the read data of a write, is selected by p_semantics (see
+// SramSemantics.py): 0 = the data stored before the clock edge
+// (read-first, default), 1 = the data written in this cycle
+// (write-first), 2 = X (x-on-write). If both ports write the same entry
+// in the same cycle port 1 wins (the entry becomes X in x-on-write mode).
+
+`ifndef SRAM_SRAM_GENERIC_2RW_V
+`define SRAM_SRAM_GENERIC_2RW_V
+
+module sram_SramGeneric2rwVRTL
+#(
+  parameter p_data_nbits  = 1,
+  parameter p_num_entries = 2,
+  parameter p_semantics   = 0,
+
+  // Local constants not meant to be set from outside the module
+  parameter c_addr_nbits  = $clog2(p_num_entries)
+)(
+  input  logic                      clk0,  // clk
+  input  logic                      web0,  // bar( write en )
+  input  logic                      csb0,  // bar( port 0 en )
+  input  logic [c_addr_nbits-1:0]   addr0, // address
+  input  logic [p_data_nbits-1:0]   din0,  // write data
+  output logic [p_data_nbits-1:0]   dout0, // read data
+
+  input  logic                      clk1,  // clk
+  input  logic                      web1,  // bar( write en )
+  input  logic                      csb1,  // bar( port 1 en )
+  input  logic [c_addr_nbits-1:0]   addr1, // address
+  input  logic [p_data_nbits-1:0]   din1,  // write data
+  output logic [p_data_nbits-1:0]   dout1  // read data
+);
+
+  logic [p_data_nbits-1:0] mem[p_num_entries-1:0];
+
+  logic [p_data_nbits-1:0] data_out0;
+  logic [p_data_nbits-1:0] data_out1;
+
+  always @( posedge clk0 ) begin
+
+    // Read path
+
+    if ( ~csb0 && p_semantics == 1 && ~csb1 && ~web1 && addr0 == addr1 )
+      data_out0 <= din1;
+    else if ( ~csb0 && p_semantics == 1 && ~web0 )
+      data_out0 <= din0;
+    else if ( ~csb0 && p_semantics == 2 && ( ~web0 || ( ~csb1 && ~web1 && addr0 == addr1 ) ) )
+      data_out0 <= {p_data_nbits{1'bx}};
+    else if ( ~csb0 )
+      data_out0 <= mem[addr0];
+    else
+      data_out0 <= {p_data_nbits{1'bx}};
+
+    if ( ~csb1 && p_semantics == 1 && ~web1 )
+      data_out1 <= din1;
+    else if ( ~csb1 && p_semantics == 1 && ~csb0 && ~web0 && addr0 == addr1 )
+      data_out1 <= din0;
+    else if ( ~csb1 && p_semantics == 2 && ( ~web1 || ( ~csb0 && ~web0 && addr0 == addr1 ) ) )
+      data_out1 <= {p_data_nbits{1'bx}};
+    else if ( ~csb1 )
+      data_out1 <= mem[addr1];
+    else
+      data_out1 <= {p_data_nbits{1'bx}};
+
+    // Write path
+
+    if ( ~csb0 && ~web0 )
+      mem[addr0] <= din0;
+
+    if ( ~csb1 && ~web1 && p_semantics == 2 && ~csb0 && ~web0 && addr0 == addr1 )
+      mem[addr1] <= {p_data_nbits{1'bx}};
+    else if ( ~csb1 && ~web1 )
+      mem[addr1] <= din1;
+
+  end
+
+  assign dout0 = data_out0;
+  assign dout1 = data_out1;
+
+  //----------------------------------------------------------------------
+  // Backdoor access
+  //----------------------------------------------------------------------
+  // Only for Verilator: zero-cycle access to the memory array from Python
+  // through DPI (see SramBackdoor.py). Words are accessed in 32-bit
+  // chunks, so the exported functions have the same prototype for every
+  // parameterization. Every kind of generic SRAM exports its own names
+  // (sram_generic_2rw_backdoor_*), so one design may contain several kinds.
+
+`ifdef VERILATOR
+
+  localparam c_backdoor_nbits = ( ( p_data_nbits + 31 ) / 32 ) * 32;
+
+  export "DPI-C" function sram_generic_2rw_backdoor_nbits;
+  export "DPI-C" function sram_generic_2rw_backdoor_nentries;
+  export "DPI-C" function sram_generic_2rw_backdoor_read;
+  export "DPI-C" function sram_generic_2rw_backdoor_write;
+
+  function int sram_generic_2rw_backdoor_nbits();
+    return p_data_nbits;
+  endfunction
+
+  function int sram_generic_2rw_backdoor_nentries();
+    return p_num_entries;
+  endfunction
+
+  function int sram_generic_2rw_backdoor_read( input int idx, input int chunk );
+    logic [c_backdoor_nbits-1:0] word;
+    word = '0;
+    word[p_data_nbits-1:0] = mem[idx];
+    return word[ chunk*32 +: 32 ];
+  endfunction
+
+  // The write port writes mem with nonblocking assignments and this
+  // function with a blocking one, which Verilator reports as BLKANDNBLK.
+  // The backdoor is only called from outside the model between two
+  // evaluations, never from a process while the clock edge is evaluated,
+  // so the two writes cannot race.
+
+  /* verilator lint_off BLKANDNBLK */
+  function void sram_generic_2rw_backdoor_write( input int idx, input int chunk, input int value );
+    logic [c_backdoor_nbits-1:0] word;
+    word = '0;
+    word[p_data_nbits-1:0] = mem[idx];
+    word[ chunk*32 +: 32 ] = value;
+    mem[idx] = word[p_data_nbits-1:0];
+  endfunction
+  /* verilator lint_on BLKANDNBLK */
+
+`endif /* VERILATOR */
+
+endmodule
+
+`endif /* SRAM_SRAM_GENERIC_2RW_V */
+
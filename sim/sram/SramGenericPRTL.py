@@ -4,12 +4,50 @@
 # This is meant to be instantiated within a carefully named outer module
 # so the outer module corresponds to an SRAM generated with the
 # OpenRAM memory compiler.
+#
+# The storage parameter selects how the memory array is stored during
+# simulation. The default 'wire' storage uses one Wire per word and is
+# the only storage that can be translated into Verilog. The 'array'
+# storage keeps the whole array in a single compact buffer (see
+# SramStorage.py) which is much faster to elaborate and simulate for
+# large SRAMs, and the 'sparse' storage only allocates pages of the array
+# on their first write. Both are simulation only.
+#
+# If mask_size is non-zero the SRAM has an additional write mask input
+# (wmask0, active high) and the word is split into mask_size lanes of
+# data_nbits/mask_size bits each. A write only updates the lanes whose
+# mask bit is set, so masks can have byte, half-word, word, etc.
+# granularity.
+#
+# The load and dump methods provide a zero-cycle backdoor into the memory
+# array for all storage engines. They can only be used once the model
+# has been elaborated and a simulator has been created.
+#
+# If activity is True the model counts the cycles, reads, and writes
+# after reset in s.activity (simulation only, see SramActivity.py).
+#
+# The semantics parameter selects the read data of a write (see
+# SramSemantics.py). By default it is undefined ('x-on-write', the PyMTL
+# model returns zero), with 'read-first' a write returns the data stored
+# before the write and with 'write-first' the data after the write. With
+# check=True the dout0_x output is one whenever the read data is
+# undefined (simulation only).
 
 from pymtl3 import *
 
+from .SramStorage   import mk_sram_storage, sram_words
+from .SramActivity  import SramActivity
+from .SramSemantics import check_sram_semantics
+
 class SramGenericPRTL( Component ):
 
-  def construct( s, data_nbits=32, num_entries=256 ):
+  def construct( s, data_nbits=32, num_entries=256, mask_size=0, storage='wire',
+                 activity=False, semantics='x-on-write', check=False ):
+
+    assert mask_size == 0 or data_nbits % mask_size == 0, \
+      f"Cannot split {data_nbits}b words into {mask_size} lanes"
+
+    check_sram_semantics( semantics )
 
     addr_width = clog2( num_entries )      # address width
     nbytes     = int( data_nbits + 7 ) // 8 # $ceil(data_nbits/8)
@@ -26,22 +64,185 @@ class SramGenericPRTL( Component ):
     s.din0  = InPort ( data_nbits )          # write data
     s.dout0 = OutPort( data_nbits )          # read data
 
+    # write mask, expanded into one enable bit per data bit
+
+    if mask_size > 0:
+      s.wmask0    = InPort( mask_size )      # write mask
+      s.wbitmask0 = Wire( data_nbits )
+
+      lane_nbits = data_nbits // mask_size
+
+      @update
+      def comb_wbitmask():
+        for i in range( mask_size ):
+          s.wbitmask0[ i*lane_nbits : i*lane_nbits + lane_nbits ] @= sext( s.wmask0[i], lane_nbits )
+
     # memory array
 
-    s.ram = [ Wire( data_nbits ) for _ in range( num_entries ) ]
+    s.nbytes  = nbytes
+    s.storage = storage
+
+    if storage == 'wire':
+
+      s.ram = [ Wire( data_nbits ) for _ in range( num_entries ) ]
+
+      # read path
+
+      if semantics == 'read-first':
+
+        @update_ff
+        def read_logic_rf():
+          if ~s.csb0:
+            s.dout0 <<= s.ram[ s.addr0 ]
+          else:
+            s.dout0 <<= 0
+
+      elif semantics == 'write-first':
 
-    # read path
+        # the word after the write
+
+        s.wword0 = Wire( data_nbits )
+
+        if mask_size > 0:
+          @update
+          def comb_wword():
+            s.wword0 @= ( s.ram[s.addr0] & ~s.wbitmask0 ) | ( s.din0 & s.wbitmask0 )
+        else:
+          s.wword0 //= s.din0
+
+        @update_ff
+        def read_logic_wf():
+          if ~s.csb0 & s.web0:
+            s.dout0 <<= s.ram[ s.addr0 ]
+          elif ~s.csb0:
+            s.dout0 <<= s.wword0
+          else:
+            s.dout0 <<= 0
+
+      else:
+
+        @update_ff
+        def read_logic():
+          if ~s.csb0 & s.web0:
+            s.dout0 <<= s.ram[ s.addr0 ]
+          else:
+            s.dout0 <<= 0
+
+      # write path
+
+      if mask_size > 0:
+
+        @update_ff
+        def write_logic_mask():
+          if ~s.csb0 & ~s.web0:
+            s.ram[s.addr0] <<= ( s.ram[s.addr0] & ~s.wbitmask0 ) | ( s.din0 & s.wbitmask0 )
 
-    @update_ff
-    def read_logic():
-      if ~s.csb0 & s.web0:
-        s.dout0 <<= s.ram[ s.addr0 ]
       else:
-        s.dout0 <<= 0
 
-    # write path
+        @update_ff
+        def write_logic():
+          if ~s.csb0 & ~s.web0:
+            s.ram[s.addr0] <<= s.din0
+
+    else:
+
+      s.mem = mk_sram_storage( storage, data_nbits, num_entries )
+
+      # reads and writes happen in the same block so a write can return
+      # the data before or after the write
+
+      read_first  = semantics == 'read-first'
+      write_first = semantics == 'write-first'
+      full_mask   = ( 1 << data_nbits ) - 1
+
+      def write_mem( idx, din, mask ):
+        if mask == full_mask and not read_first:
+          s.mem.write( idx, din )
+          return din if write_first else 0
+        old = s.mem.read( idx )
+        new = ( old & ~mask ) | ( din & mask )
+        s.mem.write( idx, new )
+        return old if read_first else new if write_first else 0
+
+      if mask_size > 0:
+
+        @update_ff
+        def read_write_logic_mem_mask():
+          if ~s.csb0 & s.web0:
+            s.dout0 <<= s.mem.read( int(s.addr0) )
+          elif ~s.csb0:
+            s.dout0 <<= write_mem( int(s.addr0), int(s.din0), int(s.wbitmask0) )
+          else:
+            s.dout0 <<= 0
+
+      else:
+
+        @update_ff
+        def read_write_logic_mem():
+          if ~s.csb0 & s.web0:
+            s.dout0 <<= s.mem.read( int(s.addr0) )
+          elif ~s.csb0:
+            s.dout0 <<= write_mem( int(s.addr0), int(s.din0), full_mask )
+          else:
+            s.dout0 <<= 0
+
+    # the read data is undefined after cycles without a read (and after
+    # writes in x-on-write mode)
+
+    if check:
+
+      s.dout0_x = OutPort()
+
+      x_on_write = b1( semantics == 'x-on-write' )
+
+      @update_ff
+      def up_check():
+        s.dout0_x <<= s.csb0 | ( ~s.web0 & x_on_write )
+
+    # access counters
+
+    if activity:
+
+      s.activity = SramActivity( data_nbits, num_entries )
+
+      @update_ff
+      def up_activity():
+        if s.reset:
+          s.activity.reset()
+        elif ~s.csb0:
+          s.activity.tick( int(s.web0), int(~s.web0) )
+        else:
+          s.activity.tick()
+
+  # Number of pages of the memory array which have been allocated, only
+  # available with the 'array' and 'sparse' storage engines
+
+  def num_resident_pages( s ):
+    return s.mem.num_resident_pages
+
+  # Backdoor access to the memory array
+
+  def load( s, data, base_idx=0 ):
+    if s.storage != 'wire':
+      s.mem.load( data, base_idx )
+      return
+
+    words = sram_words( data, s.nbytes )
+    assert 0 <= base_idx and base_idx + len(words) <= len(s.ram), \
+      f"Cannot load words [{base_idx},{base_idx+len(words)}) into an SRAM " \
+      f"with {len(s.ram)} entries!"
+
+    # Update both the current and next value so the next clock edge does
+    # not overwrite the loaded data
+
+    for i, word in enumerate( words ):
+      s.ram[ base_idx + i ] @= word
+      s.ram[ base_idx + i ] <<= word
+
+  def dump( s, lo=0, hi=None ):
+    if s.storage != 'wire':
+      return s.mem.dump( lo, hi )
 
-    @update_ff
-    def write_logic():
-      if ~s.csb0 & ~s.web0:
-        s.ram[s.addr0] <<= s.din0
+    if hi is None:
+      hi = len(s.ram)
+    return [ int( s.ram[idx] ) for idx in range( lo, hi ) ]
@@ -4,6 +4,14 @@
 // This is meant to be instantiated within a carefully named outer module
 // so the outer module corresponds to an SRAM generated with the
 // OpenRAM memory compiler.
+//
+// If p_mask_size is non-zero each word is split into p_mask_size lanes
+// and a write only updates the lanes whose bit in wmask0 is set. The
+// wmask0 input is ignored if p_mask_size is zero.
+//
+// The read data of a write is selected by p_semantics (see
+// SramSemantics.py): 0 = the data before the write (read-first), 1 = the
+// data after the write (write-first), 2 = X (x-on-write, default).
 
 `ifndef SRAM_SRAM_GENERIC_V
 `define SRAM_SRAM_GENERIC_V
@@ -12,30 +20,37 @@ module sram_SramGenericVRTL
 #(
   parameter p_data_nbits  = 1,
   parameter p_num_entries = 2,
+  parameter p_mask_size   = 0,
+  parameter p_semantics   = 2,
 
   // Local constants not meant to be set from outside the module
   parameter c_addr_nbits  = $clog2(p_num_entries),
-  parameter c_data_nbytes = (p_data_nbits+7)/8 // $ceil(p_data_nbits/8)
+  parameter c_data_nbytes = (p_data_nbits+7)/8, // $ceil(p_data_nbits/8)
+  parameter c_mask_nbits  = (p_mask_size > 0) ? p_mask_size : 1,
+  parameter c_lane_nbits  = p_data_nbits/c_mask_nbits
 )(
   input  logic                      clk0,  // clk
   input  logic                      web0,  // bar( write en )
   input  logic                      csb0,  // bar( whole SRAM en )
   input  logic [c_addr_nbits-1:0]   addr0, // address
   input  logic [p_data_nbits-1:0]   din0,  // write data
+  input  logic [c_mask_nbits-1:0]   wmask0, // write mask
   output logic [p_data_nbits-1:0]   dout0  // read data
 );
 
   logic [p_data_nbits-1:0] mem[p_num_entries-1:0];
 
   logic [p_data_nbits-1:0] data_out1;
-  logic [p_data_nbits-1:0] wdata1;
+  logic [p_data_nbits-1:0] wword0; // the word after the write
 
   always @( posedge clk0 ) begin
 
     // Read path
 
-    if ( ~csb0 && web0 )
+    if ( ~csb0 && ( web0 || p_semantics == 0 ) )
       data_out1 <= mem[addr0];
+    else if ( ~csb0 && p_semantics == 1 )
+      data_out1 <= wword0;
     else
       data_out1 <= {p_data_nbits{1'bx}};
 
@@ -45,17 +60,72 @@ module sram_SramGenericVRTL
 
   genvar i;
   generate
-    for ( i = 0; i < c_data_nbytes; i = i + 1 )
+    for ( i = 0; i < c_mask_nbits; i = i + 1 )
     begin : write
+      assign wword0[ (i+1)*c_lane_nbits-1 : i*c_lane_nbits ] = ( p_mask_size == 0 || wmask0[i] )
+        ? din0[ (i+1)*c_lane_nbits-1 : i*c_lane_nbits ]
+        : mem[addr0][ (i+1)*c_lane_nbits-1 : i*c_lane_nbits ];
+
       always @( posedge clk0 ) begin
-        if ( ~csb0 && ~web0 )
-          mem[addr0][ (i+1)*8-1 : i*8 ] <= din0[ (i+1)*8-1 : i*8 ];
+        if ( ~csb0 && ~web0 && ( p_mask_size == 0 || wmask0[i] ) )
+          mem[addr0][ (i+1)*c_lane_nbits-1 : i*c_lane_nbits ] <= din0[ (i+1)*c_lane_nbits-1 : i*c_lane_nbits ];
       end
     end
   endgenerate
 
   assign dout0 = data_out1;
 
+  //----------------------------------------------------------------------
+  // Backdoor access
+  //----------------------------------------------------------------------
+  // Only for Verilator: zero-cycle access to the memory array from Python
+  // through DPI (see SramBackdoor.py). Words are accessed in 32-bit
+  // chunks, so the exported functions have the same prototype for every
+  // parameterization. Every kind of generic SRAM exports its own names
+  // (sram_generic_backdoor_*), so one design may contain several kinds.
+
+`ifdef VERILATOR
+
+  localparam c_backdoor_nbits = ( ( p_data_nbits + 31 ) / 32 ) * 32;
+
+  export "DPI-C" function sram_generic_backdoor_nbits;
+  export "DPI-C" function sram_generic_backdoor_nentries;
+  export "DPI-C" function sram_generic_backdoor_read;
+  export "DPI-C" function sram_generic_backdoor_write;
+
+  function int sram_generic_backdoor_nbits();
+    return p_data_nbits;
+  endfunction
+
+  function int sram_generic_backdoor_nentries();
+    return p_num_entries;
+  endfunction
+
+  function int sram_generic_backdoor_read( input int idx, input int chunk );
+    logic [c_backdoor_nbits-1:0] word;
+    word = '0;
+    word[p_data_nbits-1:0] = mem[idx];
+    return word[ chunk*32 +: 32 ];
+  endfunction
+
+  // The write port writes mem with nonblocking assignments and this
+  // function with a blocking one, which Verilator reports as BLKANDNBLK.
+  // The backdoor is only called from outside the model between two
+  // evaluations, never from a process while the clock edge is evaluated,
+  // so the two writes cannot race.
+
+  /* verilator lint_off BLKANDNBLK */
+  function void sram_generic_backdoor_write( input int idx, input int chunk, input int value );
+    logic [c_backdoor_nbits-1:0] word;
+    word = '0;
+    word[p_data_nbits-1:0] = mem[idx];
+    word[ chunk*32 +: 32 ] = value;
+    mem[idx] = word[p_data_nbits-1:0];
+  endfunction
+  /* verilator lint_on BLKANDNBLK */
+
+`endif /* VERILATOR */
+
 endmodule
 
 `endif /* SRAM_SRAM_GENERIC_V */
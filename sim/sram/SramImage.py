@@ -0,0 +1,198 @@
+#=========================================================================
+# SRAM memory images
+#=========================================================================
+# Helpers to preload an SRAM from a memory image file through the
+# zero-cycle backdoor (see SramStorage.py). Three formats are supported:
+#
+#  - 'hex' : $readmemh-style text file with one hex word per token,
+#            @<hex addr> directives set the word index of the next word,
+#            and // and /* */ comments are ignored
+#  - 'bin' : raw binary of packed little-endian words
+#  - 'elf' : little-endian ELF32/ELF64 file, every PT_LOAD segment is
+#            loaded at its physical byte address
+#
+# Raw binaries and ELF files are memory-mapped and their bytes are handed
+# to the SRAM as-is, so large images are never parsed word by word into
+# Python objects. Storage engines which keep packed little-endian words
+# (see SramArrayStorage) simply copy the mapped bytes into their buffer.
+
+import mmap
+import os
+import re
+import struct
+
+#-------------------------------------------------------------------------
+# read_hex_image
+#-------------------------------------------------------------------------
+# Returns a list of (base_idx, words) segments.
+
+def read_hex_image( path ):
+
+  with open( path ) as f:
+    text = f.read()
+
+  text = re.sub( r"/\*.*?\*/", " ", text, flags=re.DOTALL )
+  text = re.sub( r"//[^\n]*", " ", text )
+
+  segments = []
+  words    = []
+  base_idx = 0
+
+  for token in text.split():
+    if token.startswith('@'):
+      if words:
+        segments.append(( base_idx, words ))
+      base_idx = int( token[1:].replace('_',''), 16 )
+      words    = []
+    else:
+      words.append( int( token.replace('_',''), 16 ) )
+
+  if words:
+    segments.append(( base_idx, words ))
+
+  return segments
+
+#-------------------------------------------------------------------------
+# map_file
+#-------------------------------------------------------------------------
+# Memory-map a file read-only, returns an empty bytes object for empty
+# files since these cannot be memory-mapped.
+
+def map_file( path ):
+  with open( path, 'rb' ) as f:
+    if os.fstat( f.fileno() ).st_size == 0:
+      return b''
+    return mmap.mmap( f.fileno(), 0, access=mmap.ACCESS_READ )
+
+#-------------------------------------------------------------------------
+# read_bin_image
+#-------------------------------------------------------------------------
+# Returns a list of (base_idx, data) segments where data is the mapped
+# file.
+
+def read_bin_image( path ):
+  return [ ( 0, map_file( path ) ) ]
+
+#-------------------------------------------------------------------------
+# read_elf_image
+#-------------------------------------------------------------------------
+# Returns a list of (base_idx, data) segments, one per PT_LOAD segment,
+# where data is a view of the mapped file. The part of a segment which is
+# not stored in the file (e.g., .bss) is filled with zeros. Segments must
+# start at a byte address which is a multiple of the word size.
+
+PT_LOAD = 1
+
+def read_elf_image( path, nbytes ):
+
+  data = map_file( path )
+
+  assert data[:4] == b'\x7fELF', f"{path} is not an ELF file!"
+  assert data[5] == 1, f"{path} is not a little-endian ELF file!"
+
+  if data[4] == 1:
+    phoff, = struct.unpack_from( '<I', data, 0x1c )
+    phentsize, phnum = struct.unpack_from( '<HH', data, 0x2a )
+    phdr_fmt = '<IIIIIIII'
+    phdr_idx = ( 0, 1, 3, 4, 5 )
+  else:
+    phoff, = struct.unpack_from( '<Q', data, 0x20 )
+    phentsize, phnum = struct.unpack_from( '<HH', data, 0x36 )
+    phdr_fmt = '<IIQQQQQQ'
+    phdr_idx = ( 0, 2, 4, 5, 6 )
+
+  # program header fields: type, offset, paddr, filesz, memsz
+
+  segments = []
+
+  for i in range( phnum ):
+    phdr = struct.unpack_from( phdr_fmt, data, phoff + i*phentsize )
+    p_type, p_offset, p_paddr, p_filesz, p_memsz = [ phdr[j] for j in phdr_idx ]
+
+    if p_type != PT_LOAD or p_memsz == 0:
+      continue
+
+    assert p_paddr % nbytes == 0, \
+      f"ELF segment at 0x{p_paddr:x} is not aligned to {nbytes}B words!"
+
+    segment = memoryview( data )[ p_offset : p_offset + p_filesz ]
+
+    # round the segment up to a whole number of words
+
+    memsz = -( -p_memsz // nbytes ) * nbytes
+    if memsz > p_filesz:
+      segment = bytes( segment ) + bytes( memsz - p_filesz )
+
+    segments.append(( p_paddr // nbytes, segment ))
+
+  # nothing refers to the mapped file if every segment was copied
+
+  if isinstance( data, mmap.mmap ) and \
+     not any( isinstance( seg, memoryview ) for _, seg in segments ):
+    data.close()
+
+  return segments
+
+#-------------------------------------------------------------------------
+# close_sram_image
+#-------------------------------------------------------------------------
+# Release the views of the mapped file in the given segments and close
+# the mapping. A mapping which is still referred to (e.g., by the
+# traceback of a failed load) is left to the garbage collector.
+
+def close_sram_image( segments ):
+
+  mapped = []
+  for _, data in segments:
+    if isinstance( data, memoryview ):
+      if isinstance( data.obj, mmap.mmap ):
+        mapped.append( data.obj )
+      try:
+        data.release()
+      except BufferError:
+        pass
+    elif isinstance( data, mmap.mmap ):
+      mapped.append( data )
+
+  for data in mapped:
+    try:
+      data.close()
+    except BufferError:
+      pass
+
+#-------------------------------------------------------------------------
+# load_sram_image
+#-------------------------------------------------------------------------
+# Load the image file at path into the given model, which can be any
+# model with a backdoor load method and an nbytes attribute (e.g.,
+# SramPRTL). If fmt is None the format is inferred from the file
+# extension, and files with an unknown extension are treated as ELF files
+# if they start with the ELF magic number and as raw binaries otherwise.
+# Returns the number of words loaded.
+
+def load_sram_image( model, path, fmt=None, base_idx=0 ):
+
+  if fmt is None:
+    ext = os.path.splitext( path )[1]
+    if   ext in [ '.hex', '.vmh', '.mem' ]: fmt = 'hex'
+    elif ext in [ '.bin' ]:                 fmt = 'bin'
+    elif ext in [ '.elf' ]:                 fmt = 'elf'
+    else:
+      with open( path, 'rb' ) as f:
+        fmt = 'elf' if f.read(4) == b'\x7fELF' else 'bin'
+
+  if   fmt == 'hex': segments = read_hex_image( path )
+  elif fmt == 'bin': segments = read_bin_image( path )
+  elif fmt == 'elf': segments = read_elf_image( path, model.nbytes )
+  else:
+    raise ValueError( f"Unknown SRAM image format '{fmt}'!" )
+
+  nwords = 0
+  try:
+    for idx, data in segments:
+      model.load( data, base_idx + idx )
+      nwords += len(data) if isinstance( data, list ) else -( -len(data) // model.nbytes )
+  finally:
+    close_sram_image( segments )
+
+  return nwords
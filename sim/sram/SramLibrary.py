@@ -0,0 +1,483 @@
+#=========================================================================
+# SRAM macro library
+#=========================================================================
+# Manages the OpenRAM configurations of the SRAM macros (the *-cfg.py
+# files in this directory and the configurations in the openram-mc
+# directories, see sram_cfg_globs) and the views OpenRAM generates from
+# them. A configuration is parsed into an SramMacroCfg with the size,
+# ports, and corners of the macro, and the library
+#
+#  - creates the BaseSRAM1rw, BaseSRAM1r1w, or BaseSRAM2rw subclass of a
+#    macro (see mk_sram_macro_cls) and the Verilog model of the macro
+#    which wraps the generic SRAM (see gen_sram_macro_v and write_verilog)
+#
+#  - looks up the views (.lib for every corner, .lef, .v, ...) of a macro
+#    in the view cache or next to its configuration, and runs OpenRAM to
+#    generate them if asked to (see views)
+#
+#  - answers queries for macros by width, depth, ports, and corner (see
+#    query and find), and registers its macros with the characterization
+#    of a corner for the SRAM tiler (see register)
+#
+# Running OpenRAM takes minutes per macro, so the views are cached in a
+# directory <cache_dir>/<hash> where hash is the SHA-256 hash of the
+# configuration (all settings but output_path, so the same macro is only
+# generated once no matter where it is configured). Entries are generated
+# in a temporary directory and renamed into place, so several processes
+# can share a cache directory. The version of OpenRAM is not part of the
+# hash, so clear the cache after updating OpenRAM.
+
+import glob
+import hashlib
+import json
+import os
+import runpy
+import shutil
+import subprocess
+import tempfile
+
+from .BaseSRAM1rw  import BaseSRAM1rw
+from .BaseSRAM1r1w import BaseSRAM1r1w
+from .BaseSRAM2rw  import BaseSRAM2rw
+
+this_dir = os.path.dirname( os.path.abspath( __file__ ) )
+
+# Configurations are read in this order, the first configuration of a
+# macro wins
+
+sram_cfg_globs = [
+  os.path.join( this_dir, '*-cfg.py' ),
+  os.path.join( this_dir, '..', '..', 'asic', 'openram-mc', '*.py' ),
+  os.path.join( this_dir, '..', '..', 'asic-manual', 'openram-mc', '*.py' ),
+]
+
+#-------------------------------------------------------------------------
+# Macro classes
+#-------------------------------------------------------------------------
+# The model of a macro is a BaseSRAM1rw, BaseSRAM1r1w, or BaseSRAM2rw
+# subclass named SRAM_<data_nbits>x<num_entries>_<ports> like the module
+# it is translated to (and the OpenRAM macro it stands in for). The
+# classes are created on demand and memoized, so every instance of a
+# macro in a design (and in every design) shares the same class and is
+# translated to a single module.
+
+sram_base_classes = {
+  '1rw'  : BaseSRAM1rw,
+  '1r1w' : BaseSRAM1r1w,
+  '2rw'  : BaseSRAM2rw,
+}
+
+sram_macro_classes = {}
+
+def mk_sram_macro_cls( data_nbits, num_entries, ports='1rw' ):
+
+  key = ( data_nbits, num_entries, ports )
+  if key in sram_macro_classes:
+    return sram_macro_classes[ key ]
+
+  if ports not in sram_base_classes:
+    raise ValueError( f"Unknown SRAM port configuration '{ports}'!" )
+
+  base = sram_base_classes[ ports ]
+  default_semantics = 'x-on-write' if ports == '1rw' else 'read-first'
+
+  def construct( s, storage='wire', activity=False, semantics=default_semantics, check=False ):
+    base.construct( s, data_nbits, num_entries, storage, activity, semantics, check )
+
+  sram_macro_classes[ key ] = type( f"SRAM_{data_nbits}x{num_entries}_{ports}", ( base, ), {
+    'construct'   : construct,
+    'data_nbits'  : data_nbits,
+    'num_entries' : num_entries,
+    'ports'       : ports,
+  })
+
+  return sram_macro_classes[ key ]
+
+#-------------------------------------------------------------------------
+# Configurations
+#-------------------------------------------------------------------------
+
+def sram_cfg_ports( cfg ):
+  ports = ( cfg.get('num_rw_ports',0), cfg.get('num_r_ports',0), cfg.get('num_w_ports',0) )
+  return { (1,0,0) : '1rw', (0,1,1) : '1r1w', (2,0,0) : '2rw' }.get( ports )
+
+# OpenRAM names the .lib of a corner <name>_<corner>.lib, e.g.,
+# SRAM_32x128_1rw_TT_1p1V_25C.lib
+
+def sram_corner_name( process, voltage, temperature ):
+  return f"{process}_{voltage:g}V_{temperature:g}C".replace( '.', 'p' )
+
+# The hash of a configuration covers every setting but output_path
+
+def sram_cfg_hash( params ):
+  params = { k : v for k, v in params.items() if k != 'output_path' }
+  return hashlib.sha256( json.dumps( params, sort_keys=True ).encode() ).hexdigest()
+
+class SramMacroCfg:
+
+  def __init__( s, path, params ):
+
+    default_name = os.path.basename( path )
+    default_name = default_name[:-len('-cfg.py')] if default_name.endswith( '-cfg.py' ) \
+                   else os.path.splitext( default_name )[0]
+
+    s.path        = path
+    s.params      = params
+    s.name        = params.get( 'output_name', default_name )
+    s.data_nbits  = params['word_size']
+    s.num_entries = params['num_words']
+    s.ports       = sram_cfg_ports( params )
+    s.hash        = sram_cfg_hash( params )
+
+    # directory a manual OpenRAM run writes the views to
+
+    s.views_dir   = os.path.join( os.path.dirname( path ), params.get( 'output_path', s.name ) )
+
+    # unspecified corners default to the ones of OpenRAM
+
+    s.corners = [ sram_corner_name( process, voltage, temperature )
+                  for process     in params.get( 'process_corners', [ 'TT' ] )
+                  for voltage     in params.get( 'supply_voltages', [ 1.0  ] )
+                  for temperature in params.get( 'temperatures',    [ 25   ] ) ]
+
+  def __repr__( s ):
+    return f"SramMacroCfg({s.name})"
+
+# Returns None if the file is not an OpenRAM configuration of an SRAM
+
+def read_sram_cfg( path ):
+
+  params = { k : v for k, v in runpy.run_path( path ).items()
+             if not k.startswith( '_' ) and isinstance( v, ( bool, int, float, str, list ) ) }
+
+  if 'word_size' not in params or 'num_words' not in params:
+    return None
+
+  return SramMacroCfg( os.path.abspath( path ), params )
+
+def find_sram_cfgs( cfg_globs=None ):
+  paths = []
+  for pattern in ( sram_cfg_globs if cfg_globs is None else cfg_globs ):
+    paths.extend( sorted( glob.glob( pattern ) ) )
+  return paths
+
+#-------------------------------------------------------------------------
+# gen_sram_macro_v
+#-------------------------------------------------------------------------
+# Returns the Verilog model of a macro, which instantiates the generic
+# SRAM for its ports and is excluded from synthesis (the macro itself is
+# linked from the .lib and .lef views instead).
+
+sram_generic_v = {
+  '1rw'  : ( 'SramGenericVRTL',     [ 'clk0', 'web0', 'csb0', 'addr0', 'din0', 'dout0' ] ),
+  '1r1w' : ( 'SramGeneric1r1wVRTL', [ 'clk0', 'csb0', 'addr0', 'din0',
+                                      'clk1', 'csb1', 'addr1', 'dout1' ] ),
+  '2rw'  : ( 'SramGeneric2rwVRTL',  [ 'clk0', 'web0', 'csb0', 'addr0', 'din0', 'dout0',
+                                      'clk1', 'web1', 'csb1', 'addr1', 'din1', 'dout1' ] ),
+}
+
+def gen_sram_macro_v( name, data_nbits, num_entries, ports='1rw' ):
+
+  generic, port_names = sram_generic_v[ ports ]
+  addr_nbits = max( 1, ( num_entries - 1 ).bit_length() )
+
+  widths = {
+    'addr' : f"[{addr_nbits-1}:0]",
+    'din'  : f"[{data_nbits-1}:0]",
+    'dout' : f"[{data_nbits-1}:0]",
+  }
+
+  width_len = max( len( x ) for x in widths.values() )
+  decls     = []
+  for port in port_names:
+    direction = 'output' if port.startswith( 'dout' ) else 'input '
+    width     = widths.get( port[:-1], '' )
+    decls.append( f"  {direction} logic {width:<{width_len}} {port}" )
+
+  # separate the ports of the two ports of the macro with a blank line
+
+  for i in range( len( port_names )-1, 0, -1 ):
+    if port_names[i][-1] != port_names[i-1][-1]:
+      decls[i-1] += ',\n'
+    else:
+      decls[i-1] += ','
+
+  conns = [ ( port, port ) for port in port_names ]
+  if ports == '1rw':
+    conns.insert( port_names.index( 'dout0' ), ( 'wmask0', "1'b1" ) )
+
+  port_len = max( len( port ) for port, _ in conns )
+  conns    = [ f"    .{port:<{port_len}} ({net})" for port, net in conns ]
+
+  # default read-during-write semantics of the generic model (see
+  # SramSemantics.py)
+
+  semantics = 2 if ports == '1rw' else 0
+
+  newline = '\n'
+  return f"""\
+//========================================================================
+// {data_nbits} bits x {num_entries} words {ports} SRAM
+//========================================================================
+// Generated by SramLibrary.py from the OpenRAM configuration of the macro
+
+`ifndef {name}
+`define {name}
+
+`include "sram/{generic}.v"
+
+`ifndef SYNTHESIS
+
+module {name}
+#(
+  // Simulation only, the read-during-write semantics (see SramSemantics.py)
+  parameter p_semantics = {semantics}
+)(
+{newline.join( decls )}
+);
+
+  sram_{generic}
+  #(
+    .p_data_nbits  ({data_nbits}),
+    .p_num_entries ({num_entries}),
+    .p_semantics   (p_semantics)
+  )
+  sram_generic
+  (
+{( ',' + newline ).join( conns )}
+  );
+
+endmodule
+
+`endif /* SYNTHESIS */
+
+`endif /* {name} */
+
+"""
+
+#-------------------------------------------------------------------------
+# run_openram
+#-------------------------------------------------------------------------
+# Generates the views of a macro in out_dir with OpenRAM. The
+# configuration is written to out_dir with output_path pointing to
+# out_dir, and the output of OpenRAM goes to out_dir/openram.log.
+
+def run_openram( cfg, out_dir, openram_cmd=( 'openram', '-v' ) ):
+
+  os.makedirs( out_dir, exist_ok=True )
+
+  cfg_file = os.path.join( out_dir, f"{cfg.name}.py" )
+  with open( cfg_file, 'w' ) as f:
+    for key, value in sorted( cfg.params.items() ):
+      if key != 'output_path':
+        f.write( f"{key} = {value!r}\n" )
+    f.write( f"output_path = {out_dir!r}\n" )
+
+  with open( os.path.join( out_dir, 'openram.log' ), 'w' ) as log:
+    subprocess.run( list( openram_cmd ) + [ cfg_file ], cwd=out_dir, check=True,
+                    stdout=log, stderr=subprocess.STDOUT )
+
+# Returns the views of a macro in a directory, the .lib views are
+# returned per corner
+
+def sram_views( cfg, views_dir ):
+
+  views = { 'dir' : views_dir, 'lib' : {} }
+
+  for ext in [ 'v', 'lef', 'gds', 'sp' ]:
+    path = os.path.join( views_dir, f"{cfg.name}.{ext}" )
+    if os.path.exists( path ):
+      views[ ext ] = path
+
+  for corner in cfg.corners:
+    path = os.path.join( views_dir, f"{cfg.name}_{corner}.lib" )
+    if os.path.exists( path ):
+      views['lib'][ corner ] = path
+
+  return views
+
+#-------------------------------------------------------------------------
+# SramViewCache
+#-------------------------------------------------------------------------
+# Every entry is a directory <cache_dir>/<hash> with the configuration
+# (cfg.json) and the views (views).
+
+class SramViewCache:
+
+  def __init__( s, cache_dir ):
+    s.cache_dir = os.path.abspath( cache_dir )
+    os.makedirs( s.cache_dir, exist_ok=True )
+
+  def entry( s, cfg ):
+    return os.path.join( s.cache_dir, cfg.hash )
+
+  def __contains__( s, cfg ):
+    return os.path.exists( os.path.join( s.entry( cfg ), 'cfg.json' ) )
+
+  def views( s, cfg ):
+    if cfg not in s:
+      return None
+    return sram_views( cfg, os.path.join( s.entry( cfg ), 'views' ) )
+
+  # Generates the views with generator( cfg, out_dir ) unless they are
+  # already cached and returns them
+
+  def generate( s, cfg, generator=run_openram ):
+
+    if cfg not in s:
+
+      tmp_dir = tempfile.mkdtemp( dir=s.cache_dir, prefix='.tmp-' )
+      try:
+        generator( cfg, os.path.join( tmp_dir, 'views' ) )
+        with open( os.path.join( tmp_dir, 'cfg.json' ), 'w' ) as f:
+          json.dump( cfg.params, f, indent=2, sort_keys=True )
+      except:
+        shutil.rmtree( tmp_dir )
+        raise
+
+      # another process may have generated the same macro in the meantime
+
+      try:
+        os.rename( tmp_dir, s.entry( cfg ) )
+      except OSError:
+        shutil.rmtree( tmp_dir )
+
+    return s.views( cfg )
+
+  def clear( s ):
+    shutil.rmtree( s.cache_dir )
+    os.makedirs( s.cache_dir )
+
+#-------------------------------------------------------------------------
+# SramLibrary
+#-------------------------------------------------------------------------
+
+class SramLibrary:
+
+  def __init__( s, cfg_globs=None, cache_dir=None, generator=run_openram ):
+
+    s.cfgs      = {}
+    s.cache     = SramViewCache( cache_dir ) if cache_dir else None
+    s.generator = generator
+
+    for path in find_sram_cfgs( cfg_globs ):
+      s.add_cfg( path )
+
+  # Adds a configuration, returns None if it is not a configuration of
+  # an SRAM we have a model for or if there already is a macro with the
+  # same name
+
+  def add_cfg( s, path ):
+    cfg = read_sram_cfg( path )
+    if cfg is None or cfg.ports is None or cfg.name in s.cfgs:
+      return None
+    s.cfgs[ cfg.name ] = cfg
+    return cfg
+
+  def __getitem__( s, name ):
+    return s.cfgs[ name ]
+
+  def __contains__( s, name ):
+    return name in s.cfgs
+
+  #-----------------------------------------------------------------------
+  # query
+  #-----------------------------------------------------------------------
+  # Returns the configurations of the macros with the given width, depth,
+  # ports, and corner (None matches anything), smallest macro first
+
+  def query( s, data_nbits=None, num_entries=None, ports=None, corner=None ):
+
+    def match( value, want ):
+      return want is None or value == want
+
+    cfgs = [ cfg for cfg in s.cfgs.values()
+             if  match( cfg.data_nbits, data_nbits ) and match( cfg.num_entries, num_entries )
+             and match( cfg.ports, ports ) and ( corner is None or corner in cfg.corners ) ]
+
+    return sorted( cfgs, key=lambda cfg: ( cfg.data_nbits * cfg.num_entries, cfg.name ) )
+
+  # Returns the configuration of the macro with exactly the given size,
+  # ports, and corner or None
+
+  def find( s, data_nbits, num_entries, ports='1rw', corner=None ):
+    cfgs = s.query( data_nbits, num_entries, ports, corner )
+    return cfgs[0] if cfgs else None
+
+  #-----------------------------------------------------------------------
+  # Models
+  #-----------------------------------------------------------------------
+
+  # Returns the model of a macro, which is the registered model if there
+  # is one (see SramTiler.py) and the generated one otherwise
+
+  def macro_cls( s, name ):
+
+    from .SramTiler import sram_macros
+
+    if name in sram_macros:
+      return sram_macros[ name ].cls
+
+    cfg = s.cfgs[ name ]
+    return mk_sram_macro_cls( cfg.data_nbits, cfg.num_entries, cfg.ports )
+
+  # Writes the Verilog model of a macro (by default next to the other
+  # models in this directory) unless it exists, returns its path
+
+  def write_verilog( s, name, path=None ):
+
+    cfg  = s.cfgs[ name ]
+    path = path or os.path.join( this_dir, f"{name}.v" )
+
+    if not os.path.exists( path ):
+      with open( path, 'w' ) as f:
+        f.write( gen_sram_macro_v( name, cfg.data_nbits, cfg.num_entries, cfg.ports ) )
+
+    return path
+
+  #-----------------------------------------------------------------------
+  # views
+  #-----------------------------------------------------------------------
+  # Returns the views of a macro from the cache or from a manual OpenRAM
+  # run next to its configuration. If there are none and generate is set
+  # the views are generated into the cache, otherwise returns None.
+
+  def views( s, name, generate=False ):
+
+    cfg = s.cfgs[ name ]
+
+    if s.cache is not None and cfg in s.cache:
+      return s.cache.views( cfg )
+
+    if os.path.isdir( cfg.views_dir ):
+      return sram_views( cfg, cfg.views_dir )
+
+    if generate:
+      assert s.cache is not None, "Generating views needs a cache directory!"
+      return s.cache.generate( cfg, s.generator )
+
+    return None
+
+  #-----------------------------------------------------------------------
+  # register
+  #-----------------------------------------------------------------------
+  # Registers every macro with the SRAM tiler, using the characterization
+  # of the given corner (default is the first corner of the macro) from
+  # its .lib view if there is one. Macros without the corner are skipped.
+  # Returns the registered SramMacros.
+
+  def register( s, corner=None ):
+
+    from .SramTiler import register_sram_macro, read_sram_lib
+
+    macros = []
+    for cfg in s.query( corner=corner ):
+
+      views = s.views( cfg.name )
+      lib   = views['lib'].get( corner or cfg.corners[0] ) if views else None
+      char  = read_sram_lib( lib ) if lib else None
+
+      macros.append( register_sram_macro( s.macro_cls( cfg.name ), cfg.data_nbits,
+                                          cfg.num_entries, cfg.name, char, cfg.ports ) )
+
+    return macros
@@ -0,0 +1,23 @@
+//========================================================================
+// Read-during-write semantics of the SRAM macros
+//========================================================================
+// The SRAM macros are black boxes from the OpenRAM libraries in
+// synthesis and only their simulation models (SRAM_*.v) take the
+// read-during-write semantics, so the wrappers instantiate the macros
+// with `SRAM_MACRO_SEMANTICS instead of a parameter list:
+//
+//   SRAM_32x256_1rw `SRAM_MACRO_SEMANTICS sram (.*);
+//
+// which sets p_semantics of the simulation model to the p_semantics of
+// the wrapper and expands to nothing in synthesis.
+
+`ifndef SRAM_SRAM_MACRO_SEMANTICS_V
+`define SRAM_SRAM_MACRO_SEMANTICS_V
+
+`ifdef SYNTHESIS
+`define SRAM_MACRO_SEMANTICS
+`else
+`define SRAM_MACRO_SEMANTICS #(.p_semantics(p_semantics))
+`endif
+
+`endif /* SRAM_SRAM_MACRO_SEMANTICS_V */
@@ -8,7 +8,7 @@
 #
 # The interface of this module are prefixed by port0_, meaning all reads
 # and writes happen through the only port. Multiported SRAMs have ports
-# prefixed by port1_, port2_, etc.
+# prefixed by port1_, port2_, etc. (see the ports parameter below).
 #
 # The following list describes each port of this module.
 #
@@ -19,91 +19,533 @@
 #  port0_idx     I          index
 #  port0_wdata   I          write data
 #  port0_rdata   O          read data output
+#  port0_wben    I          write mask (only if mask_size > 0)
 #
+# If mask_size is non-zero each word is split into mask_size lanes and a
+# write only updates the lanes whose bit in port0_wben is set. Any
+# mask_size which divides data_nbits is supported (e.g., byte or word
+# lanes).
+#
+# The SRAM is built from the available SRAM macros using the tiling
+# chosen by choose_sram_tiling (see SramTiler.py): ncols macros side by
+# side store the bits of each word and nrows rows of macros are selected
+# by the upper bits of the index. Since the macros do not support write
+# masks, each macro column is within a single lane and is only written if
+# the mask bit of that lane is set. If there is no suitable tiling we use
+# the generic SRAM model (with a write mask if needed). To add a new SRAM
+# macro, register it with register_sram_macro in SramTiler.py or add its
+# OpenRAM -cfg.py file to this directory. With objective='verilog' we only
+# use the macros SramVRTL.v selects for the same configuration, which is
+# what SramRTL does so both languages build the same SRAM.
+#
+# The ports parameter selects the port configuration:
+#
+#  - '1rw'  : a single read/write port (port0_, default)
+#  - '2rw'  : two read/write ports with the same interface as port0_
+#             (port0_ and port1_)
+#  - '1r1w' : a write port (port0_val, port0_idx, port0_wdata) and a read
+#             port (port1_val, port1_idx, port1_rdata)
+#
+# Both ports of a 1r1w or 2rw SRAM can be used in every cycle. Reads
+# return the old data if the other port writes the same entry in the same
+# cycle, and if both ports of a 2rw SRAM write the same entry port 1 wins.
+# Multiported SRAMs use an SRAM macro only if there is one with exactly
+# the right size and ports (see find_sram_macro), otherwise they use the
+# generic models (SramGeneric1r1wPRTL, SramGeneric2rwPRTL). They do not
+# support write masks.
+#
+# The storage parameter is passed down to the generic SRAM models and
+# selects the storage engine used during simulation (see
+# SramGenericPRTL). Only the default 'wire' storage can be translated.
+# Similarly, activity=True enables the simulation-only access counters of
+# every SRAM macro or generic SRAM inside (see SramActivity.py and
+# SramEnergy.py).
+#
+# The semantics parameter selects the read-during-write semantics of the
+# SRAM macros and generic SRAMs inside ('read-first', 'write-first', or
+# 'x-on-write', see SramSemantics.py), by default each model keeps its
+# own semantics (x-on-write for 1rw SRAMs and read-first for multiported
+# SRAMs). With check=True (simulation only) the SRAM has an additional
+# portN_rdata_x output for every read data output which is one whenever
+# the read data is undefined in the Verilog models, so wrappers can
+# assert that they never use don't-care read data.
+#
+# With trace=True the SRAM records every access in a compact binary
+# transaction trace in s.trace (see SramTrace.py) which keeps the most
+# recent accesses in a ring buffer, and with trace=<path> the trace is
+# also streamed to a compressed file. This is much cheaper than line
+# tracing long simulations, and the sram-trace script renders a trace
+# file in the line trace format offline. Call s.trace.close() at the end
+# of the simulation to write the remaining records to the file.
+#
+# The load and dump methods provide a zero-cycle backdoor into the
+# memory contents of the whole SRAM, independent of how it is split into
+# SRAM macros (see SramStorage.py for the data format), and load_image
+# preloads the SRAM from a hex, raw binary, or ELF image file (see
+# SramImage.py).
 
 from pymtl3            import *
-from .SramGenericPRTL  import SramGenericPRTL
-from .SRAM_32x256_1rw  import SRAM_32x256_1rw
-from .SRAM_128x256_1rw import SRAM_128x256_1rw
+from .SramGenericPRTL     import SramGenericPRTL
+from .SramGeneric1r1wPRTL import SramGeneric1r1wPRTL
+from .SramGeneric2rwPRTL  import SramGeneric2rwPRTL
+from .SramStorage         import sram_words
+from .SramImage           import load_sram_image
+from .SramTiler           import choose_sram_tiling, find_sram_macro
+from .SramTrace           import SramTrace
+
+# Options passed to every SRAM macro or generic SRAM, semantics=None keeps
+# the default semantics of the model
 
-# ''' TUTORIAL TASK '''''''''''''''''''''''''''''''''''''''''''''''''''''
-# Import new SRAM configuration RTL model
-# '''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''
+def mk_sram_opts( storage, activity, semantics, check ):
+  opts = { 'storage' : storage, 'activity' : activity, 'check' : check }
+  if semantics is not None:
+    opts['semantics'] = semantics
+  return opts
 
 class SramPRTL( Component ):
 
-  def construct( s, data_nbits=32, num_entries=256, mask_size=0 ):
+  def construct( s, data_nbits=32, num_entries=256, mask_size=0, storage='wire',
+                 objective='area', ports='1rw', activity=False, trace=False,
+                 semantics=None, check=False ):
 
     idx_nbits = clog2( num_entries )      # address width
     nbytes    = int( data_nbits + 7 ) // 8 # $ceil(data_nbits/8)
 
+    s.ports = ports
+
+    if ports not in [ '1rw', '2rw', '1r1w' ]:
+      raise ValueError( f"Unknown SRAM port configuration '{ports}'!" )
+
+    if trace:
+      s.construct_trace( data_nbits, num_entries, mask_size, ports, trace )
+
+    opts = mk_sram_opts( storage, activity, semantics, check )
+
+    if ports == '1r1w':
+      s.construct_1r1w( data_nbits, num_entries, mask_size, opts )
+      return
+
+    if ports == '2rw':
+      s.construct_2rw( data_nbits, num_entries, mask_size, opts )
+      return
+
     s.port0_val   = InPort ()
     s.port0_type  = InPort ()
     s.port0_idx   = InPort ( idx_nbits )
     s.port0_wdata = InPort ( data_nbits )
     s.port0_rdata = OutPort( data_nbits )
 
-    s.mask_size = mask_size
+    s.nbytes      = nbytes
+    s.num_entries = num_entries
+    s.mask_size   = mask_size
     if mask_size > 0:
       s.port0_wben  = InPort( mask_size )
 
+    assert mask_size == 0 or data_nbits % mask_size == 0, \
+      f"Cannot split {data_nbits}b words into {mask_size} lanes"
+
     # Inverters
 
     s.port0_val_bar = Wire()
     s.port0_val_bar //= lambda: ~s.port0_val
 
-    # if you have implemented a new SRAM, make sure use it
-    # here instead of the generic one.
+    s.port0_type_bar = Wire()
+    s.port0_type_bar //= lambda: ~s.port0_type
 
-    if data_nbits == 128 and num_entries == 256 and mask_size > 0:
-      assert mask_size == 4, "We only support dividing 128x256 into four 32x256"
+    s.tiling = tiling = choose_sram_tiling( data_nbits, num_entries, mask_size, objective )
 
-      s.webs = Wire( mask_size )
-      for i in range(mask_size):
-        s.webs[i] //= lambda: ~(s.port0_type & s.port0_wben[i])
+    if tiling is None:
+      s.sram = m = SramGenericPRTL( data_nbits, num_entries, mask_size, **opts )
+      m.clk0  //= s.clk
+      m.csb0  //= s.port0_val_bar  # csb0 low-active
+      m.web0  //= s.port0_type_bar # web0 low-active
+      m.addr0 //= s.port0_idx
+      m.din0  //= s.port0_wdata
+      m.dout0 //= s.port0_rdata
 
-      s.srams = [ SRAM_32x256_1rw() for _ in range(4) ]
+      if mask_size > 0:
+        m.wmask0 //= s.port0_wben
 
-      for i, m in enumerate( s.srams ):
-        m.clk0  //= s.clk
-        m.csb0  //= s.port0_val_bar  # csb0 low-active
-        m.web0  //= s.webs[i] # web0 low-active
-        m.addr0 //= s.port0_idx
-        m.din0  //= s.port0_wdata[i*32:(i+1)*32]
-        m.dout0 //= s.port0_rdata[i*32:(i+1)*32]
+      if check:
+        s.port0_rdata_x = OutPort()
+        s.port0_rdata_x //= m.dout0_x
 
+      return
+
+    macro = tiling.macro
+    w     = macro.data_nbits
+    nrows = tiling.nrows
+    ncols = tiling.ncols
+
+    macro_idx_nbits = clog2( macro.num_entries )
+
+    # Macros are stored row by row, i.e., srams[r*ncols+c] is in row r and
+    # column c. A single macro is s.sram and several macros are s.srams,
+    # a component stored under two names would be translated twice.
+    # s._srams is a private list of the macros in both cases.
+
+    s._srams = [ macro.cls( **opts ) for _ in range( nrows*ncols ) ]
+
+    if len( s._srams ) == 1:
+      s.sram  = s._srams[0]
+    else:
+      s.srams = s._srams
+
+    # Write data padded to a whole number of columns
+
+    s.tile_din = Wire( ncols*w )
+
+    if ncols*w == data_nbits:
+      s.tile_din //= s.port0_wdata
+    else:
+      s.tile_din //= lambda: zext( s.port0_wdata, ncols*w )
+
+    # Address of the word within a macro
+
+    s.tile_addr = Wire( macro_idx_nbits )
+
+    if macro_idx_nbits <= idx_nbits:
+      s.tile_addr //= s.port0_idx[0:macro_idx_nbits]
     else:
-      assert mask_size == 0, "We only support dividing 128x256 into four 32x256"
+      s.tile_addr //= lambda: zext( s.port0_idx, macro_idx_nbits )
+
+    # Write enables (low-active) of every column
 
-      s.port0_type_bar = Wire()
-      s.port0_type_bar //= lambda: ~s.port0_type
+    s.tile_webs = Wire( ncols )
 
-      if data_nbits == 32 and num_entries == 256:
-        s.sram = m = SRAM_32x256_1rw()
+    if mask_size > 0:
+      lane_nbits = data_nbits // mask_size
+      for c in range( ncols ):
+        lane = ( c*w ) // lane_nbits
+        s.tile_webs[c] //= lambda: ~(s.port0_type & s.port0_wben[lane])
+    else:
+      for c in range( ncols ):
+        s.tile_webs[c] //= s.port0_type_bar
+
+    # Chip selects (low-active) of every row, the row is selected by the
+    # upper bits of the index
+
+    s.tile_csbs = Wire( nrows )
+
+    if nrows == 1:
+      s.tile_csbs //= s.port0_val_bar
+
+    else:
+      BitsRow  = mk_bits( clog2( nrows ) )
+      row_lo   = macro_idx_nbits
+      row_hi   = macro_idx_nbits + clog2( nrows )
+
+      s.row_M0 = Wire( BitsRow )
+      s.row_M1 = Wire( BitsRow )
+      s.row_M0 //= s.port0_idx[row_lo:row_hi]
+
+      @update
+      def comb_csbs():
+        for r in range( nrows ):
+          s.tile_csbs[r] @= ~( s.port0_val & ( s.row_M0 == r ) )
+
+      # the read data is available in the next cycle, so we also need the
+      # selected row in the next cycle to mux the output
+
+      @update_ff
+      def up_row_M1():
+        s.row_M1 <<= s.row_M0
+
+    # Connect the macros
+
+    s.tile_douts = [ Wire( ncols*w ) for _ in range( nrows ) ]
+
+    for r in range( nrows ):
+      for c in range( ncols ):
+        m = s._srams[ r*ncols + c ]
         m.clk0  //= s.clk
-        m.csb0  //= s.port0_val_bar  # csb0 low-active
-        m.web0  //= s.port0_type_bar # web0 low-active
-        m.addr0 //= s.port0_idx
-        m.din0  //= s.port0_wdata
-        m.dout0 //= s.port0_rdata
+        m.csb0  //= s.tile_csbs[r]
+        m.web0  //= s.tile_webs[c]
+        m.addr0 //= s.tile_addr
+        m.din0  //= s.tile_din[ c*w : (c+1)*w ]
+        m.dout0 //= s.tile_douts[r][ c*w : (c+1)*w ]
+
+    # Output muxing
+
+    if nrows == 1:
+      s.port0_rdata //= s.tile_douts[0][0:data_nbits]
+
+    else:
+      @update
+      def comb_rdata():
+        s.port0_rdata @= s.tile_douts[ s.row_M1 ][0:data_nbits]
 
-      # ''' TUTORIAL TASK '''''''''''''''''''''''''''''''''''''''''''''''''
-      # Choose new SRAM configuration RTL model
-      # '''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''
+    # The read data is undefined if the read data of any macro in the
+    # selected row is undefined (e.g., the columns written by a masked
+    # write)
+
+    if check:
+
+      s.port0_rdata_x = OutPort()
+      s.tile_douts_x  = [ Wire( ncols ) for _ in range( nrows ) ]
+
+      for r in range( nrows ):
+        for c in range( ncols ):
+          s.tile_douts_x[r][c] //= s._srams[ r*ncols + c ].dout0_x
+
+      if nrows == 1:
+        s.port0_rdata_x //= lambda: reduce_or( s.tile_douts_x[0] )
 
       else:
-        s.sram = m = SramGenericPRTL( data_nbits, num_entries )
-        m.clk0  //= s.clk
-        m.csb0  //= s.port0_val_bar  # csb0 low-active
-        m.web0  //= s.port0_type_bar # web0 low-active
-        m.addr0 //= s.port0_idx
-        m.din0  //= s.port0_wdata
-        m.dout0 //= s.port0_rdata
+        @update
+        def comb_rdata_x():
+          s.port0_rdata_x @= reduce_or( s.tile_douts_x[ s.row_M1 ] )
+
+  #-----------------------------------------------------------------------
+  # 1r1w SRAM
+  #-----------------------------------------------------------------------
+
+  def construct_1r1w( s, data_nbits, num_entries, mask_size, opts ):
+
+    assert mask_size == 0, "1r1w SRAMs do not support write masks"
+
+    idx_nbits = clog2( num_entries )
+
+    s.port0_val   = InPort ()
+    s.port0_idx   = InPort ( idx_nbits )
+    s.port0_wdata = InPort ( data_nbits )
+
+    s.port1_val   = InPort ()
+    s.port1_idx   = InPort ( idx_nbits )
+    s.port1_rdata = OutPort( data_nbits )
+
+    s.nbytes      = int( data_nbits + 7 ) // 8
+    s.num_entries = num_entries
+    s.mask_size   = 0
+    s.tiling      = None
+
+    # Inverters
+
+    s.port0_val_bar = Wire()
+    s.port0_val_bar //= lambda: ~s.port0_val
+
+    s.port1_val_bar = Wire()
+    s.port1_val_bar //= lambda: ~s.port1_val
+
+    macro = find_sram_macro( data_nbits, num_entries, '1r1w' )
+
+    if macro is None:
+      s.sram = m = SramGeneric1r1wPRTL( data_nbits, num_entries, **opts )
+    else:
+      s.sram = m = macro.cls( **opts )
+
+    m.clk0  //= s.clk
+    m.csb0  //= s.port0_val_bar # csb0 low-active
+    m.addr0 //= s.port0_idx
+    m.din0  //= s.port0_wdata
+
+    m.clk1  //= s.clk
+    m.csb1  //= s.port1_val_bar # csb1 low-active
+    m.addr1 //= s.port1_idx
+    m.dout1 //= s.port1_rdata
+
+    if opts['check']:
+      s.port1_rdata_x = OutPort()
+      s.port1_rdata_x //= m.dout1_x
+
+  #-----------------------------------------------------------------------
+  # 2rw SRAM
+  #-----------------------------------------------------------------------
+
+  def construct_2rw( s, data_nbits, num_entries, mask_size, opts ):
+
+    assert mask_size == 0, "2rw SRAMs do not support write masks"
+
+    idx_nbits = clog2( num_entries )
+
+    s.port0_val   = InPort ()
+    s.port0_type  = InPort ()
+    s.port0_idx   = InPort ( idx_nbits )
+    s.port0_wdata = InPort ( data_nbits )
+    s.port0_rdata = OutPort( data_nbits )
+
+    s.port1_val   = InPort ()
+    s.port1_type  = InPort ()
+    s.port1_idx   = InPort ( idx_nbits )
+    s.port1_wdata = InPort ( data_nbits )
+    s.port1_rdata = OutPort( data_nbits )
+
+    s.nbytes      = int( data_nbits + 7 ) // 8
+    s.num_entries = num_entries
+    s.mask_size   = 0
+    s.tiling      = None
+
+    # Inverters
+
+    s.port0_val_bar = Wire()
+    s.port0_val_bar //= lambda: ~s.port0_val
+
+    s.port0_type_bar = Wire()
+    s.port0_type_bar //= lambda: ~s.port0_type
+
+    s.port1_val_bar = Wire()
+    s.port1_val_bar //= lambda: ~s.port1_val
+
+    s.port1_type_bar = Wire()
+    s.port1_type_bar //= lambda: ~s.port1_type
+
+    macro = find_sram_macro( data_nbits, num_entries, '2rw' )
+
+    if macro is None:
+      s.sram = m = SramGeneric2rwPRTL( data_nbits, num_entries, **opts )
+    else:
+      s.sram = m = macro.cls( **opts )
+
+    m.clk0  //= s.clk
+    m.csb0  //= s.port0_val_bar  # csb0 low-active
+    m.web0  //= s.port0_type_bar # web0 low-active
+    m.addr0 //= s.port0_idx
+    m.din0  //= s.port0_wdata
+    m.dout0 //= s.port0_rdata
+
+    m.clk1  //= s.clk
+    m.csb1  //= s.port1_val_bar  # csb1 low-active
+    m.web1  //= s.port1_type_bar # web1 low-active
+    m.addr1 //= s.port1_idx
+    m.din1  //= s.port1_wdata
+    m.dout1 //= s.port1_rdata
+
+    if opts['check']:
+      s.port0_rdata_x = OutPort()
+      s.port1_rdata_x = OutPort()
+      s.port0_rdata_x //= m.dout0_x
+      s.port1_rdata_x //= m.dout1_x
+
+  #-----------------------------------------------------------------------
+  # Transaction trace
+  #-----------------------------------------------------------------------
+  # The update block only refers to the ports of the configuration, which
+  # are created after the trace by the rest of the constructor.
+
+  def construct_trace( s, data_nbits, num_entries, mask_size, ports, trace ):
+
+    s.trace = SramTrace( data_nbits, num_entries, mask_size, ports,
+                         path=None if trace is True else trace )
+
+    if ports == '1r1w':
+
+      s.trace.rdata_ports[1] = lambda: s.port1_rdata
+
+      @update_ff
+      def up_trace_1r1w():
+        if s.reset:
+          s.trace.restart()
+        else:
+          s.trace.resolve( 1, s.port1_rdata )
+          s.trace.access( 0, s.port0_val, 1, s.port0_idx, s.port0_wdata )
+          s.trace.access( 1, s.port1_val, 0, s.port1_idx, 0 )
+          s.trace.tick()
+
+    elif ports == '2rw':
+
+      s.trace.rdata_ports[0] = lambda: s.port0_rdata
+      s.trace.rdata_ports[1] = lambda: s.port1_rdata
+
+      @update_ff
+      def up_trace_2rw():
+        if s.reset:
+          s.trace.restart()
+        else:
+          s.trace.resolve( 0, s.port0_rdata )
+          s.trace.resolve( 1, s.port1_rdata )
+          s.trace.access( 0, s.port0_val, s.port0_type, s.port0_idx, s.port0_wdata )
+          s.trace.access( 1, s.port1_val, s.port1_type, s.port1_idx, s.port1_wdata )
+          s.trace.tick()
+
+    elif mask_size > 0:
+
+      s.trace.rdata_ports[0] = lambda: s.port0_rdata
+
+      @update_ff
+      def up_trace_mask():
+        if s.reset:
+          s.trace.restart()
+        else:
+          s.trace.resolve( 0, s.port0_rdata )
+          s.trace.access( 0, s.port0_val, s.port0_type, s.port0_idx, s.port0_wdata,
+                          s.port0_wben )
+          s.trace.tick()
+
+    else:
+
+      s.trace.rdata_ports[0] = lambda: s.port0_rdata
+
+      @update_ff
+      def up_trace():
+        if s.reset:
+          s.trace.restart()
+        else:
+          s.trace.resolve( 0, s.port0_rdata )
+          s.trace.access( 0, s.port0_val, s.port0_type, s.port0_idx, s.port0_wdata )
+          s.trace.tick()
+
+  def num_resident_pages( s ):
+    if s.tiling is None:
+      return s.sram.num_resident_pages()
+    return sum([ m.num_resident_pages() for m in s._srams ])
+
+  # Backdoor access to the memory contents, split into the words of each
+  # macro of the tiling
+
+  def load( s, data, base_idx=0 ):
+    if s.tiling is None:
+      s.sram.load( data, base_idx )
+      return
+
+    words = sram_words( data, s.nbytes )
+    assert 0 <= base_idx and base_idx + len(words) <= s.num_entries, \
+      f"Cannot load words [{base_idx},{base_idx+len(words)}) into an SRAM " \
+      f"with {s.num_entries} entries!"
+
+    w, n = s.tiling.macro.data_nbits, s.tiling.macro.num_entries
+    mask = ( 1 << w ) - 1
+
+    for r in range( s.tiling.nrows ):
+      lo = max( base_idx, r*n )
+      hi = min( base_idx + len(words), (r+1)*n )
+      if lo >= hi:
+        continue
+      for c in range( s.tiling.ncols ):
+        s._srams[ r*s.tiling.ncols + c ].load(
+          [ ( word >> (c*w) ) & mask for word in words[ lo-base_idx : hi-base_idx ] ],
+          lo - r*n )
+
+  def dump( s, lo=0, hi=None ):
+    if s.tiling is None:
+      return s.sram.dump( lo, hi )
+
+    if hi is None:
+      hi = s.num_entries
+
+    w, n  = s.tiling.macro.data_nbits, s.tiling.macro.num_entries
+    words = []
+
+    for r in range( s.tiling.nrows ):
+      row_lo = max( lo, r*n )
+      row_hi = min( hi, (r+1)*n )
+      if row_lo >= row_hi:
+        continue
+      dumps = [ s._srams[ r*s.tiling.ncols + c ].dump( row_lo - r*n, row_hi - r*n )
+                for c in range( s.tiling.ncols ) ]
+      words.extend([ sum([ word << (c*w) for c, word in enumerate( col_words ) ])
+                     for col_words in zip( *dumps ) ])
+
+    return words
+
+  def load_image( s, path, fmt=None, base_idx=0 ):
+    return load_sram_image( s, path, fmt, base_idx )
 
   def line_trace( s ):
-    try:
-      print(s.webs, s.port0_wben)
-    except: pass
-    if s.mask_size == 0:
+    if s.ports == '1r1w':
+      return f"(addr0={s.sram.addr0} din0={s.sram.din0} addr1={s.sram.addr1} dout1={s.sram.dout1})"
+    if s.ports == '2rw':
+      return f"(addr0={s.sram.addr0} din0={s.sram.din0} dout0={s.sram.dout0})" \
+             f"(addr1={s.sram.addr1} din1={s.sram.din1} dout1={s.sram.dout1})"
+    if s.tiling is None:
       return f"(addr0={s.sram.addr0} din0={s.sram.din0} dout0={s.sram.dout0})"
-    return "".join([ f"(addr0={x.addr0} din0={x.din0} dout0={x.dout0})" for x in s.srams ])
+    return "".join([ f"(addr0={x.addr0} din0={x.din0} dout0={x.dout0})" for x in s._srams ])
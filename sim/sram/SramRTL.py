@@ -16,22 +16,58 @@ rtl_language = 'pymtl'
 from pymtl3 import *
 from pymtl3.passes.backends.verilog import *
 
+from .SramSemantics import sram_semantics, check_sram_semantics
+
 class SramVRTL( VerilogPlaceholder, Component ):
 
   # Constructor
 
-  def construct( s, data_nbits=32, num_entries=256, mask_size=0 ):
+  def construct( s, data_nbits=32, num_entries=256, mask_size=0, ports='1rw',
+                 activity=False, trace=False, semantics=None, check=False,
+                 objective='verilog' ):
+
+    assert objective == 'verilog', "SramVRTL.v selects its SRAM macros by hand"
+    assert not activity, "Access counters are only available in the PyMTL model"
+    assert not trace,    "Transaction traces are only available in the PyMTL model"
+    assert not check,    "X checks are only available in the PyMTL model"
+
+    # semantics=None keeps the default semantics of the Verilog model
+
+    params = {}
+    if semantics is not None:
+      check_sram_semantics( semantics )
+      params['p_semantics'] = sram_semantics[ semantics ]
 
     addr_width = clog2( num_entries )      # address width
     nbytes     = int( data_nbits + 7 ) // 8 # $ceil(num_bits/8)
 
     # Interface
 
-    s.port0_val   = InPort ()
-    s.port0_type  = InPort ()
-    s.port0_idx   = InPort ( addr_width )
-    s.port0_wdata = InPort ( data_nbits   )
-    s.port0_rdata = OutPort( data_nbits   )
+    if ports == '1r1w':
+
+      s.port0_val   = InPort ()
+      s.port0_idx   = InPort ( addr_width )
+      s.port0_wdata = InPort ( data_nbits   )
+
+      s.port1_val   = InPort ()
+      s.port1_idx   = InPort ( addr_width )
+      s.port1_rdata = OutPort( data_nbits   )
+
+    else:
+
+      s.port0_val   = InPort ()
+      s.port0_type  = InPort ()
+      s.port0_idx   = InPort ( addr_width )
+      s.port0_wdata = InPort ( data_nbits   )
+      s.port0_rdata = OutPort( data_nbits   )
+
+    if ports == '2rw':
+
+      s.port1_val   = InPort ()
+      s.port1_type  = InPort ()
+      s.port1_idx   = InPort ( addr_width )
+      s.port1_wdata = InPort ( data_nbits   )
+      s.port1_rdata = OutPort( data_nbits   )
 
     if mask_size > 0:
       s.port0_wben = InPort( mk_bits(mask_size) )
@@ -39,20 +75,37 @@ class SramVRTL( VerilogPlaceholder, Component ):
     # Verilog import setup
 
     from os import path
-    s.set_metadata( VerilogPlaceholderPass.src_file, path.dirname(__file__) + '/SramVRTL.v' )
-    s.set_metadata( VerilogPlaceholderPass.top_module, 'sram_SramVRTL' )
-    s.set_metadata( VerilogPlaceholderPass.params, {
-      'p_data_nbits'  : data_nbits,
-      'p_num_entries' : num_entries,
-    })
+
+    if ports == '1rw':
+      s.set_metadata( VerilogPlaceholderPass.src_file, path.dirname(__file__) + '/SramVRTL.v' )
+      s.set_metadata( VerilogPlaceholderPass.top_module, 'SramVRTL' )
+      s.set_metadata( VerilogPlaceholderPass.params, {
+        'p_data_nbits'  : data_nbits,
+        'p_num_entries' : num_entries,
+        'p_mask_size'   : mask_size,
+        **params,
+      })
+
+    elif ports in [ '1r1w', '2rw' ]:
+      assert mask_size == 0, f"{ports} SRAMs do not support write masks"
+      s.set_metadata( VerilogPlaceholderPass.src_file, path.dirname(__file__) + f'/Sram{ports}VRTL.v' )
+      s.set_metadata( VerilogPlaceholderPass.top_module, f'Sram{ports}VRTL' )
+      s.set_metadata( VerilogPlaceholderPass.params, {
+        'p_data_nbits'  : data_nbits,
+        'p_num_entries' : num_entries,
+        **params,
+      })
+
+    else:
+      raise ValueError( f"Unknown SRAM port configuration '{ports}'!" )
 
 # See if the course staff want to force testing a specific RTL language
 # for their own testing.
 
-# import sys
-# if hasattr( sys, '_called_from_test' ):
-  # if sys._pymtl_rtl_override:
-    # rtl_language = sys._pymtl_rtl_override
+import sys
+if hasattr( sys, '_called_from_test' ):
+  if sys._pymtl_rtl_override:
+    rtl_language = sys._pymtl_rtl_override
 
 # Import the appropriate version based on the rtl_language variable
 
@@ -63,10 +116,20 @@ elif rtl_language == 'verilog':
 else:
   raise Exception("Invalid RTL language!")
 
+# Both languages use the macros selected by SramVRTL.v (see
+# verilog_sram_tiling in SramTiler.py)
+
 class SramRTL( _cls ):
-  def construct( s, data_nbits=32, num_entries=256, mask_size=0 ):
-    super().construct( data_nbits, num_entries, mask_size )
+  def construct( s, data_nbits=32, num_entries=256, mask_size=0, ports='1rw',
+                 activity=False, trace=False, semantics=None, check=False ):
+    super().construct( data_nbits, num_entries, mask_size, ports=ports, activity=activity,
+                       trace=trace, semantics=semantics, check=check, objective='verilog' )
 
     # The translated Verilog must be xRTL.v instead of xPRTL.v
-    s.set_metadata( VerilogTranslationPass.explicit_module_name,
-                    f'sram_SramRTL_mask{mask_size}_{data_nbits}b_{num_entries}words' )
+    suffix = '' if semantics is None else '_' + semantics.replace( '-', '_' )
+    if ports == '1rw':
+      s.set_metadata( VerilogTranslationPass.explicit_module_name,
+                      f'sram_SramRTL_mask{mask_size}_{data_nbits}b_{num_entries}words{suffix}' )
+    else:
+      s.set_metadata( VerilogTranslationPass.explicit_module_name,
+                      f'sram_SramRTL_{ports}_{data_nbits}b_{num_entries}words{suffix}' )
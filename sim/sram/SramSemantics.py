@@ -0,0 +1,40 @@
+#=========================================================================
+# SramSemantics
+#=========================================================================
+# Read-during-write semantics of the generic SRAM models. They select
+# what a read of an entry returns if the entry is written in the same
+# cycle, either by the same port (i.e., the read data of a write) or by
+# the other port of a multiported SRAM:
+#
+#  - 'read-first'  : the data stored before the clock edge
+#  - 'write-first' : the data written in this cycle (if both ports of a
+#                    2rw SRAM write the same entry, the data of port 1)
+#  - 'x-on-write'  : undefined (X in Verilog), as in the OpenRAM macros
+#
+# In x-on-write mode the PyMTL models still return a defined value (zero
+# for the read data of a write and the old data for a read of an entry
+# the other port writes), and since PyMTL has no X the difference to the
+# Verilog models is invisible in simulation. With check=True the generic
+# models flag these cases: every read data output gets a doutN_x output
+# which is one whenever the Verilog model returns X (i.e., after cycles
+# without a read and after the X cases above), and two ports writing the
+# same entry in x-on-write mode raise an AssertionError. Wrappers which
+# rely on don't-care read data (see SramPRTL and SramMinionPRTL) use
+# these outputs to assert that they never use undefined read data. The
+# checks only add one update block per SRAM, so they are cheap enough to
+# leave enabled in regressions.
+#
+# The Verilog generic models take the same semantics as the p_semantics
+# parameter, encoded as in sram_semantics. SramVRTL passes its semantics
+# to the simulation models of the macros and the generic SRAMs as
+# p_semantics, the X checks remain PyMTL-only.
+
+sram_semantics = {
+  'read-first'  : 0,
+  'write-first' : 1,
+  'x-on-write'  : 2,
+}
+
+def check_sram_semantics( semantics ):
+  if semantics not in sram_semantics:
+    raise ValueError( f"Unknown read-during-write semantics '{semantics}'!" )
@@ -0,0 +1,204 @@
+#=========================================================================
+# SRAM random stimulus
+#=========================================================================
+# Bulk random stimulus generation and golden-model checking for SramRTL.
+# Instead of building one test vector row (a Python list) per cycle, we
+# generate all transactions up front in a few compact buffers:
+#
+#  - val   : bytearray with one 0/1 byte per cycle (75% valid)
+#  - type_ : bytearray with one 0/1 byte per cycle (1 = write)
+#  - idx   : array of word indices
+#  - wdata : bytearray of packed little-endian words
+#  - wben  : array of write masks (only if mask_size > 0)
+#
+# The first num_entries cycles write every word once so that no read
+# depends on the initial contents of the SRAM, and all remaining cycles
+# are random reads and writes. The random bytes are drawn with a single
+# call per buffer and turned into valid and type flags with
+# bytes.translate, so generating millions of transactions only takes a
+# fraction of a second.
+#
+# sram_golden_rdata runs the transactions on a flat golden memory and
+# returns the data of every read as one packed buffer, run_sram_stimulus
+# drives the model (without line tracing or per-cycle checks) and
+# collects the data of every read into a buffer with the same layout, and
+# check_sram_rdata compares the two buffers at once and reports the first
+# mismatching read only if they differ. The idx, wben, and read cycle
+# buffers use array.array rather than NumPy arrays so the tests do not
+# need any packages beyond PyMTL.
+
+import random
+from array import array
+
+from pymtl3                   import *
+from pymtl3.stdlib.test_utils import config_model_with_cmdline_opts
+
+# Translation tables which turn a random byte into a flag
+
+VAL_TABLE  = bytes([ int( ( b & 3 ) != 0 ) for b in range(256) ])
+TYPE_TABLE = bytes([ b & 1 for b in range(256) ])
+
+#-------------------------------------------------------------------------
+# SramStimulus
+#-------------------------------------------------------------------------
+
+class SramStimulus:
+
+  def __init__( s, data_nbits, num_entries, mask_size, val, type_, idx, wdata, wben ):
+    s.data_nbits  = data_nbits
+    s.num_entries = num_entries
+    s.mask_size   = mask_size
+    s.nbytes      = data_nbits // 8
+    s.val         = val
+    s.type_       = type_
+    s.idx         = idx
+    s.wdata       = wdata
+    s.wben        = wben
+
+  @property
+  def ncycles( s ):
+    return len( s.val )
+
+  def wdata_word( s, i ):
+    return int.from_bytes( s.wdata[ i*s.nbytes : (i+1)*s.nbytes ], 'little' )
+
+#-------------------------------------------------------------------------
+# gen_sram_stimulus
+#-------------------------------------------------------------------------
+# Returns the stimulus for num_entries initialization writes followed by
+# ntrans random cycles.
+
+def gen_sram_stimulus( data_nbits, num_entries, ntrans, mask_size=0, seed=0xdeadbeef ):
+
+  assert data_nbits % 8 == 0, \
+    f"Random stimulus needs whole bytes, not {data_nbits}b words"
+
+  rgen = random.Random()
+  rgen.seed(seed)
+
+  nbytes  = data_nbits // 8
+  ncycles = num_entries + ntrans
+
+  val   = bytearray( b'\x01' * num_entries ) \
+        + bytearray( rgen.randbytes( ntrans ).translate( VAL_TABLE ) )
+  type_ = bytearray( b'\x01' * num_entries ) \
+        + bytearray( rgen.randbytes( ntrans ).translate( TYPE_TABLE ) )
+
+  idx   = array( 'L', range( num_entries ) )
+  idx  += array( 'L', [ x % num_entries for x in array( 'I', rgen.randbytes( 4*ntrans ) ) ] )
+
+  wdata = bytearray( rgen.randbytes( ncycles * nbytes ) )
+
+  if mask_size > 0:
+    wben = array( 'L', [ 2**mask_size-1 ] * num_entries )
+    wben.extend( rgen.getrandbits( mask_size ) for _ in range( ntrans ) )
+  else:
+    wben = None
+
+  return SramStimulus( data_nbits, num_entries, mask_size, val, type_, idx, wdata, wben )
+
+#-------------------------------------------------------------------------
+# sram_golden_rdata
+#-------------------------------------------------------------------------
+# Returns an array with the cycle of every read and a buffer with the
+# packed data of every read.
+
+def sram_golden_rdata( stim ):
+
+  nbytes = stim.nbytes
+  mem    = bytearray( stim.num_entries * nbytes )
+
+  # bit mask of the lanes enabled by each write mask
+
+  lane_masks = {}
+  if stim.mask_size > 0:
+    lane_nbits = stim.data_nbits // stim.mask_size
+    lane_bits  = ( 1 << lane_nbits ) - 1
+    for wben in set( stim.wben ):
+      lane_masks[ wben ] = sum([ lane_bits << ( j*lane_nbits )
+                                 for j in range( stim.mask_size ) if ( wben >> j ) & 1 ])
+
+  full_mask = ( 1 << stim.data_nbits ) - 1
+
+  rd_cycles = array( 'L' )
+  rdata     = bytearray()
+
+  for i in range( stim.ncycles ):
+
+    if not stim.val[i]:
+      continue
+
+    lo = stim.idx[i] * nbytes
+    hi = lo + nbytes
+
+    if not stim.type_[i]:
+      rd_cycles.append( i )
+      rdata += mem[ lo:hi ]
+
+    elif stim.wben is None or lane_masks[ stim.wben[i] ] == full_mask:
+      mem[ lo:hi ] = stim.wdata[ i*nbytes : (i+1)*nbytes ]
+
+    else:
+      mask = lane_masks[ stim.wben[i] ]
+      old  = int.from_bytes( mem[ lo:hi ], 'little' )
+      new  = ( old & ~mask ) | ( stim.wdata_word(i) & mask )
+      mem[ lo:hi ] = new.to_bytes( nbytes, 'little' )
+
+  return rd_cycles, rdata
+
+#-------------------------------------------------------------------------
+# run_sram_stimulus
+#-------------------------------------------------------------------------
+# Simulates the stimulus on an SramRTL or SramPRTL with a single 1rw
+# port and returns a buffer with the packed data of every read.
+
+def run_sram_stimulus( model, stim, cmdline_opts=None ):
+
+  model = config_model_with_cmdline_opts( model, cmdline_opts or {}, [] )
+  model.apply( DefaultPassGroup() )
+  model.sim_reset()
+
+  nbytes = stim.nbytes
+  rdata  = bytearray()
+
+  for i in range( stim.ncycles ):
+
+    model.port0_val   @= stim.val[i]
+    model.port0_type  @= stim.type_[i]
+    model.port0_idx   @= stim.idx[i]
+    model.port0_wdata @= stim.wdata_word(i)
+    if stim.wben is not None:
+      model.port0_wben @= stim.wben[i]
+
+    model.sim_tick()
+
+    # read data is available right after the clock edge
+
+    if stim.val[i] and not stim.type_[i]:
+      rdata += int( model.port0_rdata ).to_bytes( nbytes, 'little' )
+
+  return rdata
+
+#-------------------------------------------------------------------------
+# check_sram_rdata
+#-------------------------------------------------------------------------
+
+def check_sram_rdata( stim, rd_cycles, expected, actual ):
+
+  if expected == actual:
+    return
+
+  nbytes = stim.nbytes
+
+  for k in range( min( len(expected), len(actual) ) // nbytes ):
+    exp = expected[ k*nbytes : (k+1)*nbytes ]
+    act = actual  [ k*nbytes : (k+1)*nbytes ]
+    if exp != act:
+      i = rd_cycles[k]
+      raise AssertionError(
+        f"Read {k} of index {stim.idx[i]:#x} in cycle {i} returned "
+        f"{int.from_bytes( act, 'little' ):#x} instead of "
+        f"{int.from_bytes( exp, 'little' ):#x}!" )
+
+  raise AssertionError(
+    f"Expected {len(expected) // nbytes} reads but got {len(actual) // nbytes}!" )
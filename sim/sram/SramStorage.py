@@ -0,0 +1,239 @@
+#=========================================================================
+# SRAM storage engines
+#=========================================================================
+# Simulation-only storage engines for the generic SRAM model. The default
+# generic SRAM model keeps one Wire per word so that it can be translated
+# into Verilog, but this means elaboration time, memory usage, and the
+# per-cycle cost of flipping every update_ff signal all grow with the
+# number of entries. The engines in this file instead keep the whole
+# memory array in a single compact buffer which the read and write paths
+# index directly.
+#
+# All storage engines (and SramGenericPRTL itself for the 'wire' storage)
+# also provide a zero-cycle backdoor for bulk loading and dumping the
+# memory contents:
+#
+#  - load( data, base_idx ) : write words starting at index base_idx,
+#                             data is either a bytes-like object of
+#                             packed little-endian words or a sequence
+#                             of integers with one integer per word
+#  - dump( lo, hi )         : return the words in [lo,hi) as a list of
+#                             integers
+#
+# Storage engines are selected by name using the storage parameter of
+# SramGenericPRTL:
+#
+#  - 'wire'   : one Wire per word (default, translatable)
+#  - 'array'  : one compact buffer for the whole array (simulation only)
+#  - 'sparse' : buffers allocated per page on first write (simulation only)
+#
+
+import mmap
+import sys
+from array import array
+
+#-------------------------------------------------------------------------
+# sram_words
+#-------------------------------------------------------------------------
+# Convert the data passed to load into a sequence of integers with one
+# integer per word. Bytes-like data (bytes, bytearray, memoryview, mmap)
+# is unpacked into little-endian words of nbytes each, and a trailing
+# partial word is padded with zeros. Anything else (e.g., a list or an
+# array.array) is treated as a sequence of words.
+
+def is_bytes_like( data ):
+  return isinstance( data, (bytes, bytearray, memoryview, mmap.mmap) )
+
+def sram_words( data, nbytes ):
+
+  if is_bytes_like( data ):
+    data = memoryview( data ).cast('B')
+    return [ int.from_bytes( data[i:i+nbytes], 'little' )
+             for i in range( 0, len(data), nbytes ) ]
+
+  return [ int(x) for x in data ]
+
+def _check_range( storage, base_idx, nwords ):
+  assert 0 <= base_idx and base_idx + nwords <= storage.num_entries, \
+    f"Cannot access words [{base_idx},{base_idx+nwords}) of an SRAM " \
+    f"with {storage.num_entries} entries!"
+
+#-------------------------------------------------------------------------
+# SramArrayStorage
+#-------------------------------------------------------------------------
+# Words up to 64 bits wide are stored in an array.array with the smallest
+# element type that fits, while wider words are stored back-to-back in a
+# bytearray using little-endian byte order.
+
+class SramArrayStorage:
+
+  def __init__( s, data_nbits, num_entries ):
+
+    s.data_nbits  = data_nbits
+    s.num_entries = num_entries
+    s.nbytes      = ( data_nbits + 7 ) // 8
+
+    s.buf = None
+    if data_nbits <= 64:
+      for typecode in "BHILQ":
+        if array( typecode ).itemsize >= s.nbytes:
+          s.buf = array( typecode, [0] ) * num_entries
+          break
+
+    if s.buf is not None:
+      s.read  = s.buf.__getitem__
+      s.write = s.buf.__setitem__
+    else:
+      s.buf = bytearray( s.nbytes * num_entries )
+
+    # Bytes-like data can be copied straight into the buffer if each word
+    # occupies exactly nbytes little-endian bytes
+
+    s.packed = ( s.buf.itemsize == s.nbytes and sys.byteorder == 'little' ) \
+               if isinstance( s.buf, array ) else True
+
+  # The whole array is allocated up front as a single page
+
+  @property
+  def num_resident_pages( s ):
+    return 1
+
+  # Only used for words wider than 64 bits
+
+  def read( s, idx ):
+    nbytes = s.nbytes
+    return int.from_bytes( s.buf[ idx*nbytes : (idx+1)*nbytes ], 'little' )
+
+  def write( s, idx, value ):
+    nbytes = s.nbytes
+    s.buf[ idx*nbytes : (idx+1)*nbytes ] = value.to_bytes( nbytes, 'little' )
+
+  def load( s, data, base_idx=0 ):
+
+    nbytes = s.nbytes
+
+    if s.packed and is_bytes_like( data ):
+      data = memoryview( data ).cast('B')
+      if len(data) % nbytes == 0:
+        _check_range( s, base_idx, len(data) // nbytes )
+        memoryview( s.buf ).cast('B')[ base_idx*nbytes : base_idx*nbytes + len(data) ] = data
+        return
+
+    words = sram_words( data, nbytes )
+    _check_range( s, base_idx, len(words) )
+
+    if isinstance( s.buf, array ):
+      s.buf[ base_idx : base_idx + len(words) ] = array( s.buf.typecode, words )
+    else:
+      for i, word in enumerate( words ):
+        s.write( base_idx + i, word )
+
+  def dump( s, lo=0, hi=None ):
+
+    if hi is None:
+      hi = s.num_entries
+    _check_range( s, lo, hi - lo )
+
+    if isinstance( s.buf, array ):
+      return s.buf[ lo : hi ].tolist()
+    return [ s.read( idx ) for idx in range( lo, hi ) ]
+
+#-------------------------------------------------------------------------
+# SramSparseStorage
+#-------------------------------------------------------------------------
+# The array is split into pages of page_nentries words and each page is
+# only materialized as an SramArrayStorage on the first write to it.
+# Reads from pages which have never been written return the reset value
+# of zero, so a mostly untouched SRAM only pays for the pages it uses.
+
+class SramSparseStorage:
+
+  def __init__( s, data_nbits, num_entries, page_nentries=1024 ):
+
+    assert page_nentries > 0 and page_nentries & (page_nentries-1) == 0, \
+      "Number of entries per page must be a power of two!"
+
+    s.data_nbits    = data_nbits
+    s.num_entries   = num_entries
+    s.nbytes        = ( data_nbits + 7 ) // 8
+    s.page_nentries = min( page_nentries, 1 << ( num_entries - 1 ).bit_length() )
+    s.page_nbits    = ( s.page_nentries - 1 ).bit_length()
+    s.page_mask     = s.page_nentries - 1
+
+    s.pages = {}
+
+  def read( s, idx ):
+    page = s.pages.get( idx >> s.page_nbits )
+    if page is None:
+      return 0
+    return page.read( idx & s.page_mask )
+
+  def write( s, idx, value ):
+    page_idx = idx >> s.page_nbits
+    page = s.pages.get( page_idx )
+    if page is None:
+      page = s.pages[ page_idx ] = SramArrayStorage( s.data_nbits, s.page_nentries )
+    page.write( idx & s.page_mask, value )
+
+  @property
+  def num_resident_pages( s ):
+    return len( s.pages )
+
+  # Bulk accesses are split into chunks which do not cross page
+  # boundaries, and only pages which receive data are allocated
+
+  def load( s, data, base_idx=0 ):
+
+    words = sram_words( data, s.nbytes )
+    _check_range( s, base_idx, len(words) )
+
+    i = 0
+    while i < len(words):
+      idx      = base_idx + i
+      page_idx = idx >> s.page_nbits
+      offset   = idx & s.page_mask
+      n        = min( s.page_nentries - offset, len(words) - i )
+
+      page = s.pages.get( page_idx )
+      if page is None:
+        page = s.pages[ page_idx ] = SramArrayStorage( s.data_nbits, s.page_nentries )
+      page.load( words[ i : i+n ], offset )
+
+      i += n
+
+  def dump( s, lo=0, hi=None ):
+
+    if hi is None:
+      hi = s.num_entries
+    _check_range( s, lo, hi - lo )
+
+    words = []
+    idx   = lo
+    while idx < hi:
+      page_idx = idx >> s.page_nbits
+      offset   = idx & s.page_mask
+      n        = min( s.page_nentries - offset, hi - idx )
+
+      page = s.pages.get( page_idx )
+      if page is None:
+        words.extend( [0] * n )
+      else:
+        words.extend( page.dump( offset, offset + n ) )
+
+      idx += n
+
+    return words
+
+#-------------------------------------------------------------------------
+# mk_sram_storage
+#-------------------------------------------------------------------------
+
+def mk_sram_storage( storage, data_nbits, num_entries ):
+
+  if storage == 'array':
+    return SramArrayStorage( data_nbits, num_entries )
+
+  if storage == 'sparse':
+    return SramSparseStorage( data_nbits, num_entries )
+
+  raise ValueError( f"Unknown SRAM storage engine '{storage}'!" )
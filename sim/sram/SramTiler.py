@@ -0,0 +1,315 @@
+#=========================================================================
+# SRAM macro tiler
+#=========================================================================
+# Compose an SRAM of any width and depth from the available SRAM macros.
+# A tiling uses a single kind of macro and places ncols macros side by
+# side to build wider words and nrows of these rows on top of each other
+# to build deeper memories:
+#
+#           col 0     col 1          col ncols-1
+#        .--------.--------.     .--------.
+#  row 0 | macro  | macro  | ... | macro  |  idx [0,n)
+#        +--------+--------+     +--------+
+#  row 1 | macro  | macro  | ... | macro  |  idx [n,2n)
+#        '--------'--------'     '--------'
+#           bits      bits          bits
+#          [0,w)    [w,2w)
+#
+# The row is selected by the upper bits of the index, and column c
+# stores bits [c*w,(c+1)*w) of the word. If the SRAM has a write mask,
+# every macro column has to be within a single lane of the mask so we
+# can derive its write enable from one bit of the mask.
+#
+# Macros are kept in a registry. Every *-cfg.py OpenRAM configuration in
+# this directory is registered below with a generated BaseSRAM1rw,
+# BaseSRAM1r1w, or BaseSRAM2rw subclass as its model (see
+# mk_sram_macro_cls in SramLibrary.py). Use register_sram_macro to add
+# more macros (SramLibrary.py manages the OpenRAM configurations and
+# views of the macros and can register all of them with the
+# characterization of a given corner). Only single-ported (1rw) macros
+# are used for tiling, 1r1w and 2rw SRAMs use a macro only if there is
+# one with exactly the right size (see find_sram_macro).
+#
+# Each macro carries characterization data (area in um^2, dynamic energy
+# per read and write in pJ and leakage power in mW). If an OpenRAM .lib
+# file for the macro can be found (see sram_lib_dirs) we read it from the
+# .lib file, otherwise we estimate it with a simple analytical model
+# calibrated to the SRAM_32x128_1rw macro of the tutorial. The tiler
+# picks the tiling minimizing the given objective ('area' or 'energy'),
+# and falls back to the generic SRAM model (i.e., no tiling) if no macro
+# fits, if a tiling wastes more than a quarter of the macro bits, or if
+# it needs more than 16 macros (simulating hundreds of tiny macros is
+# slow and such memories should use a bigger macro instead).
+#
+# SramVRTL.v does not use the tiler, it selects its macros with hand-
+# written generate branches. The 'verilog' objective returns the tiling
+# these branches build (see verilog_sram_tiling) and SramRTL uses it in
+# both languages, so the PyMTL and Verilog models of an SramRTL are made
+# of the same macros. Only SramPRTL used directly tiles onto any macro.
+
+import glob
+import os
+import re
+
+from .SramLibrary import mk_sram_macro_cls, read_sram_cfg
+
+#-------------------------------------------------------------------------
+# Characterization data
+#-------------------------------------------------------------------------
+
+this_dir = os.path.dirname( os.path.abspath( __file__ ) )
+
+# Directories searched for <name>*.lib and <name>/<name>*.lib files
+
+sram_lib_dirs = [
+  this_dir,
+  os.path.join( this_dir, '..', '..', 'asic', 'openram-mc' ),
+  os.path.join( this_dir, '..', '..', 'asic-manual', 'openram-mc' ),
+]
+
+def find_sram_lib( name ):
+  for lib_dir in sram_lib_dirs:
+    for pattern in [ f"{name}*.lib", f"{name}/{name}*.lib", f"{name}/{name}/{name}*.lib" ]:
+      libs = sorted( glob.glob( os.path.join( lib_dir, pattern ) ) )
+      if libs:
+        return libs[0]
+  return None
+
+#-------------------------------------------------------------------------
+# read_sram_lib
+#-------------------------------------------------------------------------
+# Parse the characterization data we need out of an OpenRAM .lib file.
+# OpenRAM describes the read and write energy as internal_power groups on
+# clk0 which apply when web0 is high and low respectively. Missing values
+# are returned as None.
+
+def read_sram_lib( path ):
+
+  with open( path ) as f:
+    text = f.read()
+
+  def first_float( pattern, string ):
+    m = re.search( pattern, string )
+    return float( m.group(1) ) if m else None
+
+  char = {
+    'area'    : first_float( r"\barea\s*:\s*([0-9.eE+-]+)", text ),
+    'leakage' : first_float( r"\bcell_leakage_power\s*:\s*([0-9.eE+-]+)", text ),
+    'read'    : None,
+    'write'   : None,
+  }
+
+  for m in re.finditer( r"internal_power\s*\(\s*\)\s*\{(.*?)\}\s*\}", text, re.DOTALL ):
+    group  = m.group(1)
+    when   = re.search( r'when\s*:\s*"([^"]*)"', group )
+    energy = first_float( r'rise_power\s*\([^)]*\)\s*\{\s*values\s*\(\s*"\s*([0-9.eE+-]+)', group )
+    if when is None or energy is None:
+      continue
+    if   "!web0" in when.group(1): char['write'] = char['write'] or energy
+    elif "web0"  in when.group(1): char['read']  = char['read']  or energy
+
+  return char
+
+#-------------------------------------------------------------------------
+# estimate_sram_char
+#-------------------------------------------------------------------------
+# Analytical characterization estimate: the area grows with the number of
+# bits plus the periphery along the rows and columns, and the energy per
+# access grows with the word width and the length of the bit lines. The
+# constants reproduce the 6968 um^2 of the SRAM_32x128_1rw macro.
+
+def estimate_sram_char( data_nbits, num_entries ):
+  nbits = data_nbits * num_entries
+  return {
+    'area'    : 1.0 * nbits + 12.0 * ( data_nbits + num_entries ) + 1000.0,
+    'leakage' : 1.0e-4 * nbits,
+    'read'    : 0.02 * data_nbits * ( 1.0 + num_entries / 256.0 ),
+    'write'   : 0.025 * data_nbits * ( 1.0 + num_entries / 256.0 ),
+  }
+
+#-------------------------------------------------------------------------
+# SramMacro
+#-------------------------------------------------------------------------
+
+class SramMacro:
+
+  def __init__( s, name, data_nbits, num_entries, cls, char=None, ports='1rw' ):
+
+    s.name        = name
+    s.data_nbits  = data_nbits
+    s.num_entries = num_entries
+    s.cls         = cls
+    s.ports       = ports
+
+    # fill in whatever the .lib does not provide with estimates
+
+    lib  = find_sram_lib( name )
+    char = dict( char or {} )
+    if lib is not None:
+      for key, value in read_sram_lib( lib ).items():
+        char.setdefault( key, value )
+    for key, value in estimate_sram_char( data_nbits, num_entries ).items():
+      if char.get( key ) is None:
+        char[ key ] = value
+
+    s.lib          = lib
+    s.area         = char['area']
+    s.leakage      = char['leakage']
+    s.read_energy  = char['read']
+    s.write_energy = char['write']
+
+  def __repr__( s ):
+    return f"SramMacro({s.name})"
+
+#-------------------------------------------------------------------------
+# Macro registry
+#-------------------------------------------------------------------------
+
+sram_macros = {}
+
+def register_sram_macro( cls, data_nbits, num_entries, name=None, char=None,
+                         ports='1rw' ):
+  name = name or f"SRAM_{data_nbits}x{num_entries}_{ports}"
+  sram_macros[ name ] = SramMacro( name, data_nbits, num_entries, cls, char, ports )
+  return sram_macros[ name ]
+
+# Register the OpenRAM configurations in this directory
+
+for cfg_file in sorted( glob.glob( os.path.join( this_dir, '*-cfg.py' ) ) ):
+  cfg = read_sram_cfg( cfg_file )
+  if cfg is None or cfg.ports is None or cfg.name in sram_macros:
+    continue
+  register_sram_macro( mk_sram_macro_cls( cfg.data_nbits, cfg.num_entries, cfg.ports ),
+                       cfg.data_nbits, cfg.num_entries, cfg.name, ports=cfg.ports )
+
+#-------------------------------------------------------------------------
+# find_sram_macro
+#-------------------------------------------------------------------------
+# Returns the macro with exactly the given size and ports or None.
+
+def find_sram_macro( data_nbits, num_entries, ports='1rw' ):
+  for macro in sram_macros.values():
+    if ( macro.data_nbits, macro.num_entries, macro.ports ) == \
+       ( data_nbits, num_entries, ports ):
+      return macro
+  return None
+
+#-------------------------------------------------------------------------
+# SramTiling
+#-------------------------------------------------------------------------
+
+class SramTiling:
+
+  def __init__( s, macro, data_nbits, num_entries ):
+    s.macro   = macro
+    s.ncols   = -( -data_nbits  // macro.data_nbits  )
+    s.nrows   = -( -num_entries // macro.num_entries )
+    s.nmacros = s.ncols * s.nrows
+
+    # one row of macros is accessed at a time
+
+    s.area         = s.nmacros * macro.area
+    s.leakage      = s.nmacros * macro.leakage
+    s.read_energy  = s.ncols * macro.read_energy
+    s.write_energy = s.ncols * macro.write_energy
+    s.utilization  = data_nbits * num_entries / ( s.nmacros * macro.data_nbits * macro.num_entries )
+
+  def cost( s, objective ):
+    if objective == 'area':
+      return ( s.area, s.read_energy + s.write_energy )
+    if objective == 'energy':
+      return ( s.read_energy + s.write_energy, s.area )
+    raise ValueError( f"Unknown SRAM tiling objective '{objective}'!" )
+
+  def __repr__( s ):
+    return f"SramTiling({s.macro.name} x {s.nrows}r{s.ncols}c)"
+
+#-------------------------------------------------------------------------
+# verilog_sram_tiling
+#-------------------------------------------------------------------------
+# Returns the tiling SramVRTL.v builds or None if it uses the generic
+# SRAM. We read the generate branches of SramVRTL.v, so new branches
+# added as described in the tutorial are picked up automatically:
+#
+#   else if ( p_mask_size == 0 && p_data_nbits == 32 && p_num_entries == 256 ) SRAM_32x256_1rw sram (.*);
+#
+# selects a macro for unmasked SRAMs of exactly its size, and the lanes
+# branch builds masked SRAMs with lanes of the given size from one macro
+# per lane.
+
+sram_vrtl_file = os.path.join( this_dir, 'SramVRTL.v' )
+
+def read_sram_vrtl_branches( path=sram_vrtl_file ):
+
+  with open( path ) as f:
+    text = re.sub( r"//.*", "", f.read() )
+
+  words = re.findall( r"if\s*\(\s*(?:p_mask_size\s*==\s*0\s*&&\s*)?"
+                      r"p_data_nbits\s*==\s*(\d+)\s*&&\s*p_num_entries\s*==\s*(\d+)\s*\)"
+                      r"\s*(\w+)\s+(?:`\w+\s+)?sram\b", text )
+
+  lanes = re.findall( r"if\s*\(\s*p_mask_size\s*>\s*0\s*&&\s*c_lane_nbits\s*==\s*(\d+)"
+                      r"\s*&&\s*p_num_entries\s*==\s*(\d+)\s*\).*?(\w+)\s+(?:`\w+\s+)?sram\b",
+                      text, re.DOTALL )
+
+  return ( { ( int(w), int(n) ) : name for w, n, name in words },
+           { ( int(w), int(n) ) : name for w, n, name in lanes } )
+
+def verilog_sram_tiling( data_nbits, num_entries, mask_size=0 ):
+
+  words, lanes = read_sram_vrtl_branches()
+
+  if mask_size > 0:
+    lane_nbits = data_nbits // mask_size
+    name       = lanes.get( ( lane_nbits, num_entries ) )
+  else:
+    lane_nbits = data_nbits
+    name       = words.get( ( data_nbits, num_entries ) )
+
+  if name is None:
+    return None
+
+  macro = sram_macros.get( name )
+  if macro is None:
+    macro = SramMacro( name, lane_nbits, num_entries, mk_sram_macro_cls( lane_nbits, num_entries ) )
+
+  return SramTiling( macro, data_nbits, num_entries )
+
+#-------------------------------------------------------------------------
+# choose_sram_tiling
+#-------------------------------------------------------------------------
+# Returns the best SramTiling or None if the generic SRAM should be used.
+
+def choose_sram_tiling( data_nbits, num_entries, mask_size=0,
+                        objective='area', min_utilization=0.75, max_macros=16,
+                        macros=None ):
+
+  if objective == 'verilog':
+    return verilog_sram_tiling( data_nbits, num_entries, mask_size )
+
+  lane_nbits = data_nbits // mask_size if mask_size > 0 else data_nbits
+
+  tilings = []
+  for macro in ( sram_macros.values() if macros is None else macros ):
+
+    if macro.ports != '1rw':
+      continue
+
+    # every column must be within a single lane of the write mask
+
+    if mask_size > 0 and lane_nbits % macro.data_nbits != 0:
+      continue
+
+    # rows are selected with the upper bits of the index
+
+    if num_entries > macro.num_entries and macro.num_entries & (macro.num_entries-1):
+      continue
+
+    tiling = SramTiling( macro, data_nbits, num_entries )
+    if tiling.utilization >= min_utilization and tiling.nmacros <= max_macros:
+      tilings.append( tiling )
+
+  if not tilings:
+    return None
+
+  return min( tilings, key=lambda t: t.cost( objective ) )
@@ -0,0 +1,368 @@
+#=========================================================================
+# SramTrace
+#=========================================================================
+# Simulation-only binary transaction trace of one SRAM. Instead of
+# formatting a line trace in every cycle, SramPRTL (constructed with
+# trace=True or trace=<path>) records only the accesses, one fixed-size
+# binary record per access:
+#
+#  Field   Format  Description
+#  -----------------------------------------------------------------------
+#  cycle   u64     cycle of the access (counted from the end of reset)
+#  port    u8      port of the access
+#  type_   u8      0 = read, 1 = write
+#  idx     u32     index
+#  wben    bytes   write mask, ceil(mask_size/8) bytes (if mask_size > 0)
+#  data    bytes   write data or read data, little-endian
+#
+# Writes are recorded at the clock edge of the access, reads at the
+# following clock edge once the read data is on the port (or when the
+# trace is read or closed). The records are kept in a ring buffer of
+# capacity records, so without a file the trace holds the most recent
+# accesses in bounded memory. With a file, every time the ring buffer has
+# filled up with new records it is handed to a background thread which
+# compresses it with zlib and appends it to the file as one block, so the
+# simulation never waits for compression or I/O unless the writer falls
+# more than nbuffers blocks behind.
+#
+# A trace file starts with a magic number and a JSON header with the
+# configuration of the SRAM, followed by the blocks. Each block has a
+# small header with the size of the compressed records, the number of
+# records, and the first and last cycle of the block, so a reader can
+# skip blocks without decompressing them. Use SramTraceReader to read a
+# trace file and fmt_sram_trace (or the sram-trace script) to render the
+# records in the line trace format of SramPRTL.
+
+import atexit
+import json
+import queue
+import struct
+import threading
+import zlib
+
+from collections import namedtuple
+
+from pymtl3 import mk_bits, clog2
+
+TRACE_MAGIC   = b'SRAMTRC1'
+TRACE_VERSION = 1
+
+# compressed size, number of records, first cycle, last cycle
+block_header = struct.Struct( '<IIQQ' )
+
+SramTraceRecord = namedtuple( 'SramTraceRecord', 'cycle port type_ idx wben data' )
+
+def mk_record_struct( data_nbits, mask_size ):
+  nbytes      = ( data_nbits + 7 ) // 8
+  wben_nbytes = ( mask_size + 7 ) // 8
+  return struct.Struct( f'<QBBI{wben_nbytes}s{nbytes}s' )
+
+def unpack_record( record, buf, offset ):
+  cycle, port, type_, idx, wben, data = record.unpack_from( buf, offset )
+  return SramTraceRecord( cycle, port, type_, idx, int.from_bytes( wben, 'little' ),
+                          int.from_bytes( data, 'little' ) )
+
+#-------------------------------------------------------------------------
+# SramTrace
+#-------------------------------------------------------------------------
+
+class SramTrace:
+
+  def __init__( s, data_nbits, num_entries, mask_size=0, ports='1rw', path=None,
+                capacity=65536, nbuffers=4, level=1 ):
+
+    assert capacity > 0, "The trace needs room for at least one record"
+
+    s.data_nbits  = data_nbits
+    s.num_entries = num_entries
+    s.mask_size   = mask_size
+    s.ports       = ports
+    s.nports      = 1 if ports == '1rw' else 2
+    s.nbytes      = ( data_nbits + 7 ) // 8
+    s.wben_nbytes = ( mask_size + 7 ) // 8
+    s.wben_full   = ( 1 << mask_size ) - 1
+
+    s.record      = mk_record_struct( data_nbits, mask_size )
+    s.capacity    = capacity
+    s.buf         = bytearray( capacity * s.record.size )
+    s.path        = path
+    s.level       = level
+
+    s.cycle       = 0
+    s.nrecords    = 0    # total number of records
+    s.nflushed    = 0    # number of records handed to the writer
+    s.first_cycle = None # cycle of the first record not yet flushed
+    s.pending     = [ None ] * s.nports
+
+    # Functions which return the read data of each port, used to record
+    # pending reads when the trace is read or closed between clock edges
+
+    s.rdata_ports = [ None ] * s.nports
+
+    s.writer = None
+    s.error  = None
+    s.closed = False
+
+    if path is not None:
+      s.file = open( path, 'wb' )
+      header = json.dumps( s.header() ).encode()
+      s.file.write( TRACE_MAGIC + struct.pack( '<I', len(header) ) + header )
+      s.queue  = queue.Queue( maxsize=nbuffers )
+      s.writer = threading.Thread( target=s.write_blocks, daemon=True )
+      s.writer.start()
+      atexit.register( s.close )
+
+  def header( s ):
+    return {
+      'version'     : TRACE_VERSION,
+      'data_nbits'  : s.data_nbits,
+      'num_entries' : s.num_entries,
+      'mask_size'   : s.mask_size,
+      'ports'       : s.ports,
+      'capacity'    : s.capacity,
+    }
+
+  #-----------------------------------------------------------------------
+  # Recording
+  #-----------------------------------------------------------------------
+
+  def append( s, port, type_, idx, wben, data ):
+
+    if s.nrecords == s.nflushed:
+      s.first_cycle = s.cycle
+
+    s.record.pack_into( s.buf, ( s.nrecords % s.capacity ) * s.record.size,
+                        s.cycle, port, type_, idx,
+                        wben.to_bytes( s.wben_nbytes, 'little' ),
+                        data.to_bytes( s.nbytes, 'little' ) )
+    s.nrecords += 1
+
+    if s.writer is not None and s.nrecords - s.nflushed == s.capacity:
+      s.flush()
+
+  # Called at every clock edge after reset, first with the read data of
+  # every port to record the reads of the previous cycle (so the records
+  # stay sorted by cycle), then with the inputs of every port.
+
+  def resolve( s, port, rdata ):
+    pending = s.pending[ port ]
+    if pending is not None:
+      s.pending[ port ] = None
+      cycle, s.cycle = s.cycle, pending[0]
+      s.append( port, 0, pending[1], 0, int(rdata) )
+      s.cycle = cycle
+
+  def access( s, port, val, type_, idx, wdata, wben=None ):
+    if val:
+      if type_:
+        s.append( port, 1, int(idx), s.wben_full if wben is None else int(wben),
+                  int(wdata) )
+      else:
+        s.pending[ port ] = ( s.cycle, int(idx) )
+
+  def tick( s ):
+    s.cycle += 1
+
+  def restart( s ):
+    s.cycle   = 0
+    s.pending = [ None ] * s.nports
+
+  def resolve_pending( s ):
+    for port, pending in enumerate( s.pending ):
+      if pending is not None and s.rdata_ports[ port ] is not None:
+        s.resolve( port, s.rdata_ports[ port ]() )
+
+  #-----------------------------------------------------------------------
+  # In-memory records
+  #-----------------------------------------------------------------------
+  # Returns the most recent records (at most capacity) from oldest to
+  # newest.
+
+  def records( s ):
+
+    s.resolve_pending()
+
+    n     = min( s.nrecords, s.capacity )
+    first = s.nrecords - n
+
+    return [ unpack_record( s.record, s.buf, ( i % s.capacity ) * s.record.size )
+             for i in range( first, s.nrecords ) ]
+
+  def __len__( s ):
+    return s.nrecords
+
+  #-----------------------------------------------------------------------
+  # Streaming to a file
+  #-----------------------------------------------------------------------
+  # Hands all records which have not been flushed yet to the writer. This
+  # happens automatically whenever the ring buffer is full of new records
+  # and when the trace is closed.
+
+  def flush( s ):
+
+    n = s.nrecords - s.nflushed
+    if s.writer is None or n == 0:
+      return
+
+    if s.error is not None:
+      raise s.error
+
+    lo = ( s.nflushed % s.capacity ) * s.record.size
+    hi = lo + n*s.record.size
+
+    if hi <= len( s.buf ):
+      data = bytes( s.buf[ lo:hi ] )
+    else:
+      data = bytes( s.buf[ lo: ] + s.buf[ : hi-len( s.buf ) ] )
+
+    s.queue.put( ( data, n, s.first_cycle, s.cycle ) )
+    s.nflushed = s.nrecords
+
+  def write_blocks( s ):
+    while True:
+      item = s.queue.get()
+      if item is None:
+        break
+      data, n, first_cycle, last_cycle = item
+      if s.error is not None:
+        continue
+      try:
+        data = zlib.compress( data, s.level )
+        s.file.write( block_header.pack( len(data), n, first_cycle, last_cycle ) + data )
+      except Exception as e:
+        s.error = e
+
+  def close( s ):
+
+    if s.closed:
+      return
+    s.closed = True
+
+    s.resolve_pending()
+
+    if s.writer is not None:
+      atexit.unregister( s.close )
+      s.flush()
+      s.queue.put( None )
+      s.writer.join()
+      s.file.close()
+      if s.error is not None:
+        raise s.error
+
+  def __enter__( s ):
+    return s
+
+  def __exit__( s, *args ):
+    s.close()
+
+#-------------------------------------------------------------------------
+# SramTraceReader
+#-------------------------------------------------------------------------
+
+class SramTraceReader:
+
+  def __init__( s, path ):
+
+    s.path = path
+
+    with open( path, 'rb' ) as f:
+      magic = f.read( len( TRACE_MAGIC ) )
+      if magic != TRACE_MAGIC:
+        raise ValueError( f"Not an SRAM trace file '{path}'!" )
+      nbytes, = struct.unpack( '<I', f.read(4) )
+      s.header = json.loads( f.read( nbytes ) )
+      s.data_offset = f.tell()
+
+    s.data_nbits  = s.header['data_nbits']
+    s.num_entries = s.header['num_entries']
+    s.mask_size   = s.header['mask_size']
+    s.ports       = s.header['ports']
+    s.record      = mk_record_struct( s.data_nbits, s.mask_size )
+
+  # Returns a list of ( offset, nrecords, first_cycle, last_cycle ) for
+  # every block in the file without decompressing them
+
+  def blocks( s ):
+
+    blocks = []
+
+    with open( s.path, 'rb' ) as f:
+      f.seek( s.data_offset )
+      while True:
+        head = f.read( block_header.size )
+        if len( head ) < block_header.size:
+          break
+        size, n, first_cycle, last_cycle = block_header.unpack( head )
+        blocks.append( ( f.tell() - block_header.size, n, first_cycle, last_cycle ) )
+        f.seek( size, 1 )
+
+    return blocks
+
+  def read_block( s, offset ):
+
+    with open( s.path, 'rb' ) as f:
+      f.seek( offset )
+      size, n, _, _ = block_header.unpack( f.read( block_header.size ) )
+      data = zlib.decompress( f.read( size ) )
+
+    return [ unpack_record( s.record, data, i*s.record.size ) for i in range(n) ]
+
+  # Yields every record in the file, or only the records of the blocks
+  # which overlap the cycles [lo,hi) if given
+
+  def records( s, lo=0, hi=None ):
+    for offset, _, first_cycle, last_cycle in s.blocks():
+      if last_cycle < lo or ( hi is not None and first_cycle >= hi ):
+        continue
+      for record in s.read_block( offset ):
+        if record.cycle >= lo and ( hi is None or record.cycle < hi ):
+          yield record
+
+  def __iter__( s ):
+    return s.records()
+
+#-------------------------------------------------------------------------
+# fmt_sram_trace
+#-------------------------------------------------------------------------
+# Renders the records (sorted by cycle) in the line trace format of
+# SramPRTL, one line for every cycle with at least one access. Ports
+# without an access in that cycle are left blank, and writes show no read
+# data. Tiled SRAMs are shown as one logical SRAM.
+
+def fmt_sram_trace( records, data_nbits, num_entries, ports='1rw' ):
+
+  fmt_idx  = lambda x: str( mk_bits( max( 1, clog2( num_entries ) ) )( x ) )
+  fmt_data = lambda x: str( mk_bits( data_nbits )( x ) )
+
+  idx_blank  = ' ' * len( fmt_idx(0) )
+  data_blank = ' ' * len( fmt_data(0) )
+
+  def fmt_port( p, record ):
+    addr = din = dout = None
+    if record is not None:
+      addr = fmt_idx( record.idx )
+      if record.type_: din  = fmt_data( record.data )
+      else:            dout = fmt_data( record.data )
+    return ( addr or idx_blank, din or data_blank, dout or data_blank )
+
+  def fmt_cycle( cycle, accesses ):
+    groups = [ fmt_port( p, accesses.get(p) ) for p in range( 1 if ports == '1rw' else 2 ) ]
+    if ports == '1r1w':
+      ( addr0, din0, _ ), ( addr1, _, dout1 ) = groups
+      line = f"(addr0={addr0} din0={din0} addr1={addr1} dout1={dout1})"
+    else:
+      line = "".join([ f"(addr{p}={addr} din{p}={din} dout{p}={dout})"
+                       for p, ( addr, din, dout ) in enumerate( groups ) ])
+    return f"{cycle:>8}: {line}"
+
+  cycle, accesses = None, {}
+
+  for record in records:
+    if record.cycle != cycle and accesses:
+      yield fmt_cycle( cycle, accesses )
+      accesses = {}
+    cycle = record.cycle
+    accesses[ record.port ] = record
+
+  if accesses:
+    yield fmt_cycle( cycle, accesses )
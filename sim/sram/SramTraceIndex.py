@@ -0,0 +1,311 @@
+#=========================================================================
+# SramTraceIndex
+#=========================================================================
+# Index over the records of an SRAM transaction trace (see SramTrace.py)
+# which answers address and watchpoint queries without rescanning the
+# trace:
+#
+#  - writes(idx), reads(idx)        : every write/read of an entry
+#  - accesses(lo, hi, cycles=...)   : every access to the entries [lo,hi),
+#                                     optionally only in some cycles
+#  - last_write(idx, cycle)         : the last write of an entry before a
+#                                     cycle (i.e., who wrote the data a
+#                                     read in that cycle returns)
+#  - hot_entries(n)                 : the n most accessed entries
+#
+# Building the index reads the trace once and keeps, for every entry, the
+# sorted cycles and the record numbers of its reads and writes in
+# array.array buffers. Queries bisect these arrays and only decompress
+# the trace blocks with the matching records. The index of a trace file
+# is saved next to it (<trace>.idx) and reused as long as the trace file
+# is unchanged, so repeated queries on a multi-million-cycle trace do not
+# even scan the trace once. Like a trace file, an index file starts with
+# a magic number and a JSON header, followed by the arrays as raw
+# little-endian 64-bit integers, so loading an index never executes
+# anything from the file. An index can also be built over the
+# in-memory records of a trace (e.g., model.trace.records()).
+#
+# Traces are only recorded by the PyMTL models, so this works for runs of
+# SramRTL and SramMinionRTL with the PyMTL implementation (SramPRTL and
+# SramMinionPRTL with trace=...).
+
+import bisect
+import heapq
+import json
+import os
+import struct
+import sys
+
+from array import array
+
+from .SramTrace import SramTraceReader
+
+INDEX_MAGIC   = b'SRAMIDX1'
+INDEX_VERSION = 2
+
+# Arrays are stored little-endian whatever the byte order of the host
+
+def write_array( f, x ):
+  if sys.byteorder == 'big':
+    x = array( 'Q', x )
+    x.byteswap()
+  f.write( x.tobytes() )
+
+def read_array( f, n ):
+  x      = array( 'Q' )
+  nbytes = n * x.itemsize
+  data   = f.read( nbytes )
+  if len( data ) != nbytes:
+    raise EOFError
+  x.frombytes( data )
+  if sys.byteorder == 'big':
+    x.byteswap()
+  return x
+
+#-------------------------------------------------------------------------
+# SramTraceIndex
+#-------------------------------------------------------------------------
+
+class SramTraceIndex:
+
+  def __init__( s, trace, nblocks_cached=8 ):
+
+    # trace is an SramTraceReader or a list of records sorted by cycle
+
+    if isinstance( trace, SramTraceReader ):
+      s.reader  = trace
+      s.records = None
+    else:
+      s.reader  = None
+      s.records = list( trace )
+
+    s.nblocks_cached = nblocks_cached
+    s.block_cache    = {}
+
+    s.block_offsets  = []           # file offset of every block
+    s.block_starts   = array( 'Q' ) # number of the first record of every block
+
+    s.entries = {} # idx -> ( read cycles, read records, write cycles, write records )
+    s.nrecords = 0
+
+  #-----------------------------------------------------------------------
+  # Building
+  #-----------------------------------------------------------------------
+
+  def build( s ):
+
+    entries = {}
+
+    def add( n, record ):
+      entry = entries.get( record.idx )
+      if entry is None:
+        entry = entries[ record.idx ] = ( [], [], [], [] )
+      k = 2 if record.type_ else 0
+      entry[k  ].append( record.cycle )
+      entry[k+1].append( n )
+
+    n = 0
+
+    if s.reader is None:
+      for record in s.records:
+        add( n, record )
+        n += 1
+
+    else:
+      s.block_offsets = []
+      s.block_starts  = array( 'Q' )
+      for offset, _, _, _ in s.reader.blocks():
+        s.block_offsets.append( offset )
+        s.block_starts.append( n )
+        for record in s.reader.read_block( offset ):
+          add( n, record )
+          n += 1
+
+    s.nrecords = n
+    s.entries  = { idx : tuple([ array( 'Q', x ) for x in entry ])
+                   for idx, entry in entries.items() }
+
+    return s
+
+  #-----------------------------------------------------------------------
+  # Saving and loading
+  #-----------------------------------------------------------------------
+  # The saved index records the size and modification time of the trace
+  # file so that a stale index is never used.
+
+  def trace_stat( s ):
+    stat = os.stat( s.reader.path )
+    return ( stat.st_size, stat.st_mtime_ns )
+
+  # The header lists the entries with the number of their reads and
+  # writes, followed by the block starts and then the cycles and record
+  # numbers of the reads and writes of every entry in the same order.
+
+  def save( s, path ):
+
+    idxs   = sorted( s.entries )
+    header = json.dumps({
+      'version'       : INDEX_VERSION,
+      'trace_stat'    : s.trace_stat(),
+      'nrecords'      : s.nrecords,
+      'block_offsets' : s.block_offsets,
+      'nblocks'       : len( s.block_starts ),
+      'entries'       : [ ( idx, len( s.entries[idx][0] ), len( s.entries[idx][2] ) )
+                          for idx in idxs ],
+    }).encode()
+
+    with open( path, 'wb' ) as f:
+      f.write( INDEX_MAGIC + struct.pack( '<I', len(header) ) + header )
+      write_array( f, s.block_starts )
+      for idx in idxs:
+        for x in s.entries[idx]:
+          write_array( f, x )
+
+  def load( s, path ):
+
+    try:
+      with open( path, 'rb' ) as f:
+
+        if f.read( len( INDEX_MAGIC ) ) != INDEX_MAGIC:
+          return False
+        nbytes, = struct.unpack( '<I', f.read(4) )
+        header  = json.loads( f.read( nbytes ) )
+
+        if header.get( 'version' ) != INDEX_VERSION or \
+           tuple( header['trace_stat'] ) != s.trace_stat():
+          return False
+
+        block_starts = read_array( f, header['nblocks'] )
+        entries      = {}
+        for idx, nreads, nwrites in header['entries']:
+          entries[ idx ] = ( read_array( f, nreads  ), read_array( f, nreads  ),
+                             read_array( f, nwrites ), read_array( f, nwrites ) )
+
+    except ( OSError, EOFError, ValueError, KeyError, struct.error ):
+      return False
+
+    s.nrecords      = header['nrecords']
+    s.block_offsets = header['block_offsets']
+    s.block_starts  = block_starts
+    s.entries       = entries
+    return True
+
+  #-----------------------------------------------------------------------
+  # Fetching records
+  #-----------------------------------------------------------------------
+
+  def record( s, n ):
+
+    if s.reader is None:
+      return s.records[ n ]
+
+    k     = bisect.bisect_right( s.block_starts, n ) - 1
+    block = s.block_cache.get( k )
+
+    if block is None:
+      if len( s.block_cache ) >= s.nblocks_cached:
+        del s.block_cache[ next( iter( s.block_cache ) ) ]
+      block = s.block_cache[ k ] = s.reader.read_block( s.block_offsets[k] )
+
+    return block[ n - s.block_starts[k] ]
+
+  # Returns the record numbers in nums whose cycles are in [lo,hi)
+
+  def select( s, cycles, nums, lo=0, hi=None ):
+    i = bisect.bisect_left( cycles, lo )
+    j = len( cycles ) if hi is None else bisect.bisect_left( cycles, hi )
+    return nums[ i:j ]
+
+  #-----------------------------------------------------------------------
+  # Queries
+  #-----------------------------------------------------------------------
+
+  def writes( s, idx, cycles=None ):
+    entry = s.entries.get( idx )
+    if entry is None:
+      return []
+    return [ s.record(n) for n in s.select( entry[2], entry[3], *( cycles or () ) ) ]
+
+  def reads( s, idx, cycles=None ):
+    entry = s.entries.get( idx )
+    if entry is None:
+      return []
+    return [ s.record(n) for n in s.select( entry[0], entry[1], *( cycles or () ) ) ]
+
+  # Returns every access to the entries [lo,hi) (or only to lo if hi is
+  # None) in the cycles [cycles[0],cycles[1]), sorted by cycle. With
+  # type_=0 or type_=1 only reads or writes are returned.
+
+  def accesses( s, lo, hi=None, cycles=None, type_=None ):
+
+    hi = lo + 1 if hi is None else hi
+
+    idxs = range( lo, hi )
+    if len( idxs ) > len( s.entries ):
+      idxs = [ idx for idx in sorted( s.entries ) if lo <= idx < hi ]
+
+    nums = []
+    for idx in idxs:
+      entry = s.entries.get( idx )
+      if entry is None:
+        continue
+      if type_ != 1:
+        nums.append( s.select( entry[0], entry[1], *( cycles or () ) ) )
+      if type_ != 0:
+        nums.append( s.select( entry[2], entry[3], *( cycles or () ) ) )
+
+    # record numbers are in the order of the trace, i.e., sorted by cycle
+
+    return [ s.record(n) for n in heapq.merge( *nums ) ]
+
+  # Returns the last write to idx in a cycle before the given cycle, or
+  # None if the entry was not written before
+
+  def last_write( s, idx, cycle ):
+
+    entry = s.entries.get( idx )
+    if entry is None:
+      return None
+
+    i = bisect.bisect_left( entry[2], cycle )
+    return s.record( entry[3][i-1] ) if i > 0 else None
+
+  # Returns the number of accesses to idx, with type_=0 or type_=1 only
+  # reads or writes are counted
+
+  def count( s, idx, type_=None ):
+    entry = s.entries.get( idx )
+    if entry is None:
+      return 0
+    return ( len( entry[0] ) if type_ != 1 else 0 ) + \
+           ( len( entry[2] ) if type_ != 0 else 0 )
+
+  # Returns a list of ( idx, count ) for the n most accessed entries (the
+  # lowest index first if the counts are equal)
+
+  def hot_entries( s, n=10, type_=None ):
+    counts = [ ( idx, s.count( idx, type_ ) ) for idx in sorted( s.entries ) ]
+    return [ ( idx, count ) for idx, count in heapq.nlargest( n, counts, key=lambda x: x[1] )
+             if count > 0 ]
+
+  def __len__( s ):
+    return s.nrecords
+
+#-------------------------------------------------------------------------
+# open_sram_trace_index
+#-------------------------------------------------------------------------
+# Returns the index of a trace file, which is loaded from <path>.idx if
+# it is up to date and built (and saved) otherwise.
+
+def open_sram_trace_index( path, save=True ):
+
+  index = SramTraceIndex( SramTraceReader( path ) )
+
+  if index.load( path + '.idx' ):
+    return index
+
+  index.build()
+  if save:
+    index.save( path + '.idx' )
+
+  return index
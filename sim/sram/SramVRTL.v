@@ -19,12 +19,24 @@
 //  port0_idx     I          index of the SRAM
 //  port0_wdata   I          write data
 //  port0_rdata   O          read data output
+//  port0_wben    I          write mask (ignored if p_mask_size is zero)
+//
+// If p_mask_size is non-zero each word is split into p_mask_size lanes
+// and a write only updates the lanes whose bit in port0_wben is set. If
+// each lane is 32 bits wide and there are 256 entries we use one
+// SRAM_32x256_1rw macro per lane, otherwise we use the generic SRAM
+// model with a write mask.
+//
+// p_semantics selects the read-during-write semantics of the SRAM in
+// simulation (see SramSemantics.py), the default is x-on-write like the
+// OpenRAM macros.
 //
 
 `ifndef SRAM_SRAM_VRTL
 `define SRAM_SRAM_VRTL
 
 `include "sram/SramGenericVRTL.v"
+`include "sram/SramMacroSemantics.v"
 `include "sram/SRAM_32x256_1rw.v"
 `include "sram/SRAM_128x256_1rw.v"
 
@@ -36,10 +48,14 @@ module sram_SramVRTL
 #(
   parameter p_data_nbits  = 32,
   parameter p_num_entries = 256,
+  parameter p_mask_size   = 0,
+  parameter p_semantics   = 2,
 
   // Local constants not meant to be set from outside the module
   parameter c_addr_nbits  = $clog2(p_num_entries),
-  parameter c_data_nbytes = (p_data_nbits+7)/8 // $ceil(p_data_nbits/8)
+  parameter c_data_nbytes = (p_data_nbits+7)/8, // $ceil(p_data_nbits/8)
+  parameter c_mask_nbits  = (p_mask_size > 0) ? p_mask_size : 1,
+  parameter c_lane_nbits  = p_data_nbits/c_mask_nbits
 )(
   input  logic                      clk,
   input  logic                      reset,
@@ -47,6 +63,7 @@ module sram_SramVRTL
   input  logic                      port0_type,
   input  logic [c_addr_nbits-1:0]   port0_idx,
   input  logic [p_data_nbits-1:0]   port0_wdata,
+  input  logic [c_mask_nbits-1:0]   port0_wben,
   output logic [p_data_nbits-1:0]   port0_rdata
 );
 
@@ -55,6 +72,7 @@ module sram_SramVRTL
   logic                     csb0;
   logic [c_addr_nbits-1:0]  addr0;
   logic [p_data_nbits-1:0]  din0;
+  logic [c_mask_nbits-1:0]  wmask0;
   logic [p_data_nbits-1:0]  dout0;
 
   assign clk0  = clk;
@@ -62,19 +80,38 @@ module sram_SramVRTL
   assign csb0  = ~port0_val;
   assign addr0 = port0_idx;
   assign din0  = port0_wdata;
+  assign wmask0 = port0_wben;
 
   assign port0_rdata = dout0;
 
+  genvar i;
   generate
-    if      ( p_data_nbits == 32  && p_num_entries == 256 ) SRAM_32x256_1rw  sram (.*);
-    else if ( p_data_nbits == 128 && p_num_entries == 256 ) SRAM_128x256_1rw sram (.*);
+    if ( p_mask_size > 0 && c_lane_nbits == 32 && p_num_entries == 256 ) begin : lanes
+
+      // One macro per lane, only write the lanes set in the mask
+
+      for ( i = 0; i < p_mask_size; i = i + 1 ) begin : lane
+        SRAM_32x256_1rw `SRAM_MACRO_SEMANTICS sram
+        (
+          .clk0  (clk0),
+          .web0  (~(port0_type & port0_wben[i])),
+          .csb0  (csb0),
+          .addr0 (addr0),
+          .din0  (din0[(i+1)*32-1:i*32]),
+          .dout0 (dout0[(i+1)*32-1:i*32])
+        );
+      end
+
+    end
+    else if ( p_mask_size == 0 && p_data_nbits == 32  && p_num_entries == 256 ) SRAM_32x256_1rw  `SRAM_MACRO_SEMANTICS sram (.*);
+    else if ( p_mask_size == 0 && p_data_nbits == 128 && p_num_entries == 256 ) SRAM_128x256_1rw `SRAM_MACRO_SEMANTICS sram (.*);
 
     // ''' TUTORIAL TASK '''''''''''''''''''''''''''''''''''''''''''''''''
     // Choose new SRAM configuration RTL model
     // '''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''
 
     else
-      sram_SramGenericVRTL#(p_data_nbits,p_num_entries) sram (.*);
+      sram_SramGenericVRTL#(p_data_nbits,p_num_entries,p_mask_size,p_semantics) sram (.*);
 
   endgenerate
 
@@ -0,0 +1,254 @@
+#=========================================================================
+# Verilator model cache
+#=========================================================================
+# Content-addressed on-disk cache of verilated models shared by all test
+# runs (and all working directories). PyMTL only reuses a verilated model
+# if the translated Verilog, the object directory, and the shared library
+# from a previous run are still in the current working directory, so
+# every fresh checkout, CI job, or regression shard (see SramRegress.py)
+# runs Verilator and the C++ compiler for every SramRTL and SramMinionRTL
+# configuration again.
+#
+# The cache stores the compiled shared library of every imported model
+# under a key which is the SHA-256 hash of:
+#
+#  - the name of the translated top module and the model parameters
+#  - the translated Verilog source
+#  - the Verilog source of the placeholder, every file it includes
+#    (e.g., SramGenericVRTL.v and SramVRTL.v), and the sim/vc/*.v library
+#  - the import options (e.g., the Verilator and C compiler flags)
+#  - the Verilator and C++ compiler versions
+#
+# If the key of a model is in the cache the shared library is copied into
+# the working directory and PyMTL skips verilating and compiling the
+# model (the C and Python wrappers are always regenerated, which is
+# cheap). Otherwise the newly compiled library is added to the cache. The
+# cache is bounded by max_bytes and evicts the least recently used
+# models first. Entries are added with an atomic rename so several
+# processes can share a cache directory.
+#
+# Use install_verilator_cache to make every translation-import (e.g., in
+# config_model_with_cmdline_opts) use the cache, or pass --vl-cache <dir>
+# to pytest.
+
+import functools
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+
+from pymtl3.passes.backends.verilog import VerilogTranslationImportPass
+from pymtl3.passes.backends.verilog.import_.VerilogVerilatorImportPass \
+  import VerilogVerilatorImportPass
+
+sim_dir = os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+
+#-------------------------------------------------------------------------
+# verilator_cache_sources
+#-------------------------------------------------------------------------
+# Returns the Verilog source of the placeholder and every file it
+# includes (directly or indirectly), followed by the vc library. Included
+# files are searched for in the include directories of the placeholder,
+# the sim directory, and the directory of the including file.
+
+include_re = re.compile( r'^\s*`include\s+"([^"]+)"', re.MULTILINE )
+
+def verilator_cache_sources( src_file, v_include=(), v_libs=() ):
+
+  sources = []
+
+  def visit( path ):
+    path = os.path.abspath( path )
+    if path in sources or not os.path.isfile( path ):
+      return
+    sources.append( path )
+
+    with open( path, errors='replace' ) as f:
+      text = f.read()
+
+    for name in include_re.findall( text ):
+      for dirname in list( v_include ) + [ sim_dir, os.path.dirname( path ) ]:
+        if os.path.isfile( os.path.join( dirname, name ) ):
+          visit( os.path.join( dirname, name ) )
+          break
+
+  for path in [ src_file ] + list( v_libs ):
+    if path:
+      visit( path )
+
+  for path in sorted( glob.glob( os.path.join( sim_dir, 'vc', '*.v' ) ) ):
+    visit( path )
+
+  return sources
+
+#-------------------------------------------------------------------------
+# verilator_cache_key
+#-------------------------------------------------------------------------
+
+@functools.lru_cache()
+def toolchain_version():
+  versions = []
+  for cmd in [ 'verilator --version', 'g++ --version' ]:
+    try:
+      versions.append( subprocess.check_output( cmd, shell=True, stderr=subprocess.DEVNULL,
+                                                universal_newlines=True ).splitlines()[0] )
+    except ( subprocess.CalledProcessError, IndexError ):
+      versions.append( '' )
+  return versions
+
+def verilator_cache_key( top_module, params, sources, import_cfg=None ):
+
+  h = hashlib.sha256()
+
+  h.update( json.dumps( [ top_module, sorted( ( str(k), str(v) ) for k, v in params.items() ),
+                          import_cfg, toolchain_version() ], sort_keys=True,
+                        default=str ).encode() )
+
+  for path in sources:
+    h.update( os.path.basename( path ).encode() + b'\0' )
+    with open( path, 'rb' ) as f:
+      h.update( hashlib.sha256( f.read() ).digest() )
+
+  return h.hexdigest()
+
+#-------------------------------------------------------------------------
+# VerilatorCache
+#-------------------------------------------------------------------------
+
+class VerilatorCache:
+
+  def __init__( s, cache_dir, max_bytes=2**31 ):
+    s.cache_dir = os.path.abspath( cache_dir )
+    s.max_bytes = max_bytes
+    s.nhits     = 0
+    s.nmisses   = 0
+    os.makedirs( s.cache_dir, exist_ok=True )
+
+  def entry_dir( s, key ):
+    return os.path.join( s.cache_dir, key )
+
+  def __contains__( s, key ):
+    return os.path.isfile( os.path.join( s.entry_dir( key ), 'lib.so' ) )
+
+  # Copy the cached shared library to path and mark the entry as used,
+  # returns False if the key is not in the cache.
+
+  def restore( s, key, path ):
+
+    lib = os.path.join( s.entry_dir( key ), 'lib.so' )
+
+    try:
+      tmp = f"{path}.{os.getpid()}.tmp"
+      shutil.copy2( lib, tmp )
+      os.replace( tmp, path )
+      os.utime( s.entry_dir( key ) )
+    except OSError:
+      s.nmisses += 1
+      return False
+
+    s.nhits += 1
+    return True
+
+  # Add the shared library at path to the cache and evict the least
+  # recently used entries if the cache is too large.
+
+  def store( s, key, path, name='' ):
+
+    if key in s:
+      return
+
+    tmp_dir = tempfile.mkdtemp( dir=s.cache_dir, prefix='.tmp-' )
+    shutil.copy2( path, os.path.join( tmp_dir, 'lib.so' ) )
+    with open( os.path.join( tmp_dir, 'entry.json' ), 'w' ) as f:
+      json.dump( { 'name' : name, 'created' : time.time() }, f )
+
+    try:
+      os.rename( tmp_dir, s.entry_dir( key ) )
+    except OSError:
+      shutil.rmtree( tmp_dir, ignore_errors=True ) # added by another process
+
+    s.evict()
+
+  def entries( s ):
+
+    entries = []
+    for key in os.listdir( s.cache_dir ):
+      entry_dir = s.entry_dir( key )
+      if key.startswith('.') or not os.path.isdir( entry_dir ):
+        continue
+      size = sum([ os.path.getsize( os.path.join( entry_dir, x ) )
+                   for x in os.listdir( entry_dir ) ])
+      entries.append( ( os.path.getmtime( entry_dir ), size, key ) )
+
+    return sorted( entries )
+
+  def size( s ):
+    return sum([ size for _, size, _ in s.entries() ])
+
+  def evict( s ):
+
+    entries = s.entries()
+    total   = sum([ size for _, size, _ in entries ])
+
+    for _, size, key in entries:
+      if total <= s.max_bytes:
+        break
+      shutil.rmtree( s.entry_dir( key ), ignore_errors=True )
+      total -= size
+
+#-------------------------------------------------------------------------
+# CachedVerilatorImportPass
+#-------------------------------------------------------------------------
+# Verilator import pass which checks the cache before verilating and
+# compiling a model and adds newly compiled models to the cache.
+
+class CachedVerilatorImportPass( VerilogVerilatorImportPass ):
+
+  cache = None
+
+  def cache_key( s, ip_cfg, import_cfg ):
+    sources = [ ip_cfg.translated_source_file ] + \
+      verilator_cache_sources( ip_cfg.src_file, ip_cfg.v_include, ip_cfg.v_libs )
+    return verilator_cache_key( ip_cfg.translated_top_module, ip_cfg.params, sources,
+                                import_cfg )
+
+  def is_cached( s, m, ip_cfg ):
+
+    cached, config_file, import_cfg = super().is_cached( m, ip_cfg )
+
+    cache = s.__class__.cache
+    if cache is not None:
+      ip_cfg._cache_key = s.cache_key( ip_cfg, import_cfg )
+      if not cached:
+        cached = cache.restore( ip_cfg._cache_key, ip_cfg.get_shared_lib_path() )
+
+    return cached, config_file, import_cfg
+
+  def create_shared_lib( s, m, ph_cfg, ip_cfg, cached ):
+
+    super().create_shared_lib( m, ph_cfg, ip_cfg, cached )
+
+    cache = s.__class__.cache
+    if cache is not None and ip_cfg._cache_key not in cache:
+      cache.store( ip_cfg._cache_key, ip_cfg.get_shared_lib_path(),
+                   ip_cfg.translated_top_module )
+
+#-------------------------------------------------------------------------
+# install_verilator_cache
+#-------------------------------------------------------------------------
+
+def install_verilator_cache( cache_dir, max_bytes=2**31 ):
+  CachedVerilatorImportPass.cache = VerilatorCache( cache_dir, max_bytes )
+  VerilogTranslationImportPass.get_import_pass = \
+    staticmethod( lambda: CachedVerilatorImportPass )
+  return CachedVerilatorImportPass.cache
+
+def uninstall_verilator_cache():
+  CachedVerilatorImportPass.cache = None
+  VerilogTranslationImportPass.get_import_pass = \
+    staticmethod( lambda: VerilogVerilatorImportPass )
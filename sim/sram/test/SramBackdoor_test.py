@@ -0,0 +1,265 @@
+#=========================================================================
+# SramBackdoor_test
+#=========================================================================
+# Most tests use a stand-in for the shared library of the imported model
+# which implements the DPI functions of the generic Verilog SRAMs in
+# Python, the last test needs Verilator.
+
+import os
+import random
+import shutil
+import sys
+
+import pytest
+
+from pymtl3                         import *
+from pymtl3.passes.backends.verilog import VerilogPlaceholderPass, VerilogTranslationImportPass
+
+from sram.SramPRTL     import SramPRTL
+from sram.SramRTL      import SramVRTL
+from sram.SramBackdoor import SramBackdoor, sram_backdoor, sram_backdoor_lib_file
+
+# Memory arrays by scope name, the DPI functions take and return signed
+# 32-bit chunks like the C functions. Every scope belongs to one kind of
+# generic SRAM (1rw by default), and like in Verilator only the functions
+# of that kind may be called in the scope.
+
+class DpiLib:
+
+  prefixes = { 'sram_generic' : '1rw', 'sram_generic_1r1w' : '1r1w',
+               'sram_generic_2rw' : '2rw' }
+
+  def __init__( s, scopes ):
+    s.scopes = {}
+    for name, ( nbits, num_entries, *ports ) in scopes.items():
+      s.scopes[ name ] = ( nbits, [ 0 ]*num_entries, ( ports or [ '1rw' ] )[0] )
+    s.scope  = None
+
+  def svGetScopeFromName( s, name ):
+    return name.decode() if name.decode() in s.scopes else None
+
+  def svSetScope( s, scope ):
+    s.scope = scope
+
+  def __getattr__( s, name ):
+    prefix, _, func = name.partition( '_backdoor_' )
+    if prefix not in s.prefixes or not func:
+      raise AttributeError( name )
+
+    def call( *args ):
+      assert s.scopes[ s.scope ][2] == s.prefixes[ prefix ], \
+        f"{name} called in the scope of another kind of SRAM"
+      return getattr( s, func )( *args )
+    return call
+
+  def nbits( s ):
+    return s.scopes[ s.scope ][0]
+
+  def nentries( s ):
+    return len( s.scopes[ s.scope ][1] )
+
+  def read( s, idx, chunk ):
+    x = ( s.scopes[ s.scope ][1][idx] >> ( 32*chunk ) ) & 0xffffffff
+    return x - ( x >> 31 << 32 )
+
+  def write( s, idx, chunk, value ):
+    assert -2**31 <= value < 2**31
+    nbits, mem, _ = s.scopes[ s.scope ]
+    mask = 0xffffffff << ( 32*chunk )
+    mem[idx] = ( ( mem[idx] & ~mask ) | ( ( value & 0xffffffff ) << ( 32*chunk ) ) ) \
+               & ( ( 1 << nbits ) - 1 )
+
+  def mem( s, name ):
+    return s.scopes[ name ][1]
+
+def mk_model( name ):
+  return type( name, (), {} )()
+
+#-------------------------------------------------------------------------
+# Test word and lane backdoors
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize( ("data_nbits", "num_entries", "scope"), [
+  ( 32,  256, 'genblk1.sram.sram_generic' ),
+  ( 40,  64,  'genblk1.sram'              ),
+  ( 96,  16,  'genblk1.sram'              ),
+])
+def test_backdoor( data_nbits, num_entries, scope ):
+
+  top   = f"sram_SramRTL_mask0_{data_nbits}b_{num_entries}words"
+  lib   = DpiLib({ f"TOP.{top}.v.{scope}" : ( data_nbits, num_entries ) })
+  model = SramBackdoor( mk_model( top ), data_nbits, num_entries, lib=lib )
+
+  rgen  = random.Random( 0xdeadbeef )
+  words = [ rgen.randint( 0, 2**data_nbits-1 ) for _ in range( num_entries ) ]
+  words[0] = 2**data_nbits-1
+
+  model.load( words )
+  assert lib.mem( f"TOP.{top}.v.{scope}" ) == words
+  assert model.dump() == words
+
+  # packed little-endian bytes overwrite the middle of the SRAM
+
+  nbytes = ( data_nbits+7 )//8
+  model.load( b''.join([ w.to_bytes( nbytes, 'little' ) for w in words[:4] ]), 8 )
+  assert model.dump( 8, 12 ) == words[:4]
+
+  with pytest.raises( AssertionError ):
+    model.load( words, 1 )
+  with pytest.raises( AssertionError ):
+    model.dump( 0, num_entries+1 )
+  with pytest.raises( AssertionError ):
+    model.dump( 4, 2 )
+
+def test_backdoor_lanes():
+
+  top    = "sram_SramRTL_mask4_128b_256words"
+  scopes = [ f"TOP.{top}.v.lanes.lane[{i}].sram.sram_generic" for i in range( 4 ) ]
+  lib    = DpiLib({ name : ( 32, 256 ) for name in scopes })
+  model  = SramBackdoor( mk_model( top ), 128, 256, 4, lib=lib )
+
+  words = [ random.randint( 0, 2**128-1 ) for _ in range( 256 ) ]
+  model.load( words )
+  assert model.dump() == words
+
+  for i, name in enumerate( scopes ):
+    assert lib.mem( name ) == [ ( x >> 32*i ) & 0xffffffff for x in words ]
+
+def test_backdoor_path( tmpdir ):
+
+  # the SRAM of a minion is found at its path, and only with the right
+  # size
+
+  top   = "SramMinionRTL"
+  lib   = DpiLib({ f"TOP.{top}.v.sram.genblk1.sram.sram_generic" : ( 32, 256 ) })
+  model = SramBackdoor( mk_model( top ), 32, 256, path='v.sram', lib=lib )
+
+  with pytest.raises( AssertionError ):
+    SramBackdoor( mk_model( top ), 32, 256, lib=lib )
+  with pytest.raises( AssertionError ):
+    SramBackdoor( mk_model( top ), 32, 128, path='v.sram', lib=lib )
+
+  path = tmpdir.join( 'image.bin' )
+  path.write_binary( bytes( range( 16 ) ) )
+  assert model.load_image( str( path ), base_idx=4 ) == 4
+  assert model.dump( 4, 6 ) == [ 0x03020100, 0x07060504 ]
+
+  # PyMTL models already have a backdoor
+
+  sram = SramPRTL( 32, 256 )
+  assert sram_backdoor( sram, 32, 256 ) is sram
+
+@pytest.mark.parametrize( "ports", [ '2rw', '1r1w' ] )
+def test_backdoor_ports( ports ):
+
+  # a design with a 1rw and a multiported generic SRAM, each of which is
+  # only accessed with its own DPI functions
+
+  top   = "SramTop"
+  lib   = DpiLib({ f"TOP.{top}.v.a.genblk1.sram" : ( 32, 64 ),
+                   f"TOP.{top}.v.b.genblk1.sram" : ( 32, 64, ports ) })
+  mem_a = SramBackdoor( mk_model( top ), 32, 64, path='v.a', lib=lib )
+  mem_b = SramBackdoor( mk_model( top ), 32, 64, path='v.b', ports=ports, lib=lib )
+
+  mem_a.load( list( range( 64 ) ) )
+  mem_b.load( list( range( 64, 128 ) ) )
+  assert mem_a.dump() == list( range( 64 ) )
+  assert mem_b.dump() == list( range( 64, 128 ) )
+
+  with pytest.raises( ValueError ):
+    SramBackdoor( mk_model( top ), 32, 64, path='v.b', ports='3rw', lib=lib )
+
+def test_backdoor_lib_file( tmpdir, monkeypatch ):
+
+  # the shared library is found next to the wrapper of the imported model
+  # wherever the current directory is
+
+  top = "sram_SramRTL_mask0_32b_256words"
+  tmpdir.join( f"{top}_v.py" ).write( f"class {top}:\n  pass\n" )
+  monkeypatch.syspath_prepend( str( tmpdir ) )
+  monkeypatch.chdir( tmpdir.mkdir( 'other' ) )
+
+  module = __import__( f"{top}_v" )
+  try:
+    with pytest.raises( AssertionError ):
+      sram_backdoor_lib_file( getattr( module, top )() )
+
+    tmpdir.join( f"lib{top}_v.so" ).write( '' )
+    assert sram_backdoor_lib_file( getattr( module, top )() ) == \
+           os.path.join( str( tmpdir ), f"lib{top}_v.so" )
+  finally:
+    del sys.modules[ f"{top}_v" ]
+
+#-------------------------------------------------------------------------
+# Test the Verilog model
+#-------------------------------------------------------------------------
+
+needs_verilator = pytest.mark.skipif( shutil.which( 'verilator' ) is None,
+                                      reason="needs Verilator" )
+
+def import_model( model, tmpdir, monkeypatch ):
+
+  # import the model in tmpdir and leave it, so the backdoor has to find
+  # the shared library of the model on its own
+
+  monkeypatch.chdir( tmpdir )
+  monkeypatch.syspath_prepend( str( tmpdir ) )
+
+  model.elaborate()
+  model.set_metadata( VerilogTranslationImportPass.enable, True )
+  model.apply( VerilogPlaceholderPass() )
+  model = VerilogTranslationImportPass()( model )
+  model.apply( DefaultPassGroup() )
+  model.sim_reset()
+
+  monkeypatch.chdir( tmpdir.mkdir( 'other' ) )
+  return model
+
+@needs_verilator
+@pytest.mark.parametrize( ("data_nbits", "num_entries", "mask_size"), [
+  ( 32, 256, 0 ), ( 64, 64, 0 ), ( 128, 256, 4 ),
+])
+def test_verilator( tmpdir, monkeypatch, data_nbits, num_entries, mask_size ):
+
+  model = import_model( SramVRTL( data_nbits, num_entries, mask_size ),
+                        tmpdir, monkeypatch )
+
+  mem   = SramBackdoor( model, data_nbits, num_entries, mask_size )
+  words = [ random.randint( 0, 2**data_nbits-1 ) for _ in range( num_entries ) ]
+  mem.load( words )
+  assert mem.dump() == words
+
+  # the loaded data is read through the port, and written data through
+  # the backdoor
+
+  model.port0_val  @= 1
+  model.port0_type @= 0
+  model.port0_idx  @= 3
+  if mask_size > 0:
+    model.port0_wben @= 0
+  model.sim_tick()
+  assert model.port0_rdata == words[3]
+
+  model.port0_type  @= 1
+  model.port0_wdata @= 0x1234
+  if mask_size > 0:
+    model.port0_wben @= 2**mask_size-1
+  model.sim_tick()
+  assert mem.dump( 3, 4 ) == [ 0x1234 ]
+
+  model.finalize()
+
+@needs_verilator
+@pytest.mark.parametrize( "ports", [ '2rw', '1r1w' ] )
+@pytest.mark.parametrize( ("data_nbits", "num_entries"), [ ( 32, 256 ), ( 64, 64 ) ] )
+def test_verilator_ports( tmpdir, monkeypatch, data_nbits, num_entries, ports ):
+
+  model = import_model( SramVRTL( data_nbits, num_entries, ports=ports ),
+                        tmpdir, monkeypatch )
+
+  mem   = SramBackdoor( model, data_nbits, num_entries, ports=ports )
+  words = [ random.randint( 0, 2**data_nbits-1 ) for _ in range( num_entries ) ]
+  mem.load( words )
+  assert mem.dump() == words
+
+  model.finalize()
@@ -0,0 +1,196 @@
+#=========================================================================
+# SramLibrary_test
+#=========================================================================
+# OpenRAM is not available in the test environment, so the views are
+# generated by a stub which writes a .lib and .lef for every macro.
+
+import os
+import re
+
+import pytest
+
+from pymtl3 import *
+from pymtl3.passes.backends.verilog import VerilogTranslationPass
+
+from sram import SramTiler
+from sram.SramLibrary import SramLibrary, read_sram_cfg, gen_sram_macro_v, \
+  mk_sram_macro_cls, sram_corner_name, this_dir
+
+def write( path, text ):
+  os.makedirs( os.path.dirname( path ), exist_ok=True )
+  with open( path, 'w' ) as f:
+    f.write( text )
+
+#-------------------------------------------------------------------------
+# Test reading configurations
+#-------------------------------------------------------------------------
+
+def test_read_sram_cfg( tmpdir ):
+
+  cfg = read_sram_cfg( os.path.join( this_dir, 'SRAM_32x256_2rw-cfg.py' ) )
+  assert ( cfg.name, cfg.data_nbits, cfg.num_entries, cfg.ports ) == \
+         ( 'SRAM_32x256_2rw', 32, 256, '2rw' )
+  assert cfg.corners == [ 'TT_1p1V_25C' ]
+
+  assert sram_corner_name( 'SS', 0.9, -40 ) == 'SS_0p9V_-40C'
+
+  # the hash only ignores the output path
+
+  path = str( tmpdir.join( 'SRAM_8x16_1rw.py' ) )
+  write( path, "word_size = 8\nnum_words = 16\nnum_rw_ports = 1\noutput_path = 'a'\n"
+               "process_corners = ['TT', 'SS']\ntemperatures = [25, 125]\n" )
+  cfg = read_sram_cfg( path )
+  assert cfg.name == 'SRAM_8x16_1rw' and cfg.ports == '1rw'
+  assert cfg.corners == [ 'TT_1V_25C', 'TT_1V_125C', 'SS_1V_25C', 'SS_1V_125C' ]
+
+  write( path, "word_size = 8\nnum_words = 16\nnum_rw_ports = 1\noutput_path = 'b'\n"
+               "process_corners = ['TT', 'SS']\ntemperatures = [25, 125]\n" )
+  assert read_sram_cfg( path ).hash == cfg.hash
+
+  write( path, "word_size = 8\nnum_words = 32\nnum_rw_ports = 1\noutput_path = 'b'\n"
+               "process_corners = ['TT', 'SS']\ntemperatures = [25, 125]\n" )
+  assert read_sram_cfg( path ).hash != cfg.hash
+
+  write( path, "import os\nx = 1\n" )
+  assert read_sram_cfg( path ) is None
+
+#-------------------------------------------------------------------------
+# Test queries
+#-------------------------------------------------------------------------
+
+def test_query():
+
+  lib = SramLibrary()
+
+  assert [ x.name for x in lib.query( 32, ports='1rw' ) ] == \
+         [ 'SRAM_32x128_1rw', 'SRAM_32x256_1rw' ]
+  assert [ x.name for x in lib.query( num_entries=256, corner='TT_1p1V_25C' ) ] == \
+         [ 'SRAM_32x256_1r1w', 'SRAM_32x256_1rw', 'SRAM_32x256_2rw', 'SRAM_128x256_1rw' ]
+  assert lib.query( corner='SS_1p0V_125C' ) == []
+
+  assert lib.find( 32, 256, '2rw' ).name == 'SRAM_32x256_2rw'
+  assert lib.find( 32, 512 ) is None
+
+#-------------------------------------------------------------------------
+# Test models
+#-------------------------------------------------------------------------
+
+# The generated Verilog models declare the same parameters and ports as
+# the hand-written ones
+
+def module_ports( text ):
+  params, decls = re.search( r"^module \w+\s*(?:#\((.*?)\)\s*)?\((.*?)\);", text,
+                             re.DOTALL | re.MULTILINE ).groups()
+  return [ line.split() for line in ( params or '' ).splitlines() + decls.splitlines()
+           if line.strip() ]
+
+@pytest.mark.parametrize( "name", [ 'SRAM_32x256_1rw', 'SRAM_128x256_1rw',
+                                    'SRAM_32x256_1r1w', 'SRAM_32x256_2rw' ] )
+def test_gen_sram_macro_v( name ):
+
+  cfg = SramLibrary()[ name ]
+  with open( os.path.join( this_dir, f"{name}.v" ) ) as f:
+    expected = f.read()
+
+  text = gen_sram_macro_v( name, cfg.data_nbits, cfg.num_entries, cfg.ports )
+  assert module_ports( text ) == module_ports( expected )
+  assert f".p_data_nbits  ({cfg.data_nbits})" in text
+  assert f"`endif /* {name} */" in text
+
+def test_mk_sram_macro_cls():
+
+  cls = mk_sram_macro_cls( 16, 64, '2rw' )
+  assert cls is mk_sram_macro_cls( 16, 64, '2rw' )
+  assert cls is not mk_sram_macro_cls( 16, 64 )
+  assert cls.__name__ == 'SRAM_16x64_2rw'
+  assert ( cls.data_nbits, cls.num_entries, cls.ports ) == ( 16, 64, '2rw' )
+
+  m = cls( semantics='write-first' )
+  m.elaborate()
+  assert m.get_metadata( VerilogTranslationPass.explicit_module_name ) == 'SRAM_16x64_2rw'
+  assert m.addr1.get_type() is Bits6 and m.dout1.get_type() is Bits16
+
+  # the registered macros use the generated models
+
+  assert SramTiler.sram_macros['SRAM_32x256_1rw'].cls is mk_sram_macro_cls( 32, 256 )
+
+  with pytest.raises( ValueError ):
+    mk_sram_macro_cls( 16, 64, '3rw' )
+
+def test_macro_cls( tmpdir ):
+
+  lib = SramLibrary()
+
+  assert lib.macro_cls( 'SRAM_32x256_1rw' ) is SramTiler.sram_macros['SRAM_32x256_1rw'].cls
+  assert lib.macro_cls( 'SRAM_32x128_1rw' ) is lib.macro_cls( 'SRAM_32x128_1rw' )
+
+  m = lib.macro_cls( 'SRAM_32x128_1rw' )()
+  m.elaborate()
+  assert m.get_metadata( VerilogTranslationPass.explicit_module_name ) == 'SRAM_32x128_1rw'
+  assert m.addr0.get_type() is Bits7 and m.dout0.get_type() is Bits32
+
+  path = lib.write_verilog( 'SRAM_32x128_1rw', str( tmpdir.join( 'SRAM_32x128_1rw.v' ) ) )
+  with open( path ) as f:
+    assert "module SRAM_32x128_1rw" in f.read()
+
+#-------------------------------------------------------------------------
+# Test generating and caching views
+#-------------------------------------------------------------------------
+
+def test_views( tmpdir, monkeypatch ):
+
+  monkeypatch.setattr( SramTiler, 'sram_macros', dict( SramTiler.sram_macros ) )
+
+  generated = []
+  def generator( cfg, out_dir ):
+    generated.append( cfg.name )
+    if cfg.name == 'SRAM_8x16_1rw':
+      raise RuntimeError( "openram failed" )
+    for corner in cfg.corners:
+      write( os.path.join( out_dir, f"{cfg.name}_{corner}.lib" ),
+             f"area : {cfg.data_nbits * cfg.num_entries}.0;\ncell_leakage_power : 0.5;\n" )
+    write( os.path.join( out_dir, f"{cfg.name}.lef" ), "MACRO" )
+
+  cfg_globs = [ os.path.join( this_dir, '*-cfg.py' ), str( tmpdir.join( 'cfgs', '*.py' ) ) ]
+  cache_dir = str( tmpdir.join( 'cache' ) )
+
+  write( str( tmpdir.join( 'cfgs', 'SRAM_8x16_1rw.py' ) ),
+         "word_size = 8\nnum_words = 16\nnum_rw_ports = 1\n" )
+
+  lib = SramLibrary( cfg_globs, cache_dir, generator )
+  assert lib.views( 'SRAM_32x256_1rw' ) is None
+
+  views = lib.views( 'SRAM_32x256_1rw', generate=True )
+  assert views['lef'].endswith( 'SRAM_32x256_1rw.lef' )
+  assert list( views['lib'] ) == [ 'TT_1p1V_25C' ]
+  assert lib.views( 'SRAM_32x256_1rw', generate=True ) == views
+
+  # a failed generation leaves nothing behind
+
+  with pytest.raises( RuntimeError ):
+    lib.views( 'SRAM_8x16_1rw', generate=True )
+  assert os.listdir( cache_dir ) == [ lib['SRAM_32x256_1rw'].hash ]
+
+  # the same macro configured elsewhere reuses the cached views
+
+  write( str( tmpdir.join( 'cfgs', 'SRAM_32x256_1rw.py' ) ),
+         open( os.path.join( this_dir, 'SRAM_32x256_1rw-cfg.py' ) ).read()
+         + "\noutput_path = 'elsewhere'\n" )
+
+  lib = SramLibrary( [ str( tmpdir.join( 'cfgs', '*.py' ) ) ], cache_dir, generator )
+  assert lib.views( 'SRAM_32x256_1rw', generate=True ) == views
+  assert generated == [ 'SRAM_32x256_1rw', 'SRAM_8x16_1rw' ]
+
+  # registered macros are characterized from the cached .lib
+
+  assert [ x.name for x in lib.register( 'TT_1p1V_25C' ) ] == [ 'SRAM_32x256_1rw' ]
+
+  macros = { x.name : x for x in lib.register() }
+  assert set( macros ) == { 'SRAM_32x256_1rw', 'SRAM_8x16_1rw' }
+  assert macros['SRAM_32x256_1rw'].area == 32*256
+  assert macros['SRAM_32x256_1rw'].leakage == 0.5
+  assert macros['SRAM_8x16_1rw'].area != 8*16
+  assert SramTiler.sram_macros['SRAM_8x16_1rw'].cls is lib.macro_cls( 'SRAM_8x16_1rw' )
+
+  lib.cache.clear()
+  assert lib.views( 'SRAM_32x256_1rw' ) is None
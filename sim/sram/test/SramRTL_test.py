@@ -5,10 +5,19 @@
 
 import pytest
 import random
+import re
+import struct
 
 from pymtl3 import *
+from pymtl3.passes.backends.verilog import VerilogTranslationPass
 from pymtl3.stdlib.test_utils import run_test_vector_sim
-from sram.SramRTL import SramRTL
+from sram.SramRTL  import SramRTL
+from sram.SramPRTL import SramPRTL
+from sram import SramImage
+from sram.SramTiler import choose_sram_tiling, estimate_sram_char, sram_macros
+from sram.SramEnergy import estimate_sram_energy
+from sram.SramStimulus import gen_sram_stimulus, sram_golden_rdata, run_sram_stimulus, \
+                              check_sram_rdata
 
 #-------------------------------------------------------------------------
 # SRAM to be tested
@@ -217,3 +226,512 @@ def test_random( cmdline_opts, data_nbits, num_entries):
                        gen_rand_tvec(data_nbits, num_entries),
                        cmdline_opts )
 
+
+#-----------------------------------------------------------------------
+# random test with write masks
+#-----------------------------------------------------------------------
+# Each write updates a random subset of the lanes and we check the merged
+# word against a golden model. The (64,256,2) configuration uses one
+# 32x256 SRAM macro per lane, the other configurations use the generic
+# SRAM with a write mask.
+
+mask_configs = [ (32, 128, 4), (64, 64, 8), (64, 256, 2), (128, 256, 4),
+                 (128, 256, 16), (16, 32, 2) ]
+
+def gen_rand_mask_tvec( data_nbits, num_entries, mask_size ):
+
+  rgen = random.Random()
+  rgen.seed(0xdeadbeef)
+
+  lane_nbits = data_nbits // mask_size
+  vmem       = [ 0 ] * num_entries
+
+  test_vectors = [ ( "port0_val", "port0_type", "port0_wben", "port0_idx",
+                     "port0_wdata", "port0_rdata*" ) ]
+
+  for i in range(100):
+    addr  = rgen.randint( 0, num_entries-1   )
+    wben  = rgen.randint( 0, 2**mask_size-1  )
+    wdata = rgen.randint( 0, 2**data_nbits-1 )
+
+    for j in range(mask_size):
+      if ( wben >> j ) & 1:
+        lane_mask  = ( 2**lane_nbits-1 ) << ( j*lane_nbits )
+        vmem[addr] = ( vmem[addr] & ~lane_mask ) | ( wdata & lane_mask )
+
+    #                val type wben  addr  wdata  rdata
+    test_vectors += [[ 1,  1,   wben, addr, wdata, '?'        ],
+                     [ 1,  0,   0,    addr, 0,     '?'        ],
+                     [ 0,  0,   0,    0,    0,     vmem[addr] ]]
+
+  return test_vectors
+
+@pytest.mark.parametrize(("data_nbits", "num_entries", "mask_size"), mask_configs )
+def test_random_mask( cmdline_opts, data_nbits, num_entries, mask_size ):
+  run_test_vector_sim( SramRTL(data_nbits, num_entries, mask_size),
+                       gen_rand_mask_tvec(data_nbits, num_entries, mask_size),
+                       cmdline_opts )
+
+@pytest.mark.parametrize( "storage", [ 'array', 'sparse' ] )
+@pytest.mark.parametrize(("data_nbits", "num_entries", "mask_size"), mask_configs )
+def test_random_mask_storage( cmdline_opts, data_nbits, num_entries, mask_size, storage ):
+  run_test_vector_sim( SramPRTL(data_nbits, num_entries, mask_size, storage),
+                       gen_rand_mask_tvec(data_nbits, num_entries, mask_size),
+                       cmdline_opts )
+
+#-----------------------------------------------------------------------
+# bulk random test
+#-----------------------------------------------------------------------
+# The stimulus is generated in bulk and the read data of the whole run is
+# compared against the golden model at the end (see SramStimulus.py). Use
+# --sram-ntrans to run deep random regressions (e.g., --sram-ntrans
+# 1000000).
+
+@pytest.mark.parametrize(("data_nbits", "num_entries"), sram_configs )
+def test_random_bulk( cmdline_opts, sram_ntrans, data_nbits, num_entries ):
+  stim = gen_sram_stimulus( data_nbits, num_entries, sram_ntrans )
+  rd_cycles, expected = sram_golden_rdata( stim )
+  actual = run_sram_stimulus( SramRTL(data_nbits, num_entries), stim, cmdline_opts )
+  check_sram_rdata( stim, rd_cycles, expected, actual )
+
+@pytest.mark.parametrize(("data_nbits", "num_entries", "mask_size"), mask_configs )
+def test_random_bulk_mask( cmdline_opts, sram_ntrans, data_nbits, num_entries, mask_size ):
+  stim = gen_sram_stimulus( data_nbits, num_entries, sram_ntrans, mask_size )
+  rd_cycles, expected = sram_golden_rdata( stim )
+  actual = run_sram_stimulus( SramRTL(data_nbits, num_entries, mask_size), stim, cmdline_opts )
+  check_sram_rdata( stim, rd_cycles, expected, actual )
+
+def test_random_bulk_check():
+
+  # a corrupted read is reported with its cycle and index
+
+  stim = gen_sram_stimulus( 32, 256, 100 )
+  rd_cycles, expected = sram_golden_rdata( stim )
+  assert len( expected ) == 4 * len( rd_cycles ) and len( rd_cycles ) > 0
+
+  actual = bytearray( expected )
+  actual[5] ^= 0xff
+  with pytest.raises( AssertionError, match=f"cycle {rd_cycles[1]}" ):
+    check_sram_rdata( stim, rd_cycles, expected, actual )
+
+  with pytest.raises( AssertionError, match="reads" ):
+    check_sram_rdata( stim, rd_cycles, expected, expected[:-4] )
+
+#-----------------------------------------------------------------------
+# random test with macro tiling
+#-----------------------------------------------------------------------
+# These configurations are built from several SRAM macros side by side
+# and/or on top of each other (see SramTiler.py). SramRTL only uses the
+# macros SramVRTL.v selects, so we test the tiling with SramPRTL.
+
+tiled_configs = [ (32, 1024, 0), (96, 512, 0), (64, 512, 0), (256, 256, 8) ]
+
+def test_tiling():
+  assert choose_sram_tiling( 16,  32  ) is None
+  assert choose_sram_tiling( 128, 256, 16 ) is None
+
+  tiling = choose_sram_tiling( 128, 256, 4 )
+  assert tiling.macro.name == "SRAM_32x256_1rw"
+  assert ( tiling.nrows, tiling.ncols ) == ( 1, 4 )
+
+  tiling = choose_sram_tiling( 96, 512 )
+  assert ( tiling.nrows, tiling.nmacros ) == ( 2, tiling.ncols*2 )
+  assert tiling.utilization >= 0.75
+
+def test_verilog_tiling():
+
+  # the same macros as the generate branches of SramVRTL.v
+
+  assert choose_sram_tiling( 128, 256, objective='verilog' ).macro.name == "SRAM_128x256_1rw"
+  assert choose_sram_tiling( 96,  512, objective='verilog' ) is None
+
+  tiling = choose_sram_tiling( 256, 256, 8, objective='verilog' )
+  assert tiling.macro.name == "SRAM_32x256_1rw"
+  assert ( tiling.nrows, tiling.ncols ) == ( 1, 8 )
+
+  # SramRTL builds the PyMTL model with objective='verilog', so it is
+  # built from the same macros whatever the language of SramRTL is
+
+  for args, name in [ ( (32, 256, 0),  "SRAM_32x256_1rw" ),
+                      ( (128, 256, 4), "SRAM_32x256_1rw" ),
+                      ( (64, 512, 0),  None              ) ]:
+    model = SramPRTL( *args, objective='verilog' )
+    model.elaborate()
+    assert repr( model.tiling ) == repr( choose_sram_tiling( *args, objective='verilog' ) )
+    assert ( model.tiling and model.tiling.macro.name ) == name
+
+@pytest.mark.parametrize(("data_nbits", "num_entries", "mask_size", "nmacros"), [
+  (32, 256, 0, 1), (128, 256, 4, 4), (32, 1024, 0, 4),
+])
+def test_translate_tiled( tmpdir, monkeypatch, data_nbits, num_entries, mask_size, nmacros ):
+
+  # every macro is instantiated exactly once in the translated Verilog
+
+  monkeypatch.chdir( tmpdir )
+
+  model = SramPRTL( data_nbits, num_entries, mask_size )
+  model.elaborate()
+  model.set_metadata( VerilogTranslationPass.enable, True )
+  model.apply( VerilogTranslationPass() )
+
+  with open( model.get_metadata( VerilogTranslationPass.translated_filename ) ) as f:
+    text = f.read()
+
+  name = model.tiling.macro.name
+  assert len( re.findall( rf"^\s*{name}\s+\w+\s*$", text, re.MULTILINE ) ) == nmacros
+
+@pytest.mark.parametrize(("data_nbits", "num_entries", "mask_size"), tiled_configs )
+def test_random_tiled( cmdline_opts, data_nbits, num_entries, mask_size ):
+  if mask_size > 0:
+    tvec = gen_rand_mask_tvec( data_nbits, num_entries, mask_size )
+  else:
+    tvec = gen_rand_tvec( data_nbits, num_entries )
+  run_test_vector_sim( SramPRTL(data_nbits, num_entries, mask_size), tvec, cmdline_opts )
+
+#-----------------------------------------------------------------------
+# random test with multiported SRAMs
+#-----------------------------------------------------------------------
+# Both ports are used in most cycles and most accesses go to a few hot
+# entries, so reads of an entry written by the other port in the same
+# cycle (which return the old data) and writes of the same entry by both
+# ports (port 1 wins) are frequent. The (32,256) configurations use the
+# SRAM macros, the other configurations use the generic models.
+
+multiport_configs = [ (16, 32), (32, 256), (64, 64) ]
+
+def gen_rand_multiport_tvec( data_nbits, num_entries, ports ):
+
+  rgen = random.Random()
+  rgen.seed(0xdeadbeef)
+
+  hot  = [ rgen.randint( 0, num_entries-1 ) for _ in range(4) ]
+  vmem = [ 0 ] * num_entries
+
+  if ports == '2rw':
+    test_vectors = [ ( "port0_val", "port0_type", "port0_idx", "port0_wdata", "port0_rdata*",
+                       "port1_val", "port1_type", "port1_idx", "port1_wdata", "port1_rdata*" ) ]
+  else:
+    test_vectors = [ ( "port0_val", "port0_idx", "port0_wdata",
+                       "port1_val", "port1_idx", "port1_rdata*" ) ]
+
+  rdata = [ '?', '?' ]
+
+  for i in range(200):
+
+    # port 0 of a 1r1w SRAM only writes and port 1 only reads
+
+    vals  = [ rgen.randint( 0, 3 ) > 0 for _ in range(2) ]
+    types = [ rgen.randint( 0, 1 ) for _ in range(2) ]
+    idxs  = [ rgen.choice( hot ) if rgen.randint( 0, 1 ) else
+              rgen.randint( 0, num_entries-1 ) for _ in range(2) ]
+    wdata = [ rgen.randint( 0, 2**data_nbits-1 ) for _ in range(2) ]
+
+    if ports == '1r1w':
+      types = [ 1, 0 ]
+
+    if ports == '2rw':
+      test_vectors.append([ vals[0], types[0], idxs[0], wdata[0], rdata[0],
+                            vals[1], types[1], idxs[1], wdata[1], rdata[1] ])
+    else:
+      test_vectors.append([ vals[0], idxs[0], wdata[0],
+                            vals[1], idxs[1], rdata[1] ])
+
+    # reads see the data before this cycle's writes
+
+    rdata = [ vmem[ idxs[p] ] if vals[p] and not types[p] else '?' for p in range(2) ]
+
+    for p in range(2):
+      if vals[p] and types[p]:
+        vmem[ idxs[p] ] = wdata[p]
+
+  if ports == '2rw':
+    test_vectors.append([ 0, 0, 0, 0, rdata[0], 0, 0, 0, 0, rdata[1] ])
+  else:
+    test_vectors.append([ 0, 0, 0, 0, 0, rdata[1] ])
+
+  return test_vectors
+
+@pytest.mark.parametrize( "ports", [ '1r1w', '2rw' ] )
+@pytest.mark.parametrize(("data_nbits", "num_entries"), multiport_configs )
+def test_random_multiport( cmdline_opts, data_nbits, num_entries, ports ):
+  run_test_vector_sim( SramRTL(data_nbits, num_entries, ports=ports),
+                       gen_rand_multiport_tvec(data_nbits, num_entries, ports),
+                       cmdline_opts )
+
+@pytest.mark.parametrize( "ports", [ '1r1w', '2rw' ] )
+@pytest.mark.parametrize(("data_nbits", "num_entries"), multiport_configs )
+def test_random_multiport_storage( cmdline_opts, data_nbits, num_entries, ports ):
+  run_test_vector_sim( SramPRTL(data_nbits, num_entries, storage='array', ports=ports),
+                       gen_rand_multiport_tvec(data_nbits, num_entries, ports),
+                       cmdline_opts )
+
+def test_multiport_macros():
+  for ports in [ '1r1w', '2rw' ]:
+    model = SramPRTL( 32, 256, ports=ports )
+    model.elaborate()
+    assert model.sram.__class__.__name__ == f"SRAM_32x256_{ports}"
+
+  assert choose_sram_tiling( 32, 256 ).macro.ports == '1rw'
+
+  with pytest.raises( ValueError ):
+    SramPRTL( 32, 256, ports='3rw' ).elaborate()
+
+@pytest.mark.parametrize( "ports", [ '1r1w', '2rw' ] )
+def test_multiport_backdoor( ports ):
+
+  rgen  = random.Random()
+  rgen.seed(0xdeadbeef)
+  words = [ rgen.randint( 0, 2**32-1 ) for _ in range(256) ]
+
+  model = SramPRTL( 32, 256, ports=ports )
+  model.apply( DefaultPassGroup() )
+  model.sim_reset()
+
+  model.load( words )
+  assert model.dump() == words
+
+  model.port1_val @= 1
+  model.port1_idx @= 0x42
+  if ports == '2rw':
+    model.port1_type @= 0
+  model.sim_tick()
+  assert model.port1_rdata == words[0x42]
+
+#-----------------------------------------------------------------------
+# activity and energy test
+#-----------------------------------------------------------------------
+# Every access of a tiled SRAM enables one row of macros, and the energy
+# of each instance follows from its access counters.
+
+@pytest.mark.parametrize(("data_nbits", "num_entries", "ports"),
+  [ (16, 32, '1rw'), (32, 256, '1rw'), (96, 512, '1rw'), (32, 256, '2rw'), (16, 32, '1r1w') ] )
+def test_activity_energy( data_nbits, num_entries, ports ):
+
+  model = SramPRTL( data_nbits, num_entries, ports=ports, activity=True )
+  model.apply( DefaultPassGroup() )
+  model.sim_reset()
+
+  # write the first 16 words, then read them back
+
+  for i in range(32):
+    if ports == '1r1w':
+      model.port0_val   @= i < 16
+      model.port0_idx   @= i % 16
+      model.port1_val   @= i >= 16
+      model.port1_idx   @= i % 16
+    else:
+      model.port0_val   @= 1
+      model.port0_type  @= i < 16
+      model.port0_idx   @= i % 16
+    model.sim_tick()
+
+  model.port0_val @= 0
+  if ports != '1rw':
+    model.port1_val @= 0
+  model.sim_tick()
+
+  report = estimate_sram_energy( model, clock_period=1.0 )
+  ncols  = model.tiling.ncols if model.tiling else 1
+
+  assert sum([ x['nwrites'] for x in report['instances'] ]) == 16*ncols
+  assert sum([ x['nreads']  for x in report['instances'] ]) == 16*ncols
+  assert all([ x['ncycles'] == 33 for x in report['instances'] ])
+
+  for x in report['instances']:
+    if x['macro'] is None:
+      char = estimate_sram_char( data_nbits, num_entries )
+    else:
+      m    = sram_macros[ x['macro'] ]
+      char = { 'read' : m.read_energy, 'write' : m.write_energy, 'leakage' : m.leakage }
+    assert x['total_energy'] == pytest.approx( x['nreads']*char['read']
+      + x['nwrites']*char['write'] + 33*char['leakage'] )
+
+  assert report['total_energy'] == pytest.approx(
+    sum([ x['total_energy'] for x in report['instances'] ]) )
+
+  if ( data_nbits, num_entries ) == ( 32, 256 ):
+    assert report['instances'][0]['macro'] == f"SRAM_32x256_{ports}"
+
+def test_activity_disabled():
+  model = SramPRTL( 32, 256 )
+  model.elaborate()
+  assert not hasattr( model.sram.sram_generic, 'activity' )
+  assert estimate_sram_energy( model )['instances'] == []
+
+#-----------------------------------------------------------------------
+# random test with array storage
+#-----------------------------------------------------------------------
+# The array storage engine is simulation only, so we always test it using
+# the PyMTL model.
+
+@pytest.mark.parametrize(("data_nbits", "num_entries"), sram_configs )
+def test_random_array_storage( cmdline_opts, data_nbits, num_entries ):
+  run_test_vector_sim( SramPRTL(data_nbits, num_entries, storage='array'),
+                       gen_rand_tvec(data_nbits, num_entries),
+                       cmdline_opts )
+
+#-----------------------------------------------------------------------
+# random test with sparse storage
+#-----------------------------------------------------------------------
+
+@pytest.mark.parametrize(("data_nbits", "num_entries"), sram_configs )
+def test_random_sparse_storage( cmdline_opts, data_nbits, num_entries ):
+  run_test_vector_sim( SramPRTL(data_nbits, num_entries, storage='sparse'),
+                       gen_rand_tvec(data_nbits, num_entries),
+                       cmdline_opts )
+
+def test_sparse_storage_resident_pages():
+
+  model = SramPRTL( 32, 65536, storage='sparse' )
+  model.apply( DefaultPassGroup() )
+  model.sim_reset()
+
+  assert model.num_resident_pages() == 0
+
+  # write two words which are far apart and read back an untouched word
+
+  for idx, wdata in [ (0x0010, 0xdeadbeef), (0xf000, 0xcafecafe) ]:
+    model.port0_val   @= 1
+    model.port0_type  @= 1
+    model.port0_idx   @= idx
+    model.port0_wdata @= wdata
+    model.sim_tick()
+
+  model.port0_type @= 0
+  model.port0_idx  @= 0xf000
+  model.sim_tick()
+  assert model.port0_rdata == 0xcafecafe
+
+  model.port0_idx  @= 0x8000
+  model.sim_tick()
+  assert model.port0_rdata == 0
+
+  assert model.num_resident_pages() == 2
+
+#-----------------------------------------------------------------------
+# backdoor load/dump test
+#-----------------------------------------------------------------------
+# Preload the whole SRAM through the backdoor, then check that the data
+# can be read both through the backdoor and through the port.
+
+@pytest.mark.parametrize( "storage", [ 'wire', 'array', 'sparse' ] )
+@pytest.mark.parametrize(("data_nbits", "num_entries", "mask_size"),
+  [ (d, n, 0) for d, n in sram_configs ] + [ (128, 256, 4), (64, 64, 8) ] + tiled_configs )
+def test_backdoor( data_nbits, num_entries, mask_size, storage ):
+
+  rgen  = random.Random()
+  rgen.seed(0xdeadbeef)
+  words = [ rgen.randint( 0, 2**data_nbits-1 ) for _ in range(num_entries) ]
+
+  model = SramPRTL( data_nbits, num_entries, mask_size, storage )
+  model.apply( DefaultPassGroup() )
+  model.sim_reset()
+
+  model.load( words )
+  assert model.dump() == words
+
+  # packed little-endian bytes overwrite the middle of the SRAM
+
+  nbytes = (data_nbits+7)//8
+  model.load( b''.join([ w.to_bytes(nbytes,'little') for w in words[:8] ]), 8 )
+  assert model.dump( 8, 16 ) == words[:8]
+
+  for idx in range( 0, num_entries, num_entries//8 ):
+    model.port0_val  @= 1
+    model.port0_type @= 0
+    model.port0_idx  @= idx
+    if mask_size > 0:
+      model.port0_wben @= 0
+    model.sim_tick()
+    assert model.port0_rdata == model.dump( idx, idx+1 )[0]
+
+#-----------------------------------------------------------------------
+# memory image test
+#-----------------------------------------------------------------------
+
+def mk_elf32( segments ):
+
+  # ELF header followed by one program header per (paddr, data, memsz)
+  # segment, followed by the segment data
+
+  phoff  = 52
+  offset = phoff + 32*len(segments)
+
+  header = struct.pack( '<4sBBBB8sHHIIIIIHHHHHH', b'\x7fELF', 1, 1, 1, 0,
+             bytes(8), 2, 0, 1, 0, phoff, 0, 0, 52, 32, len(segments), 0, 0, 0 )
+
+  phdrs = b''
+  for paddr, data, memsz in segments:
+    phdrs  += struct.pack( '<IIIIIIII', 1, offset, paddr, paddr, len(data), memsz, 0, 4 )
+    offset += len(data)
+
+  return header + phdrs + b''.join([ data for _, data, _ in segments ])
+
+@pytest.mark.parametrize( "storage", [ 'wire', 'array' ] )
+def test_load_image( tmp_path, storage ):
+
+  model = SramPRTL( 32, 256, storage=storage )
+  model.apply( DefaultPassGroup() )
+  model.sim_reset()
+
+  # $readmemh-style hex
+
+  hex_file = tmp_path / "image.hex"
+  hex_file.write_text( "// comment\n0000_0001 00000002 /* x */\n@10\ncafe0123\n" )
+
+  assert model.load_image( str(hex_file) ) == 3
+  assert model.dump( 0, 2 ) == [ 1, 2 ]
+  assert model.dump( 0x10, 0x11 ) == [ 0xcafe0123 ]
+
+  # raw binary loaded at an offset
+
+  bin_file = tmp_path / "image.bin"
+  bin_file.write_bytes( struct.pack( '<4I', 4, 5, 6, 7 ) )
+
+  assert model.load_image( str(bin_file), base_idx=0x20 ) == 4
+  assert model.dump( 0x20, 0x24 ) == [ 4, 5, 6, 7 ]
+
+  # ELF with a second segment that is partially zero-filled (.bss)
+
+  elf_file = tmp_path / "image"
+  elf_file.write_bytes( mk_elf32([
+    ( 0x100, struct.pack( '<2I', 0xdeadbeef, 0x0a0b0c0d ), 8  ),
+    ( 0x200, struct.pack( '<I',  0x42134213 ),             12 ),
+  ]))
+
+  model.load( [ 0xffffffff ]*256 )
+  model.load_image( str(elf_file) )
+  assert model.dump( 0x40, 0x42 ) == [ 0xdeadbeef, 0x0a0b0c0d ]
+  assert model.dump( 0x80, 0x84 ) == [ 0x42134213, 0, 0, 0xffffffff ]
+
+@pytest.mark.parametrize( "storage", [ 'wire', 'array' ] )
+def test_load_image_closed( tmp_path, monkeypatch, storage ):
+
+  # the mapped files are closed once the image is loaded
+
+  mapped = []
+  orig_map_file = SramImage.map_file
+  def map_file( path ):
+    mapped.append( orig_map_file( path ) )
+    return mapped[-1]
+  monkeypatch.setattr( SramImage, 'map_file', map_file )
+
+  model = SramPRTL( 32, 256, storage=storage )
+  model.apply( DefaultPassGroup() )
+  model.sim_reset()
+
+  bin_file = tmp_path / "image.bin"
+  bin_file.write_bytes( struct.pack( '<4I', 4, 5, 6, 7 ) )
+  elf_file = tmp_path / "image.elf"
+  elf_file.write_bytes( mk_elf32([ ( 0x100, struct.pack( '<2I', 1, 2 ), 8  ),
+                                   ( 0x200, struct.pack( '<I',  3 ),    12 ) ]) )
+
+  model.load_image( str(bin_file) )
+  model.load_image( str(elf_file) )
+  assert model.dump( 0, 4 ) == [ 4, 5, 6, 7 ]
+  assert model.dump( 0x40, 0x42 ) == [ 1, 2 ]
+
+  with pytest.raises( AssertionError ):
+    model.load_image( str(bin_file), base_idx=254 )
+
+  assert len( mapped ) == 3 and all( data.closed for data in mapped )
@@ -0,0 +1,247 @@
+#=========================================================================
+# SramSemantics_test
+#=========================================================================
+# Read-during-write semantics and X checks are simulation-only, so these
+# tests always use the PyMTL model (only test_verilog_semantics checks
+# that the Verilog placeholder passes the semantics on).
+
+import pytest
+
+from pymtl3 import *
+from pymtl3.passes.backends.verilog import VerilogPlaceholderPass
+
+from sram.SramPRTL      import SramPRTL
+from sram.SramRTL       import SramVRTL
+from sram.SramSemantics import sram_semantics
+
+from tut8_sram.SramMinionPRTL          import SramMinionPRTL
+from tut8_sram.test.SramMinionRTL_test import TestHarness, random_msgs
+
+def mk_model( data_nbits, num_entries, mask_size=0, **kwargs ):
+  model = SramPRTL( data_nbits, num_entries, mask_size, **kwargs )
+  model.apply( DefaultPassGroup() )
+  model.sim_reset()
+  return model
+
+def access( model, port, type_, idx, wdata=0 ):
+
+  # @= cannot be applied to getattr() directly
+
+  val = getattr( model, f'port{port}_val' )
+  val @= 1
+  addr = getattr( model, f'port{port}_idx' )
+  addr @= idx
+  if hasattr( model, f'port{port}_type' ):
+    typ = getattr( model, f'port{port}_type' )
+    typ @= type_
+  if hasattr( model, f'port{port}_wdata' ):
+    din = getattr( model, f'port{port}_wdata' )
+    din @= wdata
+
+def idle( model, *ports ):
+  for port in ports:
+    val = getattr( model, f'port{port}_val' )
+    val @= 0
+
+#-------------------------------------------------------------------------
+# Test single-ported SRAMs
+#-------------------------------------------------------------------------
+# Entry 3 holds 0x11 and is overwritten with 0x22 (or with 0x22 in the
+# low half of the word with a write mask)
+
+semantics_rdata = { 'read-first' : 0x11, 'write-first' : 0x22, 'x-on-write' : 0 }
+
+@pytest.mark.parametrize( "storage", [ 'wire', 'array' ] )
+@pytest.mark.parametrize( "semantics", [ 'read-first', 'write-first', 'x-on-write' ] )
+@pytest.mark.parametrize(("data_nbits", "num_entries"), [ (16, 32), (32, 256) ] )
+def test_1rw( data_nbits, num_entries, semantics, storage ):
+
+  model = mk_model( data_nbits, num_entries, storage=storage, semantics=semantics,
+                    check=True )
+  model.load( [ 0x11 ]*8 )
+
+  access( model, 0, 1, 3, 0x22 )
+  model.sim_tick()
+
+  assert model.port0_rdata   == semantics_rdata[ semantics ]
+  assert model.port0_rdata_x == ( semantics == 'x-on-write' )
+
+  access( model, 0, 0, 3 )
+  model.sim_tick()
+  assert model.port0_rdata == 0x22 and not model.port0_rdata_x
+
+  idle( model, 0 )
+  model.sim_tick()
+  assert model.port0_rdata_x
+
+@pytest.mark.parametrize( "storage", [ 'wire', 'array' ] )
+@pytest.mark.parametrize( "semantics", [ 'read-first', 'write-first', 'x-on-write' ] )
+def test_1rw_mask( semantics, storage ):
+
+  model = mk_model( 64, 64, 8, storage=storage, semantics=semantics, check=True )
+  model.load( [ 0x1111111111111111 ]*8 )
+
+  access( model, 0, 1, 3, 0x2222222222222222 )
+  model.port0_wben @= 0x0f
+  model.sim_tick()
+
+  assert model.port0_rdata == { 'read-first'  : 0x1111111111111111,
+                                'write-first' : 0x1111111122222222,
+                                'x-on-write'  : 0 }[ semantics ]
+  assert model.port0_rdata_x == ( semantics == 'x-on-write' )
+
+  access( model, 0, 0, 3 )
+  model.sim_tick()
+  assert model.port0_rdata == 0x1111111122222222
+
+#-------------------------------------------------------------------------
+# Test multiported SRAMs
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize( "storage", [ 'wire', 'array' ] )
+@pytest.mark.parametrize( "semantics", [ 'read-first', 'write-first', 'x-on-write' ] )
+def test_2rw( semantics, storage ):
+
+  model = mk_model( 32, 256, ports='2rw', storage=storage, semantics=semantics,
+                    check=True )
+  model.load( [ 0x11 ]*8 )
+
+  # port 0 reads the entry port 1 writes
+
+  access( model, 0, 0, 3 )
+  access( model, 1, 1, 3, 0x22 )
+  model.sim_tick()
+
+  x_on_write = semantics == 'x-on-write'
+
+  assert model.port0_rdata   == ( 0x22 if semantics == 'write-first' else 0x11 )
+  assert model.port0_rdata_x == x_on_write
+  assert model.port1_rdata   == semantics_rdata[ semantics ]
+  assert model.port1_rdata_x == x_on_write
+
+  # both ports write the same entry, port 1 wins
+
+  access( model, 0, 1, 4, 0x33 )
+  access( model, 1, 1, 4, 0x44 )
+
+  if x_on_write:
+    with pytest.raises( AssertionError ):
+      model.sim_tick()
+    return
+
+  model.sim_tick()
+  if semantics == 'write-first':
+    assert model.port0_rdata == 0x44 and model.port1_rdata == 0x44
+
+  access( model, 0, 0, 4 )
+  idle( model, 1 )
+  model.sim_tick()
+  assert model.port0_rdata == 0x44 and model.port1_rdata_x
+
+def test_2rw_no_check():
+
+  # without the checks a write/write conflict does not raise
+
+  model = mk_model( 32, 256, ports='2rw', semantics='x-on-write' )
+  access( model, 0, 1, 4, 0x33 )
+  access( model, 1, 1, 4, 0x44 )
+  model.sim_tick()
+  assert not hasattr( model, 'port0_rdata_x' )
+
+@pytest.mark.parametrize( "storage", [ 'wire', 'array' ] )
+@pytest.mark.parametrize( "semantics", [ 'read-first', 'write-first', 'x-on-write' ] )
+def test_1r1w( semantics, storage ):
+
+  model = mk_model( 32, 256, ports='1r1w', storage=storage, semantics=semantics,
+                    check=True )
+  model.load( [ 0x11 ]*8 )
+
+  access( model, 0, 1, 3, 0x22 )
+  access( model, 1, 0, 3 )
+  model.sim_tick()
+
+  assert model.port1_rdata   == ( 0x22 if semantics == 'write-first' else 0x11 )
+  assert model.port1_rdata_x == ( semantics == 'x-on-write' )
+
+  # reads of other entries are always defined
+
+  access( model, 0, 1, 3, 0x33 )
+  access( model, 1, 0, 4 )
+  model.sim_tick()
+  assert not model.port1_rdata_x
+
+def test_unknown_semantics():
+  with pytest.raises( ValueError ):
+    mk_model( 16, 32, semantics='read-last' )
+  with pytest.raises( ValueError ):
+    SramVRTL( 16, 32, semantics='read-last' ).elaborate()
+
+@pytest.mark.parametrize( "ports", [ '1rw', '2rw', '1r1w' ] )
+def test_verilog_semantics( ports ):
+
+  def params( **kwargs ):
+    model = SramVRTL( 32, 256, ports=ports, **kwargs )
+    model.elaborate()
+    model.apply( VerilogPlaceholderPass() )
+    return model.get_metadata( VerilogPlaceholderPass.placeholder_config ).params
+
+  assert 'p_semantics' not in dict( params() )
+  for semantics, value in sram_semantics.items():
+    assert dict( params( semantics=semantics ) )['p_semantics'] == value
+
+#-------------------------------------------------------------------------
+# Test tiled SRAMs
+#-------------------------------------------------------------------------
+
+def test_tiled_check():
+
+  model = mk_model( 32, 1024, check=True )
+
+  for idx in [ 3, 700 ]:
+
+    access( model, 0, 1, idx, idx )
+    model.sim_tick()
+    assert model.port0_rdata_x
+
+    access( model, 0, 0, idx )
+    model.sim_tick()
+    assert model.port0_rdata == idx and not model.port0_rdata_x
+
+def test_tiled_check_mask():
+
+  # a masked write which does not write the first column still makes the
+  # read data undefined
+
+  model = mk_model( 128, 256, 4, check=True )
+  assert model.tiling.ncols == 4
+
+  access( model, 0, 1, 3, 0x22 << 96 )
+  model.port0_wben @= 0b1000
+  model.sim_tick()
+  assert model.port0_rdata_x
+
+  access( model, 0, 0, 3 )
+  model.sim_tick()
+  assert model.port0_rdata == 0x22 << 96 and not model.port0_rdata_x
+
+#-------------------------------------------------------------------------
+# Test the minion
+#-------------------------------------------------------------------------
+# The minion never uses undefined read data, so the check passes
+
+@pytest.mark.parametrize( "mask_size", [ 0, 4 ] )
+def test_check_minion( mask_size ):
+
+  msgs = random_msgs()
+
+  th = TestHarness( SramMinionPRTL( mask_size=mask_size, check=True ) )
+  th.set_param( "top.src.construct",  msgs=msgs[::2]  )
+  th.set_param( "top.sink.construct", msgs=msgs[1::2] )
+  th.apply( DefaultPassGroup() )
+  th.sim_reset()
+
+  ncycles = 0
+  while not th.done():
+    th.sim_tick()
+    ncycles += 1
+    assert ncycles < 10000
@@ -0,0 +1,119 @@
+#=========================================================================
+# SramTraceIndex_test
+#=========================================================================
+
+import os
+import pytest
+
+from sram.SramPRTL       import SramPRTL
+from sram.SramTrace      import SramTrace, SramTraceReader
+from sram.SramTraceIndex import SramTraceIndex, open_sram_trace_index
+from sram.SramStimulus   import gen_sram_stimulus, run_sram_stimulus
+
+@pytest.fixture
+def trace_file( tmpdir ):
+
+  # the trace of 5000 random cycles, copied to a file with small blocks
+
+  stim  = gen_sram_stimulus( 32, 64, 5000 )
+  model = SramPRTL( 32, 64, trace=True )
+  run_sram_stimulus( model, stim )
+
+  path = str( tmpdir.join( 'sram.trace' ) )
+
+  with SramTrace( 32, 64, path=path, capacity=500 ) as trace:
+    for x in model.trace.records():
+      trace.cycle = x.cycle
+      trace.append( x.port, x.type_, x.idx, x.wben, x.data )
+
+  return path
+
+def check_index( index, records ):
+
+  assert len( index ) == len( records )
+
+  for idx in [ 0, 17, 63 ]:
+    assert index.writes( idx ) == [ x for x in records if x.idx == idx and x.type_ == 1 ]
+    assert index.reads ( idx ) == [ x for x in records if x.idx == idx and x.type_ == 0 ]
+    assert index.writes( idx, cycles=(1000,2000) ) == \
+      [ x for x in records if x.idx == idx and x.type_ == 1 and 1000 <= x.cycle < 2000 ]
+
+  assert index.accesses( 8, 12, cycles=(100,3000) ) == \
+    [ x for x in records if 8 <= x.idx < 12 and 100 <= x.cycle < 3000 ]
+  assert index.accesses( 0, 2**20, type_=0 ) == [ x for x in records if x.type_ == 0 ]
+  assert index.accesses( 64 ) == [] and index.writes( 64 ) == []
+
+  # the last write before every read wrote the data the read returned
+
+  for read in [ x for x in records if x.type_ == 0 ][::50]:
+    write = index.last_write( read.idx, read.cycle )
+    assert write.cycle < read.cycle and write.data == read.data
+    assert not [ x for x in records if x.idx == read.idx and x.type_ == 1
+                 and write.cycle < x.cycle < read.cycle ]
+
+  assert index.last_write( 5, 0 ) is None
+
+  # hot entries
+
+  counts = {}
+  for x in records:
+    counts[ x.idx ] = counts.get( x.idx, 0 ) + 1
+  expected = sorted( counts.items(), key=lambda x: ( -x[1], x[0] ) )[:5]
+
+  assert index.hot_entries( 5 ) == expected
+  assert index.hot_entries( 1, type_=1 )[0][1] == \
+         max([ index.count( idx, 1 ) for idx in range( 64 ) ])
+
+#-------------------------------------------------------------------------
+# Test indexes of trace files and in-memory traces
+#-------------------------------------------------------------------------
+
+def test_index_file( trace_file ):
+
+  reader  = SramTraceReader( trace_file )
+  records = list( reader )
+  assert len( reader.blocks() ) > 5
+
+  index = open_sram_trace_index( trace_file )
+  check_index( index, records )
+  assert os.path.exists( trace_file + '.idx' )
+
+  # the saved index is reused
+
+  index = SramTraceIndex( reader )
+  assert index.load( trace_file + '.idx' )
+  check_index( index, records )
+
+def test_index_stale( trace_file ):
+
+  open_sram_trace_index( trace_file )
+
+  with open( trace_file, 'ab' ) as f:
+    f.write( b'\0' )
+
+  assert not SramTraceIndex( SramTraceReader( trace_file ) ).load( trace_file + '.idx' )
+
+def test_index_corrupt( trace_file ):
+
+  # a truncated index or a file which is not an index is rebuilt
+
+  open_sram_trace_index( trace_file )
+  reader = SramTraceReader( trace_file )
+
+  with open( trace_file + '.idx', 'rb' ) as f:
+    data = f.read()
+
+  for bad in [ data[:-8], b'\x80\x04' + data ]:
+    with open( trace_file + '.idx', 'wb' ) as f:
+      f.write( bad )
+    assert not SramTraceIndex( reader ).load( trace_file + '.idx' )
+    check_index( open_sram_trace_index( trace_file ), list( reader ) )
+
+def test_index_records():
+
+  stim  = gen_sram_stimulus( 32, 64, 2000 )
+  model = SramPRTL( 32, 64, trace=True )
+  run_sram_stimulus( model, stim )
+
+  records = model.trace.records()
+  check_index( SramTraceIndex( records ).build(), records )
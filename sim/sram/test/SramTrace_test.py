@@ -0,0 +1,194 @@
+#=========================================================================
+# SramTrace_test
+#=========================================================================
+# Transaction traces are simulation-only, so these tests always use the
+# PyMTL model.
+
+import pytest
+
+from pymtl3 import *
+
+from sram.SramPRTL     import SramPRTL
+from sram.SramTrace    import SramTrace, SramTraceReader, fmt_sram_trace
+from sram.SramStimulus import gen_sram_stimulus, sram_golden_rdata, run_sram_stimulus
+
+from tut8_sram.SramMinionPRTL          import SramMinionPRTL
+from tut8_sram.test.SramMinionRTL_test import TestHarness, random_msgs
+
+def check_trace( stim, records ):
+
+  # every access is recorded once in the cycle of the access and reads
+  # record the data returned by the golden model
+
+  rd_cycles, rdata = sram_golden_rdata( stim )
+
+  nbytes = stim.nbytes
+  reads  = [ x for x in records if x.type_ == 0 ]
+  writes = [ x for x in records if x.type_ == 1 ]
+
+  assert [ x.cycle for x in reads ] == list( rd_cycles )
+  assert b''.join([ x.data.to_bytes( nbytes, 'little' ) for x in reads ]) == rdata
+
+  wr_cycles = [ i for i in range( stim.ncycles ) if stim.val[i] and stim.type_[i] ]
+  assert [ x.cycle for x in writes ] == wr_cycles
+  assert [ x.data for x in writes ] == [ stim.wdata_word(i) for i in wr_cycles ]
+  assert [ x.idx for x in records ] == [ stim.idx[ x.cycle ] for x in records ]
+
+  if stim.wben is not None:
+    assert [ x.wben for x in writes ] == [ stim.wben[i] for i in wr_cycles ]
+
+  assert [ x.cycle for x in records ] == sorted([ x.cycle for x in records ])
+
+#-------------------------------------------------------------------------
+# Test in-memory traces
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize( "data_nbits, num_entries, mask_size",
+  [ (32, 256, 0), (128, 256, 0), (32, 1024, 0), (64, 64, 8) ] )
+def test_trace( data_nbits, num_entries, mask_size ):
+
+  stim  = gen_sram_stimulus( data_nbits, num_entries, 500, mask_size )
+  model = SramPRTL( data_nbits, num_entries, mask_size, trace=True )
+  run_sram_stimulus( model, stim )
+
+  check_trace( stim, model.trace.records() )
+
+def test_trace_wrap():
+
+  # only the most recent records are kept
+
+  trace = SramTrace( 32, 16, capacity=4 )
+  for i in range( 10 ):
+    trace.access( 0, 1, 1, i % 16, i )
+    trace.tick()
+
+  assert len( trace ) == 10
+  assert [ ( x.cycle, x.idx, x.data ) for x in trace.records() ] == \
+         [ ( i, i, i ) for i in range( 6, 10 ) ]
+
+#-------------------------------------------------------------------------
+# Test multiported SRAMs
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize( "ports", [ '2rw', '1r1w' ] )
+def test_trace_multiport( ports ):
+
+  model = SramPRTL( 32, 256, ports=ports, trace=True )
+  model.apply( DefaultPassGroup() )
+  model.sim_reset()
+
+  # write 0xab to entry 3 while reading it on the other port, then read
+  # the new data in the next cycle
+
+  write, read = ( 1, 0 ) if ports == '2rw' else ( 0, 1 )
+
+  if ports == '2rw':
+    model.port0_type @= 0
+    model.port1_type @= 1
+
+  model.port0_val   @= 1
+  model.port0_idx   @= 3
+  model.port0_wdata @= 0xab
+  model.port1_val   @= 1
+  model.port1_idx   @= 3
+  if ports == '2rw':
+    model.port1_wdata @= 0xab
+
+  model.sim_tick()
+  if ports == '2rw':
+    model.port1_val @= 0
+  else:
+    model.port0_val @= 0
+  model.sim_tick()
+
+  records = [ ( x.cycle, x.port, x.type_, x.idx, x.data ) for x in model.trace.records() ]
+  assert records == [ ( 0, write, 1, 3, 0xab ), ( 0, read, 0, 3, 0 ), ( 1, read, 0, 3, 0xab ) ]
+
+  lines = list( fmt_sram_trace( model.trace.records(), 32, 256, ports ) )
+  assert len( lines ) == 2
+  if ports == '2rw':
+    assert lines[1] == "       1: (addr0=03 din0=         dout0=000000ab)" \
+                       "(addr1=   din1=         dout1=        )"
+  else:
+    assert lines[1] == "       1: (addr0=   din0=         addr1=03 dout1=000000ab)"
+
+#-------------------------------------------------------------------------
+# Test trace files
+#-------------------------------------------------------------------------
+
+def test_trace_file( tmpdir ):
+
+  path  = str( tmpdir.join( 'sram.trace' ) )
+  stim  = gen_sram_stimulus( 32, 64, 2000, mask_size=4 )
+  model = SramPRTL( 32, 64, 4, trace=path )
+  run_sram_stimulus( model, stim )
+  model.trace.close()
+
+  reader = SramTraceReader( path )
+  assert reader.data_nbits == 32 and reader.num_entries == 64 and reader.mask_size == 4
+
+  records = list( reader )
+  check_trace( stim, records )
+  assert records[-len( model.trace.records() ):] == model.trace.records()
+
+  # the cycles of a block bound the cycles of its records
+
+  blocks = reader.blocks()
+  assert sum([ n for _, n, _, _ in blocks ]) == len( records )
+  for offset, n, first_cycle, last_cycle in blocks:
+    cycles = [ x.cycle for x in reader.read_block( offset ) ]
+    assert len( cycles ) == n and first_cycle <= min( cycles ) and max( cycles ) <= last_cycle
+
+  assert list( reader.records( 100, 200 ) ) == \
+         [ x for x in records if 100 <= x.cycle < 200 ]
+
+def test_trace_file_blocks( tmpdir ):
+
+  path  = str( tmpdir.join( 'sram.trace' ) )
+  trace = SramTrace( 32, 16, path=path, capacity=8, nbuffers=1 )
+
+  with trace:
+    for i in range( 100 ):
+      trace.access( 0, 1, 1, i % 16, i )
+      if i == 50:
+        trace.flush()
+      trace.tick()
+
+  reader = SramTraceReader( path )
+  assert [ x.data for x in reader ] == list( range( 100 ) )
+  assert len( reader.blocks() ) > 100 // 8
+
+  with pytest.raises( ValueError ):
+    SramTraceReader( __file__ )
+
+#-------------------------------------------------------------------------
+# Test the minion
+#-------------------------------------------------------------------------
+
+def test_trace_minion( tmpdir ):
+
+  path = str( tmpdir.join( 'minion.trace' ) )
+  msgs = random_msgs()
+
+  th = TestHarness( SramMinionPRTL( trace=path ) )
+  th.set_param( "top.src.construct",  msgs=msgs[::2]  )
+  th.set_param( "top.sink.construct", msgs=msgs[1::2] )
+  th.apply( DefaultPassGroup() )
+  th.sim_reset()
+
+  while not th.done():
+    th.sim_tick()
+
+  th.sram.sram.trace.close()
+
+  # every memory request is one SRAM access with the same data
+
+  reqs  = msgs[::2]
+  resps = msgs[1::2]
+
+  records = list( SramTraceReader( path ) )
+  assert len( records ) == len( reqs )
+  for record, req, resp in zip( records, reqs, resps ):
+    assert record.type_ == int( req.type_ == 1 )
+    assert record.idx   == int( req.addr ) // 4 % 128
+    assert record.data  == int( req.data if record.type_ else resp.data )
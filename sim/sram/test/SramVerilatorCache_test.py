@@ -0,0 +1,110 @@
+#=========================================================================
+# SramVerilatorCache_test
+#=========================================================================
+# Verilator is not needed for these tests, we only test the cache keys and
+# the cache itself.
+
+import os
+import time
+
+from pymtl3                         import *
+from pymtl3.passes.backends.verilog import VerilogPlaceholderPass, VerilogTranslationImportPass
+from pymtl3.passes.backends.verilog.import_.VerilogVerilatorImportPass \
+  import VerilogVerilatorImportPass
+
+from sram.SramRTL import SramVRTL
+from sram.SramVerilatorCache import VerilatorCache, CachedVerilatorImportPass, \
+  verilator_cache_sources, verilator_cache_key, install_verilator_cache, \
+  uninstall_verilator_cache
+
+#-------------------------------------------------------------------------
+# Test cache keys
+#-------------------------------------------------------------------------
+
+def test_cache_sources():
+
+  m = SramVRTL( 32, 256 )
+  m.elaborate()
+  m.apply( VerilogPlaceholderPass() )
+  cfg = m.get_metadata( VerilogPlaceholderPass.placeholder_config )
+
+  names = [ os.path.basename( x ) for x in
+            verilator_cache_sources( cfg.src_file, cfg.v_include, cfg.v_libs ) ]
+
+  assert names[0] == 'SramVRTL.v'
+  assert 'SramGenericVRTL.v' in names and 'SRAM_32x256_1rw.v' in names
+  assert 'queues.v' in names and len( names ) == len( set( names ) )
+
+def test_cache_key( tmpdir ):
+
+  src = tmpdir.join( 'Foo.v' )
+  inc = tmpdir.join( 'Bar.v' )
+  src.write( '`include "Bar.v"\nmodule Foo; endmodule\n' )
+  inc.write( 'module Bar; endmodule\n' )
+
+  def key( params={ 'p_nbits' : 32 }, cfg=None ):
+    return verilator_cache_key( 'Foo', params, verilator_cache_sources( str( src ) ), cfg )
+
+  key0 = key()
+  assert key() == key0
+  assert key( { 'p_nbits' : 16 } ) != key0
+  assert key( cfg={ 'c_flags' : '-O1' } ) != key0
+
+  # changing an included file changes the key
+
+  inc.write( 'module Bar; wire x; endmodule\n' )
+  assert key() != key0
+
+#-------------------------------------------------------------------------
+# Test the cache
+#-------------------------------------------------------------------------
+
+def test_cache_store_restore( tmpdir ):
+
+  cache = VerilatorCache( str( tmpdir.join( 'cache' ) ) )
+
+  lib = tmpdir.join( 'libFoo_v.so' )
+  lib.write_binary( b'\x7fELF' + bytes( 100 ) )
+
+  dst = str( tmpdir.join( 'restored.so' ) )
+  assert not cache.restore( 'a'*64, dst )
+
+  cache.store( 'a'*64, str( lib ), 'Foo' )
+  cache.store( 'a'*64, str( lib ), 'Foo' )
+  assert 'a'*64 in cache and len( cache.entries() ) == 1
+
+  assert cache.restore( 'a'*64, dst )
+  assert open( dst, 'rb' ).read() == lib.read_binary()
+  assert ( cache.nhits, cache.nmisses ) == ( 1, 1 )
+
+def test_cache_lru( tmpdir ):
+
+  lib = tmpdir.join( 'lib.so' )
+  lib.write_binary( bytes( 1000 ) )
+
+  # room for two libraries and their metadata
+
+  cache = VerilatorCache( str( tmpdir.join( 'cache' ) ), max_bytes=2500 )
+
+  for key in [ 'a', 'b' ]:
+    cache.store( key, str( lib ) )
+    os.utime( cache.entry_dir( key ), ( time.time() - 10, time.time() - 10 ) )
+
+  # using a makes b the least recently used entry
+
+  assert cache.restore( 'a', str( tmpdir.join( 'x.so' ) ) )
+  cache.store( 'c', str( lib ) )
+
+  assert 'a' in cache and 'b' not in cache and 'c' in cache
+  assert cache.size() <= 2500
+
+def test_install( tmpdir ):
+
+  cache = install_verilator_cache( str( tmpdir ) )
+  try:
+    assert VerilogTranslationImportPass.get_import_pass() is CachedVerilatorImportPass
+    assert CachedVerilatorImportPass.cache is cache
+  finally:
+    uninstall_verilator_cache()
+
+  assert VerilogTranslationImportPass.get_import_pass() is VerilogVerilatorImportPass
@@ -0,0 +1,234 @@
+#========================================================================
+# Banked SRAM Minion Wrapper
+#========================================================================
+# This is a multi-ported latency-insensitive minion wrapper around
+# several SRAM banks. Consecutive words are interleaved across the banks
+# using the low-order bits of the word index, so the bank of a request is
+# selected by the address bits right above the byte offset:
+#
+#   addr : | ... | bank idx | bank | byte offset |
+#
+# Every minion port can send one request per cycle, and requests from
+# different ports to different banks are serviced in the same cycle.
+# Each port has its own M1 pipeline registers and its own two-element
+# response bypass queue which is used as a skid buffer exactly like in
+# SramMinionPRTL:
+#
+#              .------.
+#   port 0 -.->| bank | -.          .------.
+#           |  '------'  |-> M1 0 ->| bypq | -> port 0 resp
+#           |  .------.  |          '------'
+#   port 1 -'->| bank | -|          .------.
+#              '------'  '-> M1 1 ->| bypq | -> port 1 resp
+#                                   '------'
+#
+# If several ports send a request to the same bank in the same cycle,
+# the port with the lowest index wins and all other ports stall. Since a
+# request is either accepted in M0 or stalls, and every accepted request
+# spends exactly one cycle in M1, the responses on each port are always
+# returned in order. A port also stalls if there is a response in its
+# queue (see SramMinionPRTL for why we need two elements of buffering).
+#
+# The conflicts counter tracks the total number of cycles a valid request
+# was stalled only because another port won the arbitration for the same
+# bank, and num_bank_conflicts returns it after simulation.
+#
+# The load and dump methods provide a zero-cycle backdoor to the whole
+# memory in word index order, independent of how the words are spread
+# across the banks.
+
+from pymtl3                  import *
+from pymtl3.passes.backends.verilog import *
+from pymtl3.stdlib           import stream
+from pymtl3.stdlib.mem       import mk_mem_msg, MemMsgType
+from pymtl3.stdlib.basic_rtl import Reg, RegRst
+
+from sram             import SramRTL
+from sram.SramStorage import sram_words
+
+class SramBankedMinionPRTL( Component ):
+
+  def construct( s, num_ports=2, num_banks=4, data_nbits=32, num_entries=128,
+                 opaque_nbits=8, addr_nbits=32 ):
+
+    assert num_banks > 1 and num_banks & (num_banks-1) == 0, \
+      "Number of banks must be a power of two"
+    assert num_entries % num_banks == 0, \
+      "Number of entries must be a multiple of the number of banks"
+
+    s.set_metadata( VerilogTranslationPass.explicit_module_name,
+      f"SramBankedMinionRTL_{num_ports}ports_{num_banks}banks_{data_nbits}b_"
+      f"{num_entries}words_o{opaque_nbits}_a{addr_nbits}" )
+
+    bank_nentries = num_entries // num_banks
+    bank_start    = clog2( data_nbits // 8 )
+    bank_end      = bank_start + clog2( num_banks )
+    idx_end       = bank_end + clog2( bank_nentries )
+
+    assert idx_end <= addr_nbits, \
+      f"A {addr_nbits}b address cannot index {num_entries} {data_nbits}b words"
+
+    BitsBank  = mk_bits( clog2( num_banks ) )
+    BitsIdx   = mk_bits( clog2( bank_nentries ) )
+    BitsData  = mk_bits( data_nbits )
+    BitsCount = mk_bits( clog2( num_ports+1 ) )
+
+    MemReqType, MemRespType = mk_mem_msg( opaque_nbits, addr_nbits, data_nbits )
+
+    s.num_banks   = num_banks
+    s.num_entries = num_entries
+    s.nbytes      = data_nbits // 8
+
+    # Interface
+
+    s.minion = [ stream.ifcs.MinionIfcRTL( MemReqType, MemRespType )
+                 for _ in range(num_ports) ]
+
+    #---------------------------------------------------------------------
+    # M0 stage
+    #---------------------------------------------------------------------
+
+    s.req_bank_M0   = [ Wire( BitsBank ) for _ in range(num_ports) ]
+    s.req_go_M0     = [ Wire( Bits1    ) for _ in range(num_ports) ]
+    s.req_ok_M0     = [ Wire( Bits1    ) for _ in range(num_ports) ]
+
+    s.bank_val_M0   = [ Wire( Bits1    ) for _ in range(num_banks) ]
+    s.bank_wen_M0   = [ Wire( Bits1    ) for _ in range(num_banks) ]
+    s.bank_idx_M0   = [ Wire( BitsIdx  ) for _ in range(num_banks) ]
+    s.bank_wdata_M0 = [ Wire( BitsData ) for _ in range(num_banks) ]
+
+    s.num_conflicts_M0 = Wire( BitsCount )
+
+    # translation work around
+    MEM_MSG_TYPE_WRITE = b4(MemMsgType.WRITE)
+
+    # Fixed priority arbitration, the lowest port wins each bank
+
+    @update
+    def comb_M0():
+
+      for b in range( num_banks ):
+        s.bank_val_M0[b]   @= 0
+        s.bank_wen_M0[b]   @= 0
+        s.bank_idx_M0[b]   @= 0
+        s.bank_wdata_M0[b] @= 0
+
+      s.num_conflicts_M0 @= 0
+
+      for p in range( num_ports ):
+        s.req_bank_M0[p] @= s.minion[p].req.msg.addr[bank_start:bank_end]
+        s.req_go_M0[p]   @= 0
+
+        if s.minion[p].req.val & s.req_ok_M0[p]:
+          if s.bank_val_M0[ s.req_bank_M0[p] ]:
+            s.num_conflicts_M0 @= s.num_conflicts_M0 + 1
+          else:
+            s.req_go_M0[p] @= 1
+            s.bank_val_M0  [ s.req_bank_M0[p] ] @= 1
+            s.bank_wen_M0  [ s.req_bank_M0[p] ] @= s.minion[p].req.msg.type_ == MEM_MSG_TYPE_WRITE
+            s.bank_idx_M0  [ s.req_bank_M0[p] ] @= s.minion[p].req.msg.addr[bank_end:idx_end]
+            s.bank_wdata_M0[ s.req_bank_M0[p] ] @= s.minion[p].req.msg.data
+
+    # SRAM banks
+
+    s.banks = [ SramRTL( data_nbits, bank_nentries ) for _ in range(num_banks) ]
+
+    s.bank_rdata_M1 = [ Wire( BitsData ) for _ in range(num_banks) ]
+
+    for b, m in enumerate( s.banks ):
+      m.port0_idx   //= s.bank_idx_M0[b]
+      m.port0_type  //= s.bank_wen_M0[b]
+      m.port0_val   //= s.bank_val_M0[b]
+      m.port0_wdata //= s.bank_wdata_M0[b]
+      m.port0_rdata //= s.bank_rdata_M1[b]
+
+    # Bank conflict counter
+
+    s.conflicts = Wire( 32 )
+
+    @update_ff
+    def conflicts_counter():
+      if s.reset:
+        s.conflicts <<= 0
+      else:
+        s.conflicts <<= s.conflicts + zext( s.num_conflicts_M0, 32 )
+
+    #---------------------------------------------------------------------
+    # M1 stage
+    #---------------------------------------------------------------------
+
+    s.memreq_val_reg_M1  = [ RegRst( Bits1 )     for _ in range(num_ports) ]
+    s.memreq_msg_reg_M1  = [ Reg( MemReqType )   for _ in range(num_ports) ]
+    s.memreq_bank_reg_M1 = [ Reg( BitsBank )     for _ in range(num_ports) ]
+    s.memresp_msg_M1     = [ Wire( MemRespType ) for _ in range(num_ports) ]
+
+    for p in range( num_ports ):
+      s.memreq_val_reg_M1[p].in_  //= s.req_go_M0[p]
+      s.memreq_msg_reg_M1[p].in_  //= s.minion[p].req.msg
+      s.memreq_bank_reg_M1[p].in_ //= s.req_bank_M0[p]
+
+    # translation work around
+    MEM_MSG_TYPE_READ = b4(MemMsgType.READ)
+
+    @update
+    def comb_M1a():
+
+      for p in range( num_ports ):
+        s.memresp_msg_M1[p].type_  @= s.memreq_msg_reg_M1[p].out.type_
+        s.memresp_msg_M1[p].opaque @= s.memreq_msg_reg_M1[p].out.opaque
+        s.memresp_msg_M1[p].test   @= 0
+        s.memresp_msg_M1[p].len    @= s.memreq_msg_reg_M1[p].out.len
+
+        if s.memreq_msg_reg_M1[p].out.type_ == MEM_MSG_TYPE_READ:
+          s.memresp_msg_M1[p].data @= s.bank_rdata_M1[ s.memreq_bank_reg_M1[p].out ]
+        else:
+          s.memresp_msg_M1[p].data @= 0
+
+    # Bypass queues
+
+    s.memresp_q = [ stream.BypassQueueRTL( MemRespType, num_entries=2 )
+                    for _ in range(num_ports) ]
+
+    for p in range( num_ports ):
+      s.memresp_q[p].recv.val //= s.memreq_val_reg_M1[p].out
+      s.memresp_q[p].recv.msg //= s.memresp_msg_M1[p]
+      s.memresp_q[p].send     //= s.minion[p].resp
+
+    # stop a port if not enough skid buffering
+
+    @update
+    def comb_M1b():
+      for p in range( num_ports ):
+        s.req_ok_M0[p] @= s.memresp_q[p].count == 0
+
+    for p in range( num_ports ):
+      s.minion[p].req.rdy //= s.req_go_M0[p]
+
+  # Total number of cycles a request was stalled by a bank conflict
+
+  def num_bank_conflicts( s ):
+    return int( s.conflicts )
+
+  # Backdoor access to the SRAM contents, word i is stored in bank
+  # i % num_banks at index i // num_banks
+
+  def load( s, data, base_idx=0 ):
+    words = sram_words( data, s.nbytes )
+    for b, m in enumerate( s.banks ):
+      first = ( b - base_idx ) % s.num_banks
+      if first < len(words):
+        m.load( words[ first :: s.num_banks ], ( base_idx + first ) // s.num_banks )
+
+  def dump( s, lo=0, hi=None ):
+    if hi is None:
+      hi = s.num_entries
+    if lo >= hi:
+      return []
+    lo_row = lo // s.num_banks
+    dumps  = [ m.dump( lo_row, ( hi - 1 ) // s.num_banks + 1 ) for m in s.banks ]
+    return [ dumps[ idx % s.num_banks ][ idx // s.num_banks - lo_row ]
+             for idx in range( lo, hi ) ]
+
+  def line_trace( s ):
+    return "|".join([ '*' if x.out else ' ' for x in s.memreq_val_reg_M1 ]) \
+           + f" c{int(s.conflicts)}"
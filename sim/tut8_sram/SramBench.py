@@ -0,0 +1,254 @@
+#=========================================================================
+# SramBench
+#=========================================================================
+# Simulation throughput benchmarks for the SRAM and minion models. Each
+# benchmark builds one model, applies one of the PyMTL simulation pass
+# groups, and then drives it with random reads and writes (precomputed
+# so generating the stimulus is not part of the measurement) for a fixed
+# number of cycles. We report:
+#
+#  - elab_time      : seconds to construct and elaborate the model, apply
+#                     the simulation passes and reset it (this includes
+#                     translating and verilating the Verilog model)
+#  - sim_time       : seconds to simulate ncycles cycles
+#  - cycles_per_sec : simulated cycles per second
+#
+# The benchmarked models are:
+#
+#  - generic   : SramGenericPRTL on its own
+#  - sram      : SramPRTL without a write mask
+#  - sram-mask : SramPRTL with a byte write mask
+#  - vsram     : SramVRTL imported with Verilator
+#  - minion    : SramMinionPRTL with every request valid and every
+#                response ready
+#  - minion-cl : SramMinionCL driven like the minion benchmark
+#  - minion-fl : SramMinionFL driven like the minion benchmark
+#
+# The simulation pass groups are 'default' (DefaultPassGroup) and
+# 'mamba' (the Mamba2020 pass group, which generates specialized
+# simulation code with loop unrolling). A benchmark which fails (e.g.,
+# because Verilator is not installed) is recorded with status 'error'
+# instead of aborting the whole suite.
+#
+# write_bench_results writes the results as a JSON file together with
+# the versions of Python and PyMTL so results can be tracked across
+# releases. Use the sram-bench script to run the benchmarks from the
+# command line.
+
+import datetime
+import json
+import platform
+import random
+import time
+
+from pymtl3                         import *
+from pymtl3.passes.mamba            import Mamba2020
+from pymtl3.stdlib.mem              import mk_mem_msg, MemMsgType
+from pymtl3.stdlib.test_utils       import config_model_with_cmdline_opts
+
+from sram.SramGenericPRTL           import SramGenericPRTL
+from sram.SramPRTL                  import SramPRTL
+from sram.SramRTL                   import SramVRTL
+from tut8_sram.SramMinionPRTL       import SramMinionPRTL
+from tut8_sram.SramMinionCL         import SramMinionCL
+from tut8_sram.SramMinionFL         import SramMinionFL
+
+bench_models = [ 'generic', 'sram', 'sram-mask', 'vsram', 'minion', 'minion-cl',
+                 'minion-fl' ]
+bench_sims   = [ 'default', 'mamba' ]
+bench_sizes  = [ (16, 32), (32, 256), (128, 256), (32, 4096), (128, 65536) ]
+
+#-------------------------------------------------------------------------
+# gen_bench_stimulus
+#-------------------------------------------------------------------------
+# Returns a list of (val, type, idx, wdata, wben) tuples, one per cycle.
+
+def gen_bench_stimulus( data_nbits, num_entries, ncycles, seed=0xdeadbeef ):
+
+  rgen = random.Random()
+  rgen.seed(seed)
+
+  nbytes = ( data_nbits + 7 ) // 8
+
+  return [ ( rgen.randint( 0, 3 ) > 0,
+             rgen.randint( 0, 1 ),
+             rgen.randint( 0, num_entries-1 ),
+             rgen.randint( 0, 2**data_nbits-1 ),
+             rgen.randint( 0, 2**nbytes-1 ) ) for _ in range( ncycles ) ]
+
+#-------------------------------------------------------------------------
+# mk_bench_model
+#-------------------------------------------------------------------------
+# Returns the model and a function which drives the stimulus of one cycle
+# into the model.
+
+def mk_bench_model( model, data_nbits, num_entries, storage='wire' ):
+
+  if model == 'generic':
+
+    def drive( m, val, type_, idx, wdata, wben ):
+      m.csb0  @= not val
+      m.web0  @= not type_
+      m.addr0 @= idx
+      m.din0  @= wdata
+
+    return SramGenericPRTL( data_nbits, num_entries, storage=storage ), drive
+
+  if model in [ 'sram', 'vsram' ]:
+
+    def drive( m, val, type_, idx, wdata, wben ):
+      m.port0_val   @= val
+      m.port0_type  @= type_
+      m.port0_idx   @= idx
+      m.port0_wdata @= wdata
+
+    if model == 'vsram':
+      return SramVRTL( data_nbits, num_entries ), drive
+    return SramPRTL( data_nbits, num_entries, storage=storage ), drive
+
+  if model == 'sram-mask':
+
+    def drive( m, val, type_, idx, wdata, wben ):
+      m.port0_val   @= val
+      m.port0_type  @= type_
+      m.port0_idx   @= idx
+      m.port0_wdata @= wdata
+      m.port0_wben  @= wben
+
+    mask_size = ( data_nbits + 7 ) // 8
+    return SramPRTL( data_nbits, num_entries, mask_size, storage=storage ), drive
+
+  if model in [ 'minion', 'minion-cl', 'minion-fl' ]:
+
+    MemReqType, _ = mk_mem_msg( 8, 32, data_nbits )
+    nbytes        = data_nbits // 8
+
+    def drive( m, val, type_, idx, wdata, wben ):
+      m.minion.req.val  @= val
+      m.minion.req.msg  @= MemReqType( MemMsgType.WRITE if type_ else MemMsgType.READ,
+                                       0, idx*nbytes, 0, wdata )
+      m.minion.resp.rdy @= 1
+
+    if model == 'minion-cl':
+      return SramMinionCL( data_nbits, num_entries ), drive
+    if model == 'minion-fl':
+      return SramMinionFL( data_nbits, num_entries ), drive
+    return SramMinionPRTL( data_nbits, num_entries ), drive
+
+  raise ValueError( f"Unknown benchmark model '{model}'!" )
+
+#-------------------------------------------------------------------------
+# run_bench
+#-------------------------------------------------------------------------
+
+def run_bench( model, data_nbits, num_entries, sim='default', ncycles=10000,
+               storage='wire', seed=0xdeadbeef ):
+
+  result = {
+    'model'          : model,
+    'data_nbits'     : data_nbits,
+    'num_entries'    : num_entries,
+    'sim'            : sim,
+    'storage'        : storage,
+    'ncycles'        : ncycles,
+    'elab_time'      : None,
+    'sim_time'       : None,
+    'cycles_per_sec' : None,
+    'status'         : 'ok',
+    'error'          : None,
+  }
+
+  if sim not in bench_sims:
+    raise ValueError( f"Unknown benchmark simulation pass group '{sim}'!" )
+
+  stimulus = gen_bench_stimulus( data_nbits, num_entries, ncycles, seed )
+
+  try:
+
+    # Elaboration
+
+    start = time.perf_counter()
+
+    m, drive = mk_bench_model( model, data_nbits, num_entries, storage )
+
+    if model == 'vsram':
+      m = config_model_with_cmdline_opts( m, {}, [] )
+    else:
+      m.elaborate()
+
+    if sim == 'mamba':
+      m.apply( Mamba2020( print_line_trace=False ) )
+    else:
+      m.apply( DefaultPassGroup() )
+
+    m.sim_reset()
+
+    result['elab_time'] = time.perf_counter() - start
+
+    # Simulation
+
+    start = time.perf_counter()
+
+    for cycle in stimulus:
+      drive( m, *cycle )
+      m.sim_tick()
+
+    result['sim_time'] = time.perf_counter() - start
+
+    if result['sim_time'] > 0:
+      result['cycles_per_sec'] = ncycles / result['sim_time']
+
+  except Exception as e:
+    result['status'] = 'error'
+    result['error']  = f"{type(e).__name__}: {e}"
+
+  return result
+
+#-------------------------------------------------------------------------
+# run_bench_suite
+#-------------------------------------------------------------------------
+
+def run_bench_suite( models=None, sizes=None, sims=None, ncycles=10000,
+                     storage='wire', verbose=False ):
+
+  results = []
+
+  for model in ( bench_models if models is None else models ):
+    for data_nbits, num_entries in ( bench_sizes if sizes is None else sizes ):
+      for sim in ( bench_sims if sims is None else sims ):
+        result = run_bench( model, data_nbits, num_entries, sim, ncycles, storage )
+        results.append( result )
+        if verbose:
+          print( fmt_bench_result( result ), flush=True )
+
+  return results
+
+#-------------------------------------------------------------------------
+# Reporting
+#-------------------------------------------------------------------------
+
+def fmt_bench_result( result ):
+  config = f"{result['model']:10} {result['data_nbits']:4}x{result['num_entries']:<6} " \
+           f"{result['sim']:8} {result['storage']:7}"
+  if result['status'] != 'ok':
+    return f"{config} " + " ".join( result['error'].split() )[:120]
+  return f"{config} elab {result['elab_time']:8.3f} s  " \
+         f"sim {result['cycles_per_sec'] or 0:10.1f} cycles/s"
+
+def write_bench_results( path, results ):
+
+  try:
+    from importlib.metadata import version
+    pymtl3_version = version( 'pymtl3' )
+  except Exception:
+    pymtl3_version = None
+
+  with open( path, 'w' ) as f:
+    json.dump( {
+      'date'    : datetime.datetime.now().isoformat( timespec='seconds' ),
+      'host'    : platform.node(),
+      'python'  : platform.python_version(),
+      'pymtl3'  : pymtl3_version,
+      'results' : results,
+    }, f, indent=2 )
+    f.write( '\n' )
@@ -0,0 +1,314 @@
+#=========================================================================
+# SramFlowCache
+#=========================================================================
+# Step-level memoization of the ASIC flow in asic/tut8-sram/flow.py.
+# Instead of running make once for the whole flow, run_flow_cached runs
+# the steps one at a time in topological order and caches the build
+# directory of every step under a hash of everything the step depends on:
+#
+#  - the name of the step
+#  - the parameters of flow.py the step uses (see flow_steps)
+#  - the contents of the outputs of its upstream steps
+#  - the OpenRAM configurations (SRAM_*-cfg.py) of the SRAM macros of the
+#    design, for the steps which use the macro views
+#  - the contents of the PyMTL/Verilog sources of the design, for the
+#    gather step which collects the translated RTL
+#
+# If the cache has an entry for the key of a step we restore the step
+# from the cache and mark it as prebuilt (.prebuilt) so mflowgen does not
+# rerun it, otherwise we run the step with make and store it in the
+# cache. Since the key of a step includes the outputs of its upstream
+# steps (and not their keys), only the suffix of the graph which is
+# actually affected by a change reruns: changing the floorplan only
+# reruns the place-and-route steps, and touching SramMinionPRTL.py
+# reruns the gather step, but synthesis and everything after it is
+# restored from the cache as long as the translated RTL is unchanged.
+#
+# The build-info and brg-flow-summary steps are cheap and always run
+# (the summary is parsed from the output of the summary step). The step
+# scripts themselves are not part of the keys, so clear the cache after
+# updating the mflowgen steps. flow_steps mirrors the edges and the
+# parameters in flow.py and has to be kept in sync with it.
+#
+# Cache entries are written to a temporary directory and renamed into
+# place, so several flows (e.g., the points of a sweep, see SramSweep.py)
+# can share one cache directory.
+
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+
+sim_dir = os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+
+#-------------------------------------------------------------------------
+# Flow steps
+#-------------------------------------------------------------------------
+
+gather     = 'brgtc5-block-gather'
+info       = 'build-info'
+adk        = 'freepdk-45nm'
+rtlsim     = 'brg-rtl-4-state-vcssim'
+synth      = 'brg-synopsys-dc-synthesis'
+glffsim    = 'post-synth-gate-level-simulation'
+init       = 'brg-cadence-innovus-init'
+floorplan  = 'brg-cadence-innovus-blocksetup-floorplan'
+powergrid  = 'brg-cadence-innovus-blocksetup-power'
+pnr        = 'brg-cadence-innovus-pnr'
+signoff    = 'brg-cadence-innovus-signoff'
+synthpower = 'post-synth-power-analysis'
+summary    = 'brg-flow-summary'
+
+always_run = [ info, summary ]
+
+design_params = [ 'design_name', 'trunc_design_name', 'clk_port', 'reset_port' ]
+sim_params    = [ 'test_design_name', 'input_delay', 'output_delay' ]
+sram_params   = [ 'extra_link_lib_dir', 'sram_name' ]
+place_params  = [ 'aspect_ratio', 'pad_ring', 'sram_x_pos', 'sram_y_pos',
+                  'sram_orientation', 'sram_top_layer', 'halo_size_um',
+                  'routing_blk_size_um' ]
+
+flow_steps = [
+  # step       upstream steps                            parameters                                       macros
+  ( gather,     [],                                      [ 'sim_path', 'design_path' ] + design_params,    False ),
+  ( info,       [],                                      [],                                              False ),
+  ( adk,        [],                                      [ 'adk', 'adk_view' ],                           False ),
+  ( rtlsim,     [ gather ],                              design_params + sim_params,                      False ),
+  ( synth,      [ adk, gather ],                         design_params + sram_params
+                                                         + [ 'clock_period', 'input_delay', 'output_delay',
+                                                             'gate_clock', 'topographical' ],             True  ),
+  ( init,       [ adk, synth ],                          design_params + sram_params + place_params
+                                                         + [ 'clock_period' ],                            True  ),
+  ( glffsim,    [ adk, gather, synth ],                  design_params + sim_params + [ 'clock_period' ],  True  ),
+  ( floorplan,  [ adk, synth, init ],                    sram_params + place_params,                      True  ),
+  ( synthpower, [ adk, synth, glffsim ],                 design_params + [ 'clock_period', 'saif_instance' ], True ),
+  ( powergrid,  [ adk, synth, floorplan ],               sram_params + [ 'macro', 'sram_top_layer' ],     True  ),
+  ( pnr,        [ adk, synth, powergrid ],               sram_params + [ 'clock_period' ],                True  ),
+  ( signoff,    [ adk, synth, pnr ],                     design_params + sram_params,                     True  ),
+  ( summary,    [ signoff, rtlsim, glffsim, synthpower ], [ 'design_name' ],                              False ),
+]
+
+# The PyMTL and Verilog sources the translated RTL of the design is
+# generated from
+
+def flow_sources():
+  return sorted( glob.glob( os.path.join( sim_dir, 'sram', '*.py' ) )
+               + glob.glob( os.path.join( sim_dir, 'sram', '*.v' ) )
+               + glob.glob( os.path.join( sim_dir, 'tut8_sram', '*.py' ) )
+               + glob.glob( os.path.join( sim_dir, 'tut8_sram', '*.v' ) ) )
+
+# Returns the OpenRAM configurations of the macros an SRAM is built from
+# (the macros SramVRTL.v selects, which both RTL languages use)
+
+def sram_cfg_files( data_nbits, num_entries ):
+
+  from sram.SramTiler import choose_sram_tiling
+
+  tiling = choose_sram_tiling( data_nbits, num_entries, objective='verilog' )
+  if tiling is None:
+    return []
+
+  path = os.path.join( sim_dir, 'sram', f"{tiling.macro.name}-cfg.py" )
+  return [ path ] if os.path.exists( path ) else []
+
+# mflowgen names the build directory of a step <n>-<step> and marks it
+# with .stamp once the step is built (or with .prebuilt if it was copied)
+
+def find_step_dir( build_dir, step ):
+  for name in os.listdir( build_dir ):
+    if re.fullmatch( rf"\d+-{re.escape( step )}", name ):
+      return os.path.join( build_dir, name )
+  return None
+
+def step_built( step_dir ):
+  return os.path.exists( os.path.join( step_dir, '.stamp'    ) ) \
+      or os.path.exists( os.path.join( step_dir, '.prebuilt' ) )
+
+#-------------------------------------------------------------------------
+# Hashing
+#-------------------------------------------------------------------------
+
+def hash_files( paths ):
+  h = hashlib.sha256()
+  for path in paths:
+    h.update( os.path.basename( path ).encode() + b'\0' )
+    with open( path, 'rb' ) as f:
+      h.update( hashlib.sha256( f.read() ).digest() )
+  return h.hexdigest()
+
+# Hashes the contents of every file in a directory. Symlinks within the
+# build directory (e.g., the outputs of a step which link to its results)
+# are hashed by their contents, symlinks out of the build directory
+# (e.g., the views of the ADK) only by their target, size and
+# modification time, so we never read the whole ADK.
+
+def hash_dir( path, build_dir ):
+
+  h        = hashlib.sha256()
+  root     = os.path.realpath( build_dir ) + os.sep
+  sentinel = b'\0'
+
+  for dirpath, dirnames, filenames in os.walk( path ):
+    dirnames.sort()
+    for name in sorted( filenames ):
+
+      file_path = os.path.join( dirpath, name )
+      real_path = os.path.realpath( file_path )
+      h.update( os.path.relpath( file_path, path ).encode() + sentinel )
+
+      if not os.path.exists( real_path ):
+        h.update( b'dangling' + sentinel )
+      elif os.path.islink( file_path ) and not real_path.startswith( root ):
+        stat = os.stat( real_path )
+        h.update( f"{real_path}:{stat.st_size}:{stat.st_mtime_ns}".encode() + sentinel )
+      else:
+        with open( real_path, 'rb' ) as f:
+          h.update( hashlib.sha256( f.read() ).digest() )
+
+  return h.hexdigest()
+
+def flow_step_key( step, upstream_hashes, params, sram_cfg_hash=None, sources_hash=None ):
+  return hashlib.sha256( json.dumps( {
+    'step'     : step,
+    'upstream' : upstream_hashes,
+    'params'   : params,
+    'sram_cfg' : sram_cfg_hash,
+    'sources'  : sources_hash,
+  }, sort_keys=True, default=str ).encode() ).hexdigest()
+
+#-------------------------------------------------------------------------
+# FlowStepCache
+#-------------------------------------------------------------------------
+# Every entry is a directory <cache_dir>/<key> with a copy of the build
+# directory of the step (step) and the hash of its outputs (outputs.hash)
+
+class FlowStepCache:
+
+  def __init__( s, cache_dir ):
+    s.cache_dir = os.path.abspath( cache_dir )
+    os.makedirs( s.cache_dir, exist_ok=True )
+
+  def entry( s, key ):
+    return os.path.join( s.cache_dir, key )
+
+  def __contains__( s, key ):
+    return os.path.exists( os.path.join( s.entry( key ), 'outputs.hash' ) )
+
+  # Replaces the build directory of a step with the cached copy and
+  # returns the hash of its outputs
+
+  def restore( s, key, step_dir ):
+
+    if os.path.exists( step_dir ):
+      shutil.rmtree( step_dir )
+
+    # inputs of a step are relative symlinks to the outputs of the steps
+    # before it, so they point into the build directory of the copy
+
+    shutil.copytree( os.path.join( s.entry( key ), 'step' ), step_dir, symlinks=True )
+    open( os.path.join( step_dir, '.prebuilt' ), 'w' ).close()
+
+    with open( os.path.join( s.entry( key ), 'outputs.hash' ) ) as f:
+      return f.read().strip()
+
+  def store( s, key, step_dir, outputs_hash ):
+
+    if key in s:
+      return
+
+    tmp_dir = f"{s.entry( key )}.tmp-{os.getpid()}-{threading.get_ident()}"
+    if os.path.exists( tmp_dir ):
+      shutil.rmtree( tmp_dir )
+
+    shutil.copytree( step_dir, os.path.join( tmp_dir, 'step' ), symlinks=True )
+    with open( os.path.join( tmp_dir, 'outputs.hash' ), 'w' ) as f:
+      f.write( outputs_hash )
+
+    # another flow may have stored the same step in the meantime
+
+    try:
+      os.rename( tmp_dir, s.entry( key ) )
+    except OSError:
+      shutil.rmtree( tmp_dir )
+
+  def clear( s ):
+    shutil.rmtree( s.cache_dir )
+    os.makedirs( s.cache_dir )
+
+#-------------------------------------------------------------------------
+# run_flow_cached
+#-------------------------------------------------------------------------
+# Runs every step of an mflowgen build directory which was not changed
+# since it was cached. mflowgen_run() (re)runs mflowgen in the build
+# directory and make( step ) runs make for one step and returns its
+# output. parameters are the parameters of the flow (see mk_parameters in
+# flow.py), sram_cfgs the OpenRAM configurations of the macros, and
+# sources the sources of the RTL (see flow_sources). The optional hooks
+# are called before and after every step.
+#
+# Returns the list of steps restored from the cache and the output of the
+# summary step. The restored steps are appended to hits (if given) as
+# they are restored, so they are known even if a later step fails.
+
+def run_flow_cached( build_dir, parameters, cache, mflowgen_run, make, sram_cfgs=(),
+                     sources=None, before_step=None, after_step=None, hits=None ):
+
+  sram_cfg_hash = hash_files( sram_cfgs )
+  sources_hash  = hash_files( flow_sources() if sources is None else sources )
+
+  hashes = {}
+  hits   = [] if hits is None else hits
+  output = None
+  stale  = False # whether the Makefile does not know about changed steps
+
+  for step, upstream, keys, macros in flow_steps:
+
+    step_dir = find_step_dir( build_dir, step )
+    if step_dir is None:
+      continue
+
+    if before_step:
+      before_step( step )
+
+    key = None
+    if step not in always_run:
+      key = flow_step_key( step,
+        [ hashes[x] for x in upstream if x in hashes ],
+        { x : parameters.get( x ) for x in keys },
+        sram_cfg_hash if macros      else None,
+        sources_hash  if step == gather else None )
+
+    if key is not None and key in cache:
+      hashes[ step ] = cache.restore( key, step_dir )
+      hits.append( step )
+      stale = True
+
+    else:
+
+      # a step which is not in the cache (or always runs) starts from a
+      # fresh build directory (mflowgen recreates it), never from an
+      # earlier build
+
+      if step_built( step_dir ):
+        shutil.rmtree( step_dir )
+        stale = True
+
+      if stale:
+        mflowgen_run()
+        stale = False
+
+      step_output = make( step )
+      if step == summary:
+        output = step_output
+
+      hashes[ step ] = hash_dir( os.path.join( step_dir, 'outputs' ), build_dir )
+      if key is not None:
+        cache.store( key, step_dir, hashes[ step ] )
+
+    if after_step:
+      after_step( step )
+
+  return hits, output
@@ -0,0 +1,118 @@
+#=========================================================================
+# SRAM Minion CL Model
+#=========================================================================
+# Cycle-level model of SramMinionPRTL. The minion has the same
+# stream.ifcs.MinionIfcRTL interface and the same parameters as the RTL
+# model, so it can be swapped in for SramMinionRTL in a larger system,
+# but instead of an SRAM, pipeline registers, and a bypass queue it keeps
+# the memory in a flat buffer (see SramMinionMem.py) and the pipeline
+# state in Python objects:
+#
+#  - m1 : the response of the request accepted in the previous cycle
+#         (i.e., the message in M1) or None
+#  - q  : the responses in the memory response queue
+#
+# The memory is accessed in the cycle a request is accepted (M0), so the
+# response is available one cycle later, and the response interface and
+# the request flow control are computed from m1 and q exactly like the
+# bypass queue and the rdy logic of the RTL model (including credit based
+# flow control). The model is therefore cycle-exact with respect to
+# SramMinionPRTL, while simulating each cycle with two small Python
+# update blocks. The model cannot be translated.
+
+from collections import deque
+
+from pymtl3            import *
+from pymtl3.stdlib     import stream
+from pymtl3.stdlib.mem import mk_mem_msg
+
+from sram.SramImage import load_sram_image
+
+from .SramMinionMem import SramMinionMem
+
+class SramMinionCL( Component ):
+
+  def construct( s, data_nbits=32, num_entries=128, opaque_nbits=8,
+                 addr_nbits=32, mask_size=0, memresp_q_nentries=2,
+                 credit=False ):
+
+    assert credit or memresp_q_nentries >= 2, \
+      "Need at least two elements of skid buffering without credits"
+
+    # Memory messages use the given opaque field and address widths
+
+    MemReqType, MemRespType = mk_mem_msg( opaque_nbits, addr_nbits, data_nbits )
+
+    # Interface
+
+    s.minion = stream.ifcs.MinionIfcRTL( MemReqType, MemRespType )
+
+    # Memory and pipeline state
+
+    s.mem      = SramMinionMem( data_nbits, num_entries, addr_nbits, mask_size, MemRespType )
+    s.nbytes   = s.mem.nbytes
+    s.nentries = memresp_q_nentries
+    s.credit   = credit
+    s.m1       = None
+    s.q        = deque()
+
+    # Response interface and request flow control
+
+    s.resp_zero = MemRespType()
+
+    @update
+    def up_minion_comb():
+
+      if s.q:
+        s.minion.resp.val @= 1
+        s.minion.resp.msg @= s.q[0]
+      elif s.m1 is not None:
+        s.minion.resp.val @= 1
+        s.minion.resp.msg @= s.m1
+      else:
+        s.minion.resp.val @= 0
+        s.minion.resp.msg @= s.resp_zero
+
+      if s.credit:
+        s.minion.req.rdy @= len( s.q ) + ( s.m1 is not None ) < s.nentries
+      else:
+        s.minion.req.rdy @= len( s.q ) <= s.nentries - 2
+
+    # M2 dequeues from the queue, or directly from M1 if the queue is
+    # empty, and M0 accesses the memory
+
+    @update_ff
+    def up_minion_ff():
+
+      if s.reset:
+        s.q.clear()
+        s.m1 = None
+        return
+
+      if s.minion.resp.val & s.minion.resp.rdy:
+        if s.q:
+          s.q.popleft()
+          if s.m1 is not None:
+            s.q.append( s.m1 )
+      elif s.m1 is not None:
+        s.q.append( s.m1 )
+
+      if s.minion.req.val & s.minion.req.rdy:
+        s.m1 = s.mem.access( s.minion.req.msg )
+      else:
+        s.m1 = None
+
+  # Backdoor access to the SRAM contents, base_idx is a word index (i.e.,
+  # the memory request address divided by the number of bytes per word)
+
+  def load( s, data, base_idx=0 ):
+    s.mem.load( data, base_idx )
+
+  def dump( s, lo=0, hi=None ):
+    return s.mem.dump( lo, hi )
+
+  def load_image( s, path, fmt=None, base_idx=0 ):
+    return load_sram_image( s.mem, path, fmt, base_idx )
+
+  def line_trace( s ):
+    return '*' if s.m1 is not None else ' '
@@ -0,0 +1,85 @@
+#=========================================================================
+# SRAM Minion FL Model
+#=========================================================================
+# Functional-level model of SramMinionPRTL. The minion has the same
+# stream.ifcs.MinionIfcRTL interface and the same parameters as the RTL
+# model (except for credit), so it can be swapped in for SramMinionRTL in
+# a larger system, and it keeps the memory in a flat buffer (see
+# SramMinionMem.py).
+#
+# The model does not have a pipeline. Each accepted request immediately
+# accesses the memory and its response is appended to a single queue of
+# memresp_q_nentries outstanding responses, which becomes visible on the
+# response interface in the next cycle. This gives the same one-cycle
+# latency as the SRAM and the same amount of skid buffering, and a new
+# request is accepted whenever there is room for its response. This is
+# the flow control of the RTL model with credit=True, so the FL model
+# has the same timing as SramMinionCL( credit=True ), and it never has
+# lower throughput than the RTL model with the default flow control.
+# The model cannot be translated.
+
+from collections import deque
+
+from pymtl3            import *
+from pymtl3.stdlib     import stream
+from pymtl3.stdlib.mem import mk_mem_msg
+
+from sram.SramImage import load_sram_image
+
+from .SramMinionMem import SramMinionMem
+
+class SramMinionFL( Component ):
+
+  def construct( s, data_nbits=32, num_entries=128, opaque_nbits=8,
+                 addr_nbits=32, mask_size=0, memresp_q_nentries=2 ):
+
+    # Memory messages use the given opaque field and address widths
+
+    MemReqType, MemRespType = mk_mem_msg( opaque_nbits, addr_nbits, data_nbits )
+
+    # Interface
+
+    s.minion = stream.ifcs.MinionIfcRTL( MemReqType, MemRespType )
+
+    # Memory and outstanding responses
+
+    s.mem      = SramMinionMem( data_nbits, num_entries, addr_nbits, mask_size, MemRespType )
+    s.nbytes   = s.mem.nbytes
+    s.nentries = memresp_q_nentries
+    s.resps    = deque()
+
+    s.resp_zero = MemRespType()
+
+    @update
+    def up_minion_comb():
+      s.minion.resp.val @= len( s.resps ) > 0
+      s.minion.resp.msg @= s.resps[0] if s.resps else s.resp_zero
+      s.minion.req.rdy  @= len( s.resps ) < s.nentries
+
+    @update_ff
+    def up_minion_ff():
+
+      if s.reset:
+        s.resps.clear()
+        return
+
+      if s.minion.resp.val & s.minion.resp.rdy:
+        s.resps.popleft()
+
+      if s.minion.req.val & s.minion.req.rdy:
+        s.resps.append( s.mem.access( s.minion.req.msg ) )
+
+  # Backdoor access to the SRAM contents, base_idx is a word index (i.e.,
+  # the memory request address divided by the number of bytes per word)
+
+  def load( s, data, base_idx=0 ):
+    s.mem.load( data, base_idx )
+
+  def dump( s, lo=0, hi=None ):
+    return s.mem.dump( lo, hi )
+
+  def load_image( s, path, fmt=None, base_idx=0 ):
+    return load_sram_image( s.mem, path, fmt, base_idx )
+
+  def line_trace( s ):
+    return f"{len( s.resps )}"
@@ -0,0 +1,123 @@
+#=========================================================================
+# SramMinionMem
+#=========================================================================
+# Flat memory buffer shared by the functional-level and cycle-level SRAM
+# minions (see SramMinionFL.py and SramMinionCL.py). The whole SRAM is
+# kept in a single bytearray of packed little-endian words and access
+# turns a memory request into the memory response returned by
+# SramMinionPRTL for the same request:
+#
+#  - the word index is given by the address bits above the byte offset,
+#    exactly like the addr[addr_start:addr_end] slice in the RTL
+#  - without a write mask (mask_size=0) reads and writes always access
+#    the whole word and the len field is ignored
+#  - with a write mask, writes only update the byte lanes covered by the
+#    len bytes starting at the byte offset of the address, and reads
+#    return these bytes in the least significant bytes of the data
+#  - writes return zero data, and requests other than reads and writes
+#    read the word but also return zero data
+#
+# The load and dump methods provide the same zero-cycle backdoor as the
+# SRAMs in the RTL model (see sram/SramStorage.py).
+
+from pymtl3.stdlib.mem import MemMsgType
+
+from sram.SramStorage import is_bytes_like, sram_words
+
+class SramMinionMem:
+
+  def __init__( s, data_nbits, num_entries, addr_nbits, mask_size, MemRespType ):
+
+    nbytes     = data_nbits // 8
+    addr_width = max( 1, ( num_entries - 1 ).bit_length() )
+    addr_start = ( nbytes - 1 ).bit_length()
+
+    assert addr_start + addr_width <= addr_nbits, \
+      f"A {addr_nbits}b address cannot index {num_entries} {data_nbits}b words"
+
+    assert mask_size == 0 or ( addr_start > 0 and nbytes % mask_size == 0 ), \
+      f"Cannot split {data_nbits}b words into {mask_size} byte lanes"
+
+    s.data_nbits  = data_nbits
+    s.num_entries = num_entries
+    s.nbytes      = nbytes
+    s.mask_size   = mask_size
+    s.lane_nbytes = nbytes // mask_size if mask_size else nbytes
+    s.addr_start  = addr_start
+    s.idx_mask    = ( 1 << addr_width ) - 1
+    s.offset_mask = nbytes - 1
+    s.RespType    = MemRespType
+    s.buf         = bytearray( num_entries * nbytes )
+
+  #-----------------------------------------------------------------------
+  # access
+  #-----------------------------------------------------------------------
+  # Perform the read or write of the given request and return its response.
+
+  def access( s, req ):
+
+    type_  = int( req.type_ )
+    addr   = int( req.addr )
+    len_   = int( req.len )
+    nbytes = s.nbytes
+
+    idx = ( addr >> s.addr_start ) & s.idx_mask
+    assert idx < s.num_entries, \
+      f"Address {addr:#x} is outside of an SRAM with {s.num_entries} entries!"
+
+    base = idx * nbytes
+
+    if s.mask_size == 0:
+      lo, hi, shamt, resp_nbytes = base, base + nbytes, 0, nbytes
+    else:
+      offset      = addr & s.offset_mask
+      resp_nbytes = len_ if len_ else nbytes
+      shamt       = offset * 8
+
+      # enabled lanes start at or after the offset and before its end
+
+      lane  = s.lane_nbytes
+      first = -( -offset // lane ) * lane
+      last  = min( -( -( offset + resp_nbytes ) // lane ) * lane, nbytes )
+      lo, hi = base + first, base + max( first, last )
+
+    if type_ == MemMsgType.WRITE:
+      word = ( int( req.data ) << shamt ) & ( ( 1 << s.data_nbits ) - 1 )
+      s.buf[ lo:hi ] = word.to_bytes( nbytes, 'little' )[ lo-base : hi-base ]
+      data = 0
+
+    else:
+      word = int.from_bytes( s.buf[ base : base + nbytes ], 'little' )
+      data = ( word >> shamt ) & ( ( 1 << ( 8 * min( resp_nbytes, nbytes ) ) ) - 1 )
+      if type_ != MemMsgType.READ:
+        data = 0
+
+    return s.RespType( type_, int( req.opaque ), 0, len_, data )
+
+  #-----------------------------------------------------------------------
+  # Backdoor access
+  #-----------------------------------------------------------------------
+
+  def load( s, data, base_idx=0 ):
+
+    nbytes = s.nbytes
+
+    if is_bytes_like( data ):
+      data   = memoryview( data ).cast('B')
+      nwords = -( -len( data ) // nbytes )
+    else:
+      data   = b''.join([ ( int(x) & ( ( 1 << s.data_nbits ) - 1 ) ).to_bytes( nbytes, 'little' )
+                          for x in data ])
+      nwords = len( data ) // nbytes
+
+    assert 0 <= base_idx and base_idx + nwords <= s.num_entries, \
+      f"Cannot access words [{base_idx},{base_idx+nwords}) of an SRAM " \
+      f"with {s.num_entries} entries!"
+
+    lo = base_idx * nbytes
+    s.buf[ lo : lo + len( data ) ] = data
+
+  def dump( s, lo=0, hi=None ):
+    if hi is None:
+      hi = s.num_entries
+    return sram_words( s.buf[ lo * s.nbytes : hi * s.nbytes ], s.nbytes )
@@ -38,6 +38,59 @@
 # Note, with a pipe queue you still need two elements of buffering.
 # There could be a message in the response queue when M2 stalls and then
 # you still don't have anywhere to put the message currently in M1.
+#
+# Stalling M0 whenever the queue is not empty is simple but conservative.
+# As soon as a single response is buffered we stop accepting requests,
+# even though there is still room for the message in M1 and a new message
+# in M0, so the throughput drops to ~50% whenever the response interface
+# is intermittently stalled. Setting credit=True instead tracks the
+# number of messages which might still need a queue entry (i.e., the
+# messages in the queue plus the message in M1) and keeps accepting
+# requests as long as there is guaranteed to be an entry for the message
+# in M0 once it reaches M1:
+#
+#  rdy = count + M1 val < memresp_q_nentries
+#
+# The depth of the response queue can be set with memresp_q_nentries,
+# without credit based flow control we stall M0 if there are less than
+# two free elements in the queue.
+#
+# The size of the SRAM (data_nbits x num_entries) and the widths of the
+# opaque and address fields of the memory messages are parameters, and
+# the defaults correspond to a 32x128 SRAM with an 8b opaque field and a
+# 32b address. Without a write mask (mask_size=0) the minion always reads
+# and writes whole words and ignores the len field of the requests. With
+# a non-zero mask_size, the SRAM is split into mask_size byte lanes and
+# the minion supports sub-word accesses of len bytes at the byte offset
+# given by the address, so sub-word stores do not need a read-modify-
+# write. Sub-word stores must cover whole lanes (e.g., byte stores need
+# one lane per byte).
+#
+# The load and dump methods provide a zero-cycle backdoor to preload and
+# inspect the SRAM contents without sending any memory requests, and
+# load_image preloads the SRAM from a hex, raw binary, or ELF image file
+# (see sram/SramImage.py).
+#
+# With stats=True the minion collects simulation-only statistics in
+# s.stats (request latency, stall cycles, response queue occupancy, and
+# read/write mix, see SramMinionStats.py) which can be printed at the end
+# of a simulation. The statistics are gathered by a Python update block,
+# so a minion with statistics cannot be translated, and the minion is
+# unchanged if stats=False. The statistics also enable the access
+# counters of the SRAM, so sram.SramEnergy can estimate the SRAM energy
+# of the simulation.
+#
+# Similarly, trace=True (or trace=<path>) records every access of the
+# SRAM in a binary transaction trace in s.sram.trace (see
+# sram/SramTrace.py), which is much cheaper than line tracing long
+# simulations.
+#
+# The minion never returns the read data of a write (the response data
+# of a write is muxed to zero in M1), so it does not depend on the
+# read-during-write semantics of the SRAM. With check=True the SRAM flags
+# undefined read data (see sram/SramSemantics.py) and the minion asserts
+# that every read response uses defined data. Like the statistics, the
+# check is a Python update block and cannot be translated.
 
 from pymtl3                  import *
 from pymtl3.passes.backends.verilog import *
@@ -45,27 +98,46 @@ from pymtl3.stdlib           import stream
 from pymtl3.stdlib.mem       import mk_mem_msg, MemMsgType
 from pymtl3.stdlib.basic_rtl import Reg, RegRst
 
-from sram import SramRTL
+from sram          import SramRTL
+from sram.SramPRTL import SramPRTL
+
+from .SramMinionStats import SramMinionStats
 
 class SramMinionPRTL( Component ):
 
-  def construct( s ):
-    s.set_metadata( VerilogTranslationPass.explicit_module_name, "SramMinionRTL" )
+  def construct( s, data_nbits=32, num_entries=128, opaque_nbits=8,
+                 addr_nbits=32, mask_size=0, memresp_q_nentries=2,
+                 credit=False, stats=False, trace=False, check=False ):
+
+    assert credit or memresp_q_nentries >= 2, \
+      "Need at least two elements of skid buffering without credits"
+
+    # The default configuration is named SramMinionRTL, all other
+    # configurations include the parameters in the module name
 
-    # size is fixed as 32x128
+    if ( data_nbits, num_entries, opaque_nbits, addr_nbits, mask_size,
+         memresp_q_nentries, credit ) == ( 32, 128, 8, 32, 0, 2, False ):
+      s.set_metadata( VerilogTranslationPass.explicit_module_name, "SramMinionRTL" )
+    else:
+      s.set_metadata( VerilogTranslationPass.explicit_module_name,
+        f"SramMinionRTL_{data_nbits}b_{num_entries}words_o{opaque_nbits}_a{addr_nbits}"
+        f"_mask{mask_size}_q{memresp_q_nentries}" + ( "_credit" if credit else "" ) )
 
-    num_bits   = 32
-    num_words  = 128
+    num_bits   = data_nbits
+    num_words  = num_entries
     addr_width = clog2( num_words )
-    addr_start = clog2( num_bits / 8 )
+    addr_start = clog2( num_bits // 8 )
     addr_end   = addr_start + addr_width
 
+    assert addr_end <= addr_nbits, \
+      f"A {addr_nbits}b address cannot index {num_words} {num_bits}b words"
+
     BitsAddr   = mk_bits( addr_width )
     BitsData   = mk_bits( num_bits )
 
-    # Default memory message has 8 bits opaque field and 32 bits address.
+    # Memory messages use the given opaque field and address widths
 
-    MemReqType, MemRespType = mk_mem_msg( 8, 32, num_bits )
+    MemReqType, MemRespType = mk_mem_msg( opaque_nbits, addr_nbits, num_bits )
 
     # Interface
 
@@ -88,16 +160,67 @@ class SramMinionPRTL( Component ):
       s.sram_addr_M0  @= s.minion.req.msg.addr[addr_start:addr_end]
       s.sram_wen_M0   @= s.minion.req.val & ( s.minion.req.msg.type_ == MEM_MSG_TYPE_WRITE )
       s.sram_en_M0    @= s.minion.req.val & s.minion.req.rdy
-      s.sram_wdata_M0 @= s.minion.req.msg.data
 
     # SRAM
 
-    s.sram = m = SramRTL( num_bits, num_words )
+    # Statistics, traces, and checks are simulation only, so they always
+    # use the PyMTL SRAM model (with the same macros as SramRTL)
+
+    if stats or trace or check:
+      s.sram = m = SramPRTL( num_bits, num_words, mask_size, objective='verilog',
+                             activity=stats, trace=trace, check=check )
+    else:
+      s.sram = m = SramRTL( num_bits, num_words, mask_size )
     m.port0_idx   //= s.sram_addr_M0
     m.port0_type  //= s.sram_wen_M0
     m.port0_val   //= s.sram_en_M0
     m.port0_wdata //= s.sram_wdata_M0
 
+    s.sram_rdata_M1 = Wire( BitsData )
+
+    if mask_size == 0:
+      s.sram_wdata_M0 //= s.minion.req.msg.data
+      s.sram_rdata_M1 //= s.sram.port0_rdata
+
+    else:
+
+      # Sub-word accesses, the request data is in the least significant
+      # bytes and we shift it to the byte offset of the address, then only
+      # enable the lanes covered by the len bytes starting at the offset
+
+      nbytes = num_bits // 8
+
+      assert addr_start > 0 and nbytes % mask_size == 0, \
+        f"Cannot split {num_bits}b words into {mask_size} byte lanes"
+
+      lane_nbytes = nbytes // mask_size
+
+      BitsNBytes = mk_bits( addr_start + 2 )
+      NBYTES     = BitsNBytes( nbytes )
+
+      s.req_offset_M0 = Wire( BitsNBytes )
+      s.req_nbytes_M0 = Wire( BitsNBytes )
+      s.sram_wben_M0  = Wire( mask_size  )
+
+      m.port0_wben //= s.sram_wben_M0
+
+      @update
+      def comb_M0_subword():
+
+        s.req_offset_M0 @= zext( s.minion.req.msg.addr[0:addr_start], BitsNBytes )
+
+        if s.minion.req.msg.len == 0:
+          s.req_nbytes_M0 @= NBYTES
+        else:
+          s.req_nbytes_M0 @= zext( s.minion.req.msg.len, BitsNBytes )
+
+        for i in range( mask_size ):
+          s.sram_wben_M0[i] @= ( s.req_offset_M0 <= i*lane_nbytes ) \
+                             & ( i*lane_nbytes < s.req_offset_M0 + s.req_nbytes_M0 )
+
+        s.sram_wdata_M0 @= s.minion.req.msg.data \
+                         << ( zext( s.minion.req.msg.addr[0:addr_start], BitsData ) << 3 )
+
     #---------------------------------------------------------------------
     # M1 stage
     #---------------------------------------------------------------------
@@ -110,6 +233,29 @@ class SramMinionPRTL( Component ):
     s.memreq_msg_reg_M1 = m = Reg( MemReqType )
     m.in_ //= s.minion.req.msg
 
+    # Sub-word reads return the len bytes starting at the byte offset in
+    # the least significant bytes of the response data
+
+    if mask_size > 0:
+
+      s.resp_nbytes_M1  = Wire( BitsNBytes )
+      s.resp_bitmask_M1 = Wire( BitsData   )
+
+      @update
+      def comb_M1_subword():
+
+        if s.memreq_msg_reg_M1.out.len == 0:
+          s.resp_nbytes_M1 @= NBYTES
+        else:
+          s.resp_nbytes_M1 @= zext( s.memreq_msg_reg_M1.out.len, BitsNBytes )
+
+        for i in range( nbytes ):
+          s.resp_bitmask_M1[ i*8 : i*8 + 8 ] @= sext( s.resp_nbytes_M1 > i, 8 )
+
+        s.sram_rdata_M1 @= ( s.sram.port0_rdata
+          >> ( zext( s.memreq_msg_reg_M1.out.addr[0:addr_start], BitsData ) << 3 ) ) \
+          & s.resp_bitmask_M1
+
     # Create the memory response message with data from SRAM if read
 
     s.memresp_msg_M1 = Wire( MemRespType )
@@ -126,13 +272,13 @@ class SramMinionPRTL( Component ):
       s.memresp_msg_M1.len    @= s.memreq_msg_reg_M1.out.len
 
       if s.memreq_msg_reg_M1.out.type_ == MEM_MSG_TYPE_READ:
-        s.memresp_msg_M1.data @= s.sram.port0_rdata
+        s.memresp_msg_M1.data @= s.sram_rdata_M1
       else:
         s.memresp_msg_M1.data @= 0
 
     # Bypass queue
 
-    s.memresp_q = stream.BypassQueueRTL( MemRespType, num_entries=2 )
+    s.memresp_q = stream.BypassQueueRTL( MemRespType, num_entries=memresp_q_nentries )
 
     @update
     def comb_M1b():
@@ -147,9 +293,68 @@ class SramMinionPRTL( Component ):
       s.memresp_q.send.rdy @= s.minion.resp.rdy
       s.minion.resp.msg    @= s.memresp_q.send.msg
 
+    # Request flow control
+
+    BitsCount = mk_bits( clog2( memresp_q_nentries+2 ) )
+
+    if credit:
+
+      # accept a request if its queue entry is guaranteed
+
+      nentries = BitsCount( memresp_q_nentries )
+
+      @update
+      def comb_M0_rdy_credit():
+        s.minion.req.rdy @= ( zext( s.memresp_q.count, BitsCount )
+                            + zext( s.memreq_val_reg_M1.out, BitsCount ) ) < nentries
+
+    else:
+
       # stop the minion interface if not enough skid buffering
 
-      s.minion.req.rdy     @= s.memresp_q.count == 0
+      max_count = BitsCount( memresp_q_nentries-2 )
+
+      @update
+      def comb_M0_rdy():
+        s.minion.req.rdy @= zext( s.memresp_q.count, BitsCount ) <= max_count
+
+    # Simulation-only statistics
+
+    if stats:
+
+      s.stats = SramMinionStats( memresp_q_nentries )
+
+      @update_ff
+      def up_stats():
+        if s.reset:
+          s.stats.reset()
+        else:
+          s.stats.tick( s.minion.req.val, s.minion.req.rdy,
+                        s.minion.req.msg.type_ == MEM_MSG_TYPE_WRITE,
+                        s.minion.resp.val, s.minion.resp.rdy, s.memresp_q.count )
+
+    # Simulation-only check for undefined read data
+
+    if check:
+
+      @update_ff
+      def up_check():
+        if ~s.reset & s.memreq_val_reg_M1.out \
+           & ( s.memreq_msg_reg_M1.out.type_ == MEM_MSG_TYPE_READ ):
+          assert not s.sram.port0_rdata_x, \
+            f"Read response uses undefined SRAM read data ({s.memreq_msg_reg_M1.out})"
+
+  # Backdoor access to the SRAM contents, base_idx is a word index (i.e.,
+  # the memory request address divided by the number of bytes per word)
+
+  def load( s, data, base_idx=0 ):
+    s.sram.load( data, base_idx )
+
+  def dump( s, lo=0, hi=None ):
+    return s.sram.dump( lo, hi )
+
+  def load_image( s, path, fmt=None, base_idx=0 ):
+    return s.sram.load_image( path, fmt, base_idx )
 
   def line_trace( s ):
     return '*' if s.memreq_val_reg_M1.out else ' '
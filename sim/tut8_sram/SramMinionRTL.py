@@ -22,20 +22,47 @@ class SramMinionVRTL( VerilogPlaceholder, Component ):
 
   # Constructor
 
-  def construct( s ):
+  def construct( s, data_nbits=32, num_entries=128, opaque_nbits=8,
+                 addr_nbits=32, mask_size=0, memresp_q_nentries=2, credit=False ):
 
-    # If translated into Verilog, we use the explicit name
+    assert credit or memresp_q_nentries >= 2, \
+      "Need at least two elements of skid buffering without credits"
 
-    s.set_metadata( VerilogTranslationPass.explicit_module_name, 'SramMinionRTL' )
+    assert mask_size == 0 or ( data_nbits > 8 and ( data_nbits // 8 ) % mask_size == 0 ), \
+      f"Cannot split {data_nbits}b words into {mask_size} byte lanes"
 
-    # Default memory message has 8 bits opaque field and 32 bits address
+    # If translated into Verilog, we use the explicit name for the
+    # default configuration and include the parameters otherwise
 
-    MemReqType, MemRespType = mk_mem_msg( 8, 32, 32 )
+    if ( data_nbits, num_entries, opaque_nbits, addr_nbits, mask_size,
+         memresp_q_nentries, credit ) == ( 32, 128, 8, 32, 0, 2, False ):
+      s.set_metadata( VerilogTranslationPass.explicit_module_name, 'SramMinionRTL' )
+    else:
+      s.set_metadata( VerilogTranslationPass.explicit_module_name,
+        f'SramMinionRTL_{data_nbits}b_{num_entries}words_o{opaque_nbits}_a{addr_nbits}'
+        f'_mask{mask_size}_q{memresp_q_nentries}' + ( '_credit' if credit else '' ) )
+
+    # Memory messages use the given opaque field and address widths
+
+    MemReqType, MemRespType = mk_mem_msg( opaque_nbits, addr_nbits, data_nbits )
 
     # Interface
 
     s.minion = stream.ifcs.MinionIfcRTL( MemReqType, MemRespType )
 
+    # Verilog parameters
+
+    s.set_metadata( VerilogPlaceholderPass.params, {
+      'p_data_nbits'   : data_nbits,
+      'p_num_entries'  : num_entries,
+      'p_opaque_nbits' : opaque_nbits,
+      'p_addr_nbits'   : addr_nbits,
+      'p_mask_size'    : mask_size,
+
+      'p_memresp_q_nentries' : memresp_q_nentries,
+      'p_credit'             : int( credit ),
+    })
+
 # See if the course staff want to force testing a specific RTL language
 # for their own testing.
 
@@ -0,0 +1,129 @@
+#=========================================================================
+# SramMinionStats
+#=========================================================================
+# Simulation-only statistics for SramMinionPRTL. If the minion is
+# constructed with stats=True it calls tick once per cycle (at the clock
+# edge, after reset) with the handshake signals of the minion interface
+# and the occupancy of the response queue, and we collect:
+#
+#  - cycles            : number of cycles since reset
+#  - nreads, nwrites   : number of accepted read and write requests
+#  - latency_hist      : number of responses per latency, where the
+#                        latency is the number of cycles from the cycle
+#                        the request fires to the cycle its response
+#                        fires (at least one cycle)
+#  - stall_cycles      : cycles with a valid request which was not
+#                        accepted because there was not enough room in
+#                        the response queue (i.e., backpressure)
+#  - resp_stall_cycles : cycles with a valid response which was not
+#                        accepted by the response interface
+#  - occupancy_hist    : number of cycles with 0, 1, 2, ... responses in
+#                        the response queue
+#
+# Responses are returned in order, so we only need a FIFO of the cycles
+# in which the outstanding requests fired to compute the latencies.
+
+from collections import deque
+
+class SramMinionStats:
+
+  def __init__( s, memresp_q_nentries ):
+    s.memresp_q_nentries = memresp_q_nentries
+    s.reset()
+
+  def reset( s ):
+    s.cycles            = 0
+    s.nreads            = 0
+    s.nwrites           = 0
+    s.stall_cycles      = 0
+    s.resp_stall_cycles = 0
+    s.latency_hist      = {}
+    s.occupancy_hist    = [ 0 ] * ( s.memresp_q_nentries + 1 )
+    s.req_cycles        = deque()
+
+  def tick( s, req_val, req_rdy, req_write, resp_val, resp_rdy, count ):
+
+    if resp_val and resp_rdy:
+      latency = s.cycles - s.req_cycles.popleft()
+      s.latency_hist[ latency ] = s.latency_hist.get( latency, 0 ) + 1
+    elif resp_val:
+      s.resp_stall_cycles += 1
+
+    if req_val and req_rdy:
+      s.req_cycles.append( s.cycles )
+      if req_write:
+        s.nwrites += 1
+      else:
+        s.nreads += 1
+    elif req_val:
+      s.stall_cycles += 1
+
+    s.occupancy_hist[ int(count) ] += 1
+    s.cycles += 1
+
+  #-----------------------------------------------------------------------
+  # Derived statistics
+  #-----------------------------------------------------------------------
+
+  @property
+  def nreqs( s ):
+    return s.nreads + s.nwrites
+
+  @property
+  def nresps( s ):
+    return sum( s.latency_hist.values() )
+
+  @property
+  def avg_latency( s ):
+    if s.nresps == 0:
+      return 0.0
+    return sum([ lat * n for lat, n in s.latency_hist.items() ]) / s.nresps
+
+  @property
+  def max_latency( s ):
+    return max( s.latency_hist, default=0 )
+
+  @property
+  def throughput( s ):
+    return s.nreqs / s.cycles if s.cycles else 0.0
+
+  @property
+  def avg_occupancy( s ):
+    if s.cycles == 0:
+      return 0.0
+    return sum([ k * n for k, n in enumerate( s.occupancy_hist ) ]) / s.cycles
+
+  #-----------------------------------------------------------------------
+  # Reporting
+  #-----------------------------------------------------------------------
+
+  def as_dict( s ):
+    return {
+      'cycles'            : s.cycles,
+      'nreads'            : s.nreads,
+      'nwrites'           : s.nwrites,
+      'nresps'            : s.nresps,
+      'throughput'        : s.throughput,
+      'avg_latency'       : s.avg_latency,
+      'max_latency'       : s.max_latency,
+      'latency_hist'      : dict( sorted( s.latency_hist.items() ) ),
+      'stall_cycles'      : s.stall_cycles,
+      'resp_stall_cycles' : s.resp_stall_cycles,
+      'occupancy_hist'    : list( s.occupancy_hist ),
+      'avg_occupancy'     : s.avg_occupancy,
+    }
+
+  def __str__( s ):
+    lines = [
+      f" cycles            = {s.cycles}",
+      f" requests          = {s.nreqs} ({s.nreads} reads, {s.nwrites} writes)",
+      f" throughput        = {s.throughput:.3f} requests/cycle",
+      f" latency           = {s.avg_latency:.2f} avg, {s.max_latency} max",
+      f" stall cycles      = {s.stall_cycles} (request), {s.resp_stall_cycles} (response)",
+      f" queue occupancy   = {s.avg_occupancy:.2f} avg",
+    ]
+    for lat, n in sorted( s.latency_hist.items() ):
+      lines.append( f"   latency {lat:3} : {n}" )
+    for k, n in enumerate( s.occupancy_hist ):
+      lines.append( f"   occupancy {k:2} : {n}" )
+    return "\n".join( lines )
@@ -1,8 +1,11 @@
 //========================================================================
-// SRAM Wrapper: 32 bits/word, 128 words
+// SRAM Wrapper: p_data_nbits bits/word, p_num_entries words
 //========================================================================
 // This is a simple val/rdy wrapper around an SRAM that is supposed to be
-// generated using the CACTI-based memory compiler. Note that the SRAM is
+// generated using the CACTI-based memory compiler. The size of the SRAM
+// and the widths of the opaque and address fields of the memory messages
+// are set with parameters, and the defaults correspond to a 32x128 SRAM
+// with mem_req_4B_t/mem_resp_4B_t messages. Note that the SRAM is
 // synchronous and cannot be stalled. This complicates ensuring that our
 // val/rdy logic does not result in dropping messages. A naive solution
 // might directly connect the memresp_queue_enq_rdy for a single entry
@@ -79,6 +82,27 @@
 // There could be a message in the response queue when M2 stalls and then
 // you still don't have anywhere to put the message currently in M1.
 //
+// Stalling M0 whenever less than two entries are free is simple but
+// conservative, the throughput drops to ~50% whenever the response
+// interface is intermittently stalled. Setting p_credit instead tracks
+// the number of messages which might still need a queue entry (i.e., the
+// messages in the queue plus the message in M1) and keeps accepting
+// requests as long as there is guaranteed to be an entry for the message
+// in M0 once it reaches M1:
+//
+//  rdy = num_free > M1 val
+//
+// The depth of the response queue can be set with p_memresp_q_nentries,
+// without credit based flow control we stall M0 if there are less than
+// two free elements in the queue. This matches SramMinionPRTL.
+//
+// Without a write mask (p_mask_size = 0) the minion always reads and
+// writes whole words and ignores the len field of the requests. With a
+// non-zero p_mask_size, the SRAM is split into p_mask_size byte lanes and
+// the minion supports sub-word accesses of len bytes at the byte offset
+// given by the address. Sub-word stores must cover whole lanes (e.g.,
+// byte stores need one lane per byte).
+//
 
 `ifndef TUT8_SRAM_MINION_VRTL_V
 `define TUT8_SRAM_MINION_VRTL_V
@@ -91,25 +115,45 @@
 `include "sram/SramVRTL.v"
 
 module tut8_sram_SramMinionVRTL
-(
-  input  logic         clk,
-  input  logic         reset,
+#(
+  parameter p_data_nbits   = 32,
+  parameter p_num_entries  = 128,
+  parameter p_opaque_nbits = 8,
+  parameter p_addr_nbits   = 32,
+  parameter p_mask_size    = 0,
+
+  parameter p_memresp_q_nentries = 2,
+  parameter p_credit             = 0,
+
+  // Local constants not meant to be set from outside the module
+  parameter c_len_nbits    = $clog2(p_data_nbits/8),
+  parameter c_idx_nbits    = $clog2(p_num_entries),
+  parameter c_idx_start    = $clog2(p_data_nbits/8),
+  parameter c_req_nbits    = 4 + p_opaque_nbits + p_addr_nbits + c_len_nbits + p_data_nbits,
+  parameter c_resp_nbits   = 4 + p_opaque_nbits + 2 + c_len_nbits + p_data_nbits,
+  parameter c_q_nbits      = $clog2(p_memresp_q_nentries) + 1,
+  parameter c_nbytes       = p_data_nbits/8,
+  parameter c_mask_nbits   = (p_mask_size > 0) ? p_mask_size : 1,
+  parameter c_lane_nbytes  = c_nbytes/c_mask_nbits
+)(
+  input  logic                    clk,
+  input  logic                    reset,
 
   // Memory request port interface
 
-  input  logic         minion_req_val,
-  output logic         minion_req_rdy,
-  input  mem_req_4B_t  minion_req_msg,
+  input  logic                    minion_req_val,
+  output logic                    minion_req_rdy,
+  input  logic [c_req_nbits-1:0]  minion_req_msg,
 
   // Memory response port interface
 
-  output logic         minion_resp_val,
-  input  logic         minion_resp_rdy,
-  output mem_resp_4B_t minion_resp_msg
+  output logic                    minion_resp_val,
+  input  logic                    minion_resp_rdy,
+  output logic [c_resp_nbits-1:0] minion_resp_msg
 );
 
-  mem_resp_4B_t minion_resp_msg_raw; //4-state sim fix
-  assign minion_resp_msg = minion_resp_msg_raw & {48{minion_resp_val}};
+  logic [c_resp_nbits-1:0] minion_resp_msg_raw; //4-state sim fix
+  assign minion_resp_msg = minion_resp_msg_raw & {c_resp_nbits{minion_resp_val}};
 
   //----------------------------------------------------------------------
   // Local parameters
@@ -124,19 +168,20 @@ module tut8_sram_SramMinionVRTL
   // M0 Pipeline Stage
   //----------------------------------------------------------------------
 
-  // Unpack the request message
+  // Unpack the request message, the fields are (from MSB to LSB) type,
+  // opaque, addr, len, and data
 
-  logic [2:0]   memreq_msg_type_M0;
-  logic [7:0]   memreq_msg_opaque_M0;
-  logic [31:0]  memreq_msg_addr_M0;
-  logic [2:0]   memreq_msg_len_M0;
-  logic [31:0]  memreq_msg_data_M0;
+  logic [3:0]                memreq_msg_type_M0;
+  logic [p_opaque_nbits-1:0] memreq_msg_opaque_M0;
+  logic [p_addr_nbits-1:0]   memreq_msg_addr_M0;
+  logic [c_len_nbits-1:0]    memreq_msg_len_M0;
+  logic [p_data_nbits-1:0]   memreq_msg_data_M0;
 
-  assign memreq_msg_type_M0   = minion_req_msg.type_;
-  assign memreq_msg_opaque_M0 = minion_req_msg.opaque;
-  assign memreq_msg_addr_M0   = minion_req_msg.addr;
-  assign memreq_msg_len_M0    = minion_req_msg.len;
-  assign memreq_msg_data_M0   = minion_req_msg.data;
+  assign { memreq_msg_type_M0,
+           memreq_msg_opaque_M0,
+           memreq_msg_addr_M0,
+           memreq_msg_len_M0,
+           memreq_msg_data_M0 } = minion_req_msg;
 
   logic memreq_val_M0;
   assign memreq_val_M0 = minion_req_val;
@@ -146,27 +191,59 @@ module tut8_sram_SramMinionVRTL
 
   // Setup signals for SRAM
 
-  logic [6:0]  sram_addr_M0;
-  logic        sram_wen_M0;
-  logic        sram_oen_M0;
-  logic        sram_en_M0;
-  logic [31:0] sram_write_data_M0;
-  logic [31:0] sram_read_data_M1;
+  logic [c_idx_nbits-1:0]  sram_addr_M0;
+  logic                    sram_wen_M0;
+  logic                    sram_oen_M0;
+  logic                    sram_en_M0;
+  logic [p_data_nbits-1:0] sram_write_data_M0;
+  logic [c_mask_nbits-1:0] sram_wben_M0;
+  logic [p_data_nbits-1:0] sram_read_data_M1;
 
-  assign sram_addr_M0 = memreq_msg_addr_M0[8:2];
+  assign sram_addr_M0 = memreq_msg_addr_M0[c_idx_start+c_idx_nbits-1:c_idx_start];
   assign sram_wen_M0  = memreq_val_M0 && (memreq_msg_type_M0 == c_write);
   assign sram_en_M0   = memreq_go;
 
+  // Sub-word accesses, the request data is in the least significant bytes
+  // and we shift it to the byte offset of the address, then only enable
+  // the lanes covered by the len bytes starting at the offset
+
+  genvar i;
+  generate
+    if ( p_mask_size > 0 ) begin : subword_M0
+
+      logic [31:0] req_offset_M0;
+      logic [31:0] req_nbytes_M0;
+
+      assign req_offset_M0 = 32'(memreq_msg_addr_M0[c_idx_start-1:0]);
+      assign req_nbytes_M0 = ( memreq_msg_len_M0 == 0 ) ? c_nbytes : 32'(memreq_msg_len_M0);
+
+      for ( i = 0; i < p_mask_size; i = i + 1 ) begin : wben
+        assign sram_wben_M0[i] = ( req_offset_M0 <= i*c_lane_nbytes )
+                              && ( i*c_lane_nbytes < req_offset_M0 + req_nbytes_M0 );
+      end
+
+      assign sram_write_data_M0 = memreq_msg_data_M0 << ( req_offset_M0 << 3 );
+
+    end
+    else begin : word_M0
+
+      assign sram_wben_M0       = 1'b1;
+      assign sram_write_data_M0 = memreq_msg_data_M0;
+
+    end
+  endgenerate
+
   // Instantiate SRAM
 
-  sram_SramVRTL#(32,128) sram
+  sram_SramVRTL#(p_data_nbits,p_num_entries,p_mask_size) sram
   (
     .clk         (clk),
     .reset       (reset),
     .port0_idx   (sram_addr_M0),
     .port0_type  (sram_wen_M0),
     .port0_val   (sram_en_M0),
-    .port0_wdata (memreq_msg_data_M0),
+    .port0_wdata (sram_write_data_M0),
+    .port0_wben  (sram_wben_M0),
     .port0_rdata (sram_read_data_M1)
   );
 
@@ -177,11 +254,11 @@ module tut8_sram_SramMinionVRTL
   // we cannot really stall the SRAM, so we are instead using skid
   // buffering in the response queue.
 
-  logic         memreq_val_M1;
-  logic [2:0]   memreq_msg_type_M1;
-  logic [7:0]   memreq_msg_opaque_M1;
-  logic [31:0]  memreq_msg_addr_M1;
-  logic [1:0]   memreq_msg_len_M1;
+  logic                      memreq_val_M1;
+  logic [3:0]                memreq_msg_type_M1;
+  logic [p_opaque_nbits-1:0] memreq_msg_opaque_M1;
+  logic [p_addr_nbits-1:0]   memreq_msg_addr_M1;
+  logic [c_len_nbits-1:0]    memreq_msg_len_M1;
 
   always @( posedge clk ) begin
     if (reset)
@@ -200,31 +277,57 @@ module tut8_sram_SramMinionVRTL
   // M1 Pipeline Stage
   //----------------------------------------------------------------------
 
-  // Shift the read data
+  // Sub-word reads return the len bytes starting at the byte offset in
+  // the least significant bytes of the response data
+
+  logic [p_data_nbits-1:0] memresp_msg_data_M1;
+
+  generate
+    if ( p_mask_size > 0 ) begin : subword_M1
+
+      logic [31:0]             resp_offset_M1;
+      logic [31:0]             resp_nbytes_M1;
+      logic [p_data_nbits-1:0] resp_bitmask_M1;
+
+      assign resp_offset_M1 = 32'(memreq_msg_addr_M1[c_idx_start-1:0]);
+      assign resp_nbytes_M1 = ( memreq_msg_len_M1 == 0 ) ? c_nbytes : 32'(memreq_msg_len_M1);
+
+      for ( i = 0; i < c_nbytes; i = i + 1 ) begin : bitmask
+        assign resp_bitmask_M1[i*8 +: 8] = {8{ resp_nbytes_M1 > i }};
+      end
+
+      assign memresp_msg_data_M1 = ( sram_read_data_M1 >> ( resp_offset_M1 << 3 ) )
+                                 & resp_bitmask_M1;
+
+    end
+    else begin : word_M1
+
+      assign memresp_msg_data_M1 = sram_read_data_M1;
 
-  logic [31:0] memresp_msg_data_M1;
-  assign memresp_msg_data_M1 = sram_read_data_M1;
+    end
+  endgenerate
 
-  // Pack the response message
+  // Pack the response message, the fields are (from MSB to LSB) type,
+  // opaque, test, len, and data. Connect data to zero on write requests.
 
-  mem_resp_4B_t memresp_msg_M1;
+  logic [c_resp_nbits-1:0] memresp_msg_M1;
 
-  assign memresp_msg_M1.type_  = memreq_msg_type_M1;
-  assign memresp_msg_M1.opaque = memreq_msg_opaque_M1;
-  assign memresp_msg_M1.test   = 2'b0;
-  assign memresp_msg_M1.len    = ( memreq_msg_type_M1 == 3'b1) ? 4'b0 : memreq_msg_len_M1;   
-  assign memresp_msg_M1.data   = ( memreq_msg_type_M1 == 3'b1) ? 32'b0 : memresp_msg_data_M1; // Connect data to zero on write requests
+  assign memresp_msg_M1 = { memreq_msg_type_M1,
+                            memreq_msg_opaque_M1,
+                            2'b0,
+                            memreq_msg_len_M1,
+                            ( memreq_msg_type_M1 == c_write ) ? {p_data_nbits{1'b0}} : memresp_msg_data_M1 };
 
   // Output bypass queue
 
-  logic       memresp_queue_rdy;
-  logic [1:0] memresp_queue_num_free_entries_M1;
+  logic                 memresp_queue_rdy;
+  logic [c_q_nbits-1:0] memresp_queue_num_free_entries_M1;
 
   vc_Queue
   #(
     .p_type      (`VC_QUEUE_BYPASS),
-    .p_msg_nbits ($bits(memresp_msg_M1)),
-    .p_num_msgs  (2)
+    .p_msg_nbits (c_resp_nbits),
+    .p_num_msgs  (p_memresp_q_nentries)
   )
   memresp_queue
   (
@@ -239,7 +342,25 @@ module tut8_sram_SramMinionVRTL
     .num_free_entries (memresp_queue_num_free_entries_M1)
   );
 
-  assign minion_req_rdy = (memresp_queue_num_free_entries_M1 >= 2);
+  // Request flow control
+
+  logic [31:0] memresp_queue_num_free_M1;
+  assign memresp_queue_num_free_M1 = 32'(memresp_queue_num_free_entries_M1);
+
+  generate
+    if ( p_credit )
+
+      // accept a request if its queue entry is guaranteed
+
+      assign minion_req_rdy = ( memresp_queue_num_free_M1 > 32'(memreq_val_M1) );
+
+    else
+
+      // stop the minion interface if not enough skid buffering
+
+      assign minion_req_rdy = ( memresp_queue_num_free_M1 >= 2 );
+
+  endgenerate
 
   //----------------------------------------------------------------------
   // General assertions
@@ -259,32 +380,42 @@ module tut8_sram_SramMinionVRTL
   //----------------------------------------------------------------------
   // Line tracing
   //----------------------------------------------------------------------
+  // The vc_MemReqMsg4BTrace/vc_MemRespMsg4BTrace modules only support
+  // the default message widths, so we trace the messages directly.
 
   `ifndef SYNTHESIS
 
-  vc_MemReqMsg4BTrace memreq_trace
-  (
-    .clk   (clk),
-    .reset (reset),
-    .val   (minion_req_val),
-    .rdy   (minion_req_rdy),
-    .msg   (minion_req_msg)
-  );
+  logic [`VC_TRACE_NBITS-1:0] memreq_str;
+  logic [`VC_TRACE_NBITS-1:0] memresp_str;
 
-  vc_MemRespMsg4BTrace memresp_trace
-  (
-    .clk   (clk),
-    .reset (reset),
-    .val   (minion_resp_val),
-    .rdy   (minion_resp_rdy),
-    .msg   (minion_resp_msg)
-  );
+  logic [3:0]                memresp_msg_type;
+  logic [p_opaque_nbits-1:0] memresp_msg_opaque;
+  logic [p_data_nbits-1:0]   memresp_msg_data;
+
+  assign memresp_msg_type   = minion_resp_msg[c_resp_nbits-1:c_resp_nbits-4];
+  assign memresp_msg_opaque = minion_resp_msg[c_resp_nbits-5:c_resp_nbits-4-p_opaque_nbits];
+  assign memresp_msg_data   = minion_resp_msg[p_data_nbits-1:0];
 
   `VC_TRACE_BEGIN
   begin
-    memreq_trace.line_trace( trace_str );
+
+    if ( memreq_msg_type_M0 == c_write )
+      $sformat( memreq_str, "wr:%x:%x:%x", memreq_msg_opaque_M0,
+                memreq_msg_addr_M0, memreq_msg_data_M0 );
+    else
+      $sformat( memreq_str, "rd:%x:%x", memreq_msg_opaque_M0,
+                memreq_msg_addr_M0 );
+
+    if ( memresp_msg_type == c_write )
+      $sformat( memresp_str, "wr:%x", memresp_msg_opaque );
+    else
+      $sformat( memresp_str, "rd:%x:%x", memresp_msg_opaque,
+                memresp_msg_data );
+
+    vc_trace.append_val_rdy_str( trace_str, minion_req_val, minion_req_rdy, memreq_str );
     vc_trace.append_str( trace_str, "()" );
-    memresp_trace.line_trace( trace_str );
+    vc_trace.append_val_rdy_str( trace_str, minion_resp_val, minion_resp_rdy, memresp_str );
+
   end
   `VC_TRACE_END
 
@@ -293,4 +424,3 @@ module tut8_sram_SramMinionVRTL
 endmodule
 
 `endif /* TUT8_SRAM_MINION_VRTL_V */
-
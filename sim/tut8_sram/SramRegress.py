@@ -0,0 +1,264 @@
+#=========================================================================
+# SramRegress
+#=========================================================================
+# Parallel regression runner for the SRAM and minion tests. Instead of
+# running pytest once per RTL language (--prtl or --vrtl) and translating
+# and verilating every configuration serially, we:
+#
+#  1. collect the test cases (e.g., every test in the sram_configs x
+#     test case matrix) with pytest --collect-only
+#  2. split the test cases of each RTL language into shards, where all
+#     test cases with the same parameters (i.e., the same SRAM
+#     configuration) always go to the same shard
+#  3. run each shard as a separate pytest process, with up to jobs shards
+#     running at the same time
+#  4. merge the JUnit XML results of all shards into one list of results
+#
+# Each shard runs in its own build directory (<build_dir>/<lang>-<shard>)
+# which holds the translated Verilog and the verilated models of its
+# configurations. Test cases of the same configuration run in the same
+# shard, so they share these artifacts, and since the assignment of
+# configurations to shards only depends on the parameters (and the number
+# of shards), rerunning the regression reuses the artifacts of the
+# previous run. Workers never
+# write to the same build directory, so there are no races between
+# concurrent translations of the same model.
+#
+# To also share verilated models between shards (and with other checkouts)
+# pass --vl-cache <dir> to the shards (see sram/SramVerilatorCache.py).
+#
+# Use the sram-regress script to run a regression from the command line.
+
+import os
+import subprocess
+import sys
+import time
+import zlib
+
+import xml.etree.ElementTree as ET
+
+from concurrent.futures import ThreadPoolExecutor
+
+sim_dir = os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+
+regress_langs = [ 'pymtl', 'verilog' ]
+regress_paths = [ 'sram/test', 'tut8_sram/test' ]
+
+lang_opts = { 'pymtl' : '--prtl', 'verilog' : '--vrtl' }
+
+#-------------------------------------------------------------------------
+# collect_tests
+#-------------------------------------------------------------------------
+# Returns the node ids (relative to the sim directory) of all test cases
+# in the given test paths, optionally filtered with a pytest -k keyword
+# expression.
+
+def collect_tests( paths=None, keyword=None ):
+
+  cmd = [ sys.executable, '-m', 'pytest', '--collect-only', '-q',
+          '-p', 'no:cacheprovider' ]
+  if keyword:
+    cmd += [ '-k', keyword ]
+  cmd += regress_paths if paths is None else paths
+
+  proc = subprocess.run( cmd, cwd=sim_dir, capture_output=True, text=True )
+
+  if proc.returncode not in [ 0, 5 ]: # 5 = no tests collected
+    raise RuntimeError( f"Could not collect tests:\n{proc.stdout}{proc.stderr}" )
+
+  return [ line.strip() for line in proc.stdout.splitlines() if '::' in line ]
+
+#-------------------------------------------------------------------------
+# shard_tests
+#-------------------------------------------------------------------------
+# The shard of a test case is given by a hash of its parameters, so all
+# test cases of a configuration go to the same shard. Test cases without
+# parameters are spread out by their name.
+
+def shard_key( nodeid ):
+  if nodeid.endswith(']'):
+    return nodeid[ nodeid.index('[')+1 : -1 ]
+  return nodeid
+
+def shard_tests( nodeids, nshards ):
+
+  shards = [ [] for _ in range( nshards ) ]
+  for nodeid in nodeids:
+    key = shard_key( nodeid )
+    shards[ zlib.crc32( key.encode() ) % nshards ].append( nodeid )
+
+  return shards
+
+#-------------------------------------------------------------------------
+# parse_junit
+#-------------------------------------------------------------------------
+# Returns a dictionary with the outcome of every test case in a JUnit XML
+# file generated by pytest, indexed by the class name (i.e., the module
+# path of the test file) and the name of the test case.
+
+def parse_junit( path ):
+
+  results = {}
+
+  for case in ET.parse( path ).getroot().iter( 'testcase' ):
+
+    outcome, message = 'passed', None
+    for child in case:
+      if child.tag in [ 'failure', 'error', 'skipped' ]:
+        outcome = { 'failure' : 'failed', 'error' : 'error',
+                    'skipped' : 'skipped' }[ child.tag ]
+        message = child.get( 'message' )
+        break
+
+    results[ ( case.get( 'classname' ), case.get( 'name' ) ) ] = \
+      ( outcome, float( case.get( 'time', 0 ) ), message )
+
+  return results
+
+def junit_key( nodeid ):
+  path, name = nodeid.split( '::', 1 )
+  return ( os.path.splitext( path )[0].replace( '/', '.' ), name )
+
+#-------------------------------------------------------------------------
+# run_shard
+#-------------------------------------------------------------------------
+# Runs the given test cases in one pytest process and returns a list with
+# one result dictionary per test case.
+
+def run_shard( lang, shard, nodeids, build_dir, pytest_args=None ):
+
+  shard_dir  = os.path.join( os.path.abspath( build_dir ), f"{lang}-{shard}" )
+  junit_path = os.path.join( shard_dir, 'results.xml' )
+
+  os.makedirs( shard_dir, exist_ok=True )
+  if os.path.exists( junit_path ):
+    os.remove( junit_path )
+
+  cmd = [ sys.executable, '-m', 'pytest', '-q', '-p', 'no:cacheprovider',
+          '--rootdir', sim_dir, '-c', os.path.join( sim_dir, 'pytest.ini' ),
+          lang_opts[ lang ], f"--junitxml={junit_path}" ]
+  cmd += pytest_args or []
+  cmd += [ os.path.join( sim_dir, nodeid ) for nodeid in nodeids ]
+
+  start = time.perf_counter()
+  proc  = subprocess.run( cmd, cwd=shard_dir, capture_output=True, text=True )
+  elapsed = time.perf_counter() - start
+
+  junit = parse_junit( junit_path ) if os.path.exists( junit_path ) else {}
+
+  results = []
+  for nodeid in nodeids:
+
+    # a test case without a result means the shard process crashed
+
+    outcome, duration, message = junit.get( junit_key( nodeid ),
+      ( 'error', 0.0, ( proc.stdout + proc.stderr ).strip()[-2000:] ) )
+
+    results.append({
+      'nodeid'   : nodeid,
+      'lang'     : lang,
+      'shard'    : shard,
+      'outcome'  : outcome,
+      'time'     : duration,
+      'message'  : message,
+    })
+
+  return results, elapsed
+
+#-------------------------------------------------------------------------
+# run_regression
+#-------------------------------------------------------------------------
+# Runs the test cases in the given paths for every RTL language and
+# returns the merged list of results (sorted by language and node id).
+# By default we run one job per core and use four shards per job so that
+# shards of different sizes still keep all jobs busy.
+
+def run_regression( paths=None, langs=None, jobs=None, nshards=None, keyword=None,
+                    build_dir='build-regress', pytest_args=None, verbose=False ):
+
+  langs = regress_langs if langs is None else langs
+  for lang in langs:
+    if lang not in lang_opts:
+      raise ValueError( f"Unknown RTL language '{lang}'!" )
+
+  jobs    = jobs    or os.cpu_count() or 1
+  nshards = nshards or 4*jobs
+
+  nodeids = collect_tests( paths, keyword )
+
+  tasks = [ ( lang, shard, shard_nodeids )
+            for lang in langs
+            for shard, shard_nodeids in enumerate( shard_tests( nodeids, nshards ) )
+            if shard_nodeids ]
+
+  # every shard is a separate pytest process, so threads are enough to
+  # wait for them
+
+  results = []
+
+  with ThreadPoolExecutor( max_workers=jobs ) as pool:
+
+    futures = [ pool.submit( run_shard, lang, shard, shard_nodeids, build_dir,
+                             pytest_args )
+                for lang, shard, shard_nodeids in tasks ]
+
+    for ( lang, shard, _ ), future in zip( tasks, futures ):
+      shard_results, elapsed = future.result()
+      results += shard_results
+      if verbose:
+        print( fmt_shard_result( lang, shard, shard_results, elapsed ), flush=True )
+
+  return sorted( results, key=lambda x: ( x['lang'], x['nodeid'] ) )
+
+#-------------------------------------------------------------------------
+# Reporting
+#-------------------------------------------------------------------------
+
+def count_outcomes( results ):
+  counts = {}
+  for result in results:
+    counts[ result['outcome'] ] = counts.get( result['outcome'], 0 ) + 1
+  return counts
+
+def fmt_shard_result( lang, shard, results, elapsed ):
+  counts = count_outcomes( results )
+  return f" {lang:8} shard {shard:3} {len(results):4} tests {elapsed:8.2f} s  " \
+         + " ".join([ f"{n} {outcome}" for outcome, n in sorted( counts.items() ) ])
+
+def fmt_regress_summary( results ):
+
+  lines = []
+
+  for x in results:
+    if x['outcome'] in [ 'failed', 'error' ]:
+      message = " ".join( ( x['message'] or '' ).split() )[:120]
+      lines.append( f" {x['outcome'].upper():6} [{x['lang']}] {x['nodeid']} {message}" )
+
+  for lang in sorted( set([ x['lang'] for x in results ]) ):
+    counts = count_outcomes([ x for x in results if x['lang'] == lang ])
+    lines.append( f" {lang:8} : " + ", ".join([ f"{n} {outcome}"
+                                               for outcome, n in sorted( counts.items() ) ]) )
+
+  return "\n".join( lines )
+
+def regress_passed( results ):
+  return all([ x['outcome'] in [ 'passed', 'skipped' ] for x in results ])
+
+def write_junit( path, results ):
+
+  suite = ET.Element( 'testsuite', name='sram-regress',
+    tests    = str( len(results) ),
+    failures = str( len([ x for x in results if x['outcome'] == 'failed' ]) ),
+    errors   = str( len([ x for x in results if x['outcome'] == 'error'  ]) ),
+    skipped  = str( len([ x for x in results if x['outcome'] == 'skipped' ]) ),
+    time     = f"{sum([ x['time'] for x in results ]):.3f}" )
+
+  for x in results:
+    classname, name = junit_key( x['nodeid'] )
+    case = ET.SubElement( suite, 'testcase', classname=f"{x['lang']}.{classname}",
+                          name=name, time=f"{x['time']:.3f}" )
+    if x['outcome'] != 'passed':
+      tag = { 'failed' : 'failure', 'error' : 'error', 'skipped' : 'skipped' }[ x['outcome'] ]
+      ET.SubElement( case, tag, message=x['message'] or '' )
+
+  ET.ElementTree( suite ).write( path, encoding='utf-8', xml_declaration=True )
@@ -0,0 +1,482 @@
+#=========================================================================
+# SramSweep
+#=========================================================================
+# Design-space sweep of the SRAM minion through the ASIC flow in
+# asic/tut8-sram/flow.py. A sweep is the cross product of
+#
+#  - sizes         : SRAM sizes ( data_nbits, num_entries )
+#  - clock_periods : target clock periods in ns
+#  - aspect_ratios : floorplan aspect ratios
+#  - positions     : SRAM macro placements ( x, y ) in um
+#
+# and every point is pushed through the flow in its own mflowgen build
+# directory (<sweep_dir>/<point>/build). The design directory of a point
+# (<sweep_dir>/<point>/design) holds a generated flow.py which calls
+# construct() of the base flow with the parameters of the point (saved
+# next to it in sweep-point.json), so the base flow stays the single
+# description of the graph.
+#
+# Points run concurrently with up to jobs points at the same time. Every
+# point runs the flow step by step through a step cache shared by all
+# points (see SramFlowCache.py), so a step is only built once for all
+# points with the same inputs and rerunning a sweep only reruns the steps
+# affected by a change. The steps at the front of the flow only depend on
+# some of the parameters:
+#
+#  - gather and RTL simulation only depend on the SRAM size
+#  - synthesis and the post-synthesis simulation and power analysis also
+#    depend on the clock period (but not on the floorplan)
+#
+# For every group of these shared steps the first point with a given key
+# (e.g., the first point of every SRAM size) builds the steps, and the
+# other points with the same key wait for it before they reach the group
+# and then restore the steps from the cache instead of building them at
+# the same time. If the first point fails to build the steps the other
+# points build them on their own.
+#
+# Once the flow of a point is done we parse the output of the
+# brg-flow-summary step (area, timing, and power) and collect the results
+# of all points into one table (see fmt_sweep_table and write_sweep_csv).
+#
+# The floorplan of the flow places exactly one SRAM macro (sram_name), so
+# the SRAM of every point must be a single macro, i.e., SramVRTL.v must
+# select a macro for its size (see verilog_sram_tiling in SramTiler.py).
+# The macro and its instance in the synthesized minion (which depends on
+# the RTL language of SramMinionRTL) set sram_name of the point, and
+# extra_link_lib_dir of the point is <sweep_dir>/macros/<macro> which
+# links the views of only this macro from the extra_link_lib_dir of the
+# base flow. Points with the generic SRAM or without the views of their
+# macro are rejected before anything runs. Use the sram-sweep script to
+# run a sweep from the command line.
+
+import csv
+import importlib.util
+import itertools
+import json
+import os
+import re
+import subprocess
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .SramFlowCache import FlowStepCache, run_flow_cached, sram_cfg_files
+
+sim_dir   = os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+flow_path = os.path.join( os.path.dirname( sim_dir ), 'asic', 'tut8-sram', 'flow.py' )
+
+# Groups of shared steps and the point parameters they depend on (the
+# step cache decides what is reused, these groups only order the points)
+
+shared_steps = [
+  ( ( 'data_nbits', 'num_entries' ),
+    [ 'brgtc5-block-gather', 'brg-rtl-4-state-vcssim' ] ),
+  ( ( 'data_nbits', 'num_entries', 'clock_period' ),
+    [ 'brg-synopsys-dc-synthesis', 'post-synth-gate-level-simulation',
+      'post-synth-power-analysis' ] ),
+]
+
+summary_metrics = [ 'design_area', 'stdcells_area', 'macros_area', 'chip_area',
+                    'core_area', 'constraint', 'slack', 'actual_clk', 'exec_time',
+                    'power', 'energy' ]
+
+#-------------------------------------------------------------------------
+# Sweep points
+#-------------------------------------------------------------------------
+
+def mk_sweep_points( sizes=None, clock_periods=None, aspect_ratios=None,
+                     positions=None ):
+
+  sizes         = sizes         or [ ( 32, 128 ) ]
+  clock_periods = clock_periods or [ 1.2 ]
+  aspect_ratios = aspect_ratios or [ 0.6 ]
+  positions     = positions     or [ ( 60, 50 ) ]
+
+  return [ { 'data_nbits'   : data_nbits,
+             'num_entries'  : num_entries,
+             'clock_period' : clock_period,
+             'aspect_ratio' : aspect_ratio,
+             'sram_x_pos'   : x,
+             'sram_y_pos'   : y }
+           for ( data_nbits, num_entries ), clock_period, aspect_ratio, ( x, y )
+           in itertools.product( sizes, clock_periods, aspect_ratios, positions ) ]
+
+def sweep_point_name( point ):
+  return f"{point['data_nbits']}x{point['num_entries']}" \
+         f"-clk{point['clock_period']:g}-ar{point['aspect_ratio']:g}" \
+         f"-pos{point['sram_x_pos']:g}x{point['sram_y_pos']:g}"
+
+# The design name of a point is the name of the translated minion, which
+# only the RTL wrapper knows
+
+def sweep_design_name( data_nbits, num_entries ):
+
+  from pymtl3.passes.backends.verilog import VerilogTranslationPass
+  from tut8_sram.SramMinionRTL        import SramMinionRTL
+
+  model = SramMinionRTL( data_nbits, num_entries )
+  model.elaborate()
+  return model.get_metadata( VerilogTranslationPass.explicit_module_name )
+
+# Returns the name of the SRAM macro of a point, or raises a ValueError if
+# the flow cannot place the SRAM
+
+def sweep_sram_macro( data_nbits, num_entries ):
+
+  from sram.SramTiler import choose_sram_tiling
+
+  tiling = choose_sram_tiling( data_nbits, num_entries, objective='verilog' )
+
+  if tiling is None:
+    raise ValueError( f"The flow cannot place the generic SRAM of the {data_nbits}x"
+                      f"{num_entries} minion, add its macro to SramVRTL.v!" )
+  if tiling.nmacros != 1:
+    raise ValueError( f"The flow can only place one SRAM macro, not {tiling}!" )
+
+  return tiling.macro.name
+
+# The instance of the macro in the synthesized minion for both RTL
+# languages (the Verilog minion is the instance v of its wrapper)
+
+sweep_sram_names = {
+  'verilog' : 'v/sram/genblk1_sram',
+  'pymtl'   : 'sram/sram',
+}
+
+def sweep_sram_name():
+  from tut8_sram.SramMinionRTL import rtl_language
+  return sweep_sram_names[ rtl_language ]
+
+# The views of a macro the flow needs in its extra_link_lib_dir
+
+sram_view_exts = [ 'db', 'lib', 'lef', 'gds', 'v' ]
+
+def load_base_flow( flow_path=flow_path ):
+  spec = importlib.util.spec_from_file_location( 'sram_sweep_base_flow', flow_path )
+  flow = importlib.util.module_from_spec( spec )
+  spec.loader.exec_module( flow )
+  return flow
+
+# Links the views of the macro of every point from lib_dir (by default
+# the extra_link_lib_dir of the base flow) into macros_dir/<macro>, and
+# raises a ValueError if the flow cannot place the SRAM of a point or the
+# views of its macro are missing
+
+def gen_sweep_macros( points, macros_dir, lib_dir=None, flow_path=flow_path ):
+
+  if lib_dir is None:
+    lib_dir = load_base_flow( flow_path ).mk_parameters()['extra_link_lib_dir']
+
+  macros = sorted( set([ sweep_sram_macro( point['data_nbits'], point['num_entries'] )
+                         for point in points ]) )
+
+  for macro in macros:
+
+    views   = [ os.path.join( lib_dir, f"{macro}.{ext}" ) for ext in sram_view_exts ]
+    missing = [ os.path.basename( x ) for x in views if not os.path.exists( x ) ]
+    if missing:
+      raise ValueError( f"Missing views {' '.join( missing )} of {macro} in {lib_dir}!" )
+
+    macro_dir = os.path.join( macros_dir, macro )
+    os.makedirs( macro_dir, exist_ok=True )
+
+    for view in views:
+      link = os.path.join( macro_dir, os.path.basename( view ) )
+      if os.path.lexists( link ):
+        os.remove( link )
+      os.symlink( os.path.abspath( view ), link )
+
+  return macros
+
+# Returns the parameters of the base flow which a point overrides,
+# macros_dir is the directory of the views of the macros (see
+# gen_sweep_macros)
+
+def sweep_flow_parameters( point, macros_dir ):
+
+  design_name = sweep_design_name( point['data_nbits'], point['num_entries'] )
+  macro       = sweep_sram_macro( point['data_nbits'], point['num_entries'] )
+
+  return {
+    'design_name'        : design_name,
+    'test_design_name'   : design_name,
+    'saif_instance'      : f"{design_name}_tb/DUT",
+    'clock_period'       : point['clock_period'],
+    'aspect_ratio'       : point['aspect_ratio'],
+    'sram_name'          : sweep_sram_name(),
+    'sram_x_pos'         : f"{point['sram_x_pos']:g}",
+    'sram_y_pos'         : f"{point['sram_y_pos']:g}",
+    'extra_link_lib_dir' : os.path.join( os.path.abspath( macros_dir ), macro ),
+  }
+
+# Returns all parameters of the base flow for a point
+
+def load_flow_parameters( point, macros_dir, flow_path=flow_path ):
+  return load_base_flow( flow_path ).mk_parameters( **sweep_flow_parameters( point, macros_dir ) )
+
+#-------------------------------------------------------------------------
+# gen_sweep_design
+#-------------------------------------------------------------------------
+# Generates the mflowgen design directory of a point and returns its path
+
+flow_template = '''\
+#=========================================================================
+# flow.py for the sweep point {name}
+#=========================================================================
+# Generated by tut8_sram/SramSweep.py, runs the base flow with the
+# parameters of the sweep point in sweep-point.json.
+
+import importlib.util
+import json
+import os
+
+this_dir = os.path.dirname( os.path.abspath( __file__ ) )
+
+spec = importlib.util.spec_from_file_location( 'sram_sweep_base_flow', {flow_path!r} )
+base = importlib.util.module_from_spec( spec )
+spec.loader.exec_module( base )
+
+def construct():
+  with open( os.path.join( this_dir, 'sweep-point.json' ) ) as f:
+    return base.construct( **json.load( f )['parameters'] )
+'''
+
+def gen_sweep_design( point, point_dir, macros_dir, flow_path=flow_path ):
+
+  name       = sweep_point_name( point )
+  design_dir = os.path.join( point_dir, 'design' )
+  os.makedirs( design_dir, exist_ok=True )
+
+  with open( os.path.join( design_dir, 'sweep-point.json' ), 'w' ) as f:
+    json.dump( { 'name'       : name,
+                 'point'      : point,
+                 'parameters' : sweep_flow_parameters( point, macros_dir ) }, f, indent=2 )
+
+  with open( os.path.join( design_dir, 'flow.py' ), 'w' ) as f:
+    f.write( flow_template.format( name=name, flow_path=os.path.abspath( flow_path ) ) )
+
+  with open( os.path.join( design_dir, '.mflowgen.yml' ), 'w' ) as f:
+    f.write( "construct: flow.py\n" )
+
+  return design_dir
+
+#-------------------------------------------------------------------------
+# parse_flow_summary
+#-------------------------------------------------------------------------
+# Returns a dictionary with every "name = value" line of the output of the
+# brg-flow-summary step (the first one if a name appears several times)
+# and whether all simulations passed.
+
+summary_re = re.compile( r"^\s*(\w+)\s*=\s*(\S+)" )
+
+def parse_flow_summary( text ):
+
+  metrics = {}
+
+  for line in text.splitlines():
+    match = summary_re.match( line )
+    if match and match.group(1) not in metrics:
+      try:
+        metrics[ match.group(1) ] = float( match.group(2) )
+      except ValueError:
+        metrics[ match.group(1) ] = match.group(2)
+
+  sims = re.findall( r"\[(PASSED|FAILED)\]", text )
+  metrics['sims_passed'] = bool( sims ) and 'FAILED' not in sims
+
+  return metrics
+
+#-------------------------------------------------------------------------
+# run_sweep
+#-------------------------------------------------------------------------
+# Runs the flow for every point and returns one result dictionary per
+# point (in the order of the points). The step cache is kept in
+# <sweep_dir>/step-cache unless cache_dir is given, and sources are the
+# RTL sources for the cache keys (see SramFlowCache.py). The views of the
+# macros are linked from lib_dir (see gen_sweep_macros). The mflowgen and
+# make commands can be replaced (e.g., to run make with -j or to use stub
+# tools in tests).
+
+def run_sweep( points, jobs=None, sweep_dir='build-sweep', flow_path=flow_path,
+               mflowgen_cmd=( 'mflowgen', ), make_cmd=( 'make', ), cache_dir=None,
+               sources=None, lib_dir=None, verbose=False ):
+
+  names = [ sweep_point_name( point ) for point in points ]
+  if len( set( names ) ) != len( names ):
+    raise ValueError( "Sweep points must be unique!" )
+
+  jobs       = jobs or os.cpu_count() or 1
+  sweep_dir  = os.path.abspath( sweep_dir )
+  macros_dir = os.path.join( sweep_dir, 'macros' )
+  build_dirs = [ os.path.join( sweep_dir, name, 'build' ) for name in names ]
+
+  # rejects points the flow cannot place before anything runs
+
+  gen_sweep_macros( points, macros_dir, lib_dir, flow_path )
+
+  # generating the design directories elaborates the minion, so we do it
+  # before starting any worker threads
+
+  design_dirs = [ gen_sweep_design( point, os.path.join( sweep_dir, name ), macros_dir, flow_path )
+                  for point, name in zip( points, names ) ]
+  parameters  = [ load_flow_parameters( point, macros_dir, flow_path ) for point in points ]
+  sram_cfgs   = [ sram_cfg_files( point['data_nbits'], point['num_entries'] )
+                  for point in points ]
+
+  cache = FlowStepCache( cache_dir or os.path.join( sweep_dir, 'step-cache' ) )
+
+  # the provider of a group of shared steps is the first point with the
+  # same key, done[i][k] is set once point i is past all steps of group k
+
+  providers = []
+  first     = {}
+  for i, point in enumerate( points ):
+    providers.append([ first.setdefault( ( k, tuple([ point[x] for x in keys ]) ), i )
+                       for k, ( keys, _ ) in enumerate( shared_steps ) ])
+
+  done = [ [ threading.Event() for _ in shared_steps ] for _ in points ]
+
+  def run_point( i ):
+
+    point_dir = os.path.join( sweep_dir, names[i] )
+    build_dir = build_dirs[i]
+    os.makedirs( build_dir, exist_ok=True )
+
+    result = {
+      'name'    : names[i],
+      'point'   : points[i],
+      'status'  : 'error',
+      'message' : None,
+      'elapsed' : 0.0,
+      'reused'  : [],
+      'metrics' : {},
+    }
+
+    start = time.perf_counter()
+
+    with open( os.path.join( point_dir, 'flow.log' ), 'w' ) as log:
+
+      def run( cmd ):
+        log.write( f"% {' '.join( cmd )}\n" )
+        log.flush()
+        proc = subprocess.run( cmd, cwd=build_dir, stdout=subprocess.PIPE,
+                               stderr=subprocess.STDOUT, text=True )
+        log.write( proc.stdout )
+        log.flush()
+        if proc.returncode != 0:
+          raise RuntimeError( f"'{' '.join( cmd )}' failed (see {log.name})" )
+        return proc.stdout
+
+      finished = set()
+
+      def before_step( step ):
+        for k, ( _, steps ) in enumerate( shared_steps ):
+          if step in steps and providers[i][k] != i:
+            done[ providers[i][k] ][k].wait()
+
+      def after_step( step ):
+        finished.add( step )
+        for k, ( _, steps ) in enumerate( shared_steps ):
+          if providers[i][k] == i and finished.issuperset( steps ):
+            done[i][k].set()
+
+      try:
+
+        mflowgen_run = list( mflowgen_cmd ) + [ 'run', '--design', design_dirs[i] ]
+        run( mflowgen_run )
+
+        _, output = run_flow_cached( build_dir, parameters[i], cache,
+          lambda: run( mflowgen_run ), lambda step: run( list( make_cmd ) + [ step ] ),
+          sram_cfgs[i], sources, before_step, after_step, result['reused'] )
+
+        result['metrics'] = parse_flow_summary( output or '' )
+        result['status']  = 'ok'
+
+      except Exception as e:
+        result['message'] = str( e )
+
+      finally:
+
+        # points waiting for this one build the steps on their own
+
+        for event in done[i]:
+          event.set()
+
+    result['elapsed'] = time.perf_counter() - start
+    return result
+
+  # points only wait for earlier points which the pool has already
+  # started, so waiting in a worker thread cannot deadlock
+
+  results = []
+
+  with ThreadPoolExecutor( max_workers=jobs ) as pool:
+
+    futures = [ pool.submit( run_point, i ) for i in range( len( points ) ) ]
+
+    for future in futures:
+      results.append( future.result() )
+      if verbose:
+        print( fmt_sweep_result( results[-1] ), flush=True )
+
+  return results
+
+#-------------------------------------------------------------------------
+# Reporting
+#-------------------------------------------------------------------------
+
+table_columns = [
+  # header         key               format
+  ( 'design_area', 'design_area', '{:12.2f}' ),
+  ( 'macros_area', 'macros_area', '{:12.2f}' ),
+  ( 'slack',       'slack',       '{:8.3f}'  ),
+  ( 'actual_clk',  'actual_clk',  '{:10.3f}' ),
+  ( 'power',       'power',       '{:8.4f}'  ),
+  ( 'energy',      'energy',      '{:8.5f}'  ),
+]
+
+def fmt_sweep_result( result ):
+  reused = f" ({len( result['reused'] )} steps reused)" if result['reused'] else ""
+  status = result['status'] if result['status'] == 'ok' else \
+           f"{result['status']}: {result['message']}"
+  return f" {result['name']:36} {result['elapsed']:8.2f} s  {status}{reused}"
+
+def fmt_sweep_table( results ):
+
+  width = max([ len( x['name'] ) for x in results ] + [ 5 ])
+
+  header = f" {'point':{width}}" + "".join([
+    " " + f"{name:>{len( fmt.format( 0 ) )}}" for name, _, fmt in table_columns ]) \
+    + "  status"
+
+  lines = [ header ]
+
+  for x in results:
+    line = f" {x['name']:{width}}"
+    for _, key, fmt in table_columns:
+      value = x['metrics'].get( key )
+      text  = fmt.format( value ) if isinstance( value, float ) else '-'
+      line += " " + f"{text:>{len( fmt.format( 0 ) )}}"
+    status = x['status']
+    if status == 'ok' and not x['metrics'].get( 'sims_passed' ):
+      status = 'sim-failed'
+    lines.append( line + "  " + status )
+
+  return "\n".join( lines )
+
+def write_sweep_csv( path, results ):
+
+  point_keys = [ 'data_nbits', 'num_entries', 'clock_period', 'aspect_ratio',
+                 'sram_x_pos', 'sram_y_pos' ]
+
+  with open( path, 'w', newline='' ) as f:
+    writer = csv.writer( f )
+    writer.writerow( [ 'name' ] + point_keys + summary_metrics
+                     + [ 'sims_passed', 'status', 'elapsed', 'reused' ] )
+    for x in results:
+      writer.writerow( [ x['name'] ]
+        + [ x['point'][key] for key in point_keys ]
+        + [ x['metrics'].get( key, '' ) for key in summary_metrics ]
+        + [ x['metrics'].get( 'sims_passed', '' ), x['status'],
+            f"{x['elapsed']:.2f}", len( x['reused'] ) ] )
@@ -0,0 +1,179 @@
+#=========================================================================
+# SramBankedMinionPRTL_test
+#=========================================================================
+
+import pytest
+import random
+
+from pymtl3                   import *
+from pymtl3.stdlib            import stream
+from pymtl3.stdlib.test_utils import run_sim
+from pymtl3.stdlib.mem        import mk_mem_msg, MemMsgType
+
+from tut8_sram.SramBankedMinionPRTL import SramBankedMinionPRTL
+from tut8_sram.test.SramMinionRTL_test import needs_pymtl_sram
+
+MemReqType, MemRespType = mk_mem_msg( 8, 32, 32 )
+
+#-------------------------------------------------------------------------
+# TestHarness
+#-------------------------------------------------------------------------
+
+class TestHarness( Component ):
+
+  def construct( s, dut, num_ports ):
+
+    # Instantiate models
+
+    s.srcs  = [ stream.SourceRTL( MemReqType ) for _ in range(num_ports) ]
+    s.sram  = dut
+    s.sinks = [ stream.SinkRTL( MemRespType ) for _ in range(num_ports) ]
+
+    # Connect
+
+    for i in range(num_ports):
+      s.srcs[i].send  //= s.sram.minion[i].req
+      s.sinks[i].recv //= s.sram.minion[i].resp
+
+  def done( s ):
+    return all([ x.done() for x in s.srcs + s.sinks ])
+
+  def line_trace( s ):
+    return "|".join([ x.line_trace() for x in s.srcs ]) + \
+           f" > ({s.sram.line_trace()}) > " + \
+           "|".join([ x.line_trace() for x in s.sinks ])
+
+#-------------------------------------------------------------------------
+# make messages
+#-------------------------------------------------------------------------
+
+def req( type_, opaque, addr, len, data ):
+  if   type_ == 'rd': type_ = MemMsgType.READ
+  elif type_ == 'wr': type_ = MemMsgType.WRITE
+
+  return MemReqType( type_, opaque, addr, len, data)
+
+def resp( type_, opaque, len, data ):
+  if   type_ == 'rd': type_ = MemMsgType.READ
+  elif type_ == 'wr': type_ = MemMsgType.WRITE
+
+  return MemRespType( type_, opaque, b2(0), len, data )
+
+#-------------------------------------------------------------------------
+# Test Case: random
+#-------------------------------------------------------------------------
+# Each port reads and writes its own rows of the banks so the responses
+# do not depend on the order in which requests from different ports are
+# serviced, but requests from different ports still conflict in the
+# banks.
+
+def random_msgs( num_ports, num_banks, num_entries, port ):
+
+  rgen = random.Random()
+  rgen.seed(0xa4e28cc2 + port)
+
+  idxs = [ idx for idx in range(num_entries)
+           if ( idx // num_banks ) % num_ports == port ]
+
+  vmem = { idx : rgen.randint(0,0xffffffff) for idx in idxs }
+  msgs = []
+
+  for i, idx in enumerate( idxs ):
+    msgs.extend([
+      req( 'wr', i, 4*idx, 0, vmem[idx] ), resp( 'wr', i, 0, 0 ),
+    ])
+
+  for i in range(100):
+    idx = rgen.choice( idxs )
+
+    if rgen.randint(0,1):
+      msgs.extend([
+        req( 'rd', i, 4*idx, 0, 0 ), resp( 'rd', i, 0, vmem[idx] ),
+      ])
+    else:
+      vmem[idx] = rgen.randint(0,0xffffffff)
+      msgs.extend([
+        req( 'wr', i, 4*idx, 0, vmem[idx] ), resp( 'wr', i, 0, 0 ),
+      ])
+
+  return msgs
+
+@pytest.mark.parametrize( "num_ports, num_banks", [ (1,2), (2,4), (4,4), (3,8) ] )
+@pytest.mark.parametrize( "src, sink", [ (0,0), (0,3), (3,0), (3,5) ] )
+def test_random( num_ports, num_banks, src, sink, cmdline_opts ):
+
+  top = TestHarness( SramBankedMinionPRTL( num_ports, num_banks ), num_ports )
+
+  for i in range(num_ports):
+    msgs = random_msgs( num_ports, num_banks, 128, i )
+
+    top.set_param(f"top.srcs[{i}].construct",
+      msgs=msgs[::2], initial_delay=src, interval_delay=src )
+
+    top.set_param(f"top.sinks[{i}].construct",
+      msgs=msgs[1::2], initial_delay=sink, interval_delay=sink )
+
+  run_sim( top, cmdline_opts, duts=['sram'] )
+
+#-------------------------------------------------------------------------
+# Test bank conflicts
+#-------------------------------------------------------------------------
+
+def num_accepted( dut, addrs, ncycles ):
+
+  # Every port always sends a read to its address, returns how many
+  # requests were accepted on each port
+
+  dut.apply( DefaultPassGroup() )
+  dut.sim_reset()
+
+  naccepted = [ 0 ] * len( addrs )
+  for i in range( ncycles ):
+    for p, addr in enumerate( addrs ):
+      dut.minion[p].req.val  @= 1
+      dut.minion[p].req.msg  @= req( 'rd', 0, addr, 0, 0 )
+      dut.minion[p].resp.rdy @= 1
+    dut.sim_eval_combinational()
+    for p in range( len( addrs ) ):
+      naccepted[p] += int( dut.minion[p].req.rdy )
+    dut.sim_tick()
+
+  return naccepted
+
+@needs_pymtl_sram
+def test_bank_conflicts():
+
+  # Requests to different banks are all serviced every cycle
+
+  dut = SramBankedMinionPRTL( 4, 4 )
+  assert num_accepted( dut, [ 0x0, 0x4, 0x8, 0xc ], 100 ) == [ 100 ]*4
+  assert dut.num_bank_conflicts() == 0
+
+  # Requests to the same bank are serialized and port 0 always wins
+
+  dut = SramBankedMinionPRTL( 2, 4 )
+  assert num_accepted( dut, [ 0x0, 0x10 ], 100 ) == [ 100, 0 ]
+  assert dut.num_bank_conflicts() == 100
+
+#-------------------------------------------------------------------------
+# Test backdoor access
+#-------------------------------------------------------------------------
+
+@needs_pymtl_sram
+def test_backdoor():
+
+  rgen = random.Random()
+  rgen.seed(0xdeadbeef)
+
+  words = [ rgen.randint(0,0xffffffff) for _ in range(128) ]
+
+  dut = SramBankedMinionPRTL( 2, 4 )
+  dut.apply( DefaultPassGroup() )
+  dut.sim_reset()
+
+  dut.load( words )
+  assert dut.dump() == words
+
+  dut.load( words[:7], 5 )
+  assert dut.dump( 3, 14 ) == words[3:5] + words[:7] + words[12:14]
+  assert dut.banks[1].dump( 1, 2 ) == words[:1]
@@ -0,0 +1,61 @@
+#=========================================================================
+# SramBench_test
+#=========================================================================
+
+import json
+import pytest
+
+from tut8_sram.SramBench import run_bench, run_bench_suite, write_bench_results
+
+from tut8_sram.test.SramMinionRTL_test import needs_pymtl_sram
+
+#-------------------------------------------------------------------------
+# Test a short run of every PyMTL model
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize( "sim", [ 'default', 'mamba' ] )
+@pytest.mark.parametrize( "model", [ 'generic', 'sram', 'sram-mask',
+                                    pytest.param( 'minion', marks=needs_pymtl_sram ),
+                                    'minion-cl', 'minion-fl' ] )
+def test_bench( model, sim ):
+
+  result = run_bench( model, 32, 256, sim, ncycles=100 )
+
+  assert result['status'] == 'ok', result['error']
+  assert result['ncycles'] == 100
+  assert result['elab_time'] > 0
+  assert result['cycles_per_sec'] > 0
+
+def test_bench_storage():
+  result = run_bench( 'sram', 128, 65536, ncycles=100, storage='array' )
+  assert result['status'] == 'ok', result['error']
+
+def test_bench_error():
+
+  # A model which fails to build is recorded instead of raising
+
+  result = run_bench( 'minion', 32, 2**32, ncycles=10 )
+  assert result['status'] == 'error'
+  assert result['cycles_per_sec'] is None
+
+  with pytest.raises( ValueError ):
+    run_bench( 'sram', 32, 256, sim='unknown' )
+
+#-------------------------------------------------------------------------
+# Test the results file
+#-------------------------------------------------------------------------
+
+def test_bench_results( tmpdir ):
+
+  results = run_bench_suite( [ 'generic', 'sram' ], [ (16,32), (32,256) ],
+                             [ 'default' ], ncycles=10 )
+  assert len( results ) == 4
+
+  path = str( tmpdir.join( 'results.json' ) )
+  write_bench_results( path, results )
+
+  with open( path ) as f:
+    data = json.load( f )
+
+  assert data['results'] == results
+  assert data['python'] and 'date' in data
@@ -0,0 +1,79 @@
+#=========================================================================
+# SramFlowCache_test
+#=========================================================================
+# Running the cached flow is tested with stub tools in SramSweep_test.
+
+import os
+
+from tut8_sram.SramFlowCache import FlowStepCache, flow_steps, hash_dir, flow_step_key, \
+  sram_cfg_files
+from tut8_sram.SramSweep     import flow_path, load_flow_parameters, mk_sweep_points
+
+def write( path, text ):
+  os.makedirs( os.path.dirname( path ), exist_ok=True )
+  with open( path, 'w' ) as f:
+    f.write( text )
+
+#-------------------------------------------------------------------------
+# Test the step table
+#-------------------------------------------------------------------------
+# Every parameter of the step table is a parameter of flow.py and every
+# upstream step comes first.
+
+def test_flow_steps():
+
+  parameters = load_flow_parameters( mk_sweep_points([ ( 32, 256 ) ])[0], 'macros', flow_path )
+
+  seen = set()
+  for step, upstream, keys, _ in flow_steps:
+    assert set( keys ) <= set( parameters ), step
+    assert set( upstream ) <= seen, step
+    seen.add( step )
+
+  assert sram_cfg_files( 32, 256 )[0].endswith( 'SRAM_32x256_1rw-cfg.py' )
+  assert sram_cfg_files( 32, 1024 ) == [] # the generic SRAM in SramVRTL.v
+  assert sram_cfg_files( 7, 3 ) == []
+
+#-------------------------------------------------------------------------
+# Test hashing and caching steps
+#-------------------------------------------------------------------------
+
+def test_step_cache( tmpdir ):
+
+  build = str( tmpdir.join( 'build' ) )
+  step  = os.path.join( build, '4-synth' )
+
+  write( os.path.join( step, 'results', 'design.v' ), "module top; endmodule" )
+  write( os.path.join( step, 'outputs', 'design.sdc' ), "create_clock" )
+  os.symlink( '../results/design.v', os.path.join( step, 'outputs', 'design.v' ) )
+
+  # outputs which link into the build directory are hashed by content
+
+  outputs_hash = hash_dir( os.path.join( step, 'outputs' ), build )
+  write( os.path.join( step, 'results', 'design.v' ), "module top2; endmodule" )
+  assert hash_dir( os.path.join( step, 'outputs' ), build ) != outputs_hash
+
+  key = flow_step_key( 'synth', [ 'abc' ], { 'clock_period' : 1.2 } )
+  assert key != flow_step_key( 'synth', [ 'abc' ], { 'clock_period' : 1.0 } )
+  assert key != flow_step_key( 'synth', [ 'abd' ], { 'clock_period' : 1.2 } )
+
+  cache = FlowStepCache( str( tmpdir.join( 'cache' ) ) )
+  assert key not in cache
+
+  cache.store( key, step, outputs_hash )
+  assert key in cache
+
+  # restoring replaces the step directory and marks it as prebuilt
+
+  other = str( tmpdir.join( 'other', '4-synth' ) )
+  write( os.path.join( other, 'stale' ), "" )
+
+  assert cache.restore( key, other ) == outputs_hash
+  assert not os.path.exists( os.path.join( other, 'stale' ) )
+  assert os.path.exists( os.path.join( other, '.prebuilt' ) )
+  assert os.path.islink( os.path.join( other, 'outputs', 'design.v' ) )
+  with open( os.path.join( other, 'outputs', 'design.v' ) ) as f:
+    assert f.read() == "module top2; endmodule"
+
+  cache.clear()
+  assert key not in cache
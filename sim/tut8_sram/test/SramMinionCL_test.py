@@ -0,0 +1,150 @@
+#=========================================================================
+# SramMinionCL_test
+#=========================================================================
+
+import pytest
+import random
+
+from pymtl3                   import *
+from pymtl3.stdlib.test_utils import run_sim
+from pymtl3.stdlib.mem        import mk_mem_msg, MemMsgType
+
+from tut8_sram.SramMinionCL   import SramMinionCL
+from tut8_sram.SramMinionPRTL import SramMinionPRTL
+
+from tut8_sram.test.SramMinionRTL_test import needs_pymtl_sram, TestHarness, test_case_table, \
+  random_param_msgs, subword_msgs, random_preload_msgs
+
+#-------------------------------------------------------------------------
+# Test table for generic test
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize( **test_case_table )
+def test( test_params, cmdline_opts ):
+
+  top = TestHarness( SramMinionCL() )
+
+  msgs = test_params.msg_func()
+
+  top.set_param("top.src.construct",
+    msgs=msgs[::2],
+    initial_delay=test_params.src,
+    interval_delay=test_params.src )
+
+  top.set_param("top.sink.construct",
+    msgs=msgs[1::2],
+    initial_delay=test_params.sink,
+    interval_delay=test_params.sink )
+
+  run_sim( top, cmdline_opts, duts=['sram'] )
+
+#-------------------------------------------------------------------------
+# Test parameterized minions and sub-word accesses
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize( "data_nbits, num_entries, opaque_nbits, addr_nbits, mask_size", [
+  ( 32,  128, 8,  32, 0 ),
+  ( 64,  64,  4,  16, 0 ),
+  ( 16,  512, 16, 12, 0 ),
+  ( 128, 256, 8,  32, 4 ),
+])
+def test_param( data_nbits, num_entries, opaque_nbits, addr_nbits, mask_size, cmdline_opts ):
+
+  ReqType, RespType = mk_mem_msg( opaque_nbits, addr_nbits, data_nbits )
+
+  top = TestHarness( SramMinionCL( data_nbits, num_entries, opaque_nbits, addr_nbits,
+                                   mask_size ), ReqType, RespType )
+
+  msgs = random_param_msgs( ReqType, RespType, data_nbits, num_entries, opaque_nbits )
+
+  top.set_param("top.src.construct",  msgs=msgs[::2],  interval_delay=3 )
+  top.set_param("top.sink.construct", msgs=msgs[1::2], interval_delay=5 )
+
+  run_sim( top, cmdline_opts, duts=['sram'] )
+
+@pytest.mark.parametrize( "src, sink", [ (0,0), (3,5) ] )
+def test_subword( src, sink, cmdline_opts ):
+
+  top = TestHarness( SramMinionCL( mask_size=4 ) )
+
+  msgs = subword_msgs()
+
+  top.set_param("top.src.construct",
+    msgs=msgs[::2], initial_delay=src, interval_delay=src )
+
+  top.set_param("top.sink.construct",
+    msgs=msgs[1::2], initial_delay=sink, interval_delay=sink )
+
+  run_sim( top, cmdline_opts, duts=['sram'] )
+
+#-------------------------------------------------------------------------
+# Test cycle-exact behavior
+#-------------------------------------------------------------------------
+# Drive the CL and the PyMTL RTL model with the same random requests and
+# random backpressure and compare the interfaces every cycle.
+
+def sim_minion( dut, ncycles, seed=0xa4e28cc2 ):
+
+  MemReqType, _ = mk_mem_msg( 8, 32, 32 )
+
+  rgen = random.Random()
+  rgen.seed(seed)
+
+  dut.apply( DefaultPassGroup() )
+  dut.sim_reset()
+
+  trace = []
+  for i in range( ncycles ):
+    dut.minion.req.val  @= rgen.randint( 0, 3 ) > 0
+    dut.minion.req.msg  @= MemReqType( rgen.choice([ MemMsgType.READ, MemMsgType.WRITE ]),
+                                       i % 256, 4*rgen.randint( 0, 15 ), rgen.randint( 0, 3 ),
+                                       rgen.randint( 0, 0xffffffff ) )
+    dut.minion.resp.rdy @= rgen.randint( 0, 2 ) > 0
+    dut.sim_eval_combinational()
+    trace.append(( int( dut.minion.req.rdy ), int( dut.minion.resp.val ),
+                   dut.minion.resp.msg.to_bits() if dut.minion.resp.val else None ))
+    dut.sim_tick()
+
+  return trace
+
+@needs_pymtl_sram
+@pytest.mark.parametrize( "mask_size, nentries, credit", [
+  ( 0, 2, False ),
+  ( 0, 3, False ),
+  ( 0, 1, True  ),
+  ( 0, 2, True  ),
+  ( 4, 2, False ),
+])
+def test_cycle_exact( mask_size, nentries, credit ):
+  args = dict( mask_size=mask_size, memresp_q_nentries=nentries, credit=credit )
+  assert sim_minion( SramMinionCL( **args ), 500 ) \
+      == sim_minion( SramMinionPRTL( **args ), 500 )
+
+#-------------------------------------------------------------------------
+# Test backdoor preloading
+#-------------------------------------------------------------------------
+
+def test_backdoor_load():
+
+  rgen = random.Random()
+  rgen.seed(0xdeadbeef)
+
+  vmem = [ rgen.randint(0,0xffffffff) for _ in range(128) ]
+  init = list(vmem)
+  msgs = random_preload_msgs( vmem )
+
+  top = TestHarness( SramMinionCL() )
+
+  top.set_param("top.src.construct",  msgs=msgs[::2],  interval_delay=3 )
+  top.set_param("top.sink.construct", msgs=msgs[1::2], interval_delay=5 )
+
+  top.apply( DefaultPassGroup() )
+  top.sram.load( init )
+  top.sim_reset()
+
+  while not top.done() and top.sim_cycle_count() < 10000:
+    top.sim_tick()
+
+  assert top.done()
+  assert top.sram.dump() == vmem
+  assert top.sram.dump( 4, 8 ) == vmem[4:8]
@@ -0,0 +1,83 @@
+#=========================================================================
+# SramMinionFL_test
+#=========================================================================
+
+import pytest
+
+from pymtl3                   import *
+from pymtl3.stdlib.test_utils import run_sim
+from pymtl3.stdlib.mem        import mk_mem_msg
+
+from tut8_sram.SramMinionFL   import SramMinionFL
+from tut8_sram.SramMinionCL   import SramMinionCL
+
+from tut8_sram.test.SramMinionRTL_test import TestHarness, test_case_table, \
+  random_param_msgs, subword_msgs
+from tut8_sram.test.SramMinionCL_test  import sim_minion
+
+#-------------------------------------------------------------------------
+# Test table for generic test
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize( "nentries", [ 1, 2 ] )
+@pytest.mark.parametrize( **test_case_table )
+def test( test_params, nentries, cmdline_opts ):
+
+  top = TestHarness( SramMinionFL( memresp_q_nentries=nentries ) )
+
+  msgs = test_params.msg_func()
+
+  top.set_param("top.src.construct",
+    msgs=msgs[::2],
+    initial_delay=test_params.src,
+    interval_delay=test_params.src )
+
+  top.set_param("top.sink.construct",
+    msgs=msgs[1::2],
+    initial_delay=test_params.sink,
+    interval_delay=test_params.sink )
+
+  run_sim( top, cmdline_opts, duts=['sram'] )
+
+#-------------------------------------------------------------------------
+# Test parameterized minions and sub-word accesses
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize( "data_nbits, num_entries, opaque_nbits, addr_nbits, mask_size", [
+  ( 64,  64,  4,  16, 0 ),
+  ( 128, 256, 8,  32, 4 ),
+])
+def test_param( data_nbits, num_entries, opaque_nbits, addr_nbits, mask_size, cmdline_opts ):
+
+  ReqType, RespType = mk_mem_msg( opaque_nbits, addr_nbits, data_nbits )
+
+  top = TestHarness( SramMinionFL( data_nbits, num_entries, opaque_nbits, addr_nbits,
+                                   mask_size ), ReqType, RespType )
+
+  msgs = random_param_msgs( ReqType, RespType, data_nbits, num_entries, opaque_nbits )
+
+  top.set_param("top.src.construct",  msgs=msgs[::2],  interval_delay=3 )
+  top.set_param("top.sink.construct", msgs=msgs[1::2], interval_delay=5 )
+
+  run_sim( top, cmdline_opts, duts=['sram'] )
+
+def test_subword( cmdline_opts ):
+
+  top = TestHarness( SramMinionFL( mask_size=4 ) )
+
+  msgs = subword_msgs()
+
+  top.set_param("top.src.construct",  msgs=msgs[::2],  interval_delay=3 )
+  top.set_param("top.sink.construct", msgs=msgs[1::2], interval_delay=5 )
+
+  run_sim( top, cmdline_opts, duts=['sram'] )
+
+#-------------------------------------------------------------------------
+# Test timing
+#-------------------------------------------------------------------------
+# The FL model has the timing of the CL model with credits.
+
+@pytest.mark.parametrize( "nentries", [ 1, 2, 3 ] )
+def test_timing( nentries ):
+  assert sim_minion( SramMinionFL( memresp_q_nentries=nentries ), 500 ) \
+      == sim_minion( SramMinionCL( memresp_q_nentries=nentries, credit=True ), 500 )
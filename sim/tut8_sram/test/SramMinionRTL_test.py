@@ -14,22 +14,32 @@ from pymtl3.stdlib.test_utils import TestSrcCL, TestSinkCL
 from pymtl3.stdlib.mem        import mk_mem_msg, MemMsgType
 
 from tut8_sram.SramMinionRTL  import SramMinionRTL
+from tut8_sram.SramMinionPRTL import SramMinionPRTL
+from sram.SramEnergy          import estimate_sram_energy
+from sram.SramRTL             import rtl_language as sram_rtl_language
 
 MemReqType, MemRespType = mk_mem_msg( 8, 32, 32 )
 
+# Tests which simulate a PyMTL minion without the import passes (e.g., to
+# use its backdoor) need the PyMTL SRAM model, i.e., they do not run with
+# --vrtl
+
+needs_pymtl_sram = pytest.mark.skipif( sram_rtl_language != 'pymtl',
+                                       reason="needs the PyMTL SRAM model" )
+
 #-------------------------------------------------------------------------
 # TestHarness
 #-------------------------------------------------------------------------
 
 class TestHarness( Component ):
 
-  def construct( s, dut ):
+  def construct( s, dut, ReqType=MemReqType, RespType=MemRespType ):
 
     # Instantiate models
 
-    s.src  = stream.SourceRTL( MemReqType )
+    s.src  = stream.SourceRTL( ReqType )
     s.sram = dut
-    s.sink = stream.SinkRTL( MemRespType )
+    s.sink = stream.SinkRTL( RespType )
 
     # Connect
 
@@ -80,6 +90,18 @@ def basic_multiple_msgs():
     req( 'rd', 0x5, 0x01f8, 0, 0          ), resp( 'rd', 0x5, 0, 0x42134213 ),
   ]
 
+# Responses keep the len field of the request, without a write mask the
+# minion still writes whole words
+
+def write_len_msgs():
+  return [
+    #    type  opq  addr   len data                        type  opq len data
+    req( 'wr', 0x0, 0x0000, 2, 0x0000beef ), resp( 'wr', 0x0, 2, 0          ),
+    req( 'wr', 0x1, 0x0004, 1, 0x000000ef ), resp( 'wr', 0x1, 1, 0          ),
+    req( 'rd', 0x2, 0x0000, 0, 0          ), resp( 'rd', 0x2, 0, 0x0000beef ),
+    req( 'rd', 0x3, 0x0004, 0, 0          ), resp( 'rd', 0x3, 0, 0x000000ef ),
+  ]
+
 #----------------------------------------------------------------------
 # Test Case: random
 #----------------------------------------------------------------------
@@ -162,6 +184,7 @@ test_case_table = mk_test_case_table([
   (                       "msg_func             src sink"),
   [ "basic_single_msgs",   basic_single_msgs,   0,  0    ],
   [ "basic_multiple_msgs", basic_multiple_msgs, 0,  0    ],
+  [ "write_len_msgs",      write_len_msgs,      0,  0    ],
   [ "random",              random_msgs,         0,  0    ],
   [ "random_0_3",          random_msgs,         0,  3    ],
   [ "random_3_0",          random_msgs,         3,  0    ],
@@ -197,3 +220,267 @@ def test( test_params, cmdline_opts ):
 
   run_sim( top, cmdline_opts, duts=['sram'] )
 
+#-------------------------------------------------------------------------
+# Test parameterized minions
+#-------------------------------------------------------------------------
+# Random reads and writes to every word of a minion with the given SRAM
+# size and message field widths.
+
+def random_param_msgs( ReqType, RespType, data_nbits, num_entries, opaque_nbits ):
+
+  nbytes = data_nbits // 8
+
+  rgen = random.Random()
+  rgen.seed(0xa4e28cc2)
+
+  vmem = [ rgen.randint(0,2**data_nbits-1) for _ in range(num_entries) ]
+  msgs = []
+
+  for i in range(num_entries):
+    opaque = i % 2**opaque_nbits
+    msgs.extend([
+      ReqType ( MemMsgType.WRITE, opaque, nbytes*i, 0, vmem[i] ),
+      RespType( MemMsgType.WRITE, opaque, 0, 0, 0 ),
+    ])
+
+  for i in range(2*num_entries):
+    idx    = rgen.randint(0,num_entries-1)
+    opaque = i % 2**opaque_nbits
+    msgs.extend([
+      ReqType ( MemMsgType.READ, opaque, nbytes*idx, 0, 0 ),
+      RespType( MemMsgType.READ, opaque, 0, 0, vmem[idx] ),
+    ])
+
+  return msgs
+
+@pytest.mark.parametrize( "data_nbits, num_entries, opaque_nbits, addr_nbits", [
+  ( 32,  128, 8,  32 ),
+  ( 64,  64,  4,  16 ),
+  ( 128, 256, 8,  32 ),
+  ( 16,  512, 16, 12 ),
+])
+@pytest.mark.parametrize( "src, sink", [ (0,0), (3,5) ] )
+def test_param( data_nbits, num_entries, opaque_nbits, addr_nbits, src, sink, cmdline_opts ):
+
+  ReqType, RespType = mk_mem_msg( opaque_nbits, addr_nbits, data_nbits )
+
+  top = TestHarness( SramMinionRTL( data_nbits, num_entries, opaque_nbits, addr_nbits ),
+                     ReqType, RespType )
+
+  msgs = random_param_msgs( ReqType, RespType, data_nbits, num_entries, opaque_nbits )
+
+  top.set_param("top.src.construct",
+    msgs=msgs[::2], initial_delay=src, interval_delay=src )
+
+  top.set_param("top.sink.construct",
+    msgs=msgs[1::2], initial_delay=sink, interval_delay=sink )
+
+  run_sim( top, cmdline_opts, duts=['sram'] )
+
+def test_param_mask( cmdline_opts ):
+
+  # a 128x256 minion with a write mask is built from four 32x256 SRAMs
+
+  ReqType, RespType = mk_mem_msg( 8, 32, 128 )
+
+  top = TestHarness( SramMinionRTL( 128, 256, mask_size=4 ), ReqType, RespType )
+
+  msgs = random_param_msgs( ReqType, RespType, 128, 256, 8 )
+
+  top.set_param("top.src.construct",  msgs=msgs[::2],  interval_delay=3 )
+  top.set_param("top.sink.construct", msgs=msgs[1::2], interval_delay=5 )
+
+  run_sim( top, cmdline_opts, duts=['sram'] )
+
+#-------------------------------------------------------------------------
+# Test sub-word accesses
+#-------------------------------------------------------------------------
+# With a byte write mask the minion supports sub-word reads and writes.
+
+def subword_msgs():
+  return [
+    #    type  opq  addr   len data                        type  opq len data
+    req( 'wr', 0x0, 0x0000, 0, 0xdeadbeef ), resp( 'wr', 0x0, 0, 0          ),
+    req( 'wr', 0x1, 0x0001, 1, 0x000000aa ), resp( 'wr', 0x1, 1, 0          ),
+    req( 'rd', 0x2, 0x0000, 0, 0          ), resp( 'rd', 0x2, 0, 0xdeadaaef ),
+    req( 'wr', 0x3, 0x0002, 2, 0x00001234 ), resp( 'wr', 0x3, 2, 0          ),
+    req( 'rd', 0x4, 0x0000, 0, 0          ), resp( 'rd', 0x4, 0, 0x1234aaef ),
+    req( 'rd', 0x5, 0x0003, 1, 0          ), resp( 'rd', 0x5, 1, 0x00000012 ),
+    req( 'rd', 0x6, 0x0000, 2, 0          ), resp( 'rd', 0x6, 2, 0x0000aaef ),
+    req( 'wr', 0x7, 0x01fc, 3, 0x00c0ffee ), resp( 'wr', 0x7, 3, 0          ),
+    req( 'rd', 0x8, 0x01fc, 0, 0          ), resp( 'rd', 0x8, 0, 0x00c0ffee ),
+    req( 'rd', 0x9, 0x01fd, 2, 0          ), resp( 'rd', 0x9, 2, 0x0000c0ff ),
+  ]
+
+@pytest.mark.parametrize( "src, sink", [ (0,0), (3,5) ] )
+def test_subword( src, sink, cmdline_opts ):
+
+  top = TestHarness( SramMinionRTL( mask_size=4 ) )
+
+  msgs = subword_msgs()
+
+  top.set_param("top.src.construct",
+    msgs=msgs[::2], initial_delay=src, interval_delay=src )
+
+  top.set_param("top.sink.construct",
+    msgs=msgs[1::2], initial_delay=sink, interval_delay=sink )
+
+  run_sim( top, cmdline_opts, duts=['sram'] )
+
+#-------------------------------------------------------------------------
+# Test credit based flow control
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize( "nentries", [ 1, 2, 3 ] )
+@pytest.mark.parametrize( **test_case_table )
+def test_credit( test_params, nentries, cmdline_opts ):
+
+  top = TestHarness( SramMinionRTL( memresp_q_nentries=nentries, credit=True ) )
+
+  msgs = test_params.msg_func()
+
+  top.set_param("top.src.construct",
+    msgs=msgs[::2],
+    initial_delay=test_params.src,
+    interval_delay=test_params.src )
+
+  top.set_param("top.sink.construct",
+    msgs=msgs[1::2],
+    initial_delay=test_params.sink,
+    interval_delay=test_params.sink )
+
+  run_sim( top, cmdline_opts, duts=['sram'] )
+
+def num_accepted( dut, ncycles, cmdline_opts ):
+
+  # Always send a request and stall the response interface every fourth
+  # cycle, returning how many requests were accepted
+
+  dut = config_model_with_cmdline_opts( dut, cmdline_opts, duts=[] )
+  dut.apply( DefaultPassGroup() )
+  dut.sim_reset()
+
+  naccepted = 0
+  for i in range( ncycles ):
+    dut.minion.req.val  @= 1
+    dut.minion.req.msg  @= req( 'rd', 0, 0, 0, 0 )
+    dut.minion.resp.rdy @= ( i % 4 != 0 )
+    dut.sim_eval_combinational()
+    naccepted += int( dut.minion.req.rdy )
+    dut.sim_tick()
+
+  if hasattr( dut, 'finalize' ):
+    dut.finalize()
+
+  return naccepted
+
+def test_credit_throughput( cmdline_opts ):
+
+  # The default minion drops to ~50% throughput, while credits let us
+  # keep up with the 75% throughput of the response interface
+
+  assert num_accepted( SramMinionRTL(), 400, cmdline_opts ) <= 205
+  assert num_accepted( SramMinionRTL( credit=True ), 400, cmdline_opts ) >= 295
+
+#-------------------------------------------------------------------------
+# Test backdoor preloading
+#-------------------------------------------------------------------------
+# Instead of initializing the SRAM with 128 write requests we preload it
+# through the backdoor, and check the final contents through the backdoor
+# as well. The backdoor is only available in the PyMTL model.
+
+def random_preload_msgs( vmem ):
+
+  rgen = random.Random()
+  rgen.seed(0xa4e28cc2)
+
+  msgs = []
+
+  for i in range(128):
+    idx = rgen.randint(0,127)
+
+    if rgen.randint(0,1):
+      msgs.extend([
+        req( 'rd', i, 4*idx, 0, 0 ), resp( 'rd', i, 0, vmem[idx] ),
+      ])
+    else:
+      vmem[idx] = rgen.randint(0,0xffffffff)
+      msgs.extend([
+        req( 'wr', i, 4*idx, 0, vmem[idx] ), resp( 'wr', i, 0, 0 ),
+      ])
+
+  return msgs
+
+@needs_pymtl_sram
+@pytest.mark.parametrize( "storage", [ 'wire', 'array' ] )
+def test_backdoor_load( storage ):
+
+  rgen = random.Random()
+  rgen.seed(0xdeadbeef)
+
+  vmem = [ rgen.randint(0,0xffffffff) for _ in range(128) ]
+  init = list(vmem)
+  msgs = random_preload_msgs( vmem )
+
+  top = TestHarness( SramMinionPRTL() )
+
+  top.set_param("top.sram.sram.sram.construct", storage=storage )
+  top.set_param("top.src.construct",  msgs=msgs[::2],  interval_delay=3 )
+  top.set_param("top.sink.construct", msgs=msgs[1::2], interval_delay=5 )
+
+  top.apply( DefaultPassGroup(linetrace=True) )
+  top.sram.load( init )
+  top.sim_reset()
+
+  while not top.done() and top.sim_cycle_count() < 10000:
+    top.sim_tick()
+
+  assert top.done()
+  assert top.sram.dump() == vmem
+
+#-------------------------------------------------------------------------
+# Test statistics
+#-------------------------------------------------------------------------
+# Statistics are simulation only and thus only available in the PyMTL
+# model.
+
+@pytest.mark.parametrize( "src, sink", [ (0,0), (0,3), (3,0) ] )
+def test_stats( src, sink, cmdline_opts ):
+
+  msgs = random_msgs()
+
+  top = TestHarness( SramMinionPRTL( stats=True ) )
+
+  top.set_param("top.src.construct",
+    msgs=msgs[::2], initial_delay=src, interval_delay=src )
+
+  top.set_param("top.sink.construct",
+    msgs=msgs[1::2], initial_delay=sink, interval_delay=sink )
+
+  run_sim( top, cmdline_opts, duts=['sram'] )
+
+  stats = top.sram.stats
+
+  nreads = len([ m for m in msgs[::2] if m.type_ == MemMsgType.READ ])
+
+  assert stats.nreqs  == len( msgs ) // 2
+  assert stats.nresps == stats.nreqs
+  assert stats.nreads == nreads
+  assert sum( stats.occupancy_hist ) == stats.cycles
+
+  # The SRAM access counters see the same requests
+
+  report = estimate_sram_energy( top.sram )
+  assert len( report['instances'] ) == 1
+  assert report['instances'][0]['nreads']  == stats.nreads
+  assert report['instances'][0]['nwrites'] == stats.nwrites
+  assert report['total_energy'] > 0
+
+  # A stalled response interface fills the queue and stalls requests
+
+  if sink > 0:
+    assert stats.stall_cycles > 0 and stats.resp_stall_cycles > 0
+    assert stats.max_latency > 1 and stats.occupancy_hist[1] > 0
+  else:
+    assert stats.stall_cycles == 0 and list( stats.latency_hist ) == [ 1 ]
+    assert stats.as_dict()['occupancy_hist'][1:] == [ 0, 0 ]
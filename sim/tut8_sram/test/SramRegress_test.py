@@ -0,0 +1,50 @@
+#=========================================================================
+# SramRegress_test
+#=========================================================================
+
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from tut8_sram.SramRegress import shard_tests, shard_key, run_regression, \
+  regress_passed, write_junit
+
+#-------------------------------------------------------------------------
+# Test sharding
+#-------------------------------------------------------------------------
+# All test cases of a configuration go to the same shard.
+
+def test_shard_affinity():
+
+  nodeids = [ f"sram/test/SramRTL_test.py::{test}[{config}]"
+              for test in [ 'test_random', 'test_random_bulk' ]
+              for config in [ '16-32', '32-256', '128-256' ] ]
+
+  assert shard_key( nodeids[0] ) == '16-32'
+  assert shard_key( "sram/test/SramRTL_test.py::test_tiling" ) \
+      == "sram/test/SramRTL_test.py::test_tiling"
+
+  shards = shard_tests( nodeids, 4 )
+  assert sorted( sum( shards, [] ) ) == sorted( nodeids )
+
+  for shard in shards:
+    assert len( set([ shard_key(x) for x in shard ]) ) * 2 == len( shard )
+
+#-------------------------------------------------------------------------
+# Test a small regression
+#-------------------------------------------------------------------------
+
+def test_regression( tmpdir ):
+
+  results = run_regression( [ 'sram/test/SramRTL_test.py' ], [ 'pymtl' ], jobs=2,
+                            keyword='test_direct', build_dir=str( tmpdir ) )
+
+  assert len( results ) == 4 and regress_passed( results )
+  assert all([ x['lang'] == 'pymtl' and x['time'] > 0 for x in results ])
+
+  path = str( tmpdir.join( 'results.xml' ) )
+  write_junit( path, results )
+  assert ET.parse( path ).getroot().get( 'tests' ) == '4'
+
+  with pytest.raises( ValueError ):
+    run_regression( langs=[ 'vhdl' ] )
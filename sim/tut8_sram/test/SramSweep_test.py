@@ -0,0 +1,259 @@
+#=========================================================================
+# SramSweep_test
+#=========================================================================
+# The ASIC tools are not available in the test environment, so the sweep
+# runs with a stub mflowgen and make which only record which steps they
+# build, write an output file for every step, and print a flow summary,
+# and with empty views of the SRAM macros.
+
+import csv
+import json
+import os
+import sys
+
+import pytest
+
+from tut8_sram.SramSweep import mk_sweep_points, sweep_point_name, run_sweep, \
+  parse_flow_summary, fmt_sweep_table, write_sweep_csv, sweep_sram_names, sram_view_exts
+from tut8_sram.SramMinionRTL import rtl_language
+
+stub_tool = '''\
+import json, os, sys
+
+steps = [ 'brgtc5-block-gather', 'build-info', 'freepdk-45nm', 'brg-rtl-4-state-vcssim',
+          'brg-synopsys-dc-synthesis', 'brg-cadence-innovus-init',
+          'post-synth-gate-level-simulation', 'brg-cadence-innovus-blocksetup-floorplan',
+          'post-synth-power-analysis', 'brg-cadence-innovus-blocksetup-power',
+          'brg-cadence-innovus-pnr', 'brg-cadence-innovus-signoff', 'brg-flow-summary' ]
+
+if sys.argv[1] == 'mflowgen':
+  with open( '.design', 'w' ) as f:
+    f.write( sys.argv[4] )
+  for n, step in enumerate( steps ):
+    os.makedirs( f"{n}-{step}", exist_ok=True )
+  sys.exit( 0 )
+
+with open( open( '.design' ).read() + '/sweep-point.json' ) as f:
+  point = json.load( f )
+
+# every step depends on all steps before it
+
+for target in sys.argv[2:]:
+  for n, step in enumerate( steps[ : steps.index( target )+1 ] ):
+    step_dir = f"{n}-{step}"
+    if os.path.exists( step_dir + '/.prebuilt' ) or os.path.exists( step_dir + '/.stamp' ):
+      continue
+    if step in os.environ.get( 'STUB_FAIL', '' ).split( ',' ):
+      sys.exit( 1 )
+    os.makedirs( step_dir + '/outputs', exist_ok=True )
+    with open( step_dir + '/outputs/out.txt', 'w' ) as f:
+      if step in [ 'brgtc5-block-gather', 'freepdk-45nm', 'brg-rtl-4-state-vcssim' ]:
+        f.write( step + point['parameters']['design_name'] )
+      else:
+        f.write( step + json.dumps( point['parameters'], sort_keys=True ) )
+    open( step_dir + '/.stamp', 'w' ).close()
+    with open( os.environ['STUB_LOG'], 'a' ) as f:
+      f.write( f"{point['name']} {step}\\n" )
+
+if target == 'brg-flow-summary':
+  p = point['point']
+  print( f" design_name = {point['parameters']['design_name']}" )
+  print( f"   design_area   = {p['data_nbits']*p['num_entries']*p['aspect_ratio']:.2f} um^2" )
+  print( f"   slack         = {2.0 - p['clock_period']:.3f} ns" )
+  print( " [PASSED]: sram-rtl-random" )
+  print( f"       power     = {1/p['clock_period']:.4f} mW" )
+'''
+
+@pytest.fixture
+def stub( tmpdir, monkeypatch ):
+  path = str( tmpdir.join( 'stub.py' ) )
+  with open( path, 'w' ) as f:
+    f.write( stub_tool )
+  monkeypatch.setenv( 'STUB_LOG', str( tmpdir.join( 'steps.log' ) ) )
+
+  lib_dir = tmpdir.mkdir( 'openram-mc' )
+  for macro in [ 'SRAM_32x256_1rw', 'SRAM_128x256_1rw' ]:
+    for ext in sram_view_exts:
+      lib_dir.join( f"{macro}.{ext}" ).write( '' )
+
+  return { 'mflowgen_cmd' : [ sys.executable, path, 'mflowgen' ],
+           'make_cmd'     : [ sys.executable, path, 'make' ],
+           'lib_dir'      : str( lib_dir ) }
+
+def built_steps( tmpdir, clear=False ):
+  path = str( tmpdir.join( 'steps.log' ) )
+  with open( path ) as f:
+    steps = [ tuple( line.split() ) for line in f ]
+  if clear:
+    os.remove( path )
+  return steps
+
+#-------------------------------------------------------------------------
+# Test sweeps
+#-------------------------------------------------------------------------
+
+def test_sweep( tmpdir, stub ):
+
+  points  = mk_sweep_points( [ ( 32, 256 ), ( 128, 256 ) ], [ 1.0, 1.2 ], [ 0.6, 1.0 ] )
+  results = run_sweep( points, jobs=4, sweep_dir=str( tmpdir.join( 'sweep' ) ), **stub )
+
+  assert len( points ) == 8
+  assert [ x['status'] for x in results ] == [ 'ok' ]*8
+  assert [ x['name'] for x in results ] == [ sweep_point_name( x ) for x in points ]
+
+  # gather once per size, synthesis once per size and clock period, and
+  # the rest of the flow once per point
+
+  steps = built_steps( tmpdir )
+  assert len([ x for x in steps if x[1] == 'brgtc5-block-gather'       ]) == 2
+  assert len([ x for x in steps if x[1] == 'brg-synopsys-dc-synthesis' ]) == 4
+  assert len([ x for x in steps if x[1] == 'brg-cadence-innovus-init'  ]) == 8
+  assert len( set( steps ) ) == len( steps )
+
+  assert results[0]['reused'] == []
+  assert set( results[-1]['reused'] ) == set([ 'brgtc5-block-gather', 'freepdk-45nm',
+    'brg-rtl-4-state-vcssim', 'brg-synopsys-dc-synthesis',
+    'post-synth-gate-level-simulation', 'post-synth-power-analysis' ])
+
+  for point, x in zip( points, results ):
+    assert x['metrics']['design_area'] == \
+      pytest.approx( point['data_nbits']*point['num_entries']*point['aspect_ratio'] )
+    assert x['metrics']['slack'] == pytest.approx( 2.0 - point['clock_period'] )
+    assert x['metrics']['sims_passed']
+
+  lines = fmt_sweep_table( results ).splitlines()
+  assert len( lines ) == 9 and lines[1].split()[-1] == 'ok'
+
+  path = str( tmpdir.join( 'sweep.csv' ) )
+  write_sweep_csv( path, results )
+  with open( path ) as f:
+    rows = list( csv.DictReader( f ) )
+  assert [ row['name'] for row in rows ] == [ x['name'] for x in results ]
+  assert float( rows[3]['slack'] ) == pytest.approx( results[3]['metrics']['slack'] )
+
+#-------------------------------------------------------------------------
+# Test the SRAM macros of the points
+#-------------------------------------------------------------------------
+
+def test_sweep_macros( tmpdir, stub ):
+
+  sweep_dir = tmpdir.join( 'sweep' )
+  points    = mk_sweep_points( [ ( 32, 256 ), ( 128, 256 ) ] )
+  results   = run_sweep( points, sweep_dir=str( sweep_dir ), **stub )
+  assert [ x['status'] for x in results ] == [ 'ok' ]*2
+
+  # every point places its own macro and only links the views of it
+
+  for x, macro in zip( results, [ 'SRAM_32x256_1rw', 'SRAM_128x256_1rw' ] ):
+    with open( str( sweep_dir.join( x['name'], 'design', 'sweep-point.json' ) ) ) as f:
+      parameters = json.load( f )['parameters']
+    assert parameters['sram_name'] == sweep_sram_names[ rtl_language ]
+    assert parameters['extra_link_lib_dir'] == str( sweep_dir.join( 'macros', macro ) )
+    assert sorted( os.listdir( parameters['extra_link_lib_dir'] ) ) == \
+           sorted([ f"{macro}.{ext}" for ext in sram_view_exts ])
+
+  # the flow cannot place the generic SRAM, and needs the views of the
+  # macro
+
+  with pytest.raises( ValueError ):
+    run_sweep( mk_sweep_points( [ ( 32, 256 ), ( 32, 128 ) ] ),
+               sweep_dir=str( tmpdir.join( 'generic' ) ), **stub )
+
+  os.remove( os.path.join( stub['lib_dir'], 'SRAM_128x256_1rw.lef' ) )
+  with pytest.raises( ValueError, match="SRAM_128x256_1rw.lef" ):
+    run_sweep( points, sweep_dir=str( tmpdir.join( 'views' ) ), **stub )
+
+  assert not tmpdir.join( 'generic' ).join( sweep_point_name( points[0] ) ).check()
+
+#-------------------------------------------------------------------------
+# Test rerunning sweeps
+#-------------------------------------------------------------------------
+# Only the steps affected by a change rerun.
+
+def test_sweep_rerun( tmpdir, stub ):
+
+  sources = str( tmpdir.join( 'SramMinionPRTL.py' ) )
+  with open( sources, 'w' ) as f:
+    f.write( "# v1" )
+
+  def sweep( aspect_ratios ):
+    points = mk_sweep_points( [ ( 32, 256 ) ], [ 1.0 ], aspect_ratios )
+    results = run_sweep( points, jobs=2, sweep_dir=str( tmpdir.join( 'sweep' ) ),
+                         sources=[ sources ], **stub )
+    assert [ x['status'] for x in results ] == [ 'ok' ]*len( points )
+    return results, built_steps( tmpdir, clear=True )
+
+  sweep( [ 0.6, 1.0 ] )
+
+  # nothing changed, only the steps which always run are rebuilt
+
+  results, steps = sweep( [ 0.6, 1.0 ] )
+  assert set([ x[1] for x in steps ]) == { 'build-info', 'brg-flow-summary' }
+  assert results[0]['metrics']['design_area'] == pytest.approx( 32*256*0.6 )
+
+  # a new aspect ratio only reruns the place-and-route steps
+
+  results, steps = sweep( [ 0.6, 0.8 ] )
+  assert sorted( set([ x[1] for x in steps if x[0] == results[1]['name'] ]) ) == [
+    'brg-cadence-innovus-blocksetup-floorplan', 'brg-cadence-innovus-blocksetup-power',
+    'brg-cadence-innovus-init', 'brg-cadence-innovus-pnr', 'brg-cadence-innovus-signoff',
+    'brg-flow-summary', 'build-info' ]
+  assert results[1]['metrics']['design_area'] == pytest.approx( 32*256*0.8 )
+
+  # changing the sources reruns the gather step, but the gathered RTL is
+  # the same so nothing after it reruns
+
+  with open( sources, 'w' ) as f:
+    f.write( "# v2" )
+
+  results, steps = sweep( [ 0.6, 0.8 ] )
+  assert set([ x[1] for x in steps ]) == \
+    { 'brgtc5-block-gather', 'build-info', 'brg-flow-summary' }
+  assert len([ x for x in steps if x[1] == 'brgtc5-block-gather' ]) == 1
+
+def test_sweep_failed_provider( tmpdir, stub, monkeypatch ):
+
+  # synthesis always fails, so every point tries to build it on its own
+  # (and only the steps before it are shared)
+
+  monkeypatch.setenv( 'STUB_FAIL', 'brg-synopsys-dc-synthesis' )
+
+  points  = mk_sweep_points( [ ( 32, 256 ) ], [ 1.0 ], [ 0.6, 1.0 ] )
+  results = run_sweep( points, jobs=2, sweep_dir=str( tmpdir.join( 'sweep' ) ), **stub )
+
+  assert [ x['status'] for x in results ] == [ 'error' ]*2
+  assert results[1]['reused'] == [ 'brgtc5-block-gather', 'freepdk-45nm',
+                                   'brg-rtl-4-state-vcssim' ]
+  assert 'failed' in results[0]['message']
+  assert os.path.exists( str( tmpdir.join( 'sweep', results[1]['name'], 'flow.log' ) ) )
+
+  with pytest.raises( ValueError ):
+    run_sweep( points + points[:1], sweep_dir=str( tmpdir.join( 'sweep' ) ), **stub )
+
+#-------------------------------------------------------------------------
+# Test parsing the flow summary
+#-------------------------------------------------------------------------
+
+def test_parse_flow_summary():
+
+  metrics = parse_flow_summary( """
+ design_name = SramMinionRTL
+
+ area & timing
+   design_area   = 7733.25 um^2
+   macros_area   = 6923.28 um^2
+   slack         = 0.593 ns
+   actual_clk    = 1.907 ns
+
+ [PASSED]: sram-rtl-random
+ [FAILED]: sram-rtl-allzero
+
+   sram-rtl-random.vcd
+       power     = 0.1637 mW
+       energy    = 0.10886 nJ
+""" )
+
+  assert metrics['design_name'] == 'SramMinionRTL'
+  assert metrics['design_area'] == 7733.25 and metrics['slack'] == 0.593
+  assert metrics['power'] == 0.1637 and metrics['energy'] == 0.10886
+  assert not metrics['sims_passed']